@@ -58,6 +58,8 @@ for authority in authorities:
 
             # run model
             model.write(dst_toml_file)
+            # binary snapshot for the next stage (07_add_dynamic_forcing)
+            model.to_snapshot()
             if RUN_MODEL:
                 result = model.run()
                 assert result.exit_code == 0
@@ -69,6 +69,7 @@ def add_forcing(model, cloud, starttime, endtime, assign_budget_fractions, fract
         surface_runoff_budgets=surface_runoff_budgets,
         assign_fractions=assign_budget_fractions,
         fraction_prefix=fraction_prefix,
+        basin_masks=forcing.basin_masks,
     )  # budgets_df is used to compute basin_fractions
     return budgets_df
 
@@ -143,7 +144,8 @@ for authority in authorities:
         dst_toml_file = dst_model_dir / toml_file.name
 
         if check_build(dst_toml_file):
-            model = Model.read(toml_file)
+            # read snapshot written by 05_add_bergend if it matches the database, else the toml-file
+            model = Model.read_cached(toml_file)
 
             # add categorie to basin / state
             series = model.basin.node.df["meta_categorie"]  # type: ignore
@@ -186,7 +188,10 @@ for authority in authorities:
                 model.run()
                 model.update_state()
                 model.basin.state.write()
-                write_performance(model)
+                # history outside of the model directory, as that is replaced on every build; Parquet only in batch
+                write_performance(
+                    model, history_dir=dst_model_dir.with_name(f"{authority}_performance_history"), excel=False
+                )
 
             # DELWAQ(!)
             if compute_fractions and RUN_MODEL:
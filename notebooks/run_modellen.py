@@ -2,6 +2,7 @@
 from datetime import datetime
 
 import pandas as pd
+from ribasim_nl.run_model import RunJob, run_batch
 
 from ribasim_nl import CloudStorage, Model
 
@@ -10,6 +11,8 @@ cloud = CloudStorage()
 FIND_POST_FIXES = ["dynamic_model"]
 SELECTION = []
 INCLUDE_RESULTS = True
+THREADS = 1
+RETRIES = 0
 
 
 def get_model_dir(authority, post_fix):
@@ -17,6 +20,7 @@ def get_model_dir(authority, post_fix):
 
 
 data = {}
+jobs = []
 authorities = cloud.water_authorities if len(SELECTION) == 0 else SELECTION
 
 for authority in authorities:
@@ -35,17 +39,16 @@ for authority in authorities:
         # read model
         toml_file = next(model_dir.glob("*.toml"))
         model = Model.read(toml_file)
-        # time model-run
-        run_specs = model.run()
+        jobs.append(RunJob(toml_file, threads=THREADS, name=authority))
         data[authority] = {
             "basins": len(model.basin.node.df),
-            "exit_code": run_specs.exit_code,
-            "simulation_time": run_specs.simulation_time,
             "starttime": model.starttime,
             "endtime": model.endtime,
         }
 
+# time model-runs, concurrently on all cores
+summary = run_batch(jobs, retries=RETRIES, log_dir=cloud.joinpath("run_logs"))
+summary = summary.rename(columns={"computation_time": "simulation_time"}).drop(columns="log_file")
+summary = pd.DataFrame.from_dict(data, orient="index").join(summary)
 
-pd.DataFrame.from_dict(data, orient="index").to_excel(
-    cloud.joinpath(f"simulation_efficiency_{datetime.today().strftime('%Y%m%d')}.xlsx")
-)
+summary.to_excel(cloud.joinpath(f"simulation_efficiency_{datetime.today().strftime('%Y%m%d')}.xlsx"))
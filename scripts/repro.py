@@ -1,10 +1,31 @@
-"""Run DVC stages sequentially with per-stage logging and a summary."""
+"""Run DVC stages in parallel, in the order of the stage DAG, with per-stage logging and a summary.
 
+Stages are read from DVC itself, with foreach, vars, params and wdir resolved (foreach-stages are `stage@key`). A
+stage depends on the stages producing its deps, independent stages run at the same time on `--workers` workers.
+Like `dvc repro --single-item`, only the selected stages are run, frozen stages are skipped. Stage commands are run
+directly (non-persistent outs are removed first, as DVC does), because parallel `dvc repro` processes compete for
+the DVC repository lock. A succeeded stage is committed to dvc.lock right away with `dvc commit`, one commit at a
+time, before any stage depending on it starts.
+
+Usage: python scripts/repro.py [--workers N] [--log-dir DIR] [target ...]
+
+A target is a stage (`koppelen`, `parameterized@limburg`), a foreach-stage (`parameterized`, all items) or a
+foreach-key (`limburg`, all stages of that key). Without targets all stages of the vrij-afwaterende authorities
+are run.
+"""
+
+import argparse
 import logging
 import os
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path, PurePosixPath
 
 logger = logging.getLogger(__name__)
 
@@ -22,9 +43,171 @@ VRIJ_AFWATEREND = [
     "noorderzijlvest",
 ]
 
+WORKERS = 4
+
+
+@dataclass
+class Stage:
+    """A (foreach-expanded) DVC stage with its commands, deps and outs (paths relative to the repository root)."""
+
+    name: str
+    cmd: list[str]
+    deps: list[str] = field(default_factory=list)
+    outs: list[str] = field(default_factory=list)
+    persist: list[str] = field(default_factory=list)  # outs that are not removed before the stage runs
+    wdir: str = "."
+    frozen: bool = False
+    group: str | None = None
+    key: str | None = None
+
+
+@dataclass
+class StageResult:
+    """Exit code and timing of a stage-run; exit code None if the stage was skipped."""
+
+    stage: str
+    exit_code: int | None
+    start: float = 0.0
+    end: float = 0.0
+    log_file: Path | None = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def status(self) -> str:
+        if self.exit_code is None:
+            return "SKIPPED (upstream stage failed)"
+        return "SUCCESS" if self.exit_code == 0 else f"FAILED (exit code {self.exit_code})"
+
+
+def _relative(path: str, root: Path) -> str:
+    return Path(os.path.relpath(path, root)).as_posix()
+
+
+def read_stages(root: Path | str = ".") -> dict[str, Stage]:
+    """Read all pipeline stages of the DVC repository at root, as expanded and interpolated by DVC."""
+    from dvc.repo import Repo
+    from dvc.stage import PipelineStage
+
+    stages = {}
+    with Repo(str(root)) as repo:
+        root_dir = Path(repo.root_dir)
+        for stage in repo.index.stages:
+            if not isinstance(stage, PipelineStage):  # .dvc-files have no command
+                continue
+            name = stage.addressing
+            group, _, key = name.partition("@")
+            stages[name] = Stage(
+                name,
+                stage.cmd if isinstance(stage.cmd, list) else [stage.cmd],
+                deps=[_relative(i.fs_path, root_dir) for i in stage.deps],
+                outs=[_relative(i.fs_path, root_dir) for i in stage.outs],
+                persist=[_relative(i.fs_path, root_dir) for i in stage.outs if i.persist],
+                wdir=_relative(stage.wdir, root_dir),
+                frozen=stage.frozen,
+                group=group if key else None,
+                key=key or None,
+            )
+    return stages
+
+
+def _is_relative_to(path: str, other: str) -> bool:
+    return PurePosixPath(path).is_relative_to(PurePosixPath(other))
+
 
-def run_stages(stages: list[str], logfile: str | None = None) -> bool:
-    """Run each DVC stage, stream output to logger, and print a summary.
+def stage_dependencies(stages: dict[str, Stage]) -> dict[str, set[str]]:
+    """Per stage the stages producing (a parent directory of, or a file within) one of its deps."""
+    producers = [(out, stage.name) for stage in stages.values() for out in stage.outs]
+    dependencies = {}
+    for stage in stages.values():
+        dependencies[stage.name] = {
+            producer
+            for dep in stage.deps
+            for out, producer in producers
+            if producer != stage.name and (_is_relative_to(dep, out) or _is_relative_to(out, dep))
+        }
+    return dependencies
+
+
+def select_stages(stages: dict[str, Stage], targets: list[str]) -> list[str]:
+    """Stage names for targets: stages, foreach-stages (all items) or foreach-keys (all stages of that key)."""
+    selection = []
+    for target in targets:
+        names = [target] if target in stages else [i.name for i in stages.values() if target in (i.group, i.key)]
+        if not names:
+            raise ValueError(f"unknown stage, foreach-stage or foreach-key: {target}")
+        selection += [i for i in names if i not in selection]
+    return selection
+
+
+def critical_path(results: dict[str, StageResult], dependencies: dict[str, set[str]]) -> list[str]:
+    """Chain of dependent stages with the largest total duration."""
+    longest: dict[str, tuple[float, list[str]]] = {}
+
+    def _longest(name: str) -> tuple[float, list[str]]:
+        if name not in longest:
+            upstream = [_longest(i) for i in dependencies[name] if i in results]
+            duration, path = max(upstream, default=(0.0, []))
+            longest[name] = (duration + results[name].duration, [*path, name])
+        return longest[name]
+
+    return max((_longest(i) for i in results), default=(0.0, []))[1]
+
+
+def _remove_outs(stage: Stage, root: Path) -> None:
+    """Remove the non-persistent outs of a stage before it runs, like DVC does."""
+    for out in stage.outs:
+        if out in stage.persist:
+            continue
+        path = root / out
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        elif path.exists() or path.is_symlink():
+            path.unlink()
+
+
+def _run_stage(stage: Stage, log_file: Path, root: Path) -> int:
+    env = {**os.environ, "PYTHONUTF8": "1"}
+    _remove_outs(stage, root)
+    wdir = root / stage.wdir
+    with log_file.open("w", encoding="utf-8") as log:
+        for cmd in stage.cmd:
+            log.write(f"> {cmd}\n")
+            log.flush()
+            # stage commands are shell commands, run in the stage's wdir as by DVC
+            returncode = subprocess.run(  # noqa: S602
+                cmd, shell=True, cwd=wdir, stdout=log, stderr=subprocess.STDOUT, env=env
+            ).returncode
+            if returncode != 0:
+                return returncode
+    return 0
+
+
+def _commit(stage: str, log_file: Path, root: Path) -> int:
+    env = {**os.environ, "PYTHONUTF8": "1"}
+    with log_file.open("a", encoding="utf-8") as log:
+        log.write(f"> dvc commit --force {stage}\n")
+        log.flush()
+        return subprocess.run(
+            ["uv", "run", "dvc", "commit", "--force", stage], cwd=root, stdout=log, stderr=subprocess.STDOUT, env=env
+        ).returncode
+
+
+def run_stages(
+    stages: list[str],
+    logfile: str | None = None,
+    workers: int = WORKERS,
+    log_dir: Path | str = "repro_logs",
+    root: Path | str = ".",
+    commit: bool = True,
+    pipeline: dict[str, Stage] | None = None,
+) -> bool:
+    """Run DVC stages in DAG-order on a pool of workers, log every stage to its own file and print a summary.
+
+    Stages are selected from pipeline, by default all stages of the DVC repository at root. Every succeeded stage
+    is committed to dvc.lock (if commit), before the stages depending on it start.
 
     Returns True if all stages succeeded.
     """
@@ -39,44 +222,85 @@ def run_stages(stages: list[str], logfile: str | None = None) -> bool:
         force=True,
     )
 
-    logger.info(f"Start run: {datetime.now()}")
-    results: dict[str, int] = {}
-
-    for stage in stages:
-        logger.info(f"\n=== Running stage: {stage} ===")
+    root = Path(root)
+    all_stages = read_stages(root) if pipeline is None else pipeline
+    selection = select_stages(all_stages, stages)
+    # frozen stages are not run, like dvc repro; the stages depending on them use their outs as they are
+    frozen = [name for name in selection if all_stages[name].frozen]
+    selection = [name for name in selection if name not in frozen]
+    # only dependencies within the selection: stages outside of it are considered up to date
+    dependencies = {
+        name: {i for i in upstream if i in selection} for name, upstream in stage_dependencies(all_stages).items()
+    }
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
 
-        env = {**os.environ, "PYTHONUTF8": "1"}
-        process = subprocess.Popen(
-            ["uv", "run", "dvc", "repro", "--keep-going", "--single-item", "--force", stage],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            bufsize=1,
-            env=env,
-        )
+    logger.info(f"Start run: {datetime.now()}")
+    logger.info(f"{len(selection)} stages on {workers} workers, logs in {log_dir}")
+    t0 = time.perf_counter()
+    results: dict[str, StageResult] = {}
+    pending = list(selection)
+    running = {}
+    commit_lock = threading.Lock()  # one dvc commit at a time: DVC holds its repository lock while committing
 
-        assert process.stdout is not None
-        for line in process.stdout:
-            logger.info(line.rstrip())
+    def _run(name: str) -> StageResult:
+        log_file = log_dir / f"{name}.log"
+        result = StageResult(name, None, start=time.perf_counter() - t0, log_file=log_file)
+        result.exit_code = _run_stage(all_stages[name], log_file, root)
+        if commit and result.exit_code == 0:
+            with commit_lock:
+                result.exit_code = _commit(name, log_file, root)
+        result.end = time.perf_counter() - t0
+        return result
 
-        process.wait()
-        results[stage] = process.returncode
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for name in list(pending):
+                upstream = dependencies[name]
+                if any(results[i].exit_code != 0 for i in upstream if i in results):
+                    pending.remove(name)
+                    results[name] = StageResult(name, None)
+                    logger.info(f"{name}: {results[name].status}")
+                elif all(i in results for i in upstream):
+                    pending.remove(name)
+                    logger.info(f"=== Running stage: {name} ===")
+                    running[executor.submit(_run, name)] = name
+            if not running:
+                if pending:
+                    raise ValueError(f"circular dependencies between stages: {pending}")
+                continue
 
-        status = "SUCCESS" if process.returncode == 0 else f"FAILED (exit code {process.returncode})"
-        logger.info(f"{stage}: {status}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                result = future.result()
+                results[result.stage] = result
+                logger.info(f"{result.stage}: {result.status} in {result.duration:.0f} s")
 
+    wall_time = time.perf_counter() - t0
     logger.info("\n=== SUMMARY ===")
-    for stage, code in results.items():
-        status = "SUCCESS" if code == 0 else f"FAILED (exit code {code})"
-        logger.info(f"{stage}: {status}")
+    for name in frozen:
+        logger.info(f"{name}: SKIPPED (frozen)")
+    for name in selection:
+        result = results[name]
+        timing = "" if result.exit_code is None else f" [{result.start:.0f} s - {result.end:.0f} s]"
+        logger.info(f"{name}: {result.status}{timing}")
+
+    path = critical_path({k: v for k, v in results.items() if v.exit_code is not None}, dependencies)
+    if path:
+        path_time = sum(results[i].duration for i in path)
+        logger.info(f"\nCritical path ({path_time:.0f} s of {wall_time:.0f} s wall time): {' -> '.join(path)}")
+    logger.info(f"Sum of stage times: {sum(i.duration for i in results.values()):.0f} s")
 
     logger.info(f"End run: {datetime.now()}")
-    return all(code == 0 for code in results.values())
+    return all(i.exit_code == 0 for i in results.values())
 
 
 if __name__ == "__main__":
-    stages = sys.argv[1:] if len(sys.argv) > 1 else VRIJ_AFWATEREND
-    success = run_stages(stages, logfile="repro.log")
+    parser = argparse.ArgumentParser(description="Run DVC stages in parallel, in the order of the stage DAG.")
+    parser.add_argument("targets", nargs="*", default=VRIJ_AFWATEREND)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--log-dir", default="repro_logs")
+    args = parser.parse_args()
+    success = run_stages(args.targets, logfile="repro.log", workers=args.workers, log_dir=args.log_dir)
     raise SystemExit(0 if success else 1)
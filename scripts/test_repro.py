@@ -0,0 +1,122 @@
+"""Tests for scripts/repro.py"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+from repro import Stage, read_stages, run_stages, select_stages, stage_dependencies
+
+PYTHON = Path(sys.executable).as_posix()
+
+DVC_YAML = """
+vars:
+  - sleep: 0
+stages:
+  prepare:
+    foreach:
+      a:
+        name: A
+      b:
+        name: B
+    do:
+      cmd: python -c "open('${item.name}.txt', 'w').write('${key}')"
+      outs:
+        - data/${item.name}
+  combine:
+    cmd: python -c "pass"
+    wdir: data
+    deps:
+      - A/model.toml
+      - B
+    outs:
+      - combined:
+          persist: true
+  frozen:
+    cmd: python -c "raise SystemExit(1)"
+    frozen: true
+    outs:
+      - data/frozen
+"""
+
+
+def _pipeline() -> dict[str, Stage]:
+    def _python(code: str) -> str:
+        return f'{PYTHON} -c "{code}"'
+
+    stages = [
+        Stage("prepare@a", [_python("import time; time.sleep(1); open('A.txt', 'w').write('a')")], outs=["data/A"]),
+        Stage("prepare@b", [_python("import time; time.sleep(1); open('B.txt', 'w').write('b')")], outs=["data/B"]),
+        Stage(
+            "combine",
+            [_python("open('combined.txt', 'w').write('done')")],
+            deps=["data/A/model.toml", "data/B"],
+            outs=["data/combined", "data/stale"],
+            persist=["data/combined"],
+            wdir="data",
+        ),
+        Stage("frozen", [_python("raise SystemExit(1)")], outs=["data/frozen"], frozen=True),
+        Stage("broken", [_python("raise SystemExit(3)")], outs=["data/broken"]),
+        Stage("after_broken", [_python("pass")], deps=["data/broken"]),
+    ]
+    for stage in stages:
+        stage.group, _, stage.key = stage.name.partition("@")
+        if not stage.key:
+            stage.group = stage.key = None
+    return {i.name: i for i in stages}
+
+
+def test_read_stages(tmp_path):
+    pytest.importorskip("dvc")
+    from dvc.repo import Repo
+
+    Repo.init(tmp_path, no_scm=True)
+    (tmp_path / "dvc.yaml").write_text(DVC_YAML)
+    stages = read_stages(tmp_path)
+
+    assert list(stages) == ["prepare@a", "prepare@b", "combine", "frozen"]
+    assert stages["prepare@b"].outs == ["data/B"]
+    assert stages["prepare@b"].group == "prepare"
+    assert stages["prepare@b"].key == "b"
+    assert "B.txt" in stages["prepare@b"].cmd[0]
+    assert stages["combine"].wdir == "data"
+    assert stages["combine"].deps == ["data/A/model.toml", "data/B"]
+    assert stages["combine"].persist == ["data/combined"]
+    assert stages["frozen"].frozen
+
+
+def test_stage_dependencies():
+    stages = _pipeline()
+    dependencies = stage_dependencies(stages)
+    assert dependencies["combine"] == {"prepare@a", "prepare@b"}
+    assert dependencies["prepare@a"] == set()
+    assert dependencies["after_broken"] == {"broken"}
+
+    assert select_stages(stages, ["a", "combine"]) == ["prepare@a", "combine"]
+    assert select_stages(stages, ["prepare"]) == ["prepare@a", "prepare@b"]
+
+
+def test_run_stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "A").mkdir(parents=True)
+    (tmp_path / "data" / "A" / "stale.txt").touch()
+    (tmp_path / "data" / "stale").touch()
+    (tmp_path / "data" / "combined").touch()
+
+    success = run_stages(
+        ["prepare", "combine", "frozen", "broken", "after_broken"], workers=4, commit=False, pipeline=_pipeline()
+    )
+    assert not success
+    # combine is run in its wdir, its non-persistent outs are removed first
+    assert (tmp_path / "data" / "combined.txt").read_text() == "done"
+    assert not (tmp_path / "data" / "A").exists()
+    assert not (tmp_path / "data" / "stale").exists()
+    assert (tmp_path / "data" / "combined").exists()
+
+    assert (tmp_path / "repro_logs" / "broken.log").exists()
+    assert not (tmp_path / "repro_logs" / "after_broken.log").exists()
+    assert not (tmp_path / "repro_logs" / "frozen.log").exists()
+
+    log = (tmp_path / "repro_logs" / "prepare@a.log").read_text()
+    assert log.startswith("> ")
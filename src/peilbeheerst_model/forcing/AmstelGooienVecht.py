@@ -152,7 +152,7 @@ if DYNAMIC_CONDITIONS:
         enddate=endtime,
     )
     ribasim_model = forcing.add()
-    offline_budgets.compute_budgets(ribasim_model)
+    offline_budgets.compute_budgets(ribasim_model, basin_masks=forcing.basin_masks)
     assign_validation_path = output_dir / "results" / "assign_validation.png"
     assign_validation_path.parent.mkdir(parents=True, exist_ok=True)
     offline_budgets.plot_assign_validation(ribasim_model, path=assign_validation_path)
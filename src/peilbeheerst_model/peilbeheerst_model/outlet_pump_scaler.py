@@ -3,20 +3,22 @@
 from __future__ import annotations
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import cast
 
 import numpy as np
 import pandas as pd
-import xarray as xr
 from ribasim import run_ribasim
+from ribasim_nl.results import read_results
+from ribasim_nl.snapshot import assign_without_validation
 
 from ribasim_nl import CloudStorage, Model
 
 pd.set_option("display.max_columns", None)
 
-__all__ = ["OutletPumpScalingConfig", "scale_outlets_pumps"]
+__all__ = ["OutletPumpScalingConfig", "scale_outlets_pumps", "scale_outlets_pumps_concurrently"]
 
 LOG = logging.getLogger(__name__)
 
@@ -26,7 +28,9 @@ class OutletPumpScalingConfig:
     """Configuration for outlet and pump max_flow_rate scaling.
 
     The configuration bundles the loaded Ribasim model, the from_to_node_function_table,
-    and the scenario settings used by the iterative scaling routine.
+    and the scenario settings used by the iterative scaling routine. The situations are
+    run in their own model directory next to `ribasim_model_path`, at most `workers` at
+    the same time.
     """
 
     ribasim_model_path: str | Path
@@ -51,11 +55,15 @@ class OutletPumpScalingConfig:
     situations: list[str] = field(default_factory=lambda: ["water_demand", "water_drainage"])
     rescale_flow_capacities: bool = True
     simulation_days: int = 365
+    workers: int = 2
 
-    @property
-    def results_path(self) -> Path:
-        """Return the expected Ribasim basin-results file for the model run."""
-        return Path(self.ribasim_model_path).parent / "results" / "basin.nc"
+    def situation_model_path(self, situation: str) -> Path:
+        """Return the toml-file of the isolated model directory of a situation.
+
+        E.g. `work_dir/ribasim.toml` -> `work_dir/scaling/water_drainage/ribasim.toml`.
+        """
+        toml_file = Path(self.ribasim_model_path)
+        return toml_file.parent / "scaling" / situation / toml_file.name
 
 
 def read_output_data(file: Path, columns: list[str] | None = None) -> pd.DataFrame:
@@ -75,12 +83,11 @@ def read_output_data(file: Path, columns: list[str] | None = None) -> pd.DataFra
 
     :raises NotImplementedError: if file-type is not supported
     """
-    # read output data
+    # read output data, only reading the selected variables from file
     match file.name:
-        case "basin.nc":
-            df = xr.open_dataset(file).to_dataframe().reset_index(drop=False)
-        case "basin.arrow":
-            df = pd.read_feather(file)
+        case "basin.nc" | "basin.arrow":
+            variables = None if columns is None else [c for c in columns if c not in ("time", "node_id")]
+            df = read_results(file, variables=variables).reset_index(drop=False)
         case _:
             msg = f"File(-type) not supported: {file.name=}"
             raise NotImplementedError(msg)
@@ -444,28 +451,32 @@ def overwrite_demand_values_with_drainage_values(from_to_node_function_table):
     return from_to_node_function_table
 
 
-def overwrite_guessed_flow_rates_if_not_allowed_to_scale(from_to_node_function_table):
+def overwrite_guessed_flow_rates_if_not_allowed_to_scale(from_to_node_function_table, flow_rate_column=None):
     """Restore original flow rates for nodes that are marked as not scalable.
 
     Parameters
     ----------
     from_to_node_function_table : pd.DataFrame
         Connector-node table with guessed flow-rate columns and scaling flags.
+    flow_rate_column : str, optional
+        Column to update. Defaults to `scaled_flow_rate` when available, otherwise the latest guessed
+        flow-rate column.
 
     Returns
     -------
     pd.DataFrame
         The updated table with restricted nodes reset to `max_flow_rate`.
     """
-    # retrieve the last column name starting with "new_max_flow_rates_"
-    new_flow_rate_columns = [c for c in from_to_node_function_table.columns if c.startswith("new_max_flow_rates_")]
-    if len(new_flow_rate_columns) == 0:
-        return from_to_node_function_table
+    if flow_rate_column is None:
+        # retrieve the last column name starting with "new_max_flow_rates_"
+        new_flow_rate_columns = [c for c in from_to_node_function_table.columns if c.startswith("new_max_flow_rates_")]
+        if len(new_flow_rate_columns) == 0:
+            return from_to_node_function_table
 
-    if "scaled_flow_rate" in from_to_node_function_table.columns:
-        flow_rate_column = "scaled_flow_rate"
-    else:
-        flow_rate_column = new_flow_rate_columns[-1]
+        if "scaled_flow_rate" in from_to_node_function_table.columns:
+            flow_rate_column = "scaled_flow_rate"
+        else:
+            flow_rate_column = new_flow_rate_columns[-1]
 
     mask_false = from_to_node_function_table["allowed_to_scale"].eq(False)
     from_to_node_function_table.loc[mask_false, flow_rate_column] = from_to_node_function_table["max_flow_rate"]
@@ -474,7 +485,7 @@ def overwrite_guessed_flow_rates_if_not_allowed_to_scale(from_to_node_function_t
 
 
 def cap_guessed_flow_rates_at_minimum_and_maximum(
-    from_to_node_function_table, min_scaled_flow_rate, max_scaled_flow_rate
+    from_to_node_function_table, min_scaled_flow_rate, max_scaled_flow_rate, flow_rate_column=None
 ):
     """Cap guessed flow rates between defined bounds to prevent unrealistic values.
 
@@ -486,21 +497,25 @@ def cap_guessed_flow_rates_at_minimum_and_maximum(
         The minimum allowed flow rate in m3/s.
     max_scaled_flow_rate : float
         The maximum allowed flow rate in m3/s.
+    flow_rate_column : str, optional
+        Column to cap. Defaults to `scaled_flow_rate` when available, otherwise the latest guessed
+        flow-rate column.
 
     Returns
     -------
     pd.DataFrame
         The updated table with guessed flow rates capped at the specified bounds.
     """
-    # retrieve the last column name starting with "new_max_flow_rates_"
-    new_flow_rate_columns = [c for c in from_to_node_function_table.columns if c.startswith("new_max_flow_rates_")]
-    if len(new_flow_rate_columns) == 0:
-        return from_to_node_function_table
+    if flow_rate_column is None:
+        # retrieve the last column name starting with "new_max_flow_rates_"
+        new_flow_rate_columns = [c for c in from_to_node_function_table.columns if c.startswith("new_max_flow_rates_")]
+        if len(new_flow_rate_columns) == 0:
+            return from_to_node_function_table
 
-    if "scaled_flow_rate" in from_to_node_function_table.columns:
-        flow_rate_column = "scaled_flow_rate"
-    else:
-        flow_rate_column = new_flow_rate_columns[-1]
+        if "scaled_flow_rate" in from_to_node_function_table.columns:
+            flow_rate_column = "scaled_flow_rate"
+        else:
+            flow_rate_column = new_flow_rate_columns[-1]
 
     # cap the guessed flow rates at the defined minimum
     from_to_node_function_table.loc[
@@ -519,7 +534,7 @@ def cap_guessed_flow_rates_at_minimum_and_maximum(
     return from_to_node_function_table
 
 
-def update_max_flow_rates_in_ribasim_model(ribasim_model, from_to_node_function_table):
+def update_max_flow_rates_in_ribasim_model(ribasim_model, from_to_node_function_table, flow_rate_column=None):
     """Copy the latest guessed connector flow rates into the Ribasim model.
 
     Parameters
@@ -528,6 +543,9 @@ def update_max_flow_rates_in_ribasim_model(ribasim_model, from_to_node_function_
         The model whose pump and outlet static tables are updated.
     from_to_node_function_table : pd.DataFrame
         Connector-node table containing guessed flow-rate columns.
+    flow_rate_column : str, optional
+        Column with the flow rates to copy. Defaults to `scaled_flow_rate` when available, otherwise the latest
+        guessed flow-rate column.
 
     Returns
     -------
@@ -535,9 +553,9 @@ def update_max_flow_rates_in_ribasim_model(ribasim_model, from_to_node_function_
         The model with updated pump and outlet `max_flow_rate` values.
     """
     # prefer the final selected value when available, otherwise fall back to the latest iteration column
-    if "scaled_flow_rate" in from_to_node_function_table.columns:
+    if flow_rate_column is None and "scaled_flow_rate" in from_to_node_function_table.columns:
         flow_rate_column = "scaled_flow_rate"
-    else:
+    elif flow_rate_column is None:
         new_flow_rate_columns = [c for c in from_to_node_function_table.columns if c.startswith("new_max_flow_rates_")]
         if len(new_flow_rate_columns) == 0:
             return ribasim_model
@@ -588,6 +606,201 @@ def upload_from_to_node_function_table(from_to_node_function_table, waterschap,
         print("from_to_node_function_table with estimated flow rates saved to the GoodCloud.")
 
 
+def determine_basin_exceedance(
+    ribasim_water_levels: pd.DataFrame,
+    basin_information: pd.DataFrame,
+    situation: str,
+    iteration: int,
+    max_deviation: float,
+    max_exceedance_days: int,
+) -> pd.DataFrame:
+    """Determine per basin whether the connector capacities should be scaled higher or lower.
+
+    Parameters
+    ----------
+    ribasim_water_levels : pd.DataFrame
+        Basin results with columns `time`, `node_id` and `level`.
+    basin_information : pd.DataFrame
+        Basin information with the target level (`meta_streefpeil`), indexed by node_id.
+    situation : str
+        Scenario name, expected to be `water_drainage` or `water_demand`.
+    iteration : int
+        Iteration number (0-based), used in the column names.
+    max_deviation : float
+        Maximum allowed deviation from the target level in m.
+    max_exceedance_days : int
+        Maximum number of timesteps the deviation may be exceeded.
+
+    Returns
+    -------
+    pd.DataFrame
+        Per basin the number of exceedances and the scale direction (`higher` or `lower`).
+    """
+    # merge streefpeil to node_id
+    ribasim_water_levels = ribasim_water_levels.merge(
+        basin_information[["meta_streefpeil"]], left_on="node_id", right_index=True, how="left"
+    )
+
+    # determine which basins exceed the maximum allowed deviation and duration from the streefpeil
+    column_name_iteration = f"exceeds_deviation_duration_iteration_{iteration}_{situation}"
+    ribasim_water_levels["deviation"] = ribasim_water_levels["level"] - ribasim_water_levels["meta_streefpeil"]
+
+    if (
+        situation == "water_drainage"
+    ):  # in drainage situation, check where water levels are too high, so deviation is above the max_deviation threshold
+        ribasim_water_levels[column_name_iteration] = ribasim_water_levels["deviation"] > max_deviation
+    elif (
+        situation == "water_demand"
+    ):  # in demand situation, check where water levels are too low, so deviation is below the negative max_deviation threshold
+        ribasim_water_levels[column_name_iteration] = ribasim_water_levels["deviation"] < -max_deviation
+
+    # group by basin and determine for how many timesteps the deviation is exceeded
+    basin_exceedance = ribasim_water_levels.groupby("node_id")[column_name_iteration].sum().reset_index()
+    basin_exceedance = basin_exceedance.merge(
+        basin_information[["meta_streefpeil"]], left_on="node_id", right_index=True, how="left"
+    )
+
+    # determine which basins needs to be scaled higher or lower based on the exceeds_deviation_duration_iteration
+    column_name_direction = f"scale_direction_iteration_{iteration}_{situation}"
+    basin_exceedance[column_name_direction] = None
+    basin_exceedance.loc[basin_exceedance[column_name_iteration] > max_exceedance_days, column_name_direction] = (
+        "higher"  # if the deviation is exceeded for more than max_exceedance_days, the flow rate should be scaled higher
+    )
+    basin_exceedance.loc[basin_exceedance[column_name_iteration] <= max_exceedance_days, column_name_direction] = (
+        "lower"  # if lower, then the flow rate can be set lower
+    )
+
+    return basin_exceedance
+
+
+def run_situation(
+    toml_file: Path,
+    situation: str,
+    basin_information: pd.DataFrame,
+    iteration: int,
+    max_deviation: float,
+    max_exceedance_days: int,
+) -> pd.DataFrame:
+    """Run the model of one situation and determine per basin the scale direction.
+
+    The simulation runs in its own Ribasim CLI process, so the situations of an iteration can be run concurrently
+    from a thread pool. Only the basin levels are read from the results.
+
+    Parameters
+    ----------
+    toml_file : Path
+        Toml-file of the (isolated) model of the situation.
+    situation : str
+        Scenario name, expected to be `water_drainage` or `water_demand`.
+    basin_information : pd.DataFrame
+        Basin information with the target level (`meta_streefpeil`), indexed by node_id.
+    iteration : int
+        Iteration number (0-based), used in the column names.
+    max_deviation : float
+        Maximum allowed deviation from the target level in m.
+    max_exceedance_days : int
+        Maximum number of timesteps the deviation may be exceeded.
+
+    Returns
+    -------
+    pd.DataFrame
+        Per basin the number of exceedances and the scale direction, see `determine_basin_exceedance`.
+    """
+    run_ribasim(toml_path=toml_file)
+
+    # extract results, only select relevant columns
+    ribasim_water_levels = read_output_data(
+        Path(toml_file).parent / "results" / "basin.nc", ["time", "node_id", "level"]
+    )
+    return determine_basin_exceedance(
+        ribasim_water_levels, basin_information, situation, iteration, max_deviation, max_exceedance_days
+    )
+
+
+def update_from_to_node_function_table(
+    from_to_node_function_table: pd.DataFrame,
+    basin_exceedance: pd.DataFrame,
+    situation: str,
+    iteration: int,
+    config: OutletPumpScalingConfig,
+) -> tuple[pd.DataFrame, str]:
+    """Add the basin analysis of one situation to the connector table and guess new flow rates.
+
+    Parameters
+    ----------
+    from_to_node_function_table : pd.DataFrame
+        Connector-node table with the scaling history.
+    basin_exceedance : pd.DataFrame
+        Per basin the number of exceedances and the scale direction, see `determine_basin_exceedance`.
+    situation : str
+        Scenario name, expected to be `water_drainage` or `water_demand`.
+    iteration : int
+        Iteration number (0-based).
+    config : OutletPumpScalingConfig
+        Complete scaler configuration.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, str]
+        The updated connector-node table and the name of the column with the new flow rates.
+    """
+    column_name_iteration = f"exceeds_deviation_duration_iteration_{iteration}_{situation}"
+    column_name_direction = f"scale_direction_iteration_{iteration}_{situation}"
+
+    ### bridge basin --> connector nodes ###
+    # add the information to the from_to_node_function_table, based on the situation (drainage: checking downstream nodes, demand: checking upstream nodes)
+    if situation == "water_drainage":
+        from_to_node_function_table = from_to_node_function_table.merge(
+            basin_exceedance.set_index("node_id")[[column_name_iteration, column_name_direction]],
+            left_on="from_node_id",
+            right_index=True,
+            how="left",
+        )
+    elif situation == "water_demand":
+        from_to_node_function_table = from_to_node_function_table.merge(
+            basin_exceedance.set_index("node_id")[[column_name_iteration, column_name_direction]],
+            left_on="to_node_id",
+            right_index=True,
+            how="left",
+        )
+
+    # if drainage situation, do not scale supply nodes, and vice versa.
+    if situation == "water_drainage":
+        from_to_node_function_table.loc[
+            from_to_node_function_table.function.isin(["supply"]), column_name_direction
+        ] = "equal"
+    elif situation == "water_demand":
+        from_to_node_function_table.loc[from_to_node_function_table.function.isin(["drain"]), column_name_direction] = (
+            "equal"
+        )
+
+    ### Bisection method ###
+    from_to_node_function_table = update_from_to_node_function_table_with_new_flow_rate(
+        from_to_node_function_table=from_to_node_function_table,
+        iteration=iteration + 1,
+        situation=situation,
+        column_name_direction=column_name_direction,
+        initial_guess_flow_rate_outlet=config.initial_guess_flow_rate_outlet,
+        initial_guess_flow_rate_pump=config.initial_guess_flow_rate_pump,
+    )
+    column_name_new_flow_rate = f"new_max_flow_rates_{iteration + 1}_{situation}"
+
+    # if there are nodes which are not allowed to be scaled, overwrite the guessed flow rates with the original max_flow_rate from the ribasim model
+    from_to_node_function_table = overwrite_guessed_flow_rates_if_not_allowed_to_scale(
+        from_to_node_function_table, flow_rate_column=column_name_new_flow_rate
+    )
+
+    # cap the max_flow_rate at the defined maximum
+    from_to_node_function_table = cap_guessed_flow_rates_at_minimum_and_maximum(
+        from_to_node_function_table,
+        config.min_scaled_flow_rate,
+        config.max_scaled_flow_rate,
+        flow_rate_column=column_name_new_flow_rate,
+    )
+
+    return from_to_node_function_table, column_name_new_flow_rate
+
+
 class _OutletPumpScaler:
     """Execute the iterative outlet and pump scaling workflow for one model."""
 
@@ -598,6 +811,10 @@ class _OutletPumpScaler:
     def run(self):
         """Scale connector capacities by iteratively running demand and drainage scenarios.
 
+        Every situation is written to its own model directory (see `OutletPumpScalingConfig.situation_model_path`),
+        so the situations of one iteration run concurrently. The from_to_node_function_table is updated from the
+        results of all situations once they are finished.
+
         Returns
         -------
         tuple[Model, pd.DataFrame]
@@ -611,13 +828,13 @@ class _OutletPumpScaler:
         from_to_node_function_table = (
             config.from_to_node_function_table
         )  # table with from_node_id, to_node_id and function (drain, supply, flow_control) for each connector node
-        original_meteo = ribasim_model.basin.time.df.copy()  # will be temporarily modified
         original_initial_waterlevels = ribasim_model.basin.state.df.copy()  # will be temporarily modified
         original_from_to_node_function_table = from_to_node_function_table.copy()  # will be temporarily modified
         original_level_boundary_static = ribasim_model.level_boundary.static.df.copy()
         original_level_boundary_time = ribasim_model.level_boundary.time.df.copy()
         original_basin_time = ribasim_model.basin.time.df.copy()
         original_endtime = ribasim_model.endtime
+        original_filepath = ribasim_model.filepath
 
         # if max_flow_rate is 0.0, change to initial value
         pump_static_df = cast(pd.DataFrame, ribasim_model.pump.static.df)
@@ -630,20 +847,13 @@ class _OutletPumpScaler:
         ###########################
 
         situations = config.situations
-        results_path = config.results_path
         max_iterations = config.max_iterations
         initial_guess_flow_rate_outlet = config.initial_guess_flow_rate_outlet
         initial_guess_flow_rate_pump = config.initial_guess_flow_rate_pump
-        design_precipitation_event = config.design_precipitation_event
-        design_potential_evaporation_event = config.design_potential_evaporation_event
         node_id_exclusion_list = config.node_id_exclusion_list
         printing = config.printing
-        level_boundary_waterlevel_drainage_situation = config.level_boundary_waterlevel_drainage_situation
-        level_boundary_waterlevel_demand_situation = config.level_boundary_waterlevel_demand_situation
-        max_deviation = config.max_deviation
-        max_exceedance_days = config.max_exceedance_days
-        max_scaled_flow_rate = config.max_scaled_flow_rate
         min_scaled_flow_rate = config.min_scaled_flow_rate
+        max_scaled_flow_rate = config.max_scaled_flow_rate
         add_information_to_from_to_node_function_table = config.add_information_to_from_to_node_function_table
         simulation_days = config.simulation_days
 
@@ -653,6 +863,9 @@ class _OutletPumpScaler:
         # Set initial conditions equal to the target levels
         initial_water_level, basin_information = set_initial_water_levels(ribasim_model)
 
+        # check if known_flow_rate columns exist and filled correctly
+        check_known_flow_rate_columns(ribasim_model)
+
         # determine two df's for the downstream + upstream connector nodes which should be used in the scaling
         outlet_nodes = ribasim_model.outlet.static.df[["node_id", "meta_known_flow_rate"]].copy()
         pump_nodes = ribasim_model.pump.static.df[["node_id", "meta_known_flow_rate"]].copy()
@@ -702,188 +915,137 @@ class _OutletPumpScaler:
         )
         from_to_node_function_table = from_to_node_function_table.merge(max_flow_rate_df, on="node_id", how="left")
 
-        for situation in situations:  # loop through drainage (afvoer) and demand (aanvoer) situation
-            first_iteration = True
+        # if capacity has a flow rate lower than 0, place back to 0.001
+        outlet_static_df.loc[outlet_static_df.max_flow_rate < 0.001, "max_flow_rate"] = min_scaled_flow_rate
+        pump_static_df.loc[pump_static_df.max_flow_rate < 0.001, "max_flow_rate"] = min_scaled_flow_rate
+
+        # Set initial guess flow_rate for outlets and pumps with unknown flow_rate
+        if printing:
+            print("Replacing initial guess flow rates for outlets and pumps with unknown flow rates.")
+
+        ribasim_model.outlet.static.df.loc[~ribasim_model.outlet.static.df["meta_known_flow_rate"], "max_flow_rate"] = (
+            initial_guess_flow_rate_outlet
+        )
+        ribasim_model.pump.static.df.loc[~ribasim_model.pump.static.df["meta_known_flow_rate"], "max_flow_rate"] = (
+            initial_guess_flow_rate_pump
+        )
+
+        # if flow rate exceeds max flow rate, set equal to max flow rate
+        ribasim_model.outlet.static.df.loc[
+            ribasim_model.outlet.static.df.flow_rate > ribasim_model.outlet.static.df.max_flow_rate, "flow_rate"
+        ] = ribasim_model.outlet.static.df.max_flow_rate
+        ribasim_model.pump.static.df.loc[
+            ribasim_model.pump.static.df.flow_rate > ribasim_model.pump.static.df.max_flow_rate, "flow_rate"
+        ] = ribasim_model.pump.static.df.max_flow_rate
+        initial_outlet_static = ribasim_model.outlet.static.df.copy()
+        initial_pump_static = ribasim_model.pump.static.df.copy()
+
+        # (temporarily) changed tables per situation; each situation is written to its own model directory
+        ribasim_model.level_boundary.static.df = None
+        situation_tables = {}
+        for situation in situations:
+            ribasim_model = set_vertical_static_forcing(
+                ribasim_model, situation, config.design_precipitation_event, config.design_potential_evaporation_event
+            )
 
             # dont let gravity pose a problem for the level boundaries
+            level_boundary_time = original_level_boundary_time.copy()
             if situation == "water_drainage":
-                ribasim_model.level_boundary.time.df["level"] = level_boundary_waterlevel_drainage_situation
+                level_boundary_time["level"] = config.level_boundary_waterlevel_drainage_situation
             elif situation == "water_demand":
-                ribasim_model.level_boundary.time.df["level"] = level_boundary_waterlevel_demand_situation
-            ribasim_model.level_boundary.static.df = None
-
-            # if capacity has a flow rate lower than 0, place back to 0.001
-            outlet_static_df.loc[outlet_static_df.max_flow_rate < 0.001, "max_flow_rate"] = min_scaled_flow_rate
-            pump_static_df.loc[pump_static_df.max_flow_rate < 0.001, "max_flow_rate"] = min_scaled_flow_rate
-
-            # loop through each iteration
+                level_boundary_time["level"] = config.level_boundary_waterlevel_demand_situation
+
+            situation_tables[situation] = {
+                "basin_time": ribasim_model.basin.time.df.copy(),
+                "level_boundary_time": level_boundary_time,
+                "outlet_static": initial_outlet_static.copy(),
+                "pump_static": initial_pump_static.copy(),
+            }
+
+        if printing:
+            print(
+                "Writing updated Ribasim models with:"
+                "\n - (temporarily) changed initial water levels"
+                "\n - (temporarily) changed vertical fluxes"
+                "\n - initial guessed flow rates."
+            )
+
+        workers = max(1, min(config.workers, len(situations)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # loop through each iteration, running the drainage (afvoer) and demand (aanvoer) situation concurrently
             for iteration in range(max_iterations):
                 if printing:
-                    print(f"Starting iteration {iteration + 1}/{max_iterations} for situation: {situation}")
+                    print(f"Running Ribasim simulations: {iteration + 1}/{max_iterations} for situations: {situations}")
 
-                if first_iteration:
-                    ribasim_model = set_vertical_static_forcing(
-                        ribasim_model, situation, design_precipitation_event, design_potential_evaporation_event
-                    )
+                futures = {}
+                for situation, tables in situation_tables.items():
+                    # write the model of this situation, the previous situation is already running
+                    ribasim_model.basin.time.df = tables["basin_time"]
                     ribasim_model.basin.state.df = initial_water_level
-
-                    # check if known_flow_rate columns exist and filled correctly
-                    check_known_flow_rate_columns(ribasim_model)
-
-                    # Set initial guess flow_rate for outlets and pumps with unknown flow_rate
-                    if printing:
-                        print("Replacing initial guess flow rates for outlets and pumps with unknown flow rates.")
-
-                    ribasim_model.outlet.static.df.loc[
-                        ~ribasim_model.outlet.static.df["meta_known_flow_rate"], "max_flow_rate"
-                    ] = initial_guess_flow_rate_outlet
-                    ribasim_model.pump.static.df.loc[
-                        ~ribasim_model.pump.static.df["meta_known_flow_rate"], "max_flow_rate"
-                    ] = initial_guess_flow_rate_pump
-
-                    # if flow rate exceeds max flow rate, set equal to max flow rate
-                    ribasim_model.outlet.static.df.loc[
-                        ribasim_model.outlet.static.df.flow_rate > ribasim_model.outlet.static.df.max_flow_rate,
-                        "flow_rate",
-                    ] = ribasim_model.outlet.static.df.max_flow_rate
-                    ribasim_model.pump.static.df.loc[
-                        ribasim_model.pump.static.df.flow_rate > ribasim_model.pump.static.df.max_flow_rate, "flow_rate"
-                    ] = ribasim_model.pump.static.df.max_flow_rate
-
-                    # write model
-                    if printing:
-                        print(
-                            "Writing updated Ribasim model with:"
-                            "\n - (temporarily) changed initial water levels"
-                            "\n - (temporarily) changed vertical fluxes"
-                            "\n - initial guessed flow rates."
-                        )
-                    ribasim_model.write(config.ribasim_model_path)
-                    first_iteration = (
-                        False  # avoid resetting initial water levels and initial guess flow rates in next iterations
+                    ribasim_model.level_boundary.time.df = tables["level_boundary_time"]
+                    ribasim_model.outlet.static.df = tables["outlet_static"]
+                    ribasim_model.pump.static.df = tables["pump_static"]
+                    toml_file = config.situation_model_path(situation)
+                    ribasim_model.write(toml_file)
+                    futures[situation] = executor.submit(
+                        run_situation,
+                        toml_file,
+                        situation,
+                        basin_information,
+                        iteration,
+                        config.max_deviation,
+                        config.max_exceedance_days,
                     )
 
-                # run simulation
-                if printing:
-                    print(f"Running Ribasim simulation: {iteration + 1}/{max_iterations} for situation: {situation}")
-
-                run_ribasim(toml_path=config.ribasim_model_path)
-
-                # extract results, only select relevant columns, merge streefpeil to node_id
-                # ribasim_water_levels = pd.read_feather(results_path)
-                ribasim_water_levels = read_output_data(results_path, ["time", "node_id", "level"])
-                ribasim_water_levels = ribasim_water_levels.merge(
-                    basin_information[["meta_streefpeil"]], left_on="node_id", right_index=True, how="left"
-                )
-
-                ### basin analysis ###
-                # determine which basins exceed the maximum allowed deviation and duration from the streefpeil
-                column_name_iteration = f"exceeds_deviation_duration_iteration_{iteration}_{situation}"
-                ribasim_water_levels["deviation"] = (
-                    ribasim_water_levels["level"] - ribasim_water_levels["meta_streefpeil"]
-                )
-
-                if (
-                    situation == "water_drainage"
-                ):  # in drainage situation, check where water levels are too high, so deviation is above the max_deviation threshold
-                    ribasim_water_levels[column_name_iteration] = ribasim_water_levels["deviation"] > max_deviation
-                elif (
-                    situation == "water_demand"
-                ):  # in demand situation, check where water levels are too low, so deviation is below the negative max_deviation threshold
-                    ribasim_water_levels[column_name_iteration] = ribasim_water_levels["deviation"] < -max_deviation
-
-                # group by basin and determine for how many timesteps the deviation is exceeded
-                basin_exceedance = ribasim_water_levels.groupby("node_id")[column_name_iteration].sum().reset_index()
-                basin_exceedance = basin_exceedance.merge(
-                    basin_information[["meta_streefpeil"]], left_on="node_id", right_index=True, how="left"
-                )
-
-                # determine which basins needs to be scaled higher or lower based on the exceeds_deviation_duration_iteration
-                column_name_direction = f"scale_direction_iteration_{iteration}_{situation}"
-                basin_exceedance[column_name_direction] = None
-                basin_exceedance.loc[
-                    basin_exceedance[column_name_iteration] > max_exceedance_days, column_name_direction
-                ] = "higher"  # if the deviation is exceeded for more than max_exceedance_days, the flow rate should be scaled higher
-                basin_exceedance.loc[
-                    basin_exceedance[column_name_iteration] <= max_exceedance_days, column_name_direction
-                ] = "lower"  # if lower, then the flow rate can be set lower
-
-                ### bridge basin --> connector nodes ###
-                # add the information to the from_to_node_function_table, based on the situation (drainage: checking downstream nodes, demand: checking upstream nodes)
-                if situation == "water_drainage":
-                    from_to_node_function_table = from_to_node_function_table.merge(
-                        basin_exceedance.set_index("node_id")[[column_name_iteration, column_name_direction]],
-                        left_on="from_node_id",
-                        right_index=True,
-                        how="left",
+                # update the from_to_node_function_table with the results of all situations
+                for situation, future in futures.items():
+                    basin_exceedance = future.result()
+                    from_to_node_function_table, column_name_new_flow_rate = update_from_to_node_function_table(
+                        from_to_node_function_table, basin_exceedance, situation, iteration, config
                     )
-                elif situation == "water_demand":
-                    from_to_node_function_table = from_to_node_function_table.merge(
-                        basin_exceedance.set_index("node_id")[[column_name_iteration, column_name_direction]],
-                        left_on="to_node_id",
-                        right_index=True,
-                        how="left",
-                    )
-
-                # if drainage situation, do not scale supply nodes, and vice versa.
-                if situation == "water_drainage":
-                    from_to_node_function_table.loc[
-                        from_to_node_function_table.function.isin(["supply"]), column_name_direction
-                    ] = "equal"
-                elif situation == "water_demand":
-                    from_to_node_function_table.loc[
-                        from_to_node_function_table.function.isin(["drain"]), column_name_direction
-                    ] = "equal"
-
-                ### Bisection method ###
-                from_to_node_function_table = update_from_to_node_function_table_with_new_flow_rate(
-                    from_to_node_function_table=from_to_node_function_table,
-                    iteration=iteration + 1,
-                    situation=situation,
-                    column_name_direction=column_name_direction,
-                    initial_guess_flow_rate_outlet=initial_guess_flow_rate_outlet,
-                    initial_guess_flow_rate_pump=initial_guess_flow_rate_pump,
-                )
 
-                # only run in the last situation and last iteration
-                if situation == situations[-1] and iteration == max_iterations - 1:
-                    # if lower values have been assigned for the water_demand situation, then overwrite the max_flow_rate with the value from water_drainage
-                    from_to_node_function_table = overwrite_demand_values_with_drainage_values(
-                        from_to_node_function_table
+                    # update the max_flow_rate of this situation based on the new flow rates in the from_to_node_function_table
+                    tables = situation_tables[situation]
+                    ribasim_model.outlet.static.df = tables["outlet_static"]
+                    ribasim_model.pump.static.df = tables["pump_static"]
+                    ribasim_model = update_max_flow_rates_in_ribasim_model(
+                        ribasim_model, from_to_node_function_table, flow_rate_column=column_name_new_flow_rate
                     )
 
-                # if there are nodes which are not allowed to be scaled, overwrite the guessed flow rates with the original max_flow_rate from the ribasim model
-                from_to_node_function_table = overwrite_guessed_flow_rates_if_not_allowed_to_scale(
-                    from_to_node_function_table
-                )
-
-                # cap the max_flow_rate at the defined maximum
-                from_to_node_function_table = cap_guessed_flow_rates_at_minimum_and_maximum(
-                    from_to_node_function_table, min_scaled_flow_rate, max_scaled_flow_rate
-                )
-
-                # update the max_flow_rate in the ribasim_model based on the new flow rates in the from_to_node_function_table
-                ribasim_model = update_max_flow_rates_in_ribasim_model(ribasim_model, from_to_node_function_table)
-
-                # set flow rate equal to max flow rate
-                ribasim_model.outlet.static.df["flow_rate"] = ribasim_model.outlet.static.df["max_flow_rate"]
-                ribasim_model.pump.static.df["flow_rate"] = ribasim_model.pump.static.df["max_flow_rate"]
-
-                # store model
-                ribasim_model.write(config.ribasim_model_path)
+                    # set flow rate equal to max flow rate
+                    ribasim_model.outlet.static.df["flow_rate"] = ribasim_model.outlet.static.df["max_flow_rate"]
+                    ribasim_model.pump.static.df["flow_rate"] = ribasim_model.pump.static.df["max_flow_rate"]
+                    tables["outlet_static"] = ribasim_model.outlet.static.df.copy()
+                    tables["pump_static"] = ribasim_model.pump.static.df.copy()
 
                 # write from_to_node_table locally (push to cloud after everything has run)
                 upload_from_to_node_function_table(
                     from_to_node_function_table, config.waterschap, upload_to_cloud=False
                 )
 
+        # if lower values have been assigned for the water_demand situation, then overwrite the max_flow_rate with the value from water_drainage
+        from_to_node_function_table = overwrite_demand_values_with_drainage_values(from_to_node_function_table)
+        from_to_node_function_table = overwrite_guessed_flow_rates_if_not_allowed_to_scale(from_to_node_function_table)
+        from_to_node_function_table = cap_guessed_flow_rates_at_minimum_and_maximum(
+            from_to_node_function_table, min_scaled_flow_rate, max_scaled_flow_rate
+        )
+
+        # update the max_flow_rate in the ribasim_model with the final flow rates of all situations
+        ribasim_model.outlet.static.df = initial_outlet_static
+        ribasim_model.pump.static.df = initial_pump_static
+        ribasim_model = update_max_flow_rates_in_ribasim_model(ribasim_model, from_to_node_function_table)
+        ribasim_model.outlet.static.df["flow_rate"] = ribasim_model.outlet.static.df["max_flow_rate"]
+        ribasim_model.pump.static.df["flow_rate"] = ribasim_model.pump.static.df["max_flow_rate"]
+
         # replace the original meteo, initial water levels, boundary levels and end time in the ribasim model
-        ribasim_model.basin.time.df = original_meteo
         ribasim_model.basin.state.df = original_initial_waterlevels
         ribasim_model.basin.time.df = original_basin_time
         ribasim_model.level_boundary.time.df = original_level_boundary_time
         ribasim_model.level_boundary.static.df = original_level_boundary_static
         ribasim_model.endtime = original_endtime
+        # models are scaled in threads (scale_outlets_pumps_concurrently): assign to this model only, without
+        # validation (that would read the toml-file) and without ribasim's class-wide `_no_validate()`
+        assign_without_validation(ribasim_model, "filepath", original_filepath)
 
         if not add_information_to_from_to_node_function_table:
             from_to_node_function_table = original_from_to_node_function_table
@@ -943,3 +1105,29 @@ def scale_outlets_pumps(config: OutletPumpScalingConfig):
         # update the max_flow_rate in the ribasim_model based on the new flow rates in the from_to_node_function_table
         ribasim_model = update_max_flow_rates_in_ribasim_model(config.ribasim_model, from_to_node_function_table)
         return ribasim_model, from_to_node_function_table
+
+
+def scale_outlets_pumps_concurrently(configs: list[OutletPumpScalingConfig], workers: int | None = None):
+    """Scale outlet and pump capacities of several models (e.g. water authorities) at the same time.
+
+    Every model is scaled in its own thread, its situations are run as separate Ribasim processes (see
+    `OutletPumpScalingConfig.workers`). The models should not share a `ribasim_model_path`.
+
+    Parameters
+    ----------
+    configs : list[OutletPumpScalingConfig]
+        Complete scaler configuration per model.
+    workers : int | None, optional
+        Number of models scaled at the same time. Defaults to all.
+
+    Returns
+    -------
+    list[tuple[Model, pd.DataFrame]]
+        Per configuration the updated Ribasim model and the connector-node table.
+    """
+    model_dirs = [Path(config.ribasim_model_path).parent for config in configs]
+    if len(set(model_dirs)) != len(model_dirs):
+        raise ValueError("Models scaled concurrently should each have their own model directory.")
+
+    with ThreadPoolExecutor(max_workers=workers or max(1, len(configs))) as executor:
+        return list(executor.map(scale_outlets_pumps, configs))
@@ -10,6 +10,7 @@ import numpy as np
 import numpy.typing as npt
 import pandas as pd
 import pydantic
+import shapely
 import shapely.ops
 import tqdm.auto as tqdm
 from shapely.geometry import LineString, MultiLineString, MultiPoint, Point, Polygon
@@ -488,50 +489,64 @@ class ParseCrossings:
         # Determine endpoints
         df_linesingle, df_endpoints = self._extend_linestrings(df_linesingle, df_peil_boundary)
 
-        # Find crossings of the lines with the peilgebieden.
+        # Find crossings of the lines with the peilgebieden. The intersecting
+        # (line, peilgebied boundary) pairs, the areas completely containing
+        # a line and the crossing points are determined in bulk for all lines.
+        lines = df_linesingle.geometry.to_numpy()
+        pair_line, pair_peil = df_peil_boundary.sindex.query(lines, predicate="intersects")
+        order = np.argsort(pair_line, kind="stable")
+        pair_line, pair_peil = pair_line[order], pair_peil[order]
+        within_line, within_peil = df_peilgebieden.sindex.query(lines, predicate="within")
+        order = np.argsort(within_line, kind="stable")
+        within_line, within_peil = within_line[order], within_peil[order]
+
+        # Explode the intersections to single parts and remove empty or
+        # non-point geometries.
+        points = shapely.intersection(df_peil_boundary.geometry.to_numpy()[pair_peil], lines[pair_line])
+        parts, part_pair = shapely.get_parts(points, return_index=True)
+        is_point = shapely.get_type_id(parts) == shapely.GeometryType.POINT
+        is_point &= ~shapely.is_empty(parts)
+        parts, part_pair = parts[is_point], part_pair[is_point]
+
+        # Group the pairs, areas and points by line.
+        hit_lines, pair_start, pair_count = np.unique(pair_line, return_index=True, return_counts=True)
+        within_start = np.searchsorted(within_line, hit_lines, side="left")
+        within_end = np.searchsorted(within_line, hit_lines, side="right")
+        part_start = np.searchsorted(part_pair, pair_start, side="left")
+        part_end = np.searchsorted(part_pair, pair_start + pair_count, side="left")
+
         crossings: dict[tuple[str | None, str | None, float, float], Any] = {}
-        for row_line in tqdm.tqdm(
-            df_linesingle.itertuples(),
-            total=len(df_linesingle),
+        for i in tqdm.trange(
+            len(hit_lines),
             desc=f"Find crossings for '{layer}'",
             disable=self.disable_progress,
         ):
-            # Find the intersection of the current line with the peilgebieden.
-            idx_peilgebieden = df_peil_boundary.sindex.query(row_line.geometry, predicate="intersects")
-
-            # If no areas intersect, continue with the following line.
-            if len(idx_peilgebieden) == 0:
-                continue
+            idx_peilgebieden = pair_peil[pair_start[i] : pair_start[i] + pair_count[i]]
 
             # Add peilgebieden which completely contain the current line.
-            idx_peilgebieden2 = df_peilgebieden.sindex.query(row_line.geometry, predicate="within")
+            idx_peilgebieden2 = within_peil[within_start[i] : within_end[i]]
             idx_peilgebieden2 = list(set(idx_peilgebieden2).difference(set(idx_peilgebieden)))
             idx_within = df_peilgebieden.index[idx_peilgebieden2].to_numpy()
 
-            # Find crossings with the current line.
-            df_points = df_peil_boundary.iloc[idx_peilgebieden, :].copy()
-            df_points["geometry"] = df_points.intersection(row_line.geometry)
-
             # Subset of polygons of the intersecting areas.
-            df_subsetpeil_poly = df_peilgebieden.loc[np.hstack([df_points.index.to_numpy(), idx_within]), :].copy()
+            idx_points = df_peil_boundary.index[idx_peilgebieden].to_numpy()
+            df_subsetpeil_poly = df_peilgebieden.loc[np.hstack([idx_points, idx_within]), :].copy()
 
-            # Explode to single parts and remove empty or non-point geometries.
-            df_points = df_points.explode(ignore_index=False, index_parts=True)
-            df_points = df_points[(~df_points.is_empty) & (df_points.geometry.geom_type == "Point")].copy()
+            # Crossings with the current line.
+            df_points = gpd.GeoDataFrame(
+                geometry=parts[part_start[i] : part_end[i]],
+                crs=df_peil_boundary.crs,
+            )
 
-            if len(df_subsetpeil_poly) == 0:
-                # No areas intersect, continue with the following line.
-                continue
-            else:
-                # At least 1 peilgebied match: Determine potential crossing
-                # with these peilgebieden.
-                crossings = self._add_potential_crossing(
-                    crossings,
-                    df_endpoints,
-                    df_linesingle,
-                    df_points,
-                    df_subsetpeil_poly,
-                )
+            # At least 1 peilgebied match: Determine potential crossing with
+            # these peilgebieden.
+            crossings = self._add_potential_crossing(
+                crossings,
+                df_endpoints,
+                df_linesingle,
+                df_points,
+                df_subsetpeil_poly,
+            )
 
         # Add the found crossings.
         for (pfrom, pto, _, _), (crossing, line_ids) in crossings.items():
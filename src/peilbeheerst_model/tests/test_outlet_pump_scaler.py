@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pandas as pd
+from peilbeheerst_model.outlet_pump_scaler import (
+    OutletPumpScalingConfig,
+    determine_basin_exceedance,
+    update_from_to_node_function_table,
+)
+
+
+def test_update_from_to_node_function_table():
+    config = OutletPumpScalingConfig(
+        ribasim_model_path=Path("work_dir/ribasim.toml"),
+        ribasim_model=None,
+        from_to_node_function_table=None,
+        waterschap="test",
+        cloud=None,
+    )
+    assert config.situation_model_path("water_drainage") == Path("work_dir/scaling/water_drainage/ribasim.toml")
+
+    # basin 1 is too high during 10 days, basin 2 never
+    basin_information = pd.DataFrame({"meta_streefpeil": [0.0, 0.0]}, index=pd.Index([1, 2], name="node_id"))
+    levels = pd.DataFrame(
+        {"time": pd.date_range("2020-01-01", periods=10).repeat(2), "node_id": [1, 2] * 10, "level": [0.1, 0.0] * 10}
+    )
+    basin_exceedance = determine_basin_exceedance(levels, basin_information, "water_drainage", 0, 0.02, 5)
+    assert basin_exceedance["exceeds_deviation_duration_iteration_0_water_drainage"].tolist() == [10, 0]
+    assert basin_exceedance["scale_direction_iteration_0_water_drainage"].tolist() == ["higher", "lower"]
+
+    # drains downstream of the basins are scaled, the supply is kept equal
+    table = pd.DataFrame(
+        {
+            "node_id": [11, 12, 13],
+            "node_type": ["Outlet", "Pump", "Outlet"],
+            "from_node_id": [1, 2, 1],
+            "to_node_id": [3, 3, 2],
+            "function": ["drain", "drain", "supply"],
+            "meta_known_flow_rate": False,
+            "allowed_to_scale": True,
+            "max_flow_rate": [5.0, 5.0, 5.0],
+        }
+    )
+    for iteration in range(2):
+        basin_exceedance = determine_basin_exceedance(levels, basin_information, "water_drainage", iteration, 0.02, 5)
+        table, column = update_from_to_node_function_table(table, basin_exceedance, "water_drainage", iteration, config)
+    assert column == "new_max_flow_rates_2_water_drainage"
+    assert table["new_max_flow_rates_1_water_drainage"].tolist() == [1.0, 10.0, 1.0]
+    assert table[column].tolist() == [2.0, 5.0, 1.0]
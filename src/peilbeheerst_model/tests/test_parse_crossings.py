@@ -0,0 +1,44 @@
+import geopandas as gpd
+from shapely.geometry import LineString, Point, box
+
+from peilbeheerst_model.parse_crossings import ParseCrossings
+
+
+def test_find_crossings_with_peilgebieden(tmp_path):
+    path = tmp_path / "crossings.gpkg"
+    crs = "EPSG:28992"
+    peilgebied = gpd.GeoDataFrame(
+        {"globalid": ["west", "east", "north"]},
+        geometry=[box(0, 0, 100, 100), box(100, 0, 200, 100), box(0, 100, 200, 200)],
+        crs=crs,
+    )
+    streefpeil = gpd.GeoDataFrame(
+        {"globalid": ["west", "east", "north"], "waterhoogte": [-1.0, -1.5, -0.5]}, geometry=[None] * 3, crs=crs
+    )
+    hydroobject = gpd.GeoDataFrame(
+        {"globalid": ["crossing", "within", "outside", "double"]},
+        geometry=[
+            LineString([(50, 50), (150, 50)]),
+            LineString([(120, 20), (180, 20)]),
+            LineString([(300, 50), (400, 50)]),
+            LineString([(150, 80), (150, 150), (50, 150), (50, 80)]),
+        ],
+        crs=crs,
+    )
+    structures = gpd.GeoDataFrame({"globalid": ["s"]}, geometry=[Point(1000, 1000)], crs=crs)
+    for layer, df in [
+        ("peilgebied", peilgebied),
+        ("streefpeil", streefpeil),
+        ("hydroobject", hydroobject),
+        ("stuw", structures),
+        ("gemaal", structures.assign(globalid=["g"])),
+    ]:
+        df.to_file(path, layer=layer)
+
+    crossings = ParseCrossings(path, disable_progress=True).find_crossings_with_peilgebieden("hydroobject")
+
+    # one crossing per intersection of a line with a peilgebied boundary, ordered by line
+    assert crossings.hydroobject.tolist() == ["crossing", "double", "double"]
+    assert crossings.peilgebied_from.tolist() == ["west", "north", "north"]
+    assert crossings.peilgebied_to.tolist() == ["east", "west", "east"]
+    assert [(p.x, p.y) for p in crossings.geometry] == [(100, 50), (50, 100), (150, 100)]
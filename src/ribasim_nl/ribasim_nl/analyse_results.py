@@ -14,7 +14,10 @@ The module is split into two main blocks:
     ReadOutputFile              Read Ribasim .arrow or .nc output; resample to daily.
     LaadKoppeltabel             Load and parse the koppeltabel Excel (link_id, geometry).
     LaadSpecifiekeBewerking     Load the specific-operations table.
-    LoadMeasurements            Load aanvoer/afvoer daily measurement CSVs.
+    IngestMeasurements          Convert the measurement CSVs into a memory-mapped columnar
+                                (Arrow) store with the daily values.
+    LoadMeasurements            Load aanvoer/afvoer daily measurements (store or CSVs), only
+                                the series referenced by the koppeltabel.
     ApplySpecificOperation      Apply sum / negate / formula to model output for a link.
     ConvertToDecade             Aggregate daily data to decade (10-day) averages.
     AddCumulative               Add cumulative columns to a combined daily/decade DataFrame.
@@ -36,7 +39,8 @@ The module is split into two main blocks:
     CompareOutputMeasurements   Main entry point for the standard validation workflow;
                                 accepts abs_drempel_min_dynamica, criteria_groepen, and
                                 min_groepen_fractie; writes Voldoet_dag / Voldoet_dec
-                                pass/fail columns to the output GeoPackages.
+                                pass/fail columns to the output GeoPackages; renders the
+                                figures and time series on `workers` processes.
 
   Key private helpers:
     _sanitize_filename          Strip/replace characters invalid in filenames.
@@ -45,6 +49,8 @@ The module is split into two main blocks:
     _KleurBeoordelingen         Colour assessment columns in an openpyxl worksheet.
     _build_model_graph          Build upstream/downstream lookup dicts for a model once.
     _find_basin_for_link        Traverse model graph to find the Basin for a link.
+    _RenderQueue                Render locations as soon as they are computed, bounded in flight.
+    _render_location            Render the figures and time series of one location (process pool).
 
 **Block 2 — LHM 4.1 comparison (AnalyseLHM41Vergelijking)**
   Loads a GeoPackage coupling layer, groups measurement series by LHM 4.1 CSV, sums
@@ -72,12 +78,13 @@ koppeltabel.xlsx + Specifiek_bewerking.xlsx
     → LaadKoppeltabel / LaadSpecifiekeBewerking
     → CompareOutputMeasurements
         ├─ ReadOutputFile          (model .arrow / .nc)
-        ├─ LoadMeasurements        (measurement CSVs)
+        ├─ LoadMeasurements        (measurement store / CSVs, see IngestMeasurements)
         ├─ ApplySpecificOperation  (per link)
         ├─ ConvertToDecade + AddCumulative
         ├─ GetStatisticsPerPeriod → BeoordeelCriteria
-        ├─ PlotAndSave (+ PlotAndSaveFractie)
-        ├─ SaveTimeseries
+        ├─ _RenderQueue → _render_location  (per location, process pool)
+        │    ├─ PlotAndSave (+ PlotAndSaveFractie)
+        │    └─ SaveTimeseries
         └─ ExportToExcel → Validatie_criteria.xlsx
                          → Validatie_resultaten[_dec].gpkg
 """
@@ -85,7 +92,9 @@ koppeltabel.xlsx + Specifiek_bewerking.xlsx
 # %%
 import ast
 import operator
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 from typing import Any, cast
 
@@ -95,6 +104,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import openpyxl
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
 import tqdm
 import xarray as xr
 from openpyxl.styles import PatternFill
@@ -1320,6 +1331,7 @@ def CompareOutputMeasurements(
     output_is_feather: bool = True,
     output_is_nc: bool = False,
     resample_to_daily: bool = True,
+    workers: int = 1,
 ) -> None:
     """Compare model output with measurements, calculate statistics, and save results.
 
@@ -1327,6 +1339,11 @@ def CompareOutputMeasurements(
     measurement location, and an Excel file with criteria and assessments.
     When concentration.nc is present, a Fractie_locaties.gpkg is also written.
 
+    The figures and time series Excel files of a location are rendered as soon as its statistics
+    and assessments are computed, optionally on a process pool (``workers``) with a bounded number
+    of locations in flight, so memory does not grow with the number of locations. The results are
+    gathered in koppeltabel order, independent of the number of workers.
+
     Parameters
     ----------
     loc_koppeltabel
@@ -1375,7 +1392,13 @@ def CompareOutputMeasurements(
         Read model output as NetCDF. Default False.
     resample_to_daily
         Resample sub-daily model output to daily averages. Default True.
+    workers
+        Number of processes used to render the figures and time series Excel files. Default 1
+        (render in the current process).
     """
+    _fase_tijden: dict[str, float] = {}
+    _t_fase = time.perf_counter()
+
     koppeltabel = LaadKoppeltabel(loc_koppeltabel, apply_for_water_authority=apply_for_water_authority)
     specifics = LaadSpecifiekeBewerking(loc_specifics)
 
@@ -1397,7 +1420,8 @@ def CompareOutputMeasurements(
         resample_to_daily=resample_to_daily,
     )
 
-    measurements = LoadMeasurements(meas_folder)
+    # Alleen de meetreeksen uit de (gefilterde) koppeltabel inlezen
+    measurements = LoadMeasurements(meas_folder, meetreeksen=koppeltabel["MeetreeksC"])
 
     # ── Fractie plots setup (optioneel, vereist model met concentration.nc) ──────
     print("Inlezen model...")
@@ -1430,6 +1454,14 @@ def CompareOutputMeasurements(
         ds.close()
         print(f"  concentration.nc ingelezen ({len(_concentration_df)} rijen).")
 
+    # Pre-groepeer de concentraties per basin: elke fractieplot krijgt alleen de eigen tabel mee
+    _concentration_per_basin: dict[int, pd.DataFrame] = (
+        {int(nid): df for nid, df in _concentration_df.groupby("node_id")} if _concentration_df is not None else {}
+    )
+
+    _fase_tijden["inlezen"] = time.perf_counter() - _t_fase
+    _t_fase = time.perf_counter()
+
     results_measurements: dict[str, dict[str, list[object]]] = {}
     results_measurements_decade: dict[str, dict[str, list[object]]] = {}
     results_excel = {}  # voor het Excel-criteriabestand
@@ -1437,6 +1469,15 @@ def CompareOutputMeasurements(
     # Aparte lijst voor fractie locaties (los van de validatie geopackages)
     _fractie_records: list[dict] = []
 
+    # Figuren en tijdreeksen per locatie; worden direct na het berekenen (parallel) weggeschreven
+    _render_queue = _RenderQueue(workers)
+    _n_locaties = 0
+
+    def _verzamel_fracties(gerenderd: list[tuple[dict | None, str | None]]) -> None:
+        for fractie_record, pop_up_fractie in gerenderd:
+            if fractie_record is not None and pop_up_fractie is not None:
+                _fractie_records.append({**fractie_record, "figure_path": pop_up_fractie})
+
     # Pre-bouw graph voor O(1) basin-traversal in de loop hieronder
     _model_graph: dict | None = _build_model_graph(model) if model is not None else None
 
@@ -1648,16 +1689,19 @@ def CompareOutputMeasurements(
             _geom = shapely_translate(_geom, xoff=_occ * _SHIFT_M, yoff=_occ * _SHIFT_M)
 
         bron_meting = waterschap
-        PlotAndSave(
-            combined_df=combined_df_cum,
-            stats=stats,
-            koppelinfo=full_title,
-            fig_name=fig_name,
-            bron_meting=bron_meting,
-            output_folder=Path(model_folder, "results", "figures"),
-            criteria_grenzen=criteria_grenzen,
-            abs_drempel=abs_drempel,
-            abs_drempel_min_dynamica=abs_drempel_min_dynamica,
+        _render_taak: dict[str, Any] = {"plots": [], "fractie": None, "fractie_record": None}
+        _render_taak["plots"].append(
+            {
+                "combined_df": combined_df_cum,
+                "stats": stats,
+                "koppelinfo": full_title,
+                "fig_name": fig_name,
+                "bron_meting": bron_meting,
+                "output_folder": Path(model_folder, "results", "figures"),
+                "criteria_grenzen": criteria_grenzen,
+                "abs_drempel": abs_drempel,
+                "abs_drempel_min_dynamica": abs_drempel_min_dynamica,
+            }
         )
         fig_name_clean = _sanitize_filename(fig_name)
         pop_up_figure = f'<img src="../figures/{waterschap}/{fig_name_clean}.png" width=400 height=300>'
@@ -1667,29 +1711,27 @@ def CompareOutputMeasurements(
             _fractie_result = _find_basin_for_link(model, link, _graph=_model_graph)
             if _fractie_result is not None:
                 fractie_basin_node_id, basin_richting = _fractie_result
-                pop_up_fractie = PlotAndSaveFractie(
-                    combined_df=combined_df,
-                    concentration_df=_concentration_df,
-                    basin_node_id=fractie_basin_node_id,
-                    basin_richting=basin_richting,
-                    tracers=_tracers,
-                    fig_name=fig_name,
-                    waterschap=waterschap,
-                    output_folder=_frac_fig_folder,
-                )
-                if pop_up_fractie is not None:
-                    _fractie_records.append(
-                        {
-                            "MeetreeksC": existing_measurements[0],
-                            "Waterschap": waterschap,
-                            "Aan/Af": meetlocaties_link.iloc[0]["Aan/Af"],
-                            "link_id": link,
-                            "basin_node_id": fractie_basin_node_id,
-                            "figure_path": pop_up_fractie,
-                            "QGIS_map_tip": f"figures_fracties/{waterschap}/{fig_name_clean}_fractie.png",
-                            "geometry": _geom,
-                        }
-                    )
+                _render_taak["fractie"] = {
+                    "combined_df": combined_df,
+                    "concentration_df": _concentration_per_basin.get(int(fractie_basin_node_id)),
+                    "basin_node_id": fractie_basin_node_id,
+                    "basin_richting": basin_richting,
+                    "tracers": _tracers,
+                    "fig_name": fig_name,
+                    "waterschap": waterschap,
+                    "output_folder": _frac_fig_folder,
+                }
+                # figure_path volgt na het renderen; alleen locaties met een fractieplot worden bewaard
+                _render_taak["fractie_record"] = {
+                    "MeetreeksC": existing_measurements[0],
+                    "Waterschap": waterschap,
+                    "Aan/Af": meetlocaties_link.iloc[0]["Aan/Af"],
+                    "link_id": link,
+                    "basin_node_id": fractie_basin_node_id,
+                    "figure_path": None,
+                    "QGIS_map_tip": f"figures_fracties/{waterschap}/{fig_name_clean}_fractie.png",
+                    "geometry": _geom,
+                }
             else:
                 print(f"    Geen Basin bereikbaar voor link {link} — fractieplot overgeslagen")
 
@@ -1758,16 +1800,18 @@ def CompareOutputMeasurements(
 
         # --- Save the results per decade ---
         fig_name_dec = fig_name + "_decade"
-        PlotAndSave(
-            combined_df=combined_df_decade_cum,
-            stats=stats_dec,
-            koppelinfo=full_title,
-            fig_name=fig_name_dec,
-            bron_meting=bron_meting,
-            output_folder=Path(model_folder) / "results" / "figures",
-            criteria_grenzen=criteria_grenzen,
-            abs_drempel=abs_drempel,
-            abs_drempel_min_dynamica=abs_drempel_min_dynamica,
+        _render_taak["plots"].append(
+            {
+                "combined_df": combined_df_decade_cum,
+                "stats": stats_dec,
+                "koppelinfo": full_title,
+                "fig_name": fig_name_dec,
+                "bron_meting": bron_meting,
+                "output_folder": Path(model_folder) / "results" / "figures",
+                "criteria_grenzen": criteria_grenzen,
+                "abs_drempel": abs_drempel,
+                "abs_drempel_min_dynamica": abs_drempel_min_dynamica,
+            }
         )
         fig_name_dec_clean = _sanitize_filename(fig_name) + "_decade"
         pop_up_figure_dec = f'<img src="../figures/{waterschap}/{fig_name_dec_clean}.png" width=400 height=300>'
@@ -1826,13 +1870,15 @@ def CompareOutputMeasurements(
 
         # --- Tijdsreeksen wegschrijven per meetlocatie ---
         ts_folder = Path(model_folder) / "results" / "tijdreeksen" / waterschap
-        SaveTimeseries(
-            combined_df=combined_df,
-            combined_df_decade=combined_df_decade,
-            fig_name_clean=fig_name_clean,
-            meetreeks_naam=meetreeks_naam,
-            output_folder=ts_folder,
-        )
+        _render_taak["timeseries"] = {
+            "combined_df": combined_df,
+            "combined_df_decade": combined_df_decade,
+            "fig_name_clean": fig_name_clean,
+            "meetreeks_naam": meetreeks_naam,
+            "output_folder": ts_folder,
+        }
+        _verzamel_fracties(_render_queue.submit(_render_taak.pop("fractie_record"), _render_taak))
+        _n_locaties += 1
 
         # --- Sla record op voor het Excel-criteriabestand ---
         results_excel[waterschap].append(
@@ -1843,6 +1889,15 @@ def CompareOutputMeasurements(
             }
         )
 
+    _fase_tijden["berekenen en figuren"] = time.perf_counter() - _t_fase
+    _t_fase = time.perf_counter()
+
+    # Laatste figuren en tijdreeksen van de process pool afwachten
+    _verzamel_fracties(_render_queue.close())
+
+    _fase_tijden["figuren afronden"] = time.perf_counter() - _t_fase
+    _t_fase = time.perf_counter()
+
     results_combined = []
     results_dec_combined = []
 
@@ -1887,6 +1942,74 @@ def CompareOutputMeasurements(
         frac_gdf.to_file(frac_gpkg, layer="fractie_locaties")
         print(f"Fractie locaties geopackage opgeslagen: {frac_gpkg} ({len(_fractie_records)} locaties)")
 
+    _fase_tijden["wegschrijven"] = time.perf_counter() - _t_fase
+    print(f"Tijd per fase ({_n_locaties} locaties, {workers} worker(s)):")
+    for fase, duur in _fase_tijden.items():
+        print(f"  {fase:<24} {duur:8.1f} s")
+
+
+class _RenderQueue:
+    """Render measurement locations (see _render_location) in submission order, as soon as they are submitted.
+
+    With one worker a location is rendered on submit. With more workers it is rendered on a process pool and
+    submit blocks while more than ``2 * workers`` locations are in flight, so the DataFrames of at most that
+    many locations are held in memory.
+
+    Parameters
+    ----------
+    workers
+        Number of processes used to render. Default 1 (render in the current process).
+    """
+
+    def __init__(self, workers: int = 1):
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.max_pending = 2 * workers
+        self.pending: deque[tuple[Any, Future]] = deque()
+
+    def submit(self, key: Any, taak: dict[str, Any]) -> list[tuple[Any, str | None]]:
+        """Render a location; returns (key, result of _render_location) of the locations finished in order."""
+        if self.executor is None:
+            return [(key, _render_location(taak))]
+        self.pending.append((key, self.executor.submit(_render_location, taak)))
+        finished = []
+        while len(self.pending) > self.max_pending or (self.pending and self.pending[0][1].done()):
+            key, future = self.pending.popleft()
+            finished.append((key, future.result()))
+        return finished
+
+    def close(self) -> list[tuple[Any, str | None]]:
+        """Wait for the locations in flight and shut down the process pool; returns them as `submit`."""
+        finished = [(key, future.result()) for key, future in self.pending]
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown()
+        return finished
+
+
+def _render_location(taak: dict[str, Any]) -> str | None:
+    """Render the figures and write the time series of a single measurement location.
+
+    Module-level so it can be executed on a process pool by _RenderQueue.
+
+    Parameters
+    ----------
+    taak
+        Keyword arguments per artifact: 'plots' (list, for PlotAndSave), 'timeseries'
+        (for SaveTimeseries) and 'fractie' (for PlotAndSaveFractie, or None).
+
+    Returns
+    -------
+    str or None
+        HTML ``<img>`` tag of the fraction figure (see PlotAndSaveFractie), or None when
+        no fraction figure is made.
+    """
+    for plot in taak["plots"]:
+        PlotAndSave(**plot)
+    SaveTimeseries(**taak["timeseries"])
+    if taak["fractie"] is None:
+        return None
+    return PlotAndSaveFractie(**taak["fractie"])
+
 
 def ConvertToDecade(combined_df_results):
     """Aggregate a daily DataFrame to decade (10-day period) averages.
@@ -1944,41 +2067,122 @@ def ConvertToDecade(combined_df_results):
     return result
 
 
-def LoadMeasurements(meas_folder) -> dict[str, pd.DataFrame]:
+# Meetbestanden per type (dagwaarden, één kolom per MeetreeksC)
+_MEAS_FILES = {
+    "aanvoer_dag": "Metingen_aanvoer_dag_totaal.csv",
+    "afvoer_dag": "Metingen_afvoer_dag_totaal.csv",
+}
+
+# Standaardmap (binnen meas_folder) van de kolomgewijze opslag geschreven door IngestMeasurements
+_MEAS_STORE_FOLDER = "arrow"
+
+
+def _read_measurement_csv(path: Path, meetreeksen: set | None = None) -> pd.DataFrame | None:
+    """Read a daily measurement CSV; only the 'time' column and `meetreeksen` (all when None) are parsed."""
+    usecols = None if meetreeksen is None else (lambda c: c in meetreeksen or c in ("Unnamed: 0", "Datum"))
+    df = pd.read_csv(path, usecols=usecols)
+    if "Unnamed: 0" in df.columns:
+        df.rename(columns={"Unnamed: 0": "time"}, inplace=True)
+    elif "Datum" in df.columns:
+        df.rename(columns={"Datum": "time"}, inplace=True)
+    else:
+        print(f"Cannot identify date/time column in {path.name}. Expected 'Unnamed: 0' or 'Datum'.")
+        return None
+    df["time"] = pd.to_datetime(df["time"], format="mixed")
+    return df
+
+
+def _measurement_store_is_current(store_path: Path, csv_path: Path) -> bool:
+    """Whether the store file exists and was written from the current version of the CSV."""
+    if not store_path.is_file():
+        return False
+    metadata = pa.ipc.open_file(pa.memory_map(str(store_path))).schema.metadata or {}
+    stat = csv_path.stat()
+    return (
+        metadata.get(b"bron_mtime_ns") == str(stat.st_mtime_ns).encode()
+        and metadata.get(b"bron_size") == str(stat.st_size).encode()
+    )
+
+
+def IngestMeasurements(meas_folder, store_folder=None) -> Path:
+    """Convert the measurement CSVs of a folder into a columnar (Arrow IPC) store; a one-time step per folder.
+
+    Per measurement type ('aanvoer_dag', 'afvoer_dag') the daily values are written uncompressed, one column
+    per MeetreeksC, so LoadMeasurements can memory-map the files and read only the referenced series. Missing
+    measurements are stored as nulls and read as NaN, as from the CSV. Decade averages are not stored: they are
+    computed per location by CompareOutputMeasurements, from the summed series on the model time axis. The source
+    CSV (modification time, size) is recorded in the schema metadata; LoadMeasurements falls back to the CSV when
+    it has changed since.
+
+    Parameters
+    ----------
+    meas_folder
+        Folder containing the measurement CSV files.
+    store_folder
+        Folder of the store. Default ``{meas_folder}/arrow``.
+
+    Returns
+    -------
+    Path
+        Folder of the store.
+    """
+    store_folder = Path(meas_folder) / _MEAS_STORE_FOLDER if store_folder is None else Path(store_folder)
+    store_folder.mkdir(parents=True, exist_ok=True)
+    for key, file in _MEAS_FILES.items():
+        csv_path = Path(meas_folder) / file
+        dagmetingen = _read_measurement_csv(csv_path)
+        if dagmetingen is None:
+            continue
+        stat = csv_path.stat()
+        metadata = {"bron": file, "bron_mtime_ns": str(stat.st_mtime_ns), "bron_size": str(stat.st_size)}
+        table = pa.Table.from_pandas(dagmetingen, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+        feather.write_feather(table, store_folder / f"{key}.arrow", compression="uncompressed")
+        print(f"{file}: {dagmetingen.shape[1] - 1} meetreeksen opgeslagen in {store_folder}")
+    return store_folder
+
+
+def LoadMeasurements(meas_folder, meetreeksen=None, store_folder=None) -> dict[str, pd.DataFrame]:
     """The function `LoadMeasurements` reads measurement files from a specified folder, parses date columns, and returns a dictionary of measurements.
 
+    When a current store written by IngestMeasurements is present, the series are read from the
+    memory-mapped store instead of the CSV files.
+
     Parameters
     ----------
     meas_folder
         The `meas_folder` is a string that represents the folder path where the measurement files are located.
+    meetreeksen
+        Measurement series (MeetreeksC) to read, e.g. of the (filtered) koppeltabel. Default None (all series).
+    store_folder
+        Folder of the store written by IngestMeasurements. Default ``{meas_folder}/arrow``.
 
     Returns
     -------
         The function `LoadMeasurements` returns a dictionary `measurements` containing different types of
     measurements loaded from CSV files located in the specified `meas_folder`. The keys in the
-    dictionary correspond to the types of measurements (e.g., 'aanvoer_dag', 'aanvoer_decade',
-    'afvoer_dag', 'afvoer_decade'), and the values are pandas DataFrames.
+    dictionary correspond to the types of measurements ('aanvoer_dag', 'afvoer_dag'), and the values are
+    pandas DataFrames.
 
     """
-    # Define the different measurement files
-    meas_files = {
-        "aanvoer_dag": "Metingen_aanvoer_dag_totaal.csv",
-        #'aanvoer_decade': 'Metingen_aanvoer_decade.csv',
-        "afvoer_dag": "Metingen_afvoer_dag_totaal.csv",
-        #'afvoer_decade':  'Metingen_afvoer_decade.csv'
-    }
+    store_folder = Path(meas_folder) / _MEAS_STORE_FOLDER if store_folder is None else Path(store_folder)
+    wanted = None if meetreeksen is None else set(meetreeksen)
 
     measurements = {}
-    for key, file in meas_files.items():
-        df = pd.read_csv(Path(meas_folder) / file)
-        if "Unnamed: 0" in df.columns:
-            df.rename(columns={"Unnamed: 0": "time"}, inplace=True)
-        elif "Datum" in df.columns:
-            df.rename(columns={"Datum": "time"}, inplace=True)
-        else:
-            print(f"Cannot identify date/time column in {file}. Expected 'Unnamed: 0' or 'Datum'.")
+    for key, file in _MEAS_FILES.items():
+        csv_path = Path(meas_folder) / file
+        store_path = store_folder / f"{key}.arrow"
+        if _measurement_store_is_current(store_path, csv_path):
+            names = pa.ipc.open_file(pa.memory_map(str(store_path))).schema.names
+            columns = ["time", *(c for c in names if c != "time" and (wanted is None or c in wanted))]
+            measurements[key] = feather.read_table(store_path, columns=columns, memory_map=True).to_pandas()
+            continue
+
+        if store_path.is_file():
+            print(f"Opslag {store_path} is verouderd ten opzichte van {file}; de CSV wordt ingelezen.")
+        df = _read_measurement_csv(csv_path, wanted)
+        if df is None:
             continue
-        df["time"] = pd.to_datetime(df["time"], format="mixed")
         measurements[key] = df
 
     return measurements
@@ -2233,7 +2437,7 @@ def ExtraInfoToevoegenAllData(
     label_below = f"<{threshold}" if above_operator == ">=" else f"<={threshold}"
 
     koppeltabel = LaadKoppeltabel(loc_koppeltabel, apply_for_water_authority)
-    measurements = LoadMeasurements(meas_folder)
+    measurements = LoadMeasurements(meas_folder, meetreeksen=koppeltabel["MeetreeksC"])
 
     # --- Bereken q05 / q95 per MeetreeksC over de volledige meetreeks ---
     def _calc_stats(df):
@@ -3207,7 +3411,10 @@ def AnalyseLHM41Vergelijking(
 
     # ── 2. Laad metingen voor P95-classificatie ───────────────────────────────
     print("Laden metingen...")
-    measurements = LoadMeasurements(meas_folder)
+    _meetreeksen = set(gdf["MeetreeksC"]) | {
+        _MEETREEKS_KOLOM_UITZONDERINGEN.get((m, a), m) for m, a in zip(gdf["MeetreeksC"], gdf["Aan/Af"], strict=True)
+    }
+    measurements = LoadMeasurements(meas_folder, meetreeksen=_meetreeksen)
 
     # ── 3. Per locatie: decade-tijdreeks + statistieken Ribasim vs. meting ───
     print("Berekenen statistieken per locatie (Ribasim vs. meting)...")
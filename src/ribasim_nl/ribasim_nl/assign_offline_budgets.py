@@ -1,5 +1,9 @@
 """Assign offline MODFLOW-MetaSWAP budgets (LHM zarr or local IDF files) to Ribasim Basin nodes."""
 
+import hashlib
+import itertools
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import geopandas as gpd
@@ -9,12 +13,15 @@ import pandas as pd
 import shapely
 import xarray as xr
 from ribasim import Model
+from scipy import sparse
 from tqdm import tqdm
 from xarray.core.dataarray import DataArray
 from xarray.core.dataset import Dataset
 
 from ribasim_nl.assign_fractions_from_budgets import assign_fractions_from_budgets
 
+TIME_CHUNK_SIZE = 366
+
 
 def _crop_to_gdf(da: "xr.DataArray | xr.Dataset", gdf: gpd.GeoDataFrame) -> DataArray | Dataset:
     """Crop a DataArray or Dataset to a gdf.extent (total_bounds)
@@ -35,48 +42,164 @@ def _crop_to_gdf(da: "xr.DataArray | xr.Dataset", gdf: gpd.GeoDataFrame) -> Data
     )
 
 
-def _compute_budgets_per_basin(budgets: xr.Dataset, basin_mask: xr.DataArray, nodata=-999) -> pd.DataFrame:
-    """Sum all modflow budgets per basin_id over a basin_mask."""
-    print(f"sum budgets {list(budgets.data_vars)} rasters to basins")
-
-    if basin_mask.dims != ("x", "y"):
-        basin_mask = basin_mask.transpose("x", "y")
-
-    var_names = list(budgets.data_vars)
-    times = budgets.time.values
-    nt = len(times)
-    nv = len(var_names)
+class BasinAggregator:
+    """Sum raster cells to basins with a sparse basin x cell weight matrix, built once per basin mask.
 
-    mask = basin_mask.values.reshape(-1)
-    valid = np.isfinite(mask) & (mask != nodata)
+    Parameters
+    ----------
+    basin_mask : xr.DataArray
+        Rasterized basin mask (x, y) where each cell value is a node_id, and cells outside any basin are ``nodata``
+    nodata : int, optional
+        Fill value for cells outside any basin, by default -999
+    key : str | None, optional
+        Content of the basin definition and grid the mask is rasterized from, see `from_basin_definition`. By default
+        None (unknown)
+    """
 
-    ids = mask[valid].astype(np.int64)
-    unique_ids, inv = np.unique(ids, return_inverse=True)
-    nb = len(unique_ids)
+    def __init__(self, basin_mask: xr.DataArray, nodata: int = -999, key: str | None = None) -> None:
+        if basin_mask.dims != ("x", "y"):
+            basin_mask = basin_mask.transpose("x", "y")
+        self.mask = basin_mask
+        self.nodata = nodata
+        self.key = key
+
+        mask = basin_mask.values.reshape(-1)
+        valid = np.isfinite(mask) & (mask != nodata)
+        self.cells = np.flatnonzero(valid)
+        self.node_ids, inv = np.unique(mask[valid].astype(np.int64), return_inverse=True)
+
+        # one row per basin, one column per valid cell
+        self.weights = sparse.csr_matrix(
+            (np.ones(len(self.cells)), (inv, np.arange(len(self.cells)))),
+            shape=(len(self.node_ids), len(self.cells)),
+        )
 
-    result = np.zeros((nt, nb, nv), dtype=np.float64)
+    @classmethod
+    def from_basin_definition(
+        cls,
+        basin_definition: gpd.GeoDataFrame,
+        like: xr.DataArray,
+        nodata: int = -999,
+        reuse: Iterable["BasinAggregator"] = (),
+    ) -> "BasinAggregator":
+        """Rasterize basin_definition (column node_id) on the grid of like, or reuse an aggregator of the same content.
 
-    for v, var_name in enumerate(tqdm(var_names, desc="Variables")):
-        data = budgets[var_name]
+        Parameters
+        ----------
+        basin_definition : gpd.GeoDataFrame
+            Basin polygons with a node_id column
+        like : xr.DataArray
+            Raster (x, y) to rasterize basin_definition on
+        nodata : int, optional
+            Fill value for cells outside any basin, by default -999
+        reuse : Iterable[BasinAggregator], optional
+            Aggregators to return if rasterized from the same node_ids, geometries and grid (e.g.
+            `SetDynamicForcing.basin_masks`), by default none
 
+        Returns
+        -------
+        BasinAggregator
+        """
+        digest = hashlib.sha256()
+        digest.update(basin_definition["node_id"].to_numpy(dtype=np.int64).tobytes())
+        digest.update(b"".join(shapely.to_wkb(basin_definition.geometry.to_numpy())))
+        digest.update(np.asarray(like.x.values, dtype=np.float64).tobytes())
+        digest.update(np.asarray(like.y.values, dtype=np.float64).tobytes())
+        digest.update(str(nodata).encode())
+        key = digest.hexdigest()
+
+        for aggregator in reuse:
+            if aggregator.key == key:
+                return aggregator
+        basin_mask = imod.prepare.rasterize(basin_definition, column="node_id", like=like, fill=nodata, dtype=np.int32)
+        return cls(basin_mask, nodata=nodata, key=key)
+
+    @property
+    def cell_counts(self) -> pd.Series:
+        """Number of raster cells per basin node_id."""
+        return pd.Series(np.diff(self.weights.indptr), index=self.node_ids, name="count")
+
+    def _align(self, data: xr.DataArray) -> xr.DataArray:
+        """Select the mask grid from data and order as (time, x, y)."""
+        if not (
+            np.array_equal(data.x.values, self.mask.x.values) and np.array_equal(data.y.values, self.mask.y.values)
+        ):
+            data = data.sel(x=self.mask.x.values, y=self.mask.y.values)
         if data.dims != ("time", "x", "y"):
             data = data.transpose("time", "x", "y")
+        return data
 
-        arr = data.values.reshape(nt, -1)[:, valid]
-        arr = np.where(np.isfinite(arr), arr, 0.0)
+    def aggregate(
+        self, budgets: xr.Dataset, processes: int | None = None, time_chunk: int = TIME_CHUNK_SIZE
+    ) -> pd.DataFrame:
+        """Sum all budget variables per basin_id, reading one time chunk at a time.
 
-        for t in range(nt):
-            result[t, :, v] = np.bincount(inv, weights=arr[t], minlength=nb)
+        Parameters
+        ----------
+        budgets : xr.Dataset
+            Budgets (time, x, y), the grid of the mask is selected from the budgets
+        processes : int | None, optional
+            Number of processes to aggregate variables in parallel, by default None (no parallelization)
+        time_chunk : int, optional
+            Number of timesteps read at once if budgets are not chunked (dask) in time, by default TIME_CHUNK_SIZE
 
-    index = pd.MultiIndex.from_product([unique_ids, times], names=["node_id", "time"])
+        Returns
+        -------
+        pd.DataFrame
+            Budgets per (node_id, time) with a column per variable
+        """
+        var_names = list(budgets.data_vars)
+        times = budgets.time.values
+        nt, nb = len(times), len(self.node_ids)
+
+        args = [(self._align(budgets[var_name]), self.weights, self.cells, time_chunk) for var_name in var_names]
+        if processes is not None and processes > 1 and len(var_names) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = list(executor.map(_aggregate_variable, *zip(*args, strict=True)))
+        else:
+            results = [_aggregate_variable(*i) for i in tqdm(args, desc="Variables")]
+
+        result = np.stack(results, axis=-1) if results else np.zeros((nt, nb, 0))
+        index = pd.MultiIndex.from_product([self.node_ids, times], names=["node_id", "time"])
+
+        return pd.DataFrame(
+            result.transpose(1, 0, 2).reshape(nb * nt, len(var_names)),
+            index=index,
+            columns=var_names,
+        ).sort_index()
+
+
+def _time_chunks(data: xr.DataArray, time_chunk: int) -> list[slice]:
+    """Slices along time, following the dask chunks of data if present."""
+    nt = data.sizes["time"]
+    sizes = data.chunksizes["time"] if data.chunks is not None else [time_chunk] * -(-nt // time_chunk)
+    bounds = np.minimum(np.cumsum([0, *sizes]), nt)
+    return [slice(int(i), int(j)) for i, j in itertools.pairwise(bounds) if j > i]
+
+
+def _aggregate_variable(
+    data: xr.DataArray, weights: sparse.csr_matrix, cells: np.ndarray, time_chunk: int
+) -> np.ndarray:
+    """Sum one (time, x, y) variable to (time, basin), one time chunk and one sparse matmul at a time."""
+    result = np.zeros((data.sizes["time"], weights.shape[0]), dtype=np.float64)
+    for time_slice in _time_chunks(data, time_chunk):
+        arr = data.isel(time=time_slice).values
+        arr = arr.reshape(arr.shape[0], -1)[:, cells].astype(np.float64)
+        arr[~np.isfinite(arr)] = 0.0
+        result[time_slice] = (weights @ arr.T).T
+    return result
+
+
+def _compute_budgets_per_basin(
+    budgets: xr.Dataset, basin_mask: "xr.DataArray | BasinAggregator", nodata=-999, processes: int | None = None
+) -> pd.DataFrame:
+    """Sum all modflow budgets per basin_id over a basin_mask."""
+    print(f"sum budgets {list(budgets.data_vars)} rasters to basins")
 
-    df = pd.DataFrame(
-        result.transpose(1, 0, 2).reshape(nb * nt, nv),
-        index=index,
-        columns=var_names,
-    ).sort_index()
+    if not isinstance(basin_mask, BasinAggregator):
+        basin_mask = BasinAggregator(basin_mask, nodata=nodata)
 
-    return df
+    return basin_mask.aggregate(budgets, processes=processes)
 
 
 def _transpose_basin_definition_polygons(
@@ -338,6 +461,8 @@ class AssignOfflineBudgets:
         surface_runoff_budgets: set[str] | None = None,
         assign_fractions: bool = False,
         fraction_prefix: str | None = None,
+        processes: int | None = None,
+        basin_masks: Iterable[BasinAggregator] = (),
     ) -> tuple[Model, pd.DataFrame]:
         """Compute budgets for Ribasim model.
 
@@ -396,6 +521,11 @@ class AssignOfflineBudgets:
              if True, fractions from budgets will be calculated and assigned to model.basin.concentration.df, default False
         fraction_prefix: str, optional
              if assign_fractions, then user is to define a fraction prefix here, else it kan be kept None. default None
+        processes: int | None, optional
+             number of processes to aggregate budget variables in parallel, default None (no parallelization)
+        basin_masks: Iterable[BasinAggregator], optional
+             basin masks to reuse if rasterized from the same basins and grid, e.g. `SetDynamicForcing.basin_masks`
+             after `SetDynamicForcing.add`. default none
 
         Returns
         -------
@@ -432,36 +562,31 @@ class AssignOfflineBudgets:
             secondary_labels=self.secondary_labels,
         )
         print("rasterize basins to masks")
-        primary_basin_mask = imod.prepare.rasterize(
-            primary_basin_definition,
-            column="node_id",
-            like=_crop_to_gdf(budgets["bdgriv_sys1"].isel(time=0, drop=True), primary_basin_definition),
-            fill=-999,
-            dtype=np.int32,
+        # rasterize on the grid of all basins, so masks of SetDynamicForcing can be reused
+        like = _crop_to_gdf(budgets["bdgriv_sys1"].isel(time=0, drop=True), getattr(model.basin, basin_split).df)
+        assert isinstance(like, xr.DataArray)
+        basin_masks = list(basin_masks)
+        primary_basin_mask = BasinAggregator.from_basin_definition(
+            primary_basin_definition, like=like, reuse=basin_masks
         )
-        secondary_basin_mask = imod.prepare.rasterize(
-            secondary_basin_definition,
-            column="node_id",
-            like=_crop_to_gdf(budgets["bdgriv_sys1"].isel(time=0, drop=True), secondary_basin_definition),
-            fill=-999,
-            dtype=np.int32,
+        secondary_basin_mask = BasinAggregator.from_basin_definition(
+            secondary_basin_definition, like=like, reuse=basin_masks
         )
         print("compute budgets per basin")
         primary_budgets_df = (
             _compute_budgets_per_basin(
-                _crop_to_gdf(budgets[list(self.primary_budget_keys)], primary_basin_definition),
+                budgets[list(self.primary_budget_keys)],
                 primary_basin_mask,
+                processes=processes,
             )
             / 86400
         )
 
         secondary_budgets_df = (
             _compute_budgets_per_basin(
-                _crop_to_gdf(
-                    budgets[list(self.secondary_budget_keys | self.surface_runoff_budget_keys)],
-                    secondary_basin_definition,
-                ),
+                budgets[list(self.secondary_budget_keys | self.surface_runoff_budget_keys)],
                 secondary_basin_mask,
+                processes=processes,
             )
             / 86400
         )
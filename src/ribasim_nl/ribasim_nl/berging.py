@@ -2,17 +2,19 @@
 from pathlib import Path
 from typing import Any, cast
 
+import geopandas as gpd
 import numpy as np
 import numpy.typing as npt
 import pandas as pd
 import rasterio
+import shapely
 import tqdm
 from affine import Affine
 from geopandas import GeoDataFrame
 from rasterio.enums import Resampling
-from rasterio.features import geometry_mask
+from rasterio.features import geometry_mask, rasterize
 from rasterio.windows import Window, from_bounds
-from rasterstats import zonal_stats
+from rasterio.windows import bounds as window_bounds
 from ribasim import Node
 from ribasim.nodes import basin, tabulated_rating_curve
 from shapely.geometry import Point, Polygon
@@ -20,6 +22,7 @@ from shapely.geometry import Point, Polygon
 from ribasim_nl.cloud import CloudStorage
 from ribasim_nl.model import Model
 from ribasim_nl.profiles import MIN_PROFILE_AREA
+from ribasim_nl.raster import zonal_stats_windowed
 from ribasim_nl.settings import settings
 
 LHM_RASTER_FILE = settings.ribasim_nl_data_dir / Path("Basisgegevens/LHM/4.3/input/LHM_data.tif")
@@ -39,6 +42,10 @@ BANDEN = {
     "opp_tertiair": 12,
 }
 
+# blocks of LABEL_BLOCK_SIZE x LABEL_BLOCK_SIZE raster cells to rasterize label grids in; smaller than raster.BLOCK_SIZE
+# as a block is upsampled to sample_res (10 x 10 for 250 m LHM cells at 25 m)
+LABEL_BLOCK_SIZE = 256
+
 
 def percentage_secundair_oppervlaktewater() -> None:
     """Single-use function to compute percentage secondary surface water per LHM cell and write as GTIFF LHM_oppervlaktewater_percentage.tif"""
@@ -115,9 +122,13 @@ def sample_raster(
     all_touched: bool = False,
     stats: str = "mean",
     maaiveld_data: npt.ArrayLike | None = None,
+    maaiveld_band: int | None = None,
+    processes: int | None = None,
 ) -> list[dict[str, Any]]:
     """Sample rasters over Polygons
 
+    Only the raster-windows covering (batches of) polygons are read, see `ribasim_nl.raster.zonal_stats_windowed`.
+
     Args:
         raster_file (Path): Raster-file to sample
         df (GeoDataFrame): GeoDataFrame with polygons
@@ -126,25 +137,24 @@ def sample_raster(
         all_touched (bool, optional): rasterize all_touched setting. Defaults to False.
         stats (str, optional): rasterstats stats setting. Defaults to "mean".
         maaiveld_data (npt.ArrayLike | None, optional): If numpy-array in same shape as raster, raster-data will be subtracted from it. Defaults to None.
+        maaiveld_band (int | None, optional): If specified, raster-data will be subtracted from this band in raster_file. Defaults to None.
+        processes (int | None, optional): Number of processes to sample with. Defaults to None (single process).
 
     Returns
     -------
         list[dict]: Rasterstats output
     """
-    with rasterio.open(raster_file) as raster_src:
-        # read band
-        data = raster_src.read(band)
-
-        if maaiveld_data is not None:
-            data = maaiveld_data - data
-
-        # fill nodata
-        if fill_value is not None:
-            data = np.where(data == raster_src.nodata, fill_value, data)
-
-        affine = raster_src.transform
-
-        return zonal_stats(df, data, affine=affine, stats=stats, nodata=raster_src.nodata, all_touched=all_touched)
+    return zonal_stats_windowed(
+        raster_file=raster_file,
+        df=df,
+        band=band,
+        fill_value=fill_value,
+        all_touched=all_touched,
+        stats=stats,
+        maaiveld_band=maaiveld_band,
+        maaiveld_data=maaiveld_data,
+        processes=processes,
+    )
 
 
 def get_resampled_window(src, polygon, sample_res) -> tuple[tuple[int, int], Window, Affine]:
@@ -196,27 +206,175 @@ def basin_link_buffer_area(model: Model, node_id, buffer_distance=2.5):
     float
         Oppervlak van de unary-union buffer.
     """
-    links = model.link.df
+    # links van/naar de basin uit de topologie-index, zonder de hele link-tabel te doorzoeken
+    link_ids = model.topology.link_ids(node_id)
+    geometries = model.link.df.geometry.loc[link_ids].dropna().to_numpy()
+    if len(geometries) == 0:
+        return 0.0
+    return float(shapely.union_all(shapely.buffer(geometries, buffer_distance)).area)
+
+
+def basin_link_buffer_areas(model: Model, node_ids: npt.ArrayLike, buffer_distance=2.5) -> pd.Series:
+    """
+    Berekent het oppervlak van een buffer rond alle links van/naar een basin, voor alle basins in één keer.
 
+    Parameters
+    ----------
+    model : ribasim.Model
+    node_ids : npt.ArrayLike
+        Basin node_ids.
+    buffer_distance : float
+        Bufferafstand in CRS-eenheden, bijvoorbeeld meters bij EPSG:28992.
+
+    Returns
+    -------
+    pd.Series
+        Oppervlak van de unary-union buffer per node_id (0 voor basins zonder links).
+    """
+    links = model.link.df
     assert links is not None
-    mask = (links["from_node_id"] == node_id) | (links["to_node_id"] == node_id)
+    node_ids = pd.Index(node_ids)
 
-    basin_links = links.loc[mask]
+    # links by from- and to-node, a link between two basins counts for both
+    links = links[links.geometry.notna()]
+    link_node_ids = np.concatenate([links["from_node_id"].to_numpy(), links["to_node_id"].to_numpy()])
+    geometries = np.concatenate([links.geometry.to_numpy(), links.geometry.to_numpy()])
+    mask = pd.Index(link_node_ids).isin(node_ids)
 
-    if basin_links.empty:
-        return 0.0
+    # buffer all links at once and union per node_id
+    buffers = gpd.GeoDataFrame(
+        {"node_id": link_node_ids[mask]}, geometry=shapely.buffer(geometries[mask], buffer_distance)
+    )
+    areas = buffers.dissolve(by="node_id").area
+    return areas.reindex(node_ids, fill_value=0.0)
 
-    geom = basin_links.geometry.dropna()
 
-    if geom.empty:
-        return 0.0
+def sample_area_fraction(src: rasterio.DatasetReader, polygon: Polygon, sample_res: int = 25) -> float:
+    """Mean of band 1 in a resampled (sample_res) window under a polygon, NaN if there are no (valid) cells."""
+    out_shape, window, transform = get_resampled_window(src=src, polygon=polygon, sample_res=sample_res)
+
+    data = read_resampled(
+        src,
+        band=1,
+        window=window,
+        out_shape=out_shape,
+    )
+
+    if src.nodata is not None:
+        data[data == src.nodata] = np.nan
+
+    mask = geometry_mask(
+        [polygon],
+        transform=transform,
+        invert=True,
+        out_shape=data.shape,
+    )
+
+    values = data[mask]
+    return np.nan if values.size == 0 or np.all(np.isnan(values)) else float(np.nanmean(values))
+
+
+def sample_area_fractions(
+    src: rasterio.DatasetReader, polygons: gpd.GeoSeries, sample_res: int = 25, block_size: int = LABEL_BLOCK_SIZE
+) -> pd.Series:
+    """Batch version of `sample_area_fraction` for many polygons, on one label grid at sample_res.
 
-    buffered_union = geom.buffer(buffer_distance).union_all()
+    If the raster resolution is a multiple of sample_res, every resampled window of `sample_area_fraction` is part
+    of one grid at sample_res. All polygons (clipped to their window) are rasterized into a label grid, block by
+    block, and per-polygon means follow from `np.bincount`. Polygons that overlap others (a cell has one label) or
+    whose window is replaced or exceeds the raster are sampled with `sample_area_fraction`.
 
-    return buffered_union.area
+    Returns
+    -------
+    pd.Series
+        Mean value by polygons.index
+    """
+    geometries = polygons.to_numpy()
+    n_polygons = len(geometries)
+    result = np.full(n_polygons, np.nan)
+    fallback = np.zeros(n_polygons, dtype=bool)
+
+    # label grid at sample_res only aligns with the raster if resolution is a multiple of sample_res
+    transform = src.transform
+    ratio_x, ratio_y = abs(transform.a) / sample_res, abs(transform.e) / sample_res
+    factor_x, factor_y = round(ratio_x), round(ratio_y)
+    if not (np.isclose(ratio_x, factor_x) and np.isclose(ratio_y, factor_y) and min(factor_x, factor_y) >= 1) or not (
+        transform.b == transform.d == 0
+    ):
+        fallback[:] = True
+
+    # polygons clipped to the windows `sample_area_fraction` would read
+    clipped = np.empty(n_polygons, dtype=object)
+    for idx, polygon in enumerate(geometries):
+        window = from_bounds(*polygon.bounds, transform=transform)
+        if window.width < 1 or window.height < 1:
+            fallback[idx] = True
+            continue
+        window = window.round_offsets().round_lengths()
+        if (
+            window.col_off < 0
+            or window.row_off < 0
+            or (window.col_off + window.width > src.width)
+            or (window.row_off + window.height > src.height)
+        ):
+            fallback[idx] = True
+            continue
+        clipped[idx] = shapely.intersection(polygon, shapely.box(*window_bounds(window, transform)))
+
+    # overlapping polygons can't share a label grid
+    batch = np.flatnonzero(~fallback)
+    tree = shapely.STRtree(clipped[batch])
+    left, right = tree.query(clipped[batch], predicate="intersects")
+    pairs = left < right
+    left, right = batch[left[pairs]], batch[right[pairs]]
+    overlaps = shapely.area(shapely.intersection(clipped[left], clipped[right])) > 0
+    fallback[left[overlaps]] = True
+    fallback[right[overlaps]] = True
+    batch = np.flatnonzero(~fallback)
+
+    # rasterize labels (position + 1) block by block and accumulate sums and counts of valid cells
+    sums = np.zeros(n_polygons + 1)
+    counts = np.zeros(n_polygons + 1, dtype=np.int64)
+    tree = shapely.STRtree(clipped[batch])
+    for row_off in range(0, src.height, block_size):
+        for col_off in range(0, src.width, block_size):
+            window = Window.from_slices(
+                (row_off, min(row_off + block_size, src.height)), (col_off, min(col_off + block_size, src.width))
+            )
+            labels = batch[tree.query(shapely.box(*window_bounds(window, transform)), predicate="intersects")]
+            if len(labels) == 0:
+                continue
+            data = src.read(1, window=window).astype(float)
+            if src.nodata is not None:
+                data[data == src.nodata] = np.nan
+            data = np.repeat(np.repeat(data, factor_y, axis=0), factor_x, axis=1)
+            block_transform = src.window_transform(window)
+            label_grid = rasterize(
+                zip(clipped[labels], labels + 1, strict=True),
+                out_shape=data.shape,
+                transform=Affine(sample_res, 0.0, block_transform.c, 0.0, -sample_res, block_transform.f),
+                fill=0,
+                dtype="int32",
+            )
+            valid = (label_grid > 0) & ~np.isnan(data)
+            sums += np.bincount(label_grid[valid], weights=data[valid], minlength=n_polygons + 1)
+            counts += np.bincount(label_grid[valid], minlength=n_polygons + 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[batch] = np.where(counts[batch + 1] > 0, sums[batch + 1] / counts[batch + 1], np.nan)
+    for idx in np.flatnonzero(fallback):
+        result[idx] = sample_area_fraction(src=src, polygon=geometries[idx], sample_res=sample_res)
+
+    return pd.Series(result, index=polygons.index)
 
 
-def update_primary_basin_profiles(model: Model, sample_res: int = 25, depth: float = 2.0, buffer_distance=2.5) -> None:
+def update_primary_basin_profiles(
+    model: Model,
+    sample_res: int = 25,
+    depth: float = 2.0,
+    buffer_distance=2.5,
+    raster_file: Path | None = None,
+) -> None:
     """Surface water area of primary basin based on primair_oppervlaktewater in LHM4.3
 
     The average of resampled surface water percentage raster is mulitplied by polygon.area
@@ -229,6 +387,8 @@ def update_primary_basin_profiles(model: Model, sample_res: int = 25, depth: flo
         Resolution in which LHM raster is read under the basin.polygon, by default 25
     buffer_distance: float, optional
         Buffer distance around connected links
+    raster_file: Path | None, optional
+        Surface water percentage raster, by default None (LHM_oppervlaktewater_percentage_primair.tif in cloud)
 
     Returns
     -------
@@ -238,126 +398,110 @@ def update_primary_basin_profiles(model: Model, sample_res: int = 25, depth: flo
 
     # ah_df to concat
     def ah_df(
-        node_id: int,
-        polygon: Polygon,
-        target_level: float,
-        area_fraction: float,
-        buffer_distance: float = 2.5,
+        node_ids: npt.NDArray[np.int64],
+        polygon_areas: npt.NDArray[np.float64],
+        target_levels: npt.NDArray[np.float64],
+        area_fractions: npt.NDArray[np.float64],
+        link_buffer_areas: npt.NDArray[np.float64],
     ) -> pd.DataFrame:
-        level = np.array([target_level - depth, target_level]).round(2)
-        profile_node_ids = [node_id] * 2
-
-        # If no fraction is available, assume 2% of the basin area.
-        if pd.isna(area_fraction):
-            sw_area = 0.02 * polygon.area
-            comment = "default: 2% oppervlak"
-        elif area_fraction < 0.001:
-            sw_area = 0.001 * polygon.area
-            comment = "oppervlak >= 0.1% gezet"
-        else:
-            sw_area = area_fraction * polygon.area
-            comment = "%LHM * oppervlak"
-
-        minimum_area = max(
-            MIN_PROFILE_AREA,
-            basin_link_buffer_area(model=model, node_id=node_id, buffer_distance=buffer_distance),
-        )
-        if sw_area < minimum_area:
-            sw_area = minimum_area
-            comment = f"oppervlak >= {round(minimum_area, 1)}m2 gezet"
-
-        area = np.full(2, sw_area).round(1)
-        df = basin.Profile(node_id=profile_node_ids, level=level, area=area, meta_comment=[comment] * 2).df
+        sw_areas, comments = [], []
+        for polygon_area, area_fraction, link_buffer_area in zip(
+            polygon_areas, area_fractions, link_buffer_areas, strict=True
+        ):
+            # If no fraction is available, assume 2% of the basin area.
+            if pd.isna(area_fraction):
+                sw_area = 0.02 * polygon_area
+                comment = "default: 2% oppervlak"
+            elif area_fraction < 0.001:
+                sw_area = 0.001 * polygon_area
+                comment = "oppervlak >= 0.1% gezet"
+            else:
+                sw_area = area_fraction * polygon_area
+                comment = "%LHM * oppervlak"
+
+            minimum_area = max(MIN_PROFILE_AREA, link_buffer_area)
+            if sw_area < minimum_area:
+                sw_area = minimum_area
+                comment = f"oppervlak >= {minimum_area:.1f}m2 gezet"
+            sw_areas += [sw_area]
+            comments += [comment]
+
+        # two rows (bottom and target level) per basin
+        level = np.stack([target_levels - depth, target_levels], axis=1).round(2).ravel()
+        area = np.repeat(np.array(sw_areas), 2).round(1)
+        df = basin.Profile(
+            node_id=np.repeat(node_ids, 2), level=level, area=area, meta_comment=np.repeat(comments, 2)
+        ).df
         assert df is not None
         return df
 
     # generate raster_file if not existing
-    cloud = CloudStorage()
-    src_file = cloud.joinpath("Basisgegevens/LHM/4.3/input/LHM_oppervlaktewater_percentage_primair.tif")
-    if not src_file.exists():
-        percentage_primair_oppervlaktewater()
+    if raster_file is None:
+        cloud = CloudStorage()
+        raster_file = cloud.joinpath("Basisgegevens/LHM/4.3/input/LHM_oppervlaktewater_percentage_primair.tif")
+        if not raster_file.exists():
+            percentage_primair_oppervlaktewater()
 
     basin_node_df = cast(pd.DataFrame, model.basin.node.df)
     basin_area_df = cast(pd.DataFrame, model.basin.area.df)
     basin_profile_df = cast(pd.DataFrame, model.basin.profile.df)
 
-    # read resampled raster average and multiply by polygon.area
+    # basin-area table by node_id (first row for every node_id)
     basin_ids = basin_node_df[basin_node_df.meta_categorie.isin(["hoofdwater", "doorgaand"])].index.values
-    profiles: list[pd.DataFrame] = []
-    with rasterio.open(src_file) as src:
-        for basin_id in tqdm.tqdm(basin_ids, total=len(basin_ids), desc="profiles primary basins"):
-            # read basin-area table
-            polygon = cast(Polygon, cast(Any, basin_area_df.set_index("node_id").at[basin_id, "geometry"]))
-            target_level = float(cast(Any, basin_area_df.set_index("node_id").at[basin_id, "meta_streefpeil"]))
-            basin_fid = basin_area_df[basin_area_df.node_id == basin_id].index[0]
-
-            # read raster sampled
-            out_shape, window, transform = get_resampled_window(src=src, polygon=polygon, sample_res=sample_res)
-
-            data = read_resampled(
-                src,
-                band=1,
-                window=window,
-                out_shape=out_shape,
-            )
-
-            if src.nodata is not None:
-                data[data == src.nodata] = np.nan
-
-            mask = geometry_mask(
-                [polygon],
-                transform=transform,
-                invert=True,
-                out_shape=data.shape,
-            )
-
-            values = data[mask]
-
-            # get area_fraction and add oppervlaktewater_percentage to basin.area table
-            area_fraction = np.nan if values.size == 0 or np.all(np.isnan(values)) else float(np.nanmean(values))
+    area_df = basin_area_df.reset_index(names="fid").drop_duplicates("node_id").set_index("node_id").loc[basin_ids]
+    polygons = gpd.GeoSeries(area_df.geometry, crs=basin_area_df.crs)
+
+    # read resampled raster average for all basins at once
+    with rasterio.open(raster_file) as src:
+        area_fractions = sample_area_fractions(src=src, polygons=polygons, sample_res=sample_res)
+
+    # profile with area = average * polygon.area, at least the buffer-area of connected links
+    df = ah_df(
+        node_ids=basin_ids,
+        polygon_areas=polygons.area.to_numpy(),
+        target_levels=area_df["meta_streefpeil"].astype(float).to_numpy(),
+        area_fractions=area_fractions.to_numpy(),
+        link_buffer_areas=basin_link_buffer_areas(
+            model=model, node_ids=basin_ids, buffer_distance=buffer_distance
+        ).to_numpy(),
+    )
 
-            basin_area_df.loc[basin_fid, "meta_oppervlaktewater_percentage"] = round(area_fraction * 100, 1)
-            profile = ah_df(
-                node_id=basin_id,
-                polygon=polygon,
-                target_level=target_level,
-                area_fraction=area_fraction,
-                buffer_distance=buffer_distance,
-            )
-            percentage = round(profile.area.max() / polygon.area * 100, 1)
-            basin_area_df.loc[basin_fid, "meta_oppervlaktewater_percentage"] = percentage
-            profiles += [profile]
+    # add oppervlaktewater_percentage to basin.area table
+    percentage = [
+        round(area / polygon_area * 100, 1)
+        for area, polygon_area in zip(df.area.to_numpy()[::2], polygons.area.to_numpy(), strict=True)
+    ]
+    basin_area_df.loc[area_df["fid"].to_numpy(), "meta_oppervlaktewater_percentage"] = percentage
 
     # replace old profiles
-    df = pd.concat(profiles, ignore_index=True)
     basin_profile_df = basin_profile_df[~basin_profile_df.node_id.isin(basin_ids)]
     basin_profile_df = pd.concat([basin_profile_df, df], ignore_index=True)
     model.basin.profile.df = cast(Any, basin_profile_df)
 
 
-def add_basin_statistics(df: GeoDataFrame, lhm_raster_file: Path, ma_raster_file: Path) -> GeoDataFrame:
+def add_basin_statistics(
+    df: GeoDataFrame, lhm_raster_file: Path, ma_raster_file: Path, processes: int | None = None
+) -> GeoDataFrame:
     """Add Vd Gaast basin-statistics to a Polygon basin GeoDataFrame
 
     Args:
         df (GeoDataFrame): GeoDataFrame with basins
         lhm_raster_file (Path): LHM raster-file with layers
         ma_raster_file (Path): Specific discharge (maatgevende afvoer) raster
+        processes (int | None, optional): Number of processes to sample rasters with. Defaults to None.
 
     Returns
     -------
         GeoDataFrame: GeoDataFrame with basins ánd statistics
     """
-    with rasterio.open(lhm_raster_file) as raster_src:
-        # read band
-        maaiveld_data = raster_src.read(BANDEN["maaiveld"])
-
     # sample rasters
     ghg = sample_raster(
         raster_file=lhm_raster_file,
         df=df,
         band=BANDEN["ghg_2010-2019"],
         all_touched=True,
-        maaiveld_data=maaiveld_data,
+        maaiveld_band=BANDEN["maaiveld"],
+        processes=processes,
     )
     df.loc[:, ["ghg"]] = pd.Series(dtype=float)
     df.loc[:, ["ghg"]] = [i["mean"] for i in ghg]
@@ -367,17 +511,25 @@ def add_basin_statistics(df: GeoDataFrame, lhm_raster_file: Path, ma_raster_file
         df=df,
         band=BANDEN["glg_2010-2019"],
         all_touched=True,
-        maaiveld_data=maaiveld_data,
+        maaiveld_band=BANDEN["maaiveld"],
+        processes=processes,
     )
     df.loc[:, ["glg"]] = pd.Series(dtype=float)
     df.loc[:, ["glg"]] = [i["mean"] for i in glg]
 
-    ma = sample_raster(raster_file=ma_raster_file, df=df, all_touched=True, fill_value=37)  # 37mm/dag is
+    ma = sample_raster(
+        raster_file=ma_raster_file, df=df, all_touched=True, fill_value=37, processes=processes
+    )  # 37mm/dag is
     df.loc[:, ["ma"]] = pd.Series(dtype=float)
     df.loc[:, ["ma"]] = [i["mean"] for i in ma]
 
     maaiveld = sample_raster(
-        raster_file=lhm_raster_file, df=df, band=BANDEN["maaiveld"], stats="mean min max", all_touched=True
+        raster_file=lhm_raster_file,
+        df=df,
+        band=BANDEN["maaiveld"],
+        stats="mean min max",
+        all_touched=True,
+        processes=processes,
     )
     df.loc[:, ["maaiveld"]] = pd.Series(dtype=float)
     df.loc[:, ["maaiveld"]] = [i["mean"] for i in maaiveld]
@@ -2,13 +2,19 @@ import logging
 import re
 import shutil
 import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import date
 from pathlib import Path
 from xml.etree import ElementTree
 
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import requote_uri
 
+from .manifest import Manifest, RemoteFile, file_sha256
 from .settings import settings
 
 logger = logging.getLogger(__name__)
@@ -23,6 +29,9 @@ DOWNLOAD_MAX_RETRIES = 5
 DOWNLOAD_BACKOFF_SECONDS = 5
 DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
 
+# Number of concurrent file transfers and PROPFIND listings (and size of the connection pool)
+MAX_WORKERS = 8
+
 WATER_AUTHORITIES = [
     "AaenMaas",
     "AmstelGooienVecht",
@@ -71,14 +80,43 @@ class ModelVersion:
         return f"{self.year}.{str(self.month).zfill(2)}.{str(self.revision).zfill(3)}"
 
 
+@dataclass
+class TransferStats:
+    """Aggregate statistics of a batch of file transfers."""
+
+    n_files: int = 0
+    n_bytes: int = 0
+    duration: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Throughput in MiB/s"""
+        return self.n_bytes / 2**20 / self.duration if self.duration > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.n_files} files, {self.n_bytes / 2**20:.1f} MiB in {self.duration:.1f} s ({self.throughput:.1f} MiB/s)"
+
+
 @dataclass
 class CloudStorage:
-    """Connect a local 'data_dir` to cloud-storage."""
+    """Connect a local 'data_dir` to cloud-storage.
+
+    All requests share one `requests.Session` with a connection pool of `max_workers` connections. File transfers
+    and directory listings run concurrently on a thread pool of `max_workers` threads.
+
+    Synchronized files are recorded in a `Manifest` in `data_dir`, so transfers only include files that changed
+    remotely or locally since the last synchronization. With `hash_files` a sha256 of every downloaded file is
+    recorded too (uploaded files are always hashed).
+    """
 
     data_dir: Path = settings.ribasim_nl_data_dir
     user: str = RIBASIM_NL_CLOUD_USER
     url: str = BASE_URL
     password: str = field(repr=False, default=settings.ribasim_nl_cloud_pass)
+    max_workers: int = MAX_WORKERS
+    hash_files: bool = False
+    session: requests.Session = field(init=False, repr=False)
+    manifest: Manifest = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         # check if user and password are specified
@@ -86,8 +124,16 @@ class CloudStorage:
             raise ValueError("""'user' is None. Provide it.""")
         if self.password is None:
             raise ValueError("""'password' is None. Provide it or set environment variable RIBASIM_NL_CLOUD_PASS.""")
+
+        # session with a connection pool shared by all (concurrent) requests
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
         # check if we have correct credentials
-        response = requests.get(self.url, auth=self.auth, timeout=300)
+        response = self.session.get(self.url, timeout=300)
         if response.ok:
             logger.info("valid credentials")
         else:
@@ -104,6 +150,8 @@ class CloudStorage:
             self.data_dir.mkdir(parents=True)
             logger.info(f"{self.data_dir} is created")
 
+        self.manifest = Manifest(self.data_dir, hash_files=self.hash_files)
+
     @property
     def source_data(self) -> list[str]:
         """List of all source_data (directories) in sub-folder 'Basisgegevens`."""
@@ -145,16 +193,53 @@ class CloudStorage:
     def joinpath(self, *args: str) -> Path:
         return self.data_dir.joinpath(*args)
 
-    def upload_file(self, file_path: str | Path) -> None:
+    def upload_file(self, file_path: str | Path) -> int:
+        """Upload a file, returns the number of bytes uploaded."""
+        n_bytes = self._upload_file(Path(file_path))
+        self.manifest.save()
+        return n_bytes
+
+    def _upload_file(self, file_path: Path, sha256: str | None = None) -> int:
         # get url
         url = self.file_url(file_path)
 
         # read file and upload
-        with Path(file_path).open("rb") as f:
-            r = requests.put(url, data=f, auth=self.auth, timeout=300)
+        with file_path.open("rb") as f:
+            r = self.session.put(url, data=f, timeout=300)
+        r.raise_for_status()
+
+        # record in manifest
+        size = file_path.stat().st_size
+        self.manifest.record(
+            self.relative_path(file_path).as_posix(),
+            RemoteFile(etag=r.headers.get("ETag"), size=size),
+            sha256=file_sha256(file_path) if sha256 is None else sha256,
+        )
+        return size
+
+    def _copy_file(self, source_path: Path, file_path: Path, sha256: str | None = None) -> None:
+        """Copy a remote file server-side (WebDAV COPY) from source_path to file_path."""
+        headers = {"Destination": requote_uri(self.file_url(file_path)), "Overwrite": "T"}
+        r = self.session.request("COPY", self.file_url(source_path), headers=headers, timeout=300)
         r.raise_for_status()
+        self.manifest.record(
+            self.relative_path(file_path).as_posix(),
+            RemoteFile(etag=r.headers.get("ETag"), size=file_path.stat().st_size),
+            sha256=sha256,
+        )
+
+    def download_file(self, file_url: str, remote_file: RemoteFile | None = None) -> int:
+        """Download a file, returns the number of bytes downloaded.
+
+        The file is downloaded to a '.part' file. If the ETag of the remote file is known, an existing '.part' file,
+        e.g. from an interrupted download, is resumed with an HTTP Range request, only if the remote file did not
+        change (If-Range). Without an ETag the '.part' file can't be verified and the download starts over.
+        """
+        n_bytes = self._download_file(file_url, remote_file=remote_file)
+        self.manifest.save()
+        return n_bytes
 
-    def download_file(self, file_url: str) -> None:
+    def _download_file(self, file_url: str, remote_file: RemoteFile | None = None) -> int:
         # get local file-path
         file_path = self.file_path(file_url)
 
@@ -163,23 +248,42 @@ class CloudStorage:
 
         # download to a temp file and stream to disk; retry on transient errors
         # (connection drops, IncompleteRead, 5xx) which the WebDAV server emits
-        # under concurrent/large transfers.
+        # under concurrent/large transfers. Retries resume from the bytes received.
         tmp_path = file_path.with_name(file_path.name + ".part")
+        etag = None if remote_file is None else remote_file.etag
+        if etag is None:  # we can't verify a partial download
+            tmp_path.unlink(missing_ok=True)
+        n_bytes = 0
         last_exc: Exception | None = None
         for attempt in range(1, DOWNLOAD_MAX_RETRIES + 1):
             try:
-                with requests.get(file_url, auth=self.auth, timeout=300, stream=True) as r:
+                offset = tmp_path.stat().st_size if tmp_path.exists() else 0
+                headers = {}
+                if offset and etag is not None:
+                    headers = {"Range": f"bytes={offset}-", "If-Range": etag}
+                with self.session.get(file_url, headers=headers, timeout=300, stream=True) as r:
+                    if r.status_code == 416:  # range not satisfiable: part is invalid, start over on retry
+                        tmp_path.unlink()
                     r.raise_for_status()
-                    with tmp_path.open("wb") as f:
+                    # retries resume from this response, if the server sends an ETag
+                    etag = etag or r.headers.get("ETag")
+                    # 206: server honours the range and we append, 200: server sends the full file
+                    mode = "ab" if r.status_code == 206 else "wb"
+                    with tmp_path.open(mode) as f:
                         for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                             if chunk:
                                 f.write(chunk)
-                # atomically move completed download into place
+                                n_bytes += len(chunk)
+                    if remote_file is None:
+                        remote_file = RemoteFile(
+                            etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified")
+                        )
+                # atomically move completed download into place and record in manifest
                 tmp_path.replace(file_path)
-                return
+                self.manifest.record(self.relative_url(file_url), remote_file)
+                return n_bytes
             except (requests.exceptions.RequestException, OSError) as e:
                 last_exc = e
-                tmp_path.unlink(missing_ok=True)
                 if attempt < DOWNLOAD_MAX_RETRIES:
                     wait = DOWNLOAD_BACKOFF_SECONDS * 2 ** (attempt - 1)
                     logger.warning(
@@ -223,6 +327,11 @@ class CloudStorage:
         tuple[list[str], set[str]]
             (all item names, set of names that are directories/collections)
         """
+        items, dir_names, _ = self._propfind_files(url)
+        return items, dir_names
+
+    def _propfind_files(self, url: str) -> tuple[list[str], set[str], dict[str, RemoteFile]]:
+        """PROPFIND on a WebDAV URL, as `_propfind` plus the properties (ETag, size, last-modified) of all files."""
         headers = {"Depth": "1", "Content-Type": "application/xml"}
 
         xml_data = """
@@ -230,11 +339,14 @@ class CloudStorage:
         <D:prop>
             <D:displayname />
             <D:resourcetype />
+            <D:getetag />
+            <D:getcontentlength />
+            <D:getlastmodified />
         </D:prop>
         </D:propfind>
         """
 
-        response = requests.request("PROPFIND", url, headers=headers, auth=self.auth, data=xml_data, timeout=300)
+        response = self.session.request("PROPFIND", url, headers=headers, data=xml_data, timeout=300)
 
         if response.status_code != 207:
             response.raise_for_status()
@@ -245,6 +357,7 @@ class CloudStorage:
 
         items: list[str] = []
         dir_names: set[str] = set()
+        files: dict[str, RemoteFile] = {}
 
         for resp in xml_tree.findall(".//D:response", namespaces):
             name_elem = resp.find(".//D:displayname", namespaces)
@@ -256,8 +369,18 @@ class CloudStorage:
             resourcetype = resp.find(".//D:resourcetype", namespaces)
             if resourcetype is not None and resourcetype.find("D:collection", namespaces) is not None:
                 dir_names.add(name)
+            else:
+                properties = {
+                    key: None if (elem := resp.find(f".//D:{key}", namespaces)) is None else elem.text
+                    for key in ["getetag", "getcontentlength", "getlastmodified"]
+                }
+                files[name] = RemoteFile(
+                    etag=properties["getetag"],
+                    size=None if properties["getcontentlength"] is None else int(properties["getcontentlength"]),
+                    last_modified=properties["getlastmodified"],
+                )
 
-        return items, dir_names
+        return items, dir_names, files
 
     def dirs(self, *args: str) -> list[str]:
         """List sub-directories in a directory
@@ -284,61 +407,171 @@ class CloudStorage:
     def create_dir(self, *args: str) -> None:
         if args:
             url = self.joinurl(*args)
-            requests.request(
+            self.session.request(
                 "MKCOL",
                 url,
                 headers={
                     "Depth": "0",
                 },
-                auth=self.auth,
                 timeout=300,
             )
 
-    def download_content(self, url: str, overwrite: bool = settings.overwrite_files_from_cloud) -> None:
-        """Download content of a directory recursively."""
-        # get all content (files and directories from url)
-        content, dir_names = self._propfind(url)
-
-        # iterate over content
-        for item in content:
-            item_url = f"{url}/{item}"
-            relative_url = self.relative_url(item_url)
-            path = self.data_dir.joinpath(relative_url)
-            # if it is a directory we (re)create it (if it doesn't exist)
-            if item in dir_names:
-                if overwrite and path.exists():  # remove if we want to overwrite
-                    shutil.rmtree(path)
+    def _transfer(self, func: Callable[..., int], items: Iterable) -> TransferStats:
+        """Run a transfer function (returning bytes transferred) concurrently over items and save the manifest."""
+        items = list(items)
+        stats = TransferStats(n_files=len(items))
+        if not items:
+            return stats
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                stats.n_bytes = sum(executor.map(func, items))
+        finally:
+            self.manifest.save()
+        stats.duration = time.perf_counter() - start
+        logger.info(f"transferred {stats}")
+        return stats
+
+    def _walk(self, urls: list[str]) -> tuple[list[str], dict[str, RemoteFile]]:
+        """List all directory-urls and files (by url) in directories recursively, with concurrent PROPFIND requests.
+
+        Directory-urls are returned top-down: parents before their children.
+        """
+        dir_urls: list[str] = []
+        files: dict[str, RemoteFile] = {}
+        level = urls
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level:
+                next_level = []
+                for url, (items, dir_names, remote_files) in zip(
+                    level, executor.map(self._propfind_files, level), strict=True
+                ):
+                    next_level += [f"{url}/{item}" for item in items if item in dir_names]
+                    files.update({f"{url}/{name}": remote_file for name, remote_file in remote_files.items()})
+                dir_urls += next_level
+                level = next_level
+        return dir_urls, files
+
+    def _changed(self, file_url: str, remote_file: RemoteFile) -> bool:
+        """File changed remotely or locally since the last synchronization (or was never synchronized)."""
+        relative_path = self.relative_url(file_url)
+        return self.manifest.remote_changed(relative_path, remote_file) or self.manifest.local_changed(relative_path)
+
+    def _download(self, dir_urls: list[str], files: dict[str, RemoteFile], overwrite: bool) -> TransferStats:
+        """Download content of directories recursively and files, concurrently.
+
+        Files that don't exist locally are always downloaded. Existing files are only downloaded with overwrite, if
+        they changed since the last synchronization. With overwrite, files removed remotely since the last
+        synchronization are removed locally too (if not changed locally).
+        """
+        sub_dir_urls, content = self._walk(dir_urls)
+        files = {**content, **files}
+
+        # create directories
+        for url in sub_dir_urls:
+            path = self.file_path(url)
+            if not path.exists():
                 logger.info(f"making dir {path}")
-                path.mkdir(parents=True, exist_ok=True)  # create if it doesn't exist
-                self.download_content(item_url)  # get content of directory
-            else:
-                if overwrite and path.exists():  # delete if exists and we want to overwrite
-                    path.unlink()
-                if not path.exists():  # download if it doesn't exist
-                    logger.info(f"downloading file {path}")
-                    self.download_file(file_url=item_url)
-
-    def upload_content(self, dir_path: Path, overwrite: bool = False) -> None:
-        """Upload content of a directory recursively."""
+                path.mkdir(parents=True, exist_ok=True)
+
+        # remove files deleted remotely
+        if overwrite:
+            for url in dir_urls:
+                for relative_path in self.manifest.paths(f"{self.relative_url(url)}/"):
+                    if f"{self.url}/{relative_path}" not in files and not self.manifest.local_changed(relative_path):
+                        logger.info(f"removing file {self.data_dir / relative_path}")
+                        self.data_dir.joinpath(relative_path).unlink(missing_ok=True)
+                        self.manifest.remove(relative_path)
+
+        # download files that don't exist or changed (and we want to overwrite)
+        download_urls = []
+        for url, remote_file in files.items():
+            path = self.file_path(url)
+            if not path.exists() or (overwrite and self._changed(url, remote_file)):
+                logger.info(f"downloading file {path}")
+                download_urls.append(url)
+
+        return self._transfer(lambda url: self._download_file(url, remote_file=files[url]), download_urls)
+
+    def download_content(self, url: str, overwrite: bool = settings.overwrite_files_from_cloud) -> TransferStats:
+        """Download content of a directory recursively.
+
+        With overwrite, existing files are only downloaded if they changed since the last synchronization.
+        """
+        return self._download([url], {}, overwrite=overwrite)
+
+    def upload_content(self, dir_path: Path, overwrite: bool = False) -> TransferStats:
+        """Upload content of a directory recursively.
+
+        Files are uploaded if they don't exist remotely or, with overwrite, if they changed locally since the last
+        synchronization. Directories are uploaded if they don't exist remotely.
+        """
         # get all remote content
         content = self.content(self.joinurl(self.relative_path(dir_path).as_posix()))
 
-        # get al local directories and files.
-        dirs = [i for i in dir_path.glob("*") if i.is_dir()]
-        files = [i for i in dir_path.glob("*") if i.is_file()]
+        # add files, and dirs with all their content (as they don't exist remotely)
+        file_paths = []
+        for path in sorted(dir_path.glob("*")):
+            if path.is_file():
+                if path.name not in content or (
+                    overwrite and self.manifest.local_changed(self.relative_path(path).as_posix())
+                ):
+                    file_paths.append(path)
+            elif path.is_dir() and path.name not in content:
+                self.create_dir(self.relative_path(path).as_posix())
+                for sub_path in sorted(path.rglob("*")):
+                    if sub_path.is_dir():
+                        self.create_dir(self.relative_path(sub_path).as_posix())
+                    else:
+                        file_paths.append(sub_path)
+
+        for file_path in file_paths:
+            logger.info(f"uploading file {file_path}")
+        return self._transfer(self._upload_file, file_paths)
+
+    def diff(self, authority: str) -> pd.DataFrame:
+        """Compare local and remote files of an authority, using the manifest.
+
+        Status is one of:
+        - 'remote_only': file exists remotely, not locally
+        - 'local_only': file exists locally, not remotely
+        - 'untracked': file exists locally and remotely, but was never synchronized
+        - 'remote_changed' / 'local_changed' / 'conflict': file changed remotely / locally / both since synchronization
+        - 'unchanged': file is equal to the version last synchronized
+
+        Returns
+        -------
+        pd.DataFrame
+            path (relative to data_dir) and status of all files that are not 'unchanged'
+        """
+        _, files = self._walk([self.joinurl(authority)])
+        records = []
+        for url, remote_file in files.items():
+            relative_path = self.relative_url(url)
+            if not self.file_path(url).exists():
+                status = "remote_only"
+            elif relative_path not in self.manifest:
+                status = "untracked"
+            else:
+                remote_changed = self.manifest.remote_changed(relative_path, remote_file)
+                local_changed = self.manifest.local_changed(relative_path)
+                if remote_changed and local_changed:
+                    status = "conflict"
+                elif remote_changed:
+                    status = "remote_changed"
+                elif local_changed:
+                    status = "local_changed"
+                else:
+                    continue
+            records.append((relative_path, status))
 
-        # add files
-        for file_path in files:
-            if (file_path.stem not in content) or overwrite:
-                logger.info(f"uploading file {file_path}")
-                self.upload_file(file_path)
+        remote_paths = {self.relative_url(url) for url in files}
+        for path in sorted(self.joinpath(authority).rglob("*")):
+            relative_path = self.relative_path(path).as_posix()
+            if path.is_file() and path.suffix != ".part" and relative_path not in remote_paths:
+                records.append((relative_path, "local_only"))
 
-        # add dirs and upload their content recursively
-        for path in dirs:
-            if path.stem not in content:
-                remote_path = self.relative_path(path).as_posix()
-                self.create_dir(remote_path)
-                self.upload_content(dir_path=dir_path.joinpath(path.stem), overwrite=overwrite)
+        return pd.DataFrame.from_records(records, columns=["path", "status"])
 
     def download_aangeleverd(self, authority: str, overwrite: bool = False) -> None:
         """Download all files in folder 'aangeleverd'"""
@@ -365,9 +598,9 @@ class CloudStorage:
         for bron in bronnen:
             if bron not in source_data:
                 raise ValueError(f"""{bron} not in {source_data}""")
-            else:
-                url = self.joinurl("Basisgegevens", bron)
-                self.download_content(url, overwrite=overwrite)
+
+        # download all sources in one concurrent transfer
+        self._download([self.joinurl("Basisgegevens", bron) for bron in bronnen], {}, overwrite=overwrite)
 
     def upload_verwerkt(self, authority: str, overwrite: bool = False) -> None:
         """Upload all files in folder 'verwerkt'"""
@@ -491,33 +724,62 @@ class CloudStorage:
 
         # create dir in CloudStorage and upload content
         self.create_dir(authority, "modellen", model_version_dir.name)
-        self.upload_content(model_version_dir)
+        for path in sorted(model_version_dir.rglob("*")):
+            if path.is_dir():
+                self.create_dir(self.relative_path(path).as_posix())
+
+        # files unchanged since the previous uploaded version are copied server-side
+        previous_versions = sorted((i for i in uploaded_models if i.model == model), key=lambda i: i.sorter)
+        previous_dir = model_dir.parent / previous_versions[-1].path_string if previous_versions else None
+
+        def upload_or_copy(file_path: Path) -> int:
+            sha256 = file_sha256(file_path)
+            if previous_dir is not None:
+                source_path = previous_dir / file_path.relative_to(model_version_dir)
+                entry = self.manifest.get(self.relative_path(source_path).as_posix())
+                if entry is not None and entry.sha256 == sha256:
+                    self._copy_file(source_path, file_path, sha256=sha256)
+                    return 0
+            return self._upload_file(file_path, sha256=sha256)
+
+        file_paths = sorted(i for i in model_version_dir.rglob("*") if i.is_file())
+        self._transfer(upload_or_copy, file_paths)
 
         return ModelVersion(model, today.year, today.month, revision)
 
     def synchronize(self, filepaths: list[Path], overwrite: bool = settings.overwrite_files_from_cloud) -> None:
-        for path in filepaths:
-            path = Path(path)
-            url = self.joinurl(*path.relative_to(self.data_dir).parts)
-            # check if file exists on remote, if not raise for status
-            r = requests.head(url, auth=self.auth, timeout=300)
+        """Download files and directories if they don't exist locally or, with overwrite, if they changed."""
+        paths = [Path(path) for path in filepaths]
+        urls = [self.joinurl(*path.relative_to(self.data_dir).parts) for path in paths]
+
+        # check if files exist on remote, if not raise for status
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            responses = list(executor.map(lambda url: self.session.head(url, timeout=300), urls))
+        for r in responses:
             r.raise_for_status()
 
-            # check if file exists local, if not download (or force overwrite)
+        # check if files exist local, if not download (or overwrite if changed)
+        dir_urls: list[str] = []
+        files: dict[str, RemoteFile] = {}
+        for path, url, r in zip(paths, urls, responses, strict=True):
             if overwrite or not path.exists():
-                print(f"download data for {path}")
-
                 if path.suffix == ".shp":  # with shapes we download all files with the same stem
                     stem = path.stem
                     parent_url = self.joinurl(*path.parent.relative_to(self.data_dir).parts)
-                    siblings, _ = self._propfind(parent_url)
-                    for item in siblings:
+                    _, _, siblings = self._propfind_files(parent_url)
+                    for item, remote_file in siblings.items():
                         if Path(item).stem == stem:
-                            item_url = f"{parent_url}/{item}"
-                            item_path = path.parent / item
-                            if overwrite or not item_path.exists():
-                                self.download_file(item_url)
+                            files[f"{parent_url}/{item}"] = remote_file
                 elif self.content(url):
-                    self.download_content(url, overwrite=overwrite)
+                    dir_urls.append(url)
                 else:
-                    self.download_file(url)
+                    size = r.headers.get("Content-Length")
+                    files[url] = RemoteFile(
+                        etag=r.headers.get("ETag"),
+                        size=None if size is None else int(size),
+                        last_modified=r.headers.get("Last-Modified"),
+                    )
+
+        stats = self._download(dir_urls, files, overwrite=overwrite)
+        if stats.n_files:
+            print(f"downloaded {stats}")
@@ -1,65 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, cast
+
 import pandas as pd
 
 from ribasim_nl.model import Model
 from ribasim_nl.reset_index import reset_index
 
 
-def concat(models: list[Model], keep_original_index: bool = False) -> Model:
+def concat(models: list[Model | Path | str], keep_original_index: bool = False, workers: int | None = None) -> Model:
     """Concat existing models to one Ribasim-model
 
+    All models are concatenated in a single pass: the node_id offsets are determined up front, every model is
+    renumbered once and every table is concatenated once.
+
     Parameters
     ----------
-    models : list[Model]
-        List with Model instances
+    models : list[Model | Path | str]
+        List with Model instances or paths to their toml-files
     keep_original_index: bool
         Boolean for keeping original index. If not indices will be reset to avoid duplicate indices
+    workers: int | None
+        Number of threads to read the models given as paths. Defaults to None (sequential)
 
     Returns
     -------
     Model
         concatenated Model
     """
-    # models will be concatenated to first model.
-    model = reset_index(models[0]) if not keep_original_index else models[0]
+    # read models given as paths
+    paths = {i: model for i, model in enumerate(models) if isinstance(model, Path | str)}
+    if workers is not None and workers > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            read_models = dict(zip(paths, executor.map(Model.read, paths.values()), strict=True))
+    else:
+        read_models = {i: Model.read(path) for i, path in paths.items()}
+    _models: list[Model] = [model if isinstance(model, Model) else read_models[i] for i, model in enumerate(models)]
 
-    # concat all other models into model
-    for merge_model in models[1:]:
-        if not keep_original_index:
-            # reset index of mergemodel, node_start is max node_id
-            node_start = model.node.df.index.max() + 1
-            merge_model = reset_index(merge_model, node_start)
+    # reset index of all models: node_ids are subsequent, starting after the node_ids of the previous models
+    if not keep_original_index:
+        node_start = 1
+        for i, merge_model in enumerate(_models):
+            assert merge_model.node.df is not None
+            n_nodes = len(merge_model.node.df)
+            _models[i] = reset_index(merge_model, node_start)
+            node_start += n_nodes
+
+    # models will be concatenated to first model.
+    model = _models[0]
+    if len(_models) == 1:
+        return model
 
-        # concat node table
-        node_df = pd.concat([model.node.df, merge_model.node.df])
-        model.node.df = node_df
+    # concat node table
+    node_dfs = [i.node.df for i in _models if i.node.df is not None]
+    assert len(node_dfs) == len(_models)
+    model.node.df = cast(Any, pd.concat(node_dfs))
 
-        # concat links
-        link_df = pd.concat([model.link.df, merge_model.link.df], ignore_index=not keep_original_index)
-        link_df.index.name = "link_id"
-        model.link.df = link_df
+    # concat links
+    link_df = pd.concat([i.link.df for i in _models if i.link.df is not None], ignore_index=not keep_original_index)
+    link_df.index.name = "link_id"
+    model.link.df = cast(Any, link_df)
 
-        # merge tables
-        assert model.node.df is not None
-        assert merge_model.node.df is not None
-        for node_type in set(model.node.df.node_type.unique()).union(merge_model.node.df.node_type.unique()):
-            model_node = model.get_component(node_type)
-            merge_model_node = merge_model.get_component(node_type)
-            for attr in model_node.model_fields:
-                model_node_table = getattr(model_node, attr)
-                model_df = model_node_table.df
-                merge_model_df = getattr(merge_model_node, attr).df
-                if merge_model_df is not None:
-                    if model_df is not None:
-                        # make sure we concat both df's into the correct ribasim-object
-                        if "node_id" in model_df.columns:
-                            df = pd.concat([model_df, merge_model_df], ignore_index=True)
-                            df.index.name = "fid"
-                        else:
-                            raise Exception(f"{node_type} / {attr} cannot be merged")
-                    else:
-                        df = merge_model_df
-                    model_node_table.df = df
-                elif model_df is not None:
-                    model_node_table.df = model_df
+    # merge tables
+    node_types = set().union(*(i.node.df.node_type.unique() for i in _models if i.node.df is not None))
+    for node_type in node_types:
+        model_node = model.get_component(node_type)
+        merge_model_nodes = [i.get_component(node_type) for i in _models]
+        for attr in model_node.__class__.model_fields:
+            dfs = [df for i in merge_model_nodes if (df := getattr(i, attr).df) is not None]
+            if len(dfs) > 1:
+                # make sure we concat all df's into the correct ribasim-object
+                if "node_id" not in dfs[0].columns:
+                    raise Exception(f"{node_type} / {attr} cannot be merged")
+                df = pd.concat(dfs, ignore_index=True)
+                df.index.name = "fid"
+                getattr(model_node, attr).df = df
+            elif dfs:
+                getattr(model_node, attr).df = dfs[0]
 
     return model
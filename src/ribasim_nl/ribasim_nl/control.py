@@ -20,7 +20,6 @@ from ribasim_nl.coupling_level_common import (
     THRESHOLD_UPDATE_PROTECTION_COLUMN,
     truthy,
 )
-from ribasim_nl.downstream import downstream_nodes
 
 LOG = logging.getLogger(__name__)
 
@@ -532,11 +531,9 @@ def add_control_functions_to_connector_nodes(
     )
 
     # list all flow_control_nodes
-    graph = model.graph
     skip_nodes = drain_nodes + supply_nodes + list(flushing_nodes.keys())
     _all_downstream_nodes: list[int] = []
-    for node_id in supply_nodes:
-        _downstream_nodes = downstream_nodes(graph=graph, node_id=node_id, stop_at_node_ids=drain_nodes)
+    for _downstream_nodes in model.downstream_nodes_batch(supply_nodes, stop_at_node_ids=drain_nodes).values():
         _all_downstream_nodes += _downstream_nodes
         flow_control_nodes += [i for i in _downstream_nodes if (i in all_nodes) and (i not in skip_nodes)]
 
@@ -0,0 +1,278 @@
+from collections.abc import Iterable
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ribasim_nl.topology_index import TopologyIndex
+
+# maximum size of the (start nodes x nodes) visited-array per batch
+MAX_VISITED_SIZE = 2**26
+
+
+class CSRGraph:
+    """Compressed-sparse-row representation of the link table for vectorized up- and downstream traversal.
+
+    Nodes are stored by position in the sorted `node_ids` array, node types and functions are integer-coded.
+    Traversal is a frontier propagation for many start nodes at once over the successor (downstream) or
+    predecessor (upstream) matrix.
+
+    Parameters
+    ----------
+    node_ids : np.ndarray
+        Sorted node_ids of all nodes in node table and link table
+    from_node_ids : np.ndarray
+        from_node_id of every link
+    to_node_ids : np.ndarray
+        to_node_id of every link
+    node_types : pd.Series | None, optional
+        node_type by node_id, by default None
+    functions : pd.Series | None, optional
+        function (meta_function) by node_id, by default None
+    """
+
+    def __init__(
+        self,
+        node_ids: np.ndarray,
+        from_node_ids: np.ndarray,
+        to_node_ids: np.ndarray,
+        node_types: pd.Series | None = None,
+        functions: pd.Series | None = None,
+    ) -> None:
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        n_nodes = len(self.node_ids)
+
+        # successor matrix: row i has a 1 at column j for every link i -> j, duplicate links are merged
+        rows = self.positions(from_node_ids)
+        cols = self.positions(to_node_ids)
+        data = np.ones(len(rows), dtype=np.int32)
+        self.successors = sparse.csr_matrix((data, (rows, cols)), shape=(n_nodes, n_nodes))
+        self.successors.sum_duplicates()
+        self.successors.data[:] = 1
+        self.predecessors = self.successors.T.tocsr()
+
+        # integer-coded node attributes, -1 for unknown
+        self.node_type_codes, self.node_type_categories = self._codes(node_types)
+        self.function_codes, self.function_categories = self._codes(functions)
+
+    def _codes(self, values: pd.Series | None) -> tuple[np.ndarray, pd.Index]:
+        if values is None:
+            return np.full(len(self.node_ids), -1, dtype=np.int16), pd.Index([])
+        values = values[~values.index.duplicated()].reindex(self.node_ids)
+        codes, categories = pd.factorize(values)
+        return codes.astype(np.int16), pd.Index(categories)
+
+    @classmethod
+    def from_tables(cls, link_df: pd.DataFrame | None, node_df: pd.DataFrame | None) -> "CSRGraph":
+        """Build from a Ribasim link- and node-table."""
+        if link_df is None:
+            from_node_ids = to_node_ids = np.array([], dtype=np.int64)
+        else:
+            from_node_ids = link_df["from_node_id"].to_numpy(dtype=np.int64)
+            to_node_ids = link_df["to_node_id"].to_numpy(dtype=np.int64)
+
+        node_types = functions = None
+        node_ids = np.concatenate([from_node_ids, to_node_ids])
+        if node_df is not None:
+            node_ids = np.concatenate([node_ids, node_df.index.to_numpy(dtype=np.int64)])
+            node_types = node_df["node_type"]
+            if "meta_function" in node_df.columns:
+                functions = node_df["meta_function"]
+
+        return cls(np.unique(node_ids), from_node_ids, to_node_ids, node_types=node_types, functions=functions)
+
+    @classmethod
+    def from_graph(cls, graph: nx.DiGraph | TopologyIndex) -> "CSRGraph":
+        """Build from a graph with `node_type` and `function` node attributes (e.g. Model.graph)."""
+        edges = np.array(list(graph.edges), dtype=np.int64).reshape(-1, 2)
+        node_attributes = dict(graph.nodes.data()) if isinstance(graph, nx.DiGraph) else graph.nodes
+        node_ids = np.unique(np.concatenate([edges.ravel(), np.fromiter(node_attributes.keys(), dtype=np.int64)]))
+        node_types = pd.Series({k: v.get("node_type") for k, v in node_attributes.items()}, dtype=object)
+        functions = pd.Series({k: v.get("function") for k, v in node_attributes.items()}, dtype=object)
+        return cls(node_ids, edges[:, 0], edges[:, 1], node_types=node_types, functions=functions)
+
+    def positions(self, node_ids: Iterable[int] | np.ndarray) -> np.ndarray:
+        """Positions of node_ids in `node_ids`, raises KeyError on unknown node_ids."""
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        missing = ~self.contains(node_ids)
+        if missing.any():
+            raise KeyError(f"node_ids not in graph: {node_ids[missing].tolist()}")
+        return np.searchsorted(self.node_ids, node_ids)
+
+    def node_type_mask(self, node_type: str) -> np.ndarray:
+        """Boolean array that is True for all nodes of node_type."""
+        if node_type not in self.node_type_categories:
+            return np.zeros(len(self.node_ids), dtype=bool)
+        return self.node_type_codes == self.node_type_categories.get_loc(node_type)
+
+    def function_mask(self, function: str) -> np.ndarray:
+        """Boolean array that is True for all nodes with function."""
+        if function not in self.function_categories:
+            return np.zeros(len(self.node_ids), dtype=bool)
+        return self.function_codes == self.function_categories.get_loc(function)
+
+    def reachable(self, node_ids: Iterable[int], direction: str, stop_mask: np.ndarray) -> dict[int, set[int]]:
+        """Find all nodes reachable from every start node, not traversing beyond nodes in stop_mask.
+
+        Nodes in stop_mask are included in the result, but their neighbors are not. Start nodes are always
+        traversed, start nodes not present in the graph only reach themselves.
+
+        Parameters
+        ----------
+        node_ids : Iterable[int]
+            Start node_ids
+        direction : str
+            'upstream' or 'downstream'
+        stop_mask : np.ndarray
+            Boolean array over `node_ids` that is True for nodes not to traverse beyond
+
+        Returns
+        -------
+        dict[int, set[int]]
+            Reachable node_ids (including start node) by start node_id
+        """
+        if direction == "upstream":
+            step = self.predecessors
+        elif direction == "downstream":
+            step = self.successors
+        else:
+            raise ValueError(f"direction should be 'upstream' or 'downstream', got '{direction}'")
+
+        node_ids = list(dict.fromkeys(int(i) for i in node_ids))
+        result = {i: {i} for i in node_ids}
+        start_node_ids = np.array(node_ids, dtype=np.int64)
+        start_node_ids = start_node_ids[self.contains(start_node_ids)]
+        if len(start_node_ids) == 0:
+            return result
+
+        # process start nodes in batches, so the dense visited-array stays bounded
+        n_nodes = len(self.node_ids)
+        batch_size = max(1, MAX_VISITED_SIZE // n_nodes)
+        visited = np.zeros((min(batch_size, len(start_node_ids)), n_nodes), dtype=bool)
+        for batch_start in range(0, len(start_node_ids), batch_size):
+            batch = start_node_ids[batch_start : batch_start + batch_size]
+            rows, cols = self._propagate(self.positions(batch), step, stop_mask, visited)
+            order = np.argsort(rows, kind="stable")
+            splits = np.searchsorted(rows[order], np.arange(1, len(batch)))
+            for node_id, reached in zip(batch.tolist(), np.split(self.node_ids[cols[order]], splits), strict=True):
+                result[node_id] = set(reached.tolist())
+
+        return result
+
+    def _propagate(
+        self, start_positions: np.ndarray, step: sparse.csr_matrix, stop_mask: np.ndarray, visited: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Frontier propagation from all start positions at once.
+
+        The frontier holds (start, node) pairs. Every step gathers the neighbors of all frontier nodes from the
+        CSR index arrays, which equals the boolean product of the frontier matrix with the step matrix. Only the
+        touched cells of `visited` are set and reset, so the cost scales with the result, not with the graph.
+        """
+        n_nodes = len(self.node_ids)
+        indptr, indices = step.indptr, step.indices
+        rows, cols = np.arange(len(start_positions)), start_positions
+        visited[rows, cols] = True
+        reached_rows, reached_cols = [rows], [cols]
+
+        while len(cols) > 0:
+            # one step for all start nodes at once
+            counts = indptr[cols + 1] - indptr[cols]
+            n_reached = counts.sum()
+            if n_reached == 0:
+                break
+            offsets = np.arange(n_reached) - np.repeat(np.cumsum(counts) - counts, counts)
+            rows = np.repeat(rows, counts)
+            cols = indices[np.repeat(indptr[cols], counts) + offsets]
+
+            # keep new (start, node) pairs only
+            new = ~visited[rows, cols]
+            rows, cols = np.divmod(np.unique(rows[new] * n_nodes + cols[new]), n_nodes)
+            visited[rows, cols] = True
+            reached_rows.append(rows)
+            reached_cols.append(cols)
+
+            # traverse further from new nodes that are not stop nodes
+            expand = ~stop_mask[cols]
+            rows, cols = rows[expand], cols[expand]
+
+        rows, cols = np.concatenate(reached_rows), np.concatenate(reached_cols)
+        visited[rows, cols] = False
+        return rows, cols
+
+    def upstream_nodes(
+        self, node_ids: Iterable[int], stop_at_inlet: bool = False, stop_at_node_type: str | None = None
+    ) -> dict[int, set[int]]:
+        """Find all upstream nodes of every node in node_ids.
+
+        Traversal always stops at LevelBoundary nodes.
+
+        Parameters
+        ----------
+        node_ids : Iterable[int]
+            Start node_ids
+        stop_at_inlet : bool, optional
+            To stop at the next inlet(s), by default False
+        stop_at_node_type : str | None, optional
+            To stop at a specific node type (e.g., 'Basin', 'LevelBoundary'), by default None
+
+        Returns
+        -------
+        dict[int, set[int]]
+            Upstream node_ids (including start node) by start node_id
+        """
+        stop_mask = self.node_type_mask("LevelBoundary")
+        if stop_at_inlet:
+            stop_mask |= self.function_mask("inlet")
+        if stop_at_node_type is not None:
+            stop_mask |= self.node_type_mask(stop_at_node_type)
+        return self.reachable(node_ids, direction="upstream", stop_mask=stop_mask)
+
+    def downstream_nodes(
+        self,
+        node_ids: Iterable[int],
+        stop_at_outlet: bool = False,
+        stop_at_node_type: str | None = None,
+        stop_at_node_ids: list[int] | None = None,
+    ) -> dict[int, set[int]]:
+        """Find all downstream nodes of every node in node_ids.
+
+        Parameters
+        ----------
+        node_ids : Iterable[int]
+            Start node_ids
+        stop_at_outlet : bool, optional
+            To stop at the next outlet(s), by default False
+        stop_at_node_type : str | None, optional
+            To stop at a specific node type (e.g., 'Basin', 'LevelBoundary'), by default None
+        stop_at_node_ids : list[int] | None, optional
+            Node IDs at which to stop traversal, by default None
+
+        Returns
+        -------
+        dict[int, set[int]]
+            Downstream node_ids (including start node) by start node_id
+        """
+        stop_mask = np.zeros(len(self.node_ids), dtype=bool)
+        if stop_at_outlet:
+            stop_mask |= self.function_mask("outlet")
+        if stop_at_node_type is not None:
+            stop_mask |= self.node_type_mask(stop_at_node_type)
+        if stop_at_node_ids:
+            stop_node_ids = np.asarray(stop_at_node_ids, dtype=np.int64)
+            stop_mask[self.positions(stop_node_ids[self.contains(stop_node_ids)])] = True
+        return self.reachable(node_ids, direction="downstream", stop_mask=stop_mask)
+
+    def contains(self, node_ids: Iterable[int] | np.ndarray) -> np.ndarray:
+        """Boolean array that is True for node_ids present in the graph."""
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        positions = np.searchsorted(self.node_ids, node_ids)
+        found = positions < len(self.node_ids)
+        found[found] = self.node_ids[positions[found]] == node_ids[found]
+        return found
+
+    def __contains__(self, node_id) -> bool:
+        return bool(self.contains([node_id])[0])
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
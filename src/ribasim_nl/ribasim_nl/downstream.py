@@ -3,9 +3,12 @@ from collections import deque
 
 import networkx as nx
 
+from ribasim_nl.csr_graph import CSRGraph
+from ribasim_nl.topology_index import TopologyIndex
+
 
 def downstream_nodes(
-    graph: nx.DiGraph,
+    graph: nx.DiGraph | TopologyIndex | CSRGraph,
     node_id: int,
     stop_at_outlet: bool = False,
     stop_at_node_type: str | None = None,
@@ -14,9 +17,12 @@ def downstream_nodes(
     """Efficiently find all downstream nodes in a directed graph starting from a given node,
     stopping traversal at nodes stopping at the next outlet.
 
+    A TopologyIndex or nx.DiGraph is traversed node by node, so it needs no rebuild after an edit of the model.
+    For many start nodes, build a CSRGraph once and use CSRGraph.downstream_nodes.
+
     Parameters
     ----------
-    - graph (nx.DiGraph): The directed graph.
+    - graph (nx.DiGraph | TopologyIndex | CSRGraph): The directed graph.
     - node_id: The node to start the search from.
     - stop_at_outlet (bool): To stop at the next inlet(s)
     - stop_at_node_type (str | None): To stop at a specific node type (e.g., 'Basin', 'LevelBoundary')
@@ -24,8 +30,16 @@ def downstream_nodes(
 
     Returns
     -------
-    - set: A set of all downstream nodes excluding the starting node.
+    - set: A set of all downstream nodes including the starting node.
     """  # noqa: D205
+    if isinstance(graph, CSRGraph):
+        return graph.downstream_nodes(
+            [node_id],
+            stop_at_outlet=stop_at_outlet,
+            stop_at_node_type=stop_at_node_type,
+            stop_at_node_ids=stop_at_node_ids,
+        )[node_id]
+
     if stop_at_node_ids is None:
         stop_at_node_ids = []
     visited = set()  # To keep track of visited nodes
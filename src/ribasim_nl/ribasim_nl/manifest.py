@@ -0,0 +1,182 @@
+"""Local manifest of files synchronized with CloudStorage.
+
+For every synchronized file the manifest records the remote ETag, size and last-modified (from PROPFIND or HEAD),
+the local modification time after the transfer and, optionally, a sha256 of the content. With these CloudStorage
+transfers only files that changed remotely or locally since the last synchronization.
+
+Several processes can synchronize the same data directory: a save merges the entries changed by this process into
+the manifest on disk, under a file lock.
+"""
+
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".ribasim_nl_manifest.json"
+HASH_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
+
+
+def file_sha256(path: Path) -> str:
+    """sha256 hex-digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class RemoteFile:
+    """Properties of a remote file as reported by the WebDAV server."""
+
+    etag: str | None = None
+    size: int | None = None
+    last_modified: str | None = None
+
+
+@dataclass
+class ManifestEntry:
+    etag: str | None = None
+    size: int | None = None
+    last_modified: str | None = None
+    mtime_ns: int | None = None
+    sha256: str | None = None
+
+
+def _read_entries(path: Path) -> dict[str, ManifestEntry]:
+    """Entries of a manifest-file; empty if the file does not exist or is unreadable (with a warning)."""
+    if not path.exists():
+        return {}
+    try:
+        return {k: ManifestEntry(**v) for k, v in json.loads(path.read_text()).items()}
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"ignoring unreadable manifest {path}, all files are considered changed: {e}")
+        return {}
+
+
+class Manifest:
+    """Manifest of synchronized files in `data_dir`, keyed by posix path relative to `data_dir`.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Local data directory, the manifest is stored as `data_dir/.ribasim_nl_manifest.json`
+    hash_files : bool, optional
+        Record a sha256 of every synchronized file and use it to verify local changes, by default False
+    """
+
+    def __init__(self, data_dir: Path, hash_files: bool = False) -> None:
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / MANIFEST_FILE_NAME
+        self.hash_files = hash_files
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self._entries: dict[str, ManifestEntry] = _read_entries(self.path)
+        # paths recorded or removed since the last save, to be merged into the manifest on disk
+        self._recorded: set[str] = set()
+        self._removed: set[str] = set()
+
+    def __contains__(self, relative_path: str) -> bool:
+        return relative_path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, relative_path: str) -> ManifestEntry | None:
+        return self._entries.get(relative_path)
+
+    def paths(self, prefix: str = "") -> list[str]:
+        """All relative paths in the manifest starting with prefix."""
+        return [i for i in self._entries if i.startswith(prefix)]
+
+    def record(self, relative_path: str, remote_file: RemoteFile, sha256: str | None = None) -> ManifestEntry:
+        """Record a local file after it has been synchronized with remote_file."""
+        local_path = self.data_dir / relative_path
+        stat = local_path.stat()
+        if sha256 is None and self.hash_files:
+            sha256 = file_sha256(local_path)
+        entry = ManifestEntry(
+            etag=remote_file.etag,
+            size=remote_file.size if remote_file.size is not None else stat.st_size,
+            last_modified=remote_file.last_modified,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=sha256,
+        )
+        with self._lock:
+            self._entries[relative_path] = entry
+            self._recorded.add(relative_path)
+            self._removed.discard(relative_path)
+        return entry
+
+    def remove(self, relative_path: str) -> None:
+        with self._lock:
+            self._entries.pop(relative_path, None)
+            self._removed.add(relative_path)
+            self._recorded.discard(relative_path)
+
+    def save(self) -> None:
+        """Merge the entries recorded and removed since the last save into the manifest on disk (atomically).
+
+        Entries saved by other processes in the meantime are kept and read into this manifest.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._file_lock:
+            entries = _read_entries(self.path)
+            for relative_path in self._removed:
+                entries.pop(relative_path, None)
+            entries.update({k: self._entries[k] for k in self._recorded})
+            data = {k: asdict(v) for k, v in sorted(entries.items())}
+
+            # write to a unique temporary file next to the manifest, so a replace is atomic
+            with tempfile.NamedTemporaryFile(
+                dir=self.path.parent, prefix=self.path.name, suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = Path(f.name)
+            try:
+                tmp_path.write_text(json.dumps(data, indent=1))
+                tmp_path.replace(self.path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+            self._entries = entries
+            self._recorded.clear()
+            self._removed.clear()
+
+    def remote_changed(self, relative_path: str, remote_file: RemoteFile) -> bool:
+        """Remote file differs from the version last synchronized (or was never synchronized)."""
+        entry = self.get(relative_path)
+        if entry is None:
+            return True
+        if remote_file.size is not None and entry.size is not None and remote_file.size != entry.size:
+            return True
+        if remote_file.etag is not None and entry.etag is not None:
+            return remote_file.etag != entry.etag
+        if remote_file.last_modified is not None and entry.last_modified is not None:
+            return remote_file.last_modified != entry.last_modified
+        # nothing to compare but size
+        return remote_file.size is None or entry.size is None
+
+    def local_changed(self, relative_path: str) -> bool:
+        """Local file differs from the version last synchronized (or was never synchronized)."""
+        entry = self.get(relative_path)
+        local_path = self.data_dir / relative_path
+        if entry is None or not local_path.exists():
+            return True
+        stat = local_path.stat()
+        if stat.st_size != entry.size:
+            return True
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return False
+        # touched, but possibly not changed
+        if entry.sha256 is not None:
+            return file_sha256(local_path) != entry.sha256
+        return True
@@ -9,9 +9,7 @@ import numpy as np
 import pandas as pd
 import ribasim
 import shapely
-import xarray as xr
 from pandera.typing.geopandas import GeoDataFrame
-from pydantic import BaseModel
 from ribasim import Node
 from ribasim.geometry.area import BasinAreaSchema
 from ribasim.geometry.node import NodeSchema
@@ -23,9 +21,19 @@ from shapely.geometry import LineString, MultiPolygon, Point, Polygon
 from shapely.geometry.base import BaseGeometry
 
 from ribasim_nl.case_conversions import pascal_to_snake_case
+from ribasim_nl.csr_graph import CSRGraph
 from ribasim_nl.downstream import downstream_nodes
 from ribasim_nl.geometry import split_basin
-from ribasim_nl.run_model import RunSpecs, parse_computation_time, run
+from ribasim_nl.results import Results
+from ribasim_nl.run_model import RunSpecs, parse_computation_time, read_run_events, run, run_specs_from_events
+from ribasim_nl.snapshot import (
+    assign_without_validation,
+    read_snapshot,
+    snapshot_is_current,
+    snapshot_path,
+    write_snapshot,
+)
+from ribasim_nl.topology_index import NodeRowIndex, TopologyIndex
 from ribasim_nl.upstream import upstream_nodes
 
 manning_data = manning_resistance.Static(length=[100], manning_n=[0.04], profile_width=[10], profile_slope=[1])
@@ -55,11 +63,12 @@ class default_tables:
 DEFAULT_TABLES = default_tables()
 
 
-def read_results(filepath: Path) -> pd.DataFrame:
-    df = xr.open_dataset(filepath).to_dataframe().reset_index()
-    if "time" in df.columns:
-        df.set_index("time", inplace=True)
-    return df
+def _neighbor_node_ids(node_ids: list[int], node_id: int, index_name: str, name: str):
+    # mimic df.loc[node_id].column on a link-table indexed by index_name: None, a scalar or a Series
+    if len(node_ids) == 1:
+        return node_ids[0]
+    elif len(node_ids) > 1:
+        return pd.Series(node_ids, index=pd.Index([node_id] * len(node_ids), name=index_name), name=name)
 
 
 def node_properties_to_table(table, node_properties, node_id) -> None:
@@ -69,15 +78,12 @@ def node_properties_to_table(table, node_properties, node_id) -> None:
         node_df.loc[node_id, [column]] = value
 
 
-class Results(BaseModel):
-    filepath: Path
-    _df = None
-
-    @property
-    def df(self) -> pd.DataFrame:
-        if self._df is None:
-            self._df = read_results(self.filepath)
-        return self._df
+def _assign_row_subset(table, df) -> None:
+    # Assigning table.df validates the column names and the pandera schema (dtypes, per-row checks, index). A subset
+    # of the rows of the current table has the same columns and dtypes and rows that passed before, so validation
+    # cannot fail where it passed for the current table. Invalid in-place edits of the table are not missed either:
+    # TableModel.sort re-assigns and so validates every table before it is written.
+    assign_without_validation(table, "df", df)
 
 
 class Model(ribasim.Model):
@@ -85,7 +91,12 @@ class Model(ribasim.Model):
     _basin_outstate: Results | None = None
     _flow_results: Results | None = None
     _link_results: Results | None = None
-    _graph: nx.Graph | None = None
+    _graph: nx.DiGraph | None = None
+    _graph_version: int | None = None
+    _topology: TopologyIndex | None = None
+    _row_indexes: dict[str, NodeRowIndex] | None = None
+    _csr_graph: CSRGraph | None = None
+    _csr_graph_version: int | None = None
     _parameterize: object | None = None
 
     def __init__(self, **data) -> None:
@@ -171,30 +182,81 @@ class Model(ribasim.Model):
         return level_boundary_ds_node_ids_df[level_boundary_ds_node_ids_df.isin(node_ids)].to_list()
 
     @property
-    def graph(self):
-        # create a DiGraph from link-table
-        if self._graph is None:
-            graph = nx.from_pandas_edgelist(
-                df=self.link.df[["from_node_id", "to_node_id"]],
-                source="from_node_id",
-                target="to_node_id",
-                create_using=nx.DiGraph,
-            )
-            node_table_df = self.node.df.copy()
-            if "meta_function" not in node_table_df.columns:
-                node_table_df.loc[:, "meta_function"] = ""
-            node_attributes = node_table_df.rename(columns={"meta_function": "function"})[
-                ["function", "node_type"]
-            ].to_dict(orient="index")
-            nx.set_node_attributes(graph, node_attributes)
+    def topology(self) -> TopologyIndex:
+        """Topology index of link- and node-table.
+
+        The index is updated in place by the Model methods that edit links and nodes. It is rebuilt
+        only if link.df or node.df has been replaced by other code.
+        """
+        if self._topology is None:
+            self._topology = TopologyIndex()
+        if not self._topology.is_synced(self.link.df, self.node.df):
+            self._topology.rebuild(self.link.df, self.node.df)
+        return self._topology
+
+    def _synced_topology(self) -> TopologyIndex | None:
+        """Topology index to update in place, None if it is stale and will be rebuilt on next access."""
+        if (self._topology is not None) and self._topology.is_synced(self.link.df, self.node.df):
+            return self._topology
+        return None
+
+    def _update_topology(
+        self, topology: TopologyIndex | None, node_ids: list[int] | None = None, link_ids: list[int] | None = None
+    ) -> None:
+        """Register (changed) nodes and links from the tables in a synced topology index."""
+        if topology is None:
+            return
+        if node_ids:
+            node_df = self.node.df
+            assert node_df is not None
+            for node_id in node_ids:
+                function = node_df.at[node_id, "meta_function"] if "meta_function" in node_df.columns else ""
+                topology.set_node(node_id, node_df.at[node_id, "node_type"], function)
+        if link_ids:
+            link_df = self.link.df
+            assert link_df is not None
+            for link_id in link_ids:
+                topology.add_link(
+                    link_id,
+                    link_df.at[link_id, "from_node_id"],
+                    link_df.at[link_id, "to_node_id"],
+                    link_df.at[link_id, "link_type"],
+                )
+        topology.track(self.link.df, self.node.df)
 
-            self._graph = graph
+    def _row_index(self, table) -> NodeRowIndex:
+        """Node_id row index of a sub-table, rebuilt only if the table has been replaced."""
+        if self._row_indexes is None:
+            self._row_indexes = {}
+        row_index = self._row_indexes.setdefault(table.tablename(), NodeRowIndex())
+        if not row_index.is_synced(table.df):
+            row_index.rebuild(table.df)
+        return row_index
 
+    @property
+    def graph(self) -> nx.DiGraph:
+        # create a DiGraph from the topology index, only if the topology has changed since last call
+        topology = self.topology
+        if (self._graph is None) or (self._graph_version != topology.version):
+            self._graph = topology.to_networkx()
+            self._graph_version = topology.version
         return self._graph
 
+    @property
+    def csr_graph(self) -> CSRGraph:
+        # create a CSRGraph from link- and node-table, only if the topology has changed since last call. Only the
+        # batch-queries use it: single-node queries traverse the topology index, so edits do not trigger a rebuild
+        topology = self.topology
+        if (self._csr_graph is None) or (self._csr_graph_version != topology.version):
+            self._csr_graph = CSRGraph.from_tables(self.link.df, self.node.df)
+            self._csr_graph_version = topology.version
+        return self._csr_graph
+
     @property
     def reset_graph(self):
         self._graph = None
+        self._csr_graph = None
+        self._topology = None
         return self.graph
 
     @property
@@ -214,8 +276,28 @@ class Model(ribasim.Model):
                     if computation_time is not None:
                         return computation_time
 
+    @property
+    def run_events_path(self) -> Path:
+        """JSON-lines file with the telemetry-events of the last run, see `ribasim_nl.run_model.run`"""
+        return self.toml_path.parent / self.results_dir / "run_events.jsonl"
+
+    @property
+    def run_specs(self) -> RunSpecs | None:
+        """Get RunSpecs of last run: computation time, wall time, progress, simulated time, speed and stalls"""
+        if not self.run_events_path.exists():
+            return None  # model has never been run with telemetry
+        try:
+            computation_time = self.computation_time
+        except FileNotFoundError:
+            computation_time = None  # run failed before writing results
+        return run_specs_from_events(read_run_events(self.run_events_path), computation_time)
+
     def run(self, **kwargs) -> RunSpecs:
-        """Run your Ribasim model"""
+        """Run your Ribasim model, kwargs are passed to `ribasim_nl.run_model.run`
+
+        Telemetry-events are written to `run_events_path` unless another events_file is given.
+        """
+        kwargs.setdefault("events_file", self.run_events_path)
         result = run(self.toml_path, **kwargs)
         # reset cached results so they are re-read from (possibly new) filepath
         self._basin_results = None
@@ -224,6 +306,64 @@ class Model(ribasim.Model):
         self._link_results = None
         return result
 
+    def to_snapshot(self, path: Path | str | None = None) -> Path:
+        """Write a binary snapshot of the model (see ribasim_nl.snapshot)
+
+        Parameters
+        ----------
+        path : Path | str | None, optional
+            Snapshot directory. By default next to the toml-file: `model.toml` -> `model.snapshot`
+
+        Returns
+        -------
+        Path
+            Snapshot directory
+        """
+        if path is None:
+            if self.filepath is None:
+                raise ValueError("Model has no filepath, specify the snapshot path")
+            path = snapshot_path(self.filepath)
+        return write_snapshot(self, path)
+
+    @classmethod
+    def from_snapshot(cls, path: Path | str, validate: bool | None = None) -> "Model":
+        """Read a model from a binary snapshot (see ribasim_nl.snapshot)
+
+        Parameters
+        ----------
+        path : Path | str
+            Snapshot directory
+        validate : bool | None, optional
+            Validate all tables. By default only when the content hash of the snapshot does not match
+
+        Returns
+        -------
+        Model
+        """
+        return read_snapshot(cls, path, validate=validate)
+
+    @classmethod
+    def read_cached(cls, filepath: Path | str) -> "Model":
+        """Read a model from its snapshot if it is current, from the toml-file otherwise
+
+        Parameters
+        ----------
+        filepath : Path | str
+            Path to the toml-file, the snapshot is expected next to it (`model.toml` -> `model.snapshot`)
+
+        Returns
+        -------
+        Model
+        """
+        path = snapshot_path(filepath)
+        if not snapshot_is_current(path, filepath):
+            return cls.read(filepath)
+
+        model = cls.from_snapshot(path)
+        # as if read from filepath; assigning a filepath with validation would read the toml-file
+        assign_without_validation(model, "filepath", Path(filepath))
+        return model
+
     def update_state(self, time_stamp: pd.Timestamp | None = None) -> None:
         """Update basin.state with results or final basin_state (outstate)
 
@@ -243,7 +383,7 @@ class Model(ribasim.Model):
         if time_stamp is None:
             df = self.basin_outstate.df
         else:
-            df = self.basin_results.df.loc[time_stamp][["node_id", "level"]]
+            df = self.basin_results.at(time_stamp, variables="level")[["node_id", "level"]]
             df.reset_index(inplace=True, drop=True)
         df.index += 1
         df.index.name = "fid"
@@ -255,22 +395,41 @@ class Model(ribasim.Model):
 
         self.basin.state.df = df
 
-    # methods relying on networkx. Discuss making this all in a subclass of Model
+    # batch-methods relying on the CSRGraph traversal engine
+    def upstream_nodes_batch(
+        self, node_ids: list[int], stop_at_inlet: bool = False, stop_at_node_type: str | None = None
+    ) -> dict[int, set[int]]:
+        """Get upstream nodes (including node itself) for every node_id in one traversal."""
+        return self.csr_graph.upstream_nodes(node_ids, stop_at_inlet=stop_at_inlet, stop_at_node_type=stop_at_node_type)
+
+    def downstream_nodes_batch(
+        self,
+        node_ids: list[int],
+        stop_at_outlet: bool = False,
+        stop_at_node_type: str | None = None,
+        stop_at_node_ids: list[int] | None = None,
+    ) -> dict[int, set[int]]:
+        """Get downstream nodes (including node itself) for every node_id in one traversal."""
+        return self.csr_graph.downstream_nodes(
+            node_ids,
+            stop_at_outlet=stop_at_outlet,
+            stop_at_node_type=stop_at_node_type,
+            stop_at_node_ids=stop_at_node_ids,
+        )
+
     def _upstream_nodes(self, node_id, stop_at_inlet: bool = False, stop_at_node_type: str | None = None) -> set[int]:
-        # get upstream nodes
-        #     return list(nx.traversal.bfs_tree(self.graph, node_id, reverse=True))
+        # get upstream nodes from the topology index: it is updated in place, so queries between edits are cheap
         return upstream_nodes(
-            graph=self.graph, node_id=node_id, stop_at_inlet=stop_at_inlet, stop_at_node_type=stop_at_node_type
+            graph=self.topology, node_id=node_id, stop_at_inlet=stop_at_inlet, stop_at_node_type=stop_at_node_type
         )
 
     def _downstream_nodes(
         self, node_id, stop_at_outlet: bool = False, stop_at_node_type: str | None = None
     ) -> set[int]:
-        # get downstream nodes
+        # get downstream nodes from the topology index
         return downstream_nodes(
-            graph=self.graph, node_id=node_id, stop_at_outlet=stop_at_outlet, stop_at_node_type=stop_at_node_type
+            graph=self.topology, node_id=node_id, stop_at_outlet=stop_at_outlet, stop_at_node_type=stop_at_node_type
         )
-        # return list(nx.traversal.bfs_tree(self.graph, node_id))
 
     def get_upstream_basins(
         self, node_id, stop_at_inlet: bool = False, stop_at_node_type: str | None = None
@@ -293,18 +452,28 @@ class Model(ribasim.Model):
         return self.basin.area.df[self.basin.area.df.node_id.isin(downstream_node_ids)]
 
     def get_upstream_links(self, node_id, **kwargs):
-        # get upstream links
+        # get upstream links: links within the upstream nodes, not starting at node_id
         upstream_node_ids = self._upstream_nodes(node_id, **kwargs)
-        mask = self.link.df.from_node_id.isin(upstream_node_ids[1:]) & self.link.df.to_node_id.isin(upstream_node_ids)
-        return self.link.df[mask]
+        topology = self.topology
+        link_ids = [
+            link_id
+            for to_node_id in upstream_node_ids
+            for link_id in topology.upstream_link_ids(to_node_id)
+            if topology.link(link_id)[0] in upstream_node_ids and topology.link(link_id)[0] != node_id
+        ]
+        return self.link.df.loc[sorted(link_ids)]
 
     def get_downstream_links(self, node_id, **kwargs):
-        # get upstream links
+        # get downstream links: links within the downstream nodes, not ending at node_id
         downstream_node_ids = self._downstream_nodes(node_id, **kwargs)
-        mask = self.link.df.from_node_id.isin(downstream_node_ids) & self.link.df.to_node_id.isin(
-            downstream_node_ids[1:]
-        )
-        return self.link.df[mask]
+        topology = self.topology
+        link_ids = [
+            link_id
+            for from_node_id in downstream_node_ids
+            for link_id in topology.downstream_link_ids(from_node_id)
+            if topology.link(link_id)[1] in downstream_node_ids and topology.link(link_id)[1] != node_id
+        ]
+        return self.link.df.loc[sorted(link_ids)]
 
     def find_node_id(self, ds_node_id=None, us_node_id=None, **kwargs) -> int:
         """Find a node_id by it's properties"""
@@ -312,18 +481,21 @@ class Model(ribasim.Model):
         assert self.node.df is not None
         df = self.node.df
 
-        # filter node ids by properties
-        for column, value in kwargs.items():
-            df = df[df[column] == value]
-
-        # filter node ids by us and ds node
+        # filter node ids by us and ds node, using the topology index
         if (ds_node_id is not None) or (us_node_id is not None):
-            assert self.link.df is not None
-            link_df = self.link.df
+            topology = self.topology
+            node_ids: set[int] | None = None
             if ds_node_id is not None:
-                df = df[df.index.isin(link_df[link_df.to_node_id == ds_node_id].from_node_id)]
+                node_ids = set(topology.predecessors(ds_node_id))
             if us_node_id is not None:
-                df = df[df.index.isin(link_df[link_df.from_node_id == us_node_id].to_node_id)]
+                successors = set(topology.successors(us_node_id))
+                node_ids = successors if node_ids is None else node_ids & successors
+            assert node_ids is not None
+            df = df.loc[sorted(i for i in node_ids if i in df.index)]
+
+        # filter node ids by properties
+        for column, value in kwargs.items():
+            df = df[df[column] == value]
 
         # check if we didn't find 0 or multiple node_ids
         node_ids = df.index.to_list()
@@ -358,11 +530,9 @@ class Model(ribasim.Model):
 
     def upstream_node_id(self, node_id: int, link_type: Literal["flow", "control"] = "flow"):
         """Get upstream node_id(s)"""
-        assert self.link.df is not None
-        _df = self.link.df.set_index("to_node_id")
-        _df = _df[_df.link_type == link_type]
-        if node_id in _df.index:
-            return _df.loc[node_id].from_node_id
+        topology = self.topology
+        from_node_ids = [topology.link(i)[0] for i in topology.upstream_link_ids(node_id, link_type=link_type)]
+        return _neighbor_node_ids(from_node_ids, node_id, index_name="to_node_id", name="from_node_id")
 
     def upstream_profile(self, node_id: int) -> pd.DataFrame | GeoDataFrame:
         """Get upstream basin-profile"""
@@ -377,11 +547,9 @@ class Model(ribasim.Model):
 
     def downstream_node_id(self, node_id: int, link_type: Literal["flow", "control"] = "flow"):
         """Get downstream node_id(s)"""
-        assert self.link.df is not None
-        _df = self.link.df.set_index("from_node_id")
-        _df = _df[_df.link_type == link_type]
-        if node_id in _df.index:
-            return _df.loc[node_id].to_node_id
+        topology = self.topology
+        to_node_ids = [topology.link(i)[1] for i in topology.downstream_link_ids(node_id, link_type=link_type)]
+        return _neighbor_node_ids(to_node_ids, node_id, index_name="from_node_id", name="to_node_id")
 
     def downstream_profile(self, node_id: int) -> pd.DataFrame | GeoDataFrame:
         """Get upstream basin-profile"""
@@ -410,11 +578,15 @@ class Model(ribasim.Model):
     def remove_node(self, node_id: int, remove_links: bool = False) -> None:
         """Remove node from model"""
         assert self.node.df is not None
+        topology = self._synced_topology()
         node_type = None
         if node_id in self.node.df.index:
             node_type = self.get_node_type(node_id)
             # Remove from node table
-            self.node.df = self.node.df.drop(node_id)
+            _assign_row_subset(self.node, self.node.df.drop(node_id))
+            if topology is not None:
+                topology.remove_node(node_id)
+                self._update_topology(topology)
 
         if node_id in self.node._used_node_ids:
             self.node._used_node_ids.node_ids.remove(node_id)
@@ -426,19 +598,20 @@ class Model(ribasim.Model):
         if sub is not None:
             for table in sub._tables():
                 if table.df is not None and "node_id" in table.df.columns:
-                    table.df = table.df[table.df["node_id"] != node_id]
-                    if table.df.empty:
-                        table.df = None
+                    row_index = self._row_index(table)
+                    positions = row_index.positions(node_id)
+                    if len(positions) == 0:
+                        continue
+                    keep = np.ones(len(table.df), dtype=bool)
+                    keep[positions] = False
+                    df = table.df[keep]
+                    _assign_row_subset(table, None if df.empty else df)
+                    row_index.remove(node_id, table.df)
         # remove links
         if remove_links and (self.link.df is not None):
-            for row in self.link.df[self.link.df.from_node_id == node_id].itertuples():
-                self.remove_link(
-                    from_node_id=row.from_node_id, to_node_id=row.to_node_id, remove_disconnected_nodes=False
-                )
-            for row in self.link.df[self.link.df.to_node_id == node_id].itertuples():
-                self.remove_link(
-                    from_node_id=row.from_node_id, to_node_id=row.to_node_id, remove_disconnected_nodes=False
-                )
+            link_ids = self.topology.link_ids(node_id)
+            if link_ids:
+                self.remove_links(link_ids)
 
     def update_node(
         self, node_id, node_type, data: list[object] | None = None, node_properties: dict[str, object] | None = None
@@ -446,6 +619,7 @@ class Model(ribasim.Model):
         if node_properties is None:
             node_properties = {}
         assert self.node.df is not None
+        topology = self._synced_topology()
         existing_node_type = self.node.df.at[node_id, "node_type"]
 
         # read existing table
@@ -485,6 +659,7 @@ class Model(ribasim.Model):
         # complete node_properties
         node_properties = {**node_properties, **node_dict}
         node_properties_to_table(table, node_properties, node_id)
+        self._update_topology(topology, node_ids=[node_id])
 
     def add_control_node(
         self,
@@ -534,6 +709,7 @@ class Model(ribasim.Model):
 
         node_id = self.next_node_id
         node = Node(node_id=node_id, geometry=node_geom)
+        topology = self._synced_topology()
 
         # add node
         table = getattr(self, pascal_to_snake_case(ctrl_type))
@@ -541,12 +717,14 @@ class Model(ribasim.Model):
 
         # add node properties
         node_properties_to_table(table, node_properties, node_id)
+        self._update_topology(topology, node_ids=[node_id])
 
         # add links
         if isinstance(to_node_id, int):
             to_node_id = [to_node_id]
         for _to_node_id in to_node_id:
             self.link.add(table[node_id], self.get_node(_to_node_id))
+            self._update_topology(topology, link_ids=[self.link.df.index[-1]])
 
     def reverse_link(
         self,
@@ -566,9 +744,13 @@ class Model(ribasim.Model):
             else:
                 link_data = dict(self.link.df.loc[link_id])
 
+            topology = self._synced_topology()
+
             # revert node ids
             self.link.df.loc[link_id, ["from_node_id"]] = link_data["to_node_id"]
             self.link.df.loc[link_id, ["to_node_id"]] = link_data["from_node_id"]
+            if topology is not None:
+                topology.reverse_link(link_id)
 
             # revert geometry
             self.link.df.loc[link_id, ["geometry"]] = link_data["geometry"].reverse()
@@ -578,23 +760,27 @@ class Model(ribasim.Model):
     ) -> None:
         """Remove an link and disconnected nodes"""
         if self.link.df is not None:
-            # get original link-data
-            indices = self.link.df[
-                (self.link.df.from_node_id == from_node_id) & (self.link.df.to_node_id == to_node_id)
-            ].index
+            # get link_ids from the topology index
+            topology = self.topology
+            link_ids = [i for i in topology.downstream_link_ids(from_node_id) if topology.link(i)[1] == to_node_id]
 
             # remove link from link-table
-            self.link.df = self.link.df[~self.link.df.index.isin(indices)]
+            self.remove_links(link_ids)
 
             # remove disconnected nodes
             if remove_disconnected_nodes:
                 for node_id in [from_node_id, to_node_id]:
-                    if node_id not in self.link.df[["from_node_id", "to_node_id"]].to_numpy().ravel():
+                    if not self.topology.has_links(node_id):
                         self.remove_node(node_id)
 
     def remove_links(self, link_ids: list[int]) -> None:
         if self.link.df is not None:
-            self.link.df = self.link.df[~self.link.df.index.isin(link_ids)]
+            topology = self._synced_topology()
+            _assign_row_subset(self.link, self.link.df[~self.link.df.index.isin(link_ids)])
+            if topology is not None:
+                for link_id in link_ids:
+                    topology.remove_link(link_id)
+                self._update_topology(topology)
 
     def add_basin(self, node_id, geometry, tables=None, **kwargs) -> None:
         # define node properties
@@ -612,7 +798,9 @@ class Model(ribasim.Model):
         if tables is None:
             tables = DEFAULT_TABLES.basin
 
-        self.basin.add(Node(node_id=node_id, geometry=geometry, name=name, **node_properties), tables=tables)
+        topology = self._synced_topology()
+        node = self.basin.add(Node(node_id=node_id, geometry=geometry, name=name, **node_properties), tables=tables)
+        self._update_topology(topology, node_ids=[node.node_id])
 
     def connect_basins(self, from_basin_id, to_basin_id, node_type, geometry, tables=None, name="", **kwargs) -> None:
         if pd.isna(name):
@@ -641,9 +829,11 @@ class Model(ribasim.Model):
             tables = getattr(DEFAULT_TABLES, pascal_to_snake_case(node_type))
 
         # add node
+        topology = self._synced_topology()
         node = getattr(self, pascal_to_snake_case(node_type)).add(
             Node(geometry=geometry, name=name, **node_properties), tables=tables
         )
+        self._update_topology(topology, node_ids=[node.node_id])
 
         # add links from and to node
         for from_node, to_node in [(self.get_node(from_basin_id), node), (node, self.get_node(to_basin_id))]:
@@ -655,6 +845,7 @@ class Model(ribasim.Model):
                         f"Error in connecting {from_node.node_type} #{from_node.node_id} to {to_node.node_type} #{to_node.node_id}"
                     )
                     raise e
+                self._update_topology(topology, link_ids=[self.link.df.index[-1]])
             else:
                 self.add_link(from_node, to_node)
 
@@ -674,6 +865,7 @@ class Model(ribasim.Model):
         """
         geometry_to_append = [LineString([from_node.geometry, to_node.geometry])]
         link_id = self.link.df.index.max() + 1
+        topology = self._synced_topology()
         df = gpd.GeoDataFrame(
             data={
                 "from_node_id": [from_node.node_id],
@@ -690,6 +882,7 @@ class Model(ribasim.Model):
         self.link.df = _concat([self.link.df, df])
         self.link._used_link_ids.add(link_id)
         self.link._used_link_ids.max_node_id = self.link.df.index.max()
+        self._update_topology(topology, link_ids=[link_id])
 
     def add_basin_outlet(self, basin_id, geometry, node_type="Outlet", tables=None, **kwargs) -> None:
         # define node properties
@@ -708,19 +901,24 @@ class Model(ribasim.Model):
             tables = getattr(DEFAULT_TABLES, pascal_to_snake_case(node_type))
 
         # add outlet
+        topology = self._synced_topology()
         node = getattr(self, pascal_to_snake_case(node_type)).add(
             Node(geometry=geometry, name=name, **node_properties), tables=tables
         )
+        self._update_topology(topology, node_ids=[node.node_id])
 
         # add links from and to node
         self.link.add(self.basin[basin_id], node)
+        self._update_topology(topology, link_ids=[self.link.df.index[-1]])
         link_geometry = self.link.df.set_index(["from_node_id", "to_node_id"]).at[(basin_id, node.node_id), "geometry"]
 
         # add boundary
         geometry = shapely.affinity.scale(link_geometry, xfact=1.05, yfact=1.05, origin="center").boundary.geoms[1]
         # geometry = link_geometry.interpolate(1.05, normalized=True)
         boundary_node = self.level_boundary.add(Node(geometry=geometry), tables=DEFAULT_TABLES.level_boundary)
+        self._update_topology(topology, node_ids=[boundary_node.node_id])
         self.link.add(node, boundary_node)
+        self._update_topology(topology, link_ids=[self.link.df.index[-1]])
 
     def reverse_direction_at_node(self, node_id) -> None:
         for link_id in self.link.df[
@@ -888,15 +1086,21 @@ class Model(ribasim.Model):
     def link_from_node_type(self) -> pd.Series:
         assert self.node.df is not None
         assert self.link.df is not None
-        node_df = self.node.df
-        return self.link.df.from_node_id.apply(lambda x: node_df.at[x, "node_type"] if x in node_df.index else None)
+        return (
+            self.link.df.from_node_id.map(self.node.df.node_type)
+            .astype(object)
+            .where(self.link.df.from_node_id.isin(self.node.df.index), None)
+        )
 
     @property
     def link_to_node_type(self) -> pd.Series:
         assert self.node.df is not None
         assert self.link.df is not None
-        node_df = self.node.df
-        return self.link.df.to_node_id.apply(lambda x: node_df.at[x, "node_type"] if x in node_df.index else None)
+        return (
+            self.link.df.to_node_id.map(self.node.df.node_type)
+            .astype(object)
+            .where(self.link.df.to_node_id.isin(self.node.df.index), None)
+        )
 
     def split_basin(
         self,
@@ -986,10 +1190,13 @@ class Model(ribasim.Model):
 
     def redirect_link(self, link_id: int, from_node_id: int | None = None, to_node_id: int | None = None) -> None:
         if self.link.df is not None:
+            topology = self._synced_topology()
             if from_node_id is not None:
                 self.link.df.loc[link_id, ["from_node_id"]] = from_node_id
             if to_node_id is not None:
                 self.link.df.loc[link_id, ["to_node_id"]] = to_node_id
+            if topology is not None:
+                topology.redirect_link(link_id, from_node_id=from_node_id, to_node_id=to_node_id)
 
         self.reset_link_geometry(link_ids=[link_id])
 
@@ -1046,28 +1253,42 @@ class Model(ribasim.Model):
             )
 
         if are_connected and (to_node_type != "FlowBoundary"):
-            self._graph = None  # set self._graph to None, so it will regenerate on currend link-table
-            paths = [i for i in nx.all_shortest_paths(nx.Graph(self.graph), node_id, to_node_id) if len(i) == 3]
+            # flow-nodes connecting both basins, in either direction (undirected paths of length 3)
+            neighbors = self.topology.neighbors(node_id)
+            connecting_node_ids = (
+                [] if to_node_id in neighbors else sorted(neighbors & self.topology.neighbors(to_node_id))
+            )
 
-            if len(paths) == 0:
+            if len(connecting_node_ids) == 0:
                 raise ValueError(f"basin {node_id} not a direct neighbor of basin {to_node_id}")
 
             # remove flow-node and connected links
-            for path in paths:
-                self.remove_node(path[1], remove_links=True)
+            for connecting_node_id in connecting_node_ids:
+                self.remove_node(connecting_node_id, remove_links=True)
 
         # get a complete link-list to modify
-        link_ids = self.link.df[self.link.df.from_node_id == node_id].index.to_list()
-        link_ids += self.link.df[self.link.df.to_node_id == node_id].index.to_list()
+        topology = self._synced_topology()
+        from_link_ids = self.link.df[self.link.df.from_node_id == node_id].index.to_list()
+        to_link_ids = self.link.df[self.link.df.to_node_id == node_id].index.to_list()
+        link_ids = from_link_ids + to_link_ids
 
         # correct link from and to attributes
         self.link.df.loc[self.link.df.from_node_id == node_id, "from_node_id"] = to_node_id
         self.link.df.loc[self.link.df.to_node_id == node_id, "to_node_id"] = to_node_id
+        if topology is not None:
+            for link_id in from_link_ids:
+                topology.redirect_link(link_id, from_node_id=to_node_id)
+            for link_id in to_link_ids:
+                topology.redirect_link(link_id, to_node_id=to_node_id)
 
         # remove self-connecting link in case we merge to flow-boundary
         if to_node_type == "FlowBoundary":
             mask = (self.link.df.from_node_id == to_node_id) & (self.link.df.to_node_id == to_node_id)
             self.link.df = self.link.df[~mask]
+            if topology is not None:
+                for link_id in mask[mask].index:
+                    topology.remove_link(link_id)
+                self._update_topology(topology)
 
         # reset link geometries
         self.reset_link_geometry(link_ids=link_ids)
@@ -1126,22 +1347,24 @@ class Model(ribasim.Model):
         outlet_b = self.outlet.node.df.loc[outlet_b_id]
 
         # Remove upstream (outlet_a) control node before link redirection, keeping the downstream one
-        upstream_ctrl_links = self.link.df[
-            (self.link.df.to_node_id == outlet_a_id) & (self.link.df.link_type == "control")
-        ]
-        for ctrl_link_id in upstream_ctrl_links.index:
-            ctrl_node_id: int = self.link.df.at[ctrl_link_id, "from_node_id"]
+        topology = self.topology
+        ctrl_node_ids = [topology.link(i)[0] for i in topology.upstream_link_ids(outlet_a_id, link_type="control")]
+        for ctrl_node_id in dict.fromkeys(ctrl_node_ids):
             self.remove_node(ctrl_node_id, remove_links=True)
 
         # correct link from and to attributes (collect all links connected to either outlet for geometry reset)
-        link_ids = self.link.df[
-            (self.link.df.from_node_id.isin([outlet_a_id, outlet_b_id]))
-            | (self.link.df.to_node_id.isin([outlet_a_id, outlet_b_id]))
-        ].index.to_list()
+        topology = self.topology
+        link_ids = sorted(set(topology.link_ids(outlet_a_id)) | set(topology.link_ids(outlet_b_id)))
 
         # Remove outlet_b from the links
-        self.link.df.loc[self.link.df.from_node_id == outlet_b_id, "from_node_id"] = outlet_a_id
-        self.link.df.loc[self.link.df.to_node_id == outlet_b_id, "to_node_id"] = outlet_a_id
+        from_link_ids = topology.downstream_link_ids(outlet_b_id)
+        to_link_ids = topology.upstream_link_ids(outlet_b_id)
+        for link_id in from_link_ids:
+            topology.redirect_link(link_id, from_node_id=outlet_a_id)
+        for link_id in to_link_ids:
+            topology.redirect_link(link_id, to_node_id=outlet_a_id)
+        self.link.df.loc[from_link_ids, "from_node_id"] = outlet_a_id
+        self.link.df.loc[to_link_ids, "to_node_id"] = outlet_a_id
 
         # Merge geometry
         avg_x = (outlet_a.geometry.x + outlet_b.geometry.x) / 2
@@ -1149,9 +1372,11 @@ class Model(ribasim.Model):
         self.node.df.loc[outlet_a_id, "geometry"] = Point(avg_x, avg_y)
 
         # Merge attributes
-        self.outlet.static.df.loc[self.outlet.static.df.node_id == outlet_a_id, "max_downstream_level"] = (
-            self.outlet.static.df.loc[self.outlet.static.df.node_id == outlet_b_id, "max_downstream_level"]
-        )
+        static_df = self.outlet.static.df
+        row_index = self._row_index(self.outlet.static)
+        static_df.loc[static_df.index[row_index.positions(outlet_a_id)], "max_downstream_level"] = static_df.loc[
+            static_df.index[row_index.positions(outlet_b_id)], "max_downstream_level"
+        ]
 
         # Remove outlet_b
         self.remove_node(outlet_b_id)
@@ -1159,85 +1384,69 @@ class Model(ribasim.Model):
 
         return outlet_a
 
-    def invalid_topology_at_node(self, link_type: str = "flow") -> gpd.GeoDataFrame:
+    def invalid_topology_at_node(self, link_type: str | list[str] = "flow") -> gpd.GeoDataFrame:
+        """Check if all nodes have the minimum amount of in- and outneighbors for the given link type(s).
+
+        Parameters
+        ----------
+        link_type : str | list[str], optional
+            Link type(s) to check in one pass, e.g. ["flow", "control"], by default "flow"
+
+        Returns
+        -------
+        gpd.GeoDataFrame
+            Invalid nodes, indexed by node_id, with node_type, exception and link_type
+        """
         assert self.link.df is not None
         assert self.node.df is not None
-        df_graph = self.link.df
+        df_link = self.link.df
         df_node = self.node.df
-        # Join df_link with df_node to get to_node_type
-        df_graph = df_graph.join(df_node[["node_type"]], on="from_node_id", how="left", rsuffix="_from")
-        df_graph = df_graph.rename(columns={"node_type": "from_node_type"})
+        link_types = [link_type] if isinstance(link_type, str) else list(link_type)
 
-        df_graph = df_graph.join(df_node[["node_type"]], on="to_node_id", how="left", rsuffix="_to")
-        df_graph = df_graph.rename(columns={"node_type": "to_node_type"})
-        df_node = self.node.df
-
-        """Check if the neighbor amount of the two nodes connected by the given link meet the minimum requirements."""
         errors = []
+        for link_type in link_types:
+            df_graph = df_link.loc[df_link["link_type"] == link_type]
+            for direction, bound, neighbor in (("from", 2, "outneighbor"), ("to", 0, "inneighbor")):
+                # count links per node (from: outneighbors, to: inneighbors)
+                positions = df_node.index.get_indexer(df_graph[f"{direction}_node_id"])
+                positions = positions[positions >= 0]
+                count = np.bincount(positions, minlength=len(df_node))
+                minimum = (
+                    df_node["node_type"]
+                    .map({k: v[bound] for k, v in link_amount[link_type].items()})
+                    .fillna(0)
+                    .to_numpy(dtype=np.int64)
+                )
+                invalid = np.flatnonzero(count < minimum)
 
-        # filter graph by link type
-        df_graph = df_graph.loc[df_graph["link_type"] == link_type]
-
-        # count occurrence of "from_node" which reflects the number of outneighbors
-        from_node_count = df_graph.groupby("from_node_id").size().reset_index(name="from_node_count")
-
-        # append from_node_count column to from_node_id and from_node_type
-        from_node_info = (
-            df_graph[["from_node_id", "from_node_type"]]
-            .drop_duplicates()
-            .merge(from_node_count, on="from_node_id", how="left")
-        )
-        from_node_info = from_node_info[["from_node_id", "from_node_count", "from_node_type"]]
-
-        # add the node that is not the upstream of any other nodes
-        from_node_info = self._add_source_sink_node(df_node["node_type"], from_node_info, "from")
-
-        # loop over all the "from_node" and check if they have enough outneighbor
-        for _, row in from_node_info.iterrows():
-            # from node's outneighbor
-            min_outneighbors = link_amount[link_type][row["from_node_type"]][2]
-            if row["from_node_count"] < min_outneighbors:
-                node_id = row["from_node_id"]
-                errors += [
-                    {
-                        "geometry": df_node.at[node_id, "geometry"],
-                        "node_id": node_id,
-                        "node_type": df_node.at[node_id, "node_type"],
-                        "exception": f"must have at least {min_outneighbors} outneighbor(s) (got {row['from_node_count']})",
-                    }
-                ]
-
-        # count occurrence of "to_node" which reflects the number of inneighbors
-        to_node_count = df_graph.groupby("to_node_id").size().reset_index(name="to_node_count")
-
-        # append to_node_count column to result
-        to_node_info = (
-            df_graph[["to_node_id", "to_node_type"]].drop_duplicates().merge(to_node_count, on="to_node_id", how="left")
-        )
-        to_node_info = to_node_info[["to_node_id", "to_node_count", "to_node_type"]]
-
-        # add the node that is not the downstream of any other nodes
-        to_node_info = self._add_source_sink_node(df_node["node_type"], to_node_info, "to")
+                # report nodes in order of appearance in the link table, followed by nodes without links
+                order = len(positions) + np.arange(len(df_node))
+                first_positions, first_links = np.unique(positions, return_index=True)
+                order[first_positions] = first_links
+                invalid = invalid[np.argsort(order[invalid], kind="stable")]
 
-        # loop over all the "to_node" and check if they have enough inneighbor
-        for _, row in to_node_info.iterrows():
-            min_inneighbors = link_amount[link_type][row["to_node_type"]][0]
-            if row["to_node_count"] < min_inneighbors:
-                node_id = row["to_node_id"]
                 errors += [
-                    {
-                        "geometry": df_node.at[node_id, "geometry"],
-                        "node_id": node_id,
-                        "node_type": df_node.at[node_id, "node_type"],
-                        "exception": f"must have at least {min_inneighbors} inneighbor(s) (got {row['to_node_count']})",
-                    }
+                    gpd.GeoDataFrame(
+                        {
+                            "geometry": df_node.geometry.to_numpy()[invalid],
+                            "node_id": df_node.index[invalid],
+                            "node_type": df_node["node_type"].to_numpy()[invalid],
+                            "exception": [
+                                f"must have at least {i} {neighbor}(s) (got {j})"
+                                for i, j in zip(minimum[invalid], count[invalid], strict=True)
+                            ],
+                            "link_type": link_type,
+                        },
+                        crs=self.crs,
+                    )
                 ]
 
-        if len(errors) > 0:
-            return gpd.GeoDataFrame(errors, crs=self.crs).set_index("node_id")
+        df = pd.concat(errors, ignore_index=True) if errors else None
+        if df is not None and not df.empty:
+            return gpd.GeoDataFrame(df, crs=self.crs).set_index("node_id")
         else:
             return gpd.GeoDataFrame(
-                [], columns=["node_id", "node_type", "exception"], geometry=gpd.GeoSeries(crs=self.crs)
+                [], columns=["node_id", "node_type", "exception", "link_type"], geometry=gpd.GeoSeries(crs=self.crs)
             ).set_index("node_id")
 
     def validate_link_source_destination(self) -> None:
@@ -1245,15 +1454,12 @@ class Model(ribasim.Model):
         # remove function when this is available: https://github.com/Deltares/Ribasim/issues/2140
         df = self.link.df
 
-        # on tuples we can easily check duplicates irrespective of order
-        duplicated_links = pd.Series(
-            list(
-                zip(
-                    np.minimum(df["from_node_id"], df["to_node_id"]),
-                    np.maximum(df["from_node_id"], df["to_node_id"]),
-                    strict=True,
-                )
-            ),
+        # on sorted node pairs we can easily check duplicates irrespective of order
+        duplicated_links = pd.DataFrame(
+            {
+                "node_id_a": np.minimum(df["from_node_id"], df["to_node_id"]),
+                "node_id_b": np.maximum(df["from_node_id"], df["to_node_id"]),
+            },
             index=df.index,
         ).duplicated(keep=False)
 
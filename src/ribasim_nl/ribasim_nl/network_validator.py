@@ -1,6 +1,9 @@
 from dataclasses import dataclass
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
 from pandera.typing.geopandas import GeoDataFrame
 from ribasim.geometry.link import LinkSchema
 from ribasim.geometry.node import NodeSchema
@@ -8,38 +11,55 @@ from ribasim.geometry.node import NodeSchema
 from ribasim_nl.model import Model
 
 
-def within_distance(row, gdf, tolerance=1.0) -> bool:
-    distance = gdf[gdf.index != row.name].distance(row.geometry)
-    return (distance < tolerance).any()
+def within_distance(gdf: gpd.GeoDataFrame, tolerance: float = 1.0) -> np.ndarray:
+    """Boolean mask of geometries within (<) tolerance of a geometry with another index-label, using the spatial index."""
+    geometries = gdf.geometry.to_numpy()
+    idx, tree_idx = gdf.sindex.query(geometries, predicate="dwithin", distance=tolerance)
 
+    # drop self-matches and check strictly smaller than tolerance, as dwithin includes tolerance
+    labels = gdf.index.to_numpy()
+    other = labels[idx] != labels[tree_idx]
+    idx, tree_idx = idx[other], tree_idx[other]
+    within = shapely.distance(geometries[idx], geometries[tree_idx]) < tolerance
 
-def check_node_connectivity(row, node_df, tolerance=1.0) -> bool:
-    invalid = True
+    mask = np.zeros(len(gdf), dtype=bool)
+    mask[idx[within]] = True
+    return mask
 
-    # handle zero-length links
-    if row.geometry.length == 0:
-        point_from = point_to = row.geometry.centroid
-    else:
-        point_from, point_to = row.geometry.boundary.geoms
+
+def link_end_points(link_df: gpd.GeoDataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """First and last point of every link-geometry (the same point for zero-length links)."""
+    geometries = link_df.geometry.to_numpy()
+    return shapely.get_point(geometries, 0), shapely.get_point(geometries, -1)
+
+
+def node_distance(points: np.ndarray, node_ids: pd.Series, node_df: gpd.GeoDataFrame) -> np.ndarray:
+    """Distance from points to the geometry of node_ids, NaN if node_id is not in node_df."""
+    node_geometries = node_df.geometry.reindex(node_ids.to_numpy()).to_numpy()
+    return shapely.distance(points, node_geometries)
+
+
+def check_node_connectivity(link_df: gpd.GeoDataFrame, node_df: gpd.GeoDataFrame, tolerance=1.0) -> np.ndarray:
+    """Boolean mask of links that have their from or to node further than tolerance from their first or last point.
+
+    Links with a from_node_id that is not in node_df are invalid.
+    """
+    point_from, point_to = link_end_points(link_df)
 
     # check if from_node_id is valid
-    if row.from_node_id in node_df.index:
-        distance = point_from.distance(node_df.at[row.from_node_id, "geometry"])
-        invalid = distance > tolerance
+    from_in_nodes = link_df.from_node_id.isin(node_df.index).to_numpy()
+    invalid = ~from_in_nodes | (node_distance(point_from, link_df.from_node_id, node_df) > tolerance)
 
     # if valid, check if to_node_id is valid
-    if (not invalid) and (row.to_node_id in node_df.index):
-        distance = point_to.distance(node_df.at[row.to_node_id, "geometry"])
-        invalid = distance > tolerance
+    to_in_nodes = link_df.to_node_id.isin(node_df.index).to_numpy()
+    invalid |= to_in_nodes & (node_distance(point_to, link_df.to_node_id, node_df) > tolerance)
 
     return invalid
 
 
-def check_internal_basin(row, link_df) -> bool:
-    if row.node_type == "Basin":
-        return row.name not in link_df.from_node_id.to_numpy()
-    else:
-        return False
+def check_internal_basin(node_df: gpd.GeoDataFrame, link_df: gpd.GeoDataFrame) -> np.ndarray:
+    """Boolean mask of Basin nodes that are not the from_node_id of any link."""
+    return ((node_df.node_type == "Basin") & ~node_df.index.isin(link_df.from_node_id)).to_numpy()
 
 
 @dataclass
@@ -59,46 +79,47 @@ class NetworkValidator:
     tolerance: float = 1
 
     @property
-    def node_df(self) -> GeoDataFrame[NodeSchema] | None:
-        return self.model.node.df
+    def node_df(self) -> GeoDataFrame[NodeSchema]:
+        node_df = self.model.node.df
+        assert node_df is not None, "model has no nodes to validate"
+        return node_df
 
     @property
-    def link_df(self) -> GeoDataFrame[LinkSchema] | None:
-        return self.model.link.df
+    def link_df(self) -> GeoDataFrame[LinkSchema]:
+        link_df = self.model.link.df
+        assert link_df is not None, "model has no links to validate"
+        return link_df
 
     def node_overlapping(self):
         """Check if the node-geometry overlaps another node within tolerance (default=1m)"""
-        return self.node_df[self.node_df.apply(lambda row: within_distance(row, self.node_df, self.tolerance), axis=1)]
+        return self.node_df[within_distance(self.node_df, self.tolerance)]
 
     def node_duplicated(self):
         """Check if node_id is duplicated"""
-        return self.node_df[self.node_df.node_id.duplicated()]
+        return self.node_df[self.node_df.index.duplicated()]
 
     def node_internal_basin(self):
         """Check if a Node with node_type Basin is not connected to another node"""
-        mask = self.node_df.apply(lambda row: check_internal_basin(row, self.link_df), axis=1)
-        return self.node_df[mask]
+        return self.node_df[check_internal_basin(self.node_df, self.link_df)]
 
     def node_invalid_connectivity(self, tolerance: float = 1.0) -> GeoDataFrame:
         """Check if node_from and node_to are correct on link"""
         node_df = self.node_df
         invalid_links_df = self.link_incorrect_connectivity()
-        invalid_nodes = []
-        for row in invalid_links_df.itertuples():
-            geoms = row.geometry.boundary.geoms
-
-            for idx, attr in ((0, "from_node_id"), (1, "to_node_id")):
-                node_id = getattr(row, attr)
-                point = geoms[idx]
-                if node_id in node_df.index:
-                    if point.distance(node_df.at[node_id, "geometry"]) > tolerance:
-                        invalid_nodes += [{"node_id": node_id, "geometry": point}]
-                else:
-                    invalid_nodes += [{"node_id": node_id, "geometry": point}]
-
-        if invalid_nodes:
-            df = gpd.GeoDataFrame(invalid_nodes, crs=node_df.crs)
-            df.drop_duplicates(inplace=True)
+
+        # from and to node of every invalid link, interleaved to keep the link order
+        point_from, point_to = link_end_points(invalid_links_df)
+        node_ids = pd.Series(
+            np.column_stack([invalid_links_df.from_node_id, invalid_links_df.to_node_id]).ravel(), dtype="int64"
+        )
+        points = np.column_stack([point_from, point_to]).ravel()
+        distance = node_distance(points, node_ids, node_df)
+        invalid = ~node_ids.isin(node_df.index).to_numpy() | (distance > tolerance)
+
+        if invalid.any():
+            df = gpd.GeoDataFrame(
+                {"node_id": node_ids[invalid].to_numpy()}, geometry=points[invalid], crs=node_df.crs
+            ).drop_duplicates()
         else:
             df = gpd.GeoDataFrame({"node_id": []}, geometry=gpd.GeoSeries(), crs=node_df.crs)
 
@@ -110,45 +131,22 @@ class NetworkValidator:
 
     def link_missing_nodes(self):
         """Check if the `from_node_id` and `to_node_id` in the link-table are both as node-id in the node-table"""
-        mask = ~(
-            self.link_df.from_node_id.isin(self.node_df.node_id) & self.link_df.to_node_id.isin(self.node_df.node_id)
-        )
+        mask = ~(self.link_df.from_node_id.isin(self.node_df.index) & self.link_df.to_node_id.isin(self.node_df.index))
         return self.link_df[mask]
 
     def link_incorrect_from_node(self):
         """Check if the `from_node_type` in link-table in matches the `node_type` of the corresponding node in the node-table"""
-        node_df = self.node_df
-        mask = ~self.link_df.apply(
-            lambda row: (
-                node_df.at[row["from_node_id"], "node_type"] == row["from_node_type"]
-                if row["from_node_id"] in node_df.index
-                else False
-            ),
-            axis=1,
-        )
-        return self.link_df[mask]
+        node_type = self.link_df.from_node_id.map(self.node_df.node_type)
+        return self.link_df[~(node_type == self.link_df["from_node_type"])]
 
     def link_incorrect_to_node(self):
         """Check if the `to_node_type` in link-table in matches the `node_type` of the corresponding node in the node-table"""
-        node_df = self.node_df
-        mask = ~self.link_df.apply(
-            lambda row: (
-                node_df.at[row["to_node_id"], "node_type"] == row["to_node_type"]
-                if row["to_node_id"] in node_df.index
-                else False
-            ),
-            axis=1,
-        )
-        return self.link_df[mask]
+        node_type = self.link_df.to_node_id.map(self.node_df.node_type)
+        return self.link_df[~(node_type == self.link_df["to_node_type"])]
 
     def link_incorrect_connectivity(self):
         """Check if the geometries of the `from_node_id` and `to_node_id` are on the start and end vertices of the link-geometry within tolerance (default=1m)"""
-        node_df = self.node_df
-        mask = self.link_df.apply(
-            lambda row: check_node_connectivity(row=row, node_df=node_df, tolerance=self.tolerance), axis=1
-        )
-
-        return self.link_df[mask]
+        return self.link_df[check_node_connectivity(self.link_df, self.node_df, tolerance=self.tolerance)]
 
     def link_incorrect_type_connectivity(self, from_node_type="ManningResistance", to_node_type="LevelBoundary"):
         """Check links that contain wrong connectivity"""
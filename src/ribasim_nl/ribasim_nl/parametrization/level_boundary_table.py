@@ -54,16 +54,20 @@ def update_level_boundary_static(
     mask = static_df.level.isna()
     assert model.basin.area.df is not None
     if mask.any():
+        node_ids = static_df[mask].node_id.to_list()
+        upstream_nodes = model.upstream_nodes_batch(node_ids, stop_at_node_type="Basin")
+        downstream_nodes = model.downstream_nodes_batch(node_ids, stop_at_node_type="Basin")
+        basin_area_df = model.basin.area.df.set_index("node_id")
         for row in static_df[mask].itertuples():
             node_id = row.node_id
-            us_basins = model.get_upstream_basins(node_id, stop_at_node_type="Basin").node_id.to_list()
+            us_basins = basin_area_df.index[basin_area_df.index.isin(upstream_nodes[node_id])]
             if len(us_basins) > 0:
-                level = model.basin.area.df.set_index("node_id").loc[us_basins]["meta_streefpeil"].min()
+                level = basin_area_df.loc[us_basins]["meta_streefpeil"].min()
             else:  # its an inlet
-                ds_basins = model.get_downstream_basins(node_id, stop_at_node_type="Basin").node_id.to_list()
+                ds_basins = basin_area_df.index[basin_area_df.index.isin(downstream_nodes[node_id])]
                 if len(ds_basins) == 0:
                     raise ValueError(f"node_id {node_id} does not have an upstream or downstream basin")
-                level = model.basin.area.df.set_index("node_id").loc[ds_basins]["meta_streefpeil"].max()
+                level = basin_area_df.loc[ds_basins]["meta_streefpeil"].max()
             static_df.loc[row.Index, "level"] = level
 
     model.level_boundary.static.df = static_df
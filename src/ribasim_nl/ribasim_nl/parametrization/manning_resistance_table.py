@@ -99,7 +99,7 @@ def manning_flow_rate(model: Model, manning_node_id: int, at_timestamp: Timestam
     """
     # get at_timestamp if not defined
     if at_timestamp is None:
-        at_timestamp = model.basin_results.df.index.max()
+        at_timestamp = model.basin_results.time.max()
 
     # get upstream and downstream basins
     us_basin_node_id = model.upstream_node_id(manning_node_id)
@@ -107,7 +107,9 @@ def manning_flow_rate(model: Model, manning_node_id: int, at_timestamp: Timestam
 
     # get slope
     assert model.manning_resistance.static.df is not None
-    df = model.basin_results.df.loc[at_timestamp].set_index("node_id")
+    df = model.basin_results.at(
+        at_timestamp, variables="level", node_id=[us_basin_node_id, ds_basin_node_id]
+    ).set_index("node_id")
     delta_h = df.at[us_basin_node_id, "level"] - df.at[ds_basin_node_id, "level"]
     slope = abs(delta_h / model.manning_resistance.static.df.set_index("node_id").at[manning_node_id, "length"])
 
@@ -89,28 +89,26 @@ def defaults_to_static_df(model: Model, static_df: pd.DataFrame, static_data_xls
 
             if not pd.isna(row.flow_rate_mm_per_day):
                 unit_conversion = float(row.flow_rate_mm_per_day) / 1000 / 86400
+                node_ids = static_df[mask][sub_mask].node_id.to_list()
                 if row.function == "outlet":
-                    flow_rate = np.array(
-                        [
-                            round_to_significant_digits(
-                                model.get_upstream_basins(node_id, stop_at_inlet=True).area.sum() * unit_conversion
-                            )
-                            for node_id in static_df[mask][sub_mask].node_id
-                        ],
-                        dtype=float,
-                    )
+                    node_sets = model.upstream_nodes_batch(node_ids, stop_at_inlet=True)
                 elif row.function == "inlet":
-                    flow_rate = np.array(
-                        [
-                            round_to_significant_digits(
-                                model.get_downstream_basins(node_id, stop_at_outlet=True).area.sum() * unit_conversion
-                            )
-                            for node_id in static_df[mask][sub_mask].node_id
-                        ],
-                        dtype=float,
-                    )
+                    node_sets = model.downstream_nodes_batch(node_ids, stop_at_outlet=True)
                 else:
                     raise ValueError(f"Unknown function '{row.function}' for flow_rate_mm_per_day")
+
+                # sum basin area over all up- or downstream basins
+                assert model.basin.area.df is not None
+                basin_area = model.basin.area.df.area.groupby(model.basin.area.df.node_id).sum()
+                flow_rate = np.array(
+                    [
+                        round_to_significant_digits(
+                            basin_area[basin_area.index.isin(node_sets[node_id])].sum() * unit_conversion
+                        )
+                        for node_id in node_ids
+                    ],
+                    dtype=float,
+                )
                 static_df.loc[indices, "flow_rate"] = flow_rate
             elif not pd.isna(row.flow_rate):
                 static_df.loc[indices, "flow_rate"] = row.flow_rate
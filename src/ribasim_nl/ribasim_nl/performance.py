@@ -1,12 +1,31 @@
+"""Solver-performance analytics of a Ribasim model-run.
+
+Convergence (basin.nc) and solver stats (solver_stats.nc) are reduced chunk-wise over time, so memory is bounded by
+`chunk_size` values regardless of the length of the run. The worst converging nodes are joined with their topology
+(node type, degree and upstream basin area). Every run is added to an append-only history (one Parquet file per
+run), so computation time and solver steps can be compared across model versions.
+"""
+
 import tomllib
 from os import PathLike
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import xarray as xr
 
+from ribasim_nl.manifest import file_sha256
 from ribasim_nl.model import Model
 
+CHUNK_SIZE = 10_000_000  # number of values read at once
+N_WORST = 100  # number of worst converging nodes with upstream area
+EXCEL_ROWS = 10_000  # rows of the time-sheet in Excel, the full series is in Parquet
+
+# log-spaced bins for the median of convergence when it does not fit in one chunk: ~3.7% relative bin width
+_CONVERGENCE_EDGES = np.logspace(-12, 4, 513)
+
 
 def _resolve_toml_and_results_dir(model: Model | str | PathLike[str]) -> tuple[Path, Path]:
     if isinstance(model, (str, PathLike)):
@@ -23,25 +42,195 @@ def _resolve_toml_and_results_dir(model: Model | str | PathLike[str]) -> tuple[P
     return toml_path, Path(model.results_dir)
 
 
-def _compute_node_performance(basin_path: Path) -> pd.DataFrame:
+def _time_chunks(n_time: int, n_values: int, chunk_size: int):
+    steps = max(1, chunk_size // max(n_values, 1))
+    for start in range(0, n_time, steps):
+        yield slice(start, start + steps)
+
+
+def _histogram_median(histogram: np.ndarray, count: np.ndarray, maximum: np.ndarray) -> np.ndarray:
+    """Median per row of a histogram over _CONVERGENCE_EDGES, interpolated linearly within the median bin."""
+    lower = np.concatenate([[0.0], _CONVERGENCE_EDGES])
+    upper = np.concatenate([_CONVERGENCE_EDGES, [np.inf]])
+    cumulative = histogram.cumsum(axis=1)
+    rank = (count - 1) / 2  # 0-based rank of the median
+    median_bin = (cumulative > rank[:, None]).argmax(axis=1)
+    rows = np.arange(len(count))
+    in_bin = histogram[rows, median_bin]
+    below = cumulative[rows, median_bin] - in_bin
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = (rank - below + 0.5) / in_bin
+        bin_lower = lower[median_bin]
+        bin_upper = np.minimum(upper[median_bin], maximum)
+        median = np.minimum(bin_lower + fraction * (bin_upper - bin_lower), maximum)
+    return np.where(count > 0, median, np.nan)
+
+
+def _compute_node_performance(basin_path: Path, chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """Median, mean and max convergence per node, read `chunk_size` values at a time.
+
+    Mean and max are exact. The median is exact if convergence fits in one chunk, otherwise it is derived from a
+    histogram with a relative bin width of ~3.7%.
+    """
     with xr.open_dataset(basin_path) as ds:
-        convergence = ds["convergence"].load()
+        convergence = ds["convergence"].transpose("time", "node_id")
+        node_ids = convergence.node_id.to_numpy()
+        n_time, n_nodes = convergence.shape
+
+        total = np.zeros(n_nodes)
+        count = np.zeros(n_nodes, dtype=np.int64)
+        maximum = np.full(n_nodes, -np.inf)
+        chunks = list(_time_chunks(n_time, n_nodes, chunk_size))
+        median = None
+        histogram = np.zeros((n_nodes, len(_CONVERGENCE_EDGES) + 1), dtype=np.int64)
+
+        for chunk in chunks:
+            values = convergence.isel(time=chunk).to_numpy()
+            valid = ~np.isnan(values)
+            total += np.where(valid, values, 0.0).sum(axis=0)
+            count += valid.sum(axis=0)
+            maximum = np.maximum(maximum, np.where(valid, values, -np.inf).max(axis=0))
+            if len(chunks) == 1:
+                with np.errstate(all="ignore"):
+                    median = np.nanmedian(values, axis=0) if n_time > 0 else np.full(n_nodes, np.nan)
+            else:
+                cols = np.broadcast_to(np.arange(n_nodes), values.shape)[valid]
+                bins = np.searchsorted(_CONVERGENCE_EDGES, values[valid], side="right")
+                histogram += np.bincount(cols * histogram.shape[1] + bins, minlength=histogram.size).reshape(
+                    histogram.shape
+                )
+
+    maximum = np.where(count > 0, maximum, np.nan)
+    if median is None:
+        median = _histogram_median(histogram, count, maximum)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
 
     return pd.DataFrame(
         {
-            "node_id": convergence.node_id.values,
-            "median_convergence": convergence.median(dim="time").values,
-            "mean_convergence": convergence.mean(dim="time").values,
-            "max_convergence": convergence.max(dim="time").values,
+            "node_id": node_ids,
+            "median_convergence": median,
+            "mean_convergence": mean,
+            "max_convergence": maximum,
         }
     ).sort_values("mean_convergence", ascending=False)
 
 
+def _write_solver_stats(solver_stats_path: Path, parquet_path: Path, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Write solver stats to Parquet chunk-wise and return their totals (minimum for `dt`)."""
+    totals: dict[str, float] = {}
+    with xr.open_dataset(solver_stats_path) as ds, pq.ParquetWriter(parquet_path, _solver_stats_schema(ds)) as writer:
+        variables = [i for i in ds.data_vars if ds[i].dims == ("time",)]
+        for chunk in _time_chunks(ds.sizes["time"], len(variables), chunk_size):
+            df = ds[variables].isel(time=chunk).to_dataframe().reset_index()
+            writer.write_table(pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False))
+            for variable in variables:
+                if variable == "dt":
+                    totals["min_dt"] = min(totals.get("min_dt", np.inf), df[variable].min())
+                else:
+                    totals[str(variable)] = totals.get(str(variable), 0) + df[variable].sum()
+    return totals
+
+
+def _solver_stats_schema(ds: xr.Dataset) -> pa.Schema:
+    variables = [i for i in ds.data_vars if ds[i].dims == ("time",)]
+    df = ds[variables].isel(time=slice(0, 0)).to_dataframe().reset_index()
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+
+def _read_head(parquet_path: Path, n_rows: int) -> pd.DataFrame:
+    """Read the first n_rows of a Parquet-file, without reading the rest."""
+    parquet_file = pq.ParquetFile(parquet_path)
+    batch = next(parquet_file.iter_batches(batch_size=n_rows), None)
+    if batch is None:
+        return parquet_file.schema_arrow.empty_table().to_pandas()
+    return batch.to_pandas()
+
+
+def _add_topology(nodes_df: pd.DataFrame, model: Model, n_worst: int = N_WORST) -> pd.DataFrame:
+    """Add node type, degree and, for the n_worst nodes, the area of all upstream basins."""
+    node_df = model.node.df
+    assert node_df is not None, "model has no nodes"
+    link_df = model.link.df
+    nodes_df = nodes_df.join(node_df["node_type"], on="node_id")
+    if link_df is not None:
+        nodes_df["in_degree"] = nodes_df.node_id.map(link_df.to_node_id.value_counts()).fillna(0).astype(int)
+        nodes_df["out_degree"] = nodes_df.node_id.map(link_df.from_node_id.value_counts()).fillna(0).astype(int)
+
+    nodes_df["upstream_area"] = np.nan
+    area_df = model.basin.area.df
+    if (link_df is not None) and (area_df is not None):
+        basin_area = area_df.set_index("node_id").area.groupby(level=0).sum()
+        worst = nodes_df.node_id.iloc[:n_worst].to_list()
+        upstream = model.upstream_nodes_batch(worst)
+        nodes_df.loc[nodes_df.index[:n_worst], "upstream_area"] = [
+            basin_area.reindex(list(upstream.get(i, {i}))).sum() for i in worst
+        ]
+    return nodes_df
+
+
+def _history_record(
+    toml_path: Path, model: Model, solver_stats_path: Path, totals: dict, nodes_df: pd.DataFrame
+) -> pd.DataFrame:
+    with toml_path.open("rb") as file:
+        config = tomllib.load(file)
+    database_path = model.database_path
+    node_df = model.node.df
+    assert node_df is not None, "model has no nodes"
+    record = {
+        "model": toml_path.parent.name,
+        "run_time": pd.Timestamp(solver_stats_path.stat().st_mtime_ns, unit="ns"),
+        "ribasim_version": config.get("ribasim_version"),
+        "database_sha256": file_sha256(database_path) if database_path is not None and database_path.exists() else None,
+        "starttime": pd.Timestamp(config["starttime"]),
+        "endtime": pd.Timestamp(config["endtime"]),
+        "nodes": len(node_df),
+        "basins": int((node_df.node_type == "Basin").sum()),
+        **totals,
+        "mean_convergence": nodes_df.mean_convergence.mean(),
+        "max_convergence": nodes_df.max_convergence.max(),
+    }
+    if "accepted_timesteps" in totals and "rejected_timesteps" in totals:
+        record["steps"] = totals["accepted_timesteps"] + totals["rejected_timesteps"]
+    return pd.DataFrame([record])
+
+
+def read_performance_history(history_dir: str | PathLike[str]) -> pd.DataFrame:
+    """Read the performance history of a model, see `write_performance`.
+
+    Parameters
+    ----------
+    history_dir : path-like
+        Directory with one Parquet file per run.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run, sorted by run time, with the relative change (e.g. `computation_time_change`) in
+        computation time and solver steps with respect to the previous run.
+    """
+    files = sorted(Path(history_dir).glob("*.parquet"))
+    if not files:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_parquet(i) for i in files], ignore_index=True).sort_values("run_time", ignore_index=True)
+    for column in ["computation_time", "steps", "accepted_timesteps", "rhs_calls"]:
+        if column in df.columns:
+            df[f"{column}_change"] = df[column].pct_change()
+    return df
+
+
 def write_performance(
     model: Model | str | PathLike[str],
     output_path: str | PathLike[str] | None = None,
+    history_dir: str | PathLike[str] | None = None,
+    excel: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+    excel_rows: int = EXCEL_ROWS,
 ) -> Path:
-    """Write performance.xlsx next to a model TOML file.
+    """Write performance.xlsx and Parquet-files next to a model TOML file and add the run to its history.
+
+    Writes `{stem}_nodes.parquet` (convergence per node with topology) and `{stem}_time.parquet` (solver stats) next
+    to the Excel-file, and one record with totals of the run to history_dir.
 
     Parameters
     ----------
@@ -49,6 +238,15 @@ def write_performance(
         A ``ribasim_nl.Model`` instance or a path to a model TOML file.
     output_path : path-like, optional
         Output Excel path. Defaults to ``performance.xlsx`` next to the TOML.
+    history_dir : path-like, optional
+        Directory of the append-only run history. Defaults to ``performance_history`` next to the TOML.
+    excel : bool, optional
+        Write the Excel-file, by default True. Parquet-files are always written.
+    chunk_size : int, optional
+        Number of values read from the results at once, by default CHUNK_SIZE.
+    excel_rows : int, optional
+        Number of time steps in the time-sheet of the Excel-file, by default EXCEL_ROWS. The full series is in
+        `{stem}_time.parquet`.
 
     Returns
     -------
@@ -69,15 +267,28 @@ def write_performance(
     if output_path is None:
         output_path = toml_path.with_name("performance.xlsx")
     output_path = Path(output_path).resolve()
+    if history_dir is None:
+        history_dir = toml_path.with_name("performance_history")
+    history_dir = Path(history_dir)
 
-    with xr.open_dataset(solver_stats_path) as ds:
-        time_df = ds.to_dataframe().reset_index()
-
-    nodes_df = _compute_node_performance(basin_path)
+    if not isinstance(model, Model):
+        model = Model.read_cached(toml_path)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with pd.ExcelWriter(output_path) as writer:
-        time_df.to_excel(writer, sheet_name="time", index=False)
-        nodes_df.to_excel(writer, sheet_name="nodes", index=False)
+    time_path = output_path.with_name(f"{output_path.stem}_time.parquet")
+    totals = _write_solver_stats(solver_stats_path, time_path, chunk_size)
+
+    nodes_df = _add_topology(_compute_node_performance(basin_path, chunk_size), model)
+    nodes_df.to_parquet(output_path.with_name(f"{output_path.stem}_nodes.parquet"), index=False)
+
+    history_df = _history_record(toml_path, model, solver_stats_path, totals, nodes_df)
+    history_dir.mkdir(parents=True, exist_ok=True)
+    history_df.to_parquet(history_dir / f"{history_df.run_time.iloc[0]:%Y%m%dT%H%M%S}.parquet", index=False)
+
+    if excel:
+        with pd.ExcelWriter(output_path) as writer:
+            _read_head(time_path, excel_rows).to_excel(writer, sheet_name="time", index=False)
+            nodes_df.to_excel(writer, sheet_name="nodes", index=False)
+            history_df.T.reset_index().to_excel(writer, sheet_name="summary", index=False, header=False)
 
     return output_path
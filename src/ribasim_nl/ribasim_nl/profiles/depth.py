@@ -4,10 +4,12 @@ import logging
 
 import geopandas as gpd
 import numpy as np
+import pandas as pd
 import shapely
 import shapely.affinity
 
 from ribasim_nl.profiles import hydrotopes as ht
+from ribasim_nl.profiles import width
 
 LOG = logging.getLogger(__name__)
 
@@ -39,6 +41,43 @@ def make_depth_profiles(
     return gpd.GeoDataFrame({"line_id": profile_lines.index}, geometry=profile_lines.values, crs=profile_points.crs)
 
 
+def verify_hydrotopes(
+    hydrotope_map: gpd.GeoDataFrame, hydrotopes: ht.HydrotopeTable, *, col_fid: str = "HYDROTYPE2"
+) -> None:
+    """Verify the definition of all hydrotopes.
+
+    :param hydrotope_map: geospatial data of hydrotopes
+    :param hydrotopes: table with hydrotope-data
+    :param col_fid: column-name with hydrotope ID data (in `hydrotope_map`), defaults to 'HYDROTYPE2'
+
+    :type hydrotope_map: geopandas.GeoDataFrame
+    :type hydrotopes: profiles.hydrotopes.HydrotopeTable
+    :type col_fid: str, optional
+
+    :raises ValueError: if not all hydrotopes are initiated
+    """
+    unique_fids = list(hydrotope_map[col_fid].unique())
+    if not all(i in unique_fids for i in hydrotopes):
+        missing = [i for i in unique_fids if i not in hydrotopes]
+        msg = f"Not all occurring hydrotopes initiated: {missing=}"
+        raise ValueError(msg)
+
+
+def hydrotope_depth(hydrotope: ht.Hydrotope, widths: np.ndarray) -> np.ndarray:
+    """Representative depths of a hydrotope based on the widths (see `Hydrotope.depth`).
+
+    :param hydrotope: hydrotope
+    :param widths: widths of hydro-objects
+
+    :type hydrotope: profiles.hydrotopes.Hydrotope
+    :type widths: numpy.ndarray[float]
+
+    :return: representative depths
+    :rtype: numpy.ndarray[float]
+    """
+    return np.asarray(hydrotope.depths, dtype=float)[np.searchsorted(hydrotope.thresholds, widths)]
+
+
 def depth_from_hydrotopes(
     hydro_objects: gpd.GeoDataFrame, hydrotope_map: gpd.GeoDataFrame, hydrotopes: ht.HydrotopeTable, **kwargs
 ) -> gpd.GeoDataFrame:
@@ -52,6 +91,7 @@ def depth_from_hydrotopes(
     :key col_fid: column-name with hydrotope ID data (in `hydrotope_map`), defaults to 'HYDROTOPE2'
     :key drop_na: drop hydro-objects for which depth cannot be determined, defaults to True
     :key min_map: minimal joining of `hydrotope_map` to the `hydro_objects`, defaults to True
+    :key check_hydrotopes: verify the definition of all hydrotopes (see `verify_hydrotopes`), defaults to True
 
     :type hydro_objects: geopandas.GeoDataFrame
     :type hydrotope_map: geopandas.GeoDataFrame
@@ -62,14 +102,6 @@ def depth_from_hydrotopes(
 
     :raises ValueError: if hydro-objects are missing width-estimates
     """
-
-    def depth_calculator(fid: int, width: float) -> float | None:
-        """Calculation of depth based on overlapping hydrotope."""
-        hydrotope = hydrotopes.get_by_fid(fid)
-        if hydrotope is None:
-            return None
-        return hydrotope.depth(width)
-
     # verify required width estimations of hydro-objects
     if "width" not in hydro_objects.columns:
         msg = "Hydro-objects are missing width estimates"
@@ -79,13 +111,11 @@ def depth_from_hydrotopes(
     col_fid: str = kwargs.get("col_fid", "HYDROTYPE2")
     drop_na: bool = kwargs.get("drop_na", True)
     min_map: bool = kwargs.get("min_map", True)
+    check_hydrotopes: bool = kwargs.get("check_hydrotopes", True)
 
     # verify definition of all occurring hydrotopes
-    unique_fids = list(hydrotope_map[col_fid].unique())
-    if not all(i in unique_fids for i in hydrotopes):
-        missing = [i for i in unique_fids if i not in hydrotopes]
-        msg = f"Not all occurring hydrotopes initiated: {missing=}"
-        raise ValueError(msg)
+    if check_hydrotopes:
+        verify_hydrotopes(hydrotope_map, hydrotopes, col_fid=col_fid)
 
     # minimise map-columns
     if min_map:
@@ -101,21 +131,27 @@ def depth_from_hydrotopes(
     if mask.any():
         LOG.warning(f"Hydro-objects outside hydrotope map ({sum(mask)}) linked to nearest hydrotope")
         _temp = gpd.sjoin_nearest(hydro_objects.loc[temp.index[mask]], hydrotope_map, how="left", rsuffix="map")
+        # equidistant hydrotopes: keep the first hydrotope
+        _temp = _temp.sort_values("index_map", kind="stable")
+        _temp = _temp[~_temp.index.duplicated()]
         LOG.debug(temp[mask])
         temp.update(_temp)
         LOG.debug(temp[mask])
 
-    temp["overlap"] = temp.apply(
-        lambda row: row["geometry"].intersection(hydrotope_map.loc[row["index_map"], "geometry"]).length, axis=1
-    )
+    polygons = hydrotope_map.geometry.loc[temp["index_map"].astype(hydrotope_map.index.dtype)].values
+    temp["overlap"] = shapely.length(shapely.intersection(temp.geometry.values, polygons))
 
     # assign the hydrotope with the largest overlap per hydro-object
     temp.reset_index(drop=False, inplace=True)
     idx = temp.groupby("index")["overlap"].idxmax()
-    hydro_objects["ht_code"] = temp.loc[idx, col_fid]
+    hydro_objects["ht_code"] = pd.Series(temp.loc[idx.to_numpy(), col_fid].to_numpy(), index=idx.index)
 
-    # calculate depth
-    hydro_objects["depth"] = hydro_objects.apply(lambda row: depth_calculator(row["ht_code"], row["width"]), axis=1)
+    # calculate depth: per hydrotope, based on the width of the hydro-objects
+    hydro_objects["depth"] = np.nan
+    for fid, index in hydro_objects.groupby("ht_code").groups.items():
+        hydrotope = hydrotopes.get_by_fid(fid)
+        if hydrotope is not None:
+            hydro_objects.loc[index, "depth"] = hydrotope_depth(hydrotope, hydro_objects.loc[index, "width"].to_numpy())
     if drop_na:
         hydro_objects.dropna(subset="depth", inplace=True, ignore_index=True)
 
@@ -146,6 +182,23 @@ def normalise_measured_cross_sections(
     return out
 
 
+def measured_depth(cross_sections: np.ndarray) -> np.ndarray:
+    """Depth of measured cross-sections: maximum depth, i.e., minimum z-coordinate.
+
+    :param cross_sections: measured cross-sections (with z-coordinates)
+    :type cross_sections: numpy.ndarray[shapely.Geometry]
+
+    :return: depths
+    :rtype: numpy.ndarray[float]
+    """
+    coords, index = shapely.get_coordinates(cross_sections, include_z=True, return_index=True)
+    depths = np.full(len(cross_sections), np.nan)
+    if len(coords):
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+        depths[index[starts]] = -np.minimum.reduceat(coords[:, 2], starts)
+    return depths
+
+
 def depth_from_measurements(
     hydro_objects: gpd.GeoDataFrame, cross_sections: gpd.GeoDataFrame, *, only_main_route: bool = True
 ) -> gpd.GeoDataFrame:
@@ -164,17 +217,6 @@ def depth_from_measurements(
 
     :raises AssertionError: if `cross_sections` does not have z-coordinates
     """
-
-    def depth_calculator(line: shapely.LineString) -> float:
-        """Depth equals maximum depth, i.e., minimum z-coordinate."""
-        return -np.min(line.coords, axis=0)[2]
-
-    def representative_depth(indices: tuple[int, ...]) -> float | None:
-        """Take the mean of estimated depths of all connected cross-sections."""
-        if indices and -1 not in indices:
-            return float(np.nanmean([depth_calculator(cross_sections.geometry.iloc[i]) for i in indices]))
-        return None
-
     # assure cross-sections contain z-coordinates
     assert all(cross_sections.has_z)
 
@@ -183,7 +225,7 @@ def depth_from_measurements(
         cross_sections, how="left", predicate="intersects", rsuffix="xs"
     )
     temp["index_xs"] = temp["index_xs"].fillna(-1).astype(int)
-    temp = temp.groupby(level=0)["index_xs"].apply(list).to_frame()
+    temp = width.grouped_lists(temp.index.to_numpy(), temp["index_xs"].to_numpy(), name="index_xs").to_frame()
 
     # flag hydro-objects: use of measurements
     hydro_objects["depth_measured"] = ~temp["index_xs"].isin([[-1]])
@@ -191,8 +233,12 @@ def depth_from_measurements(
     if only_main_route:
         assert np.all(~hydro_objects.loc[~hydro_objects["main-route"], "depth_measured"])
 
-    # update depth estimate
-    temp["depth"] = temp["index_xs"].apply(representative_depth)
+    # update depth estimate: mean of the measured depths of all connected cross-sections
+    coupling = temp["index_xs"].explode()
+    coupling = coupling[coupling != -1]
+    sections = pd.unique(coupling.to_numpy())
+    depths = pd.Series(measured_depth(cross_sections.geometry.loc[sections].values), index=sections)
+    temp["depth"] = pd.Series(depths.loc[coupling].to_numpy(), index=coupling.index).groupby(level=0).mean()
     temp.dropna(subset="depth", inplace=True)
     hydro_objects.update(temp[temp["depth"] > 0])
 
@@ -16,6 +16,8 @@ import networkx as nx
 import numpy as np
 import shapely
 import tqdm
+from scipy import sparse
+from scipy.sparse import csgraph
 from shapely.ops import nearest_points
 from sklearn.cluster import DBSCAN
 
@@ -243,148 +245,85 @@ def point_to_graph_node(graph: nx.Graph | shapely.MultiPoint, point: shapely.Poi
     return nearest_node.x, nearest_node.y
 
 
-def full_graph_search(basin: shapely.Polygon, graph: nx.Graph, crossings: list[shapely.Point], **kwargs) -> bool:
-    """Estimation whether a full graph search would be computationally more efficient than a source-target search.
+def points_to_graph_nodes(graph: nx.Graph, points: list[shapely.Point]) -> list[tuple[float, float]]:
+    """Snap shapely.Points to their nearest graph-nodes in one spatial-index query.
 
-    In case the graph is 'dense' and/or the number of crossings constitute for a percentage of the graph's nodes, a full
-    pairwise comparison of the shortest paths between all the nodes of the graph is performed after which the nodes
-    representing the crossings are selected. This is considered more efficient than searching every route between pairs
-    of crossings.
-
-    The graph is considered dense if there are 'a lot of' edges compared to the number of nodes. What 'a lot of' means,
-    is calculated by the following comparison:
-
-        |E| > a * |N|**2
-
-    where `|E|` is the number of edges; `|N|` the number of nodes; and `a` a user-defined threshold (`dense_threshold`).
-
-    Specifically for the case of searching the shortest paths in basins, the 'flatness' of the basin hints to the extent
-    of overlapping routes: 'Flat' (or stretched-out) basins will generally have a single main route from which the edges
-    sprawl to other connections. In such a basin, a full graph search would be computationally more efficient than a
-    source-target search, as many shortest paths share the same edge(s).
-
-    Thus, if any of the following three criteria are met, a full graph search is considered beneficial (i.e.,
-    computationally more efficient than a source-target search):
-     1. The graph is 'dense';
-     2. The crossings cover 'a lot of' the graph's nodes;
-     3. The basin is 'flat'.
-
-    What constitutes for 'dense', 'a lot of', and 'flat' can be controlled by setting thresholds.
-
-    :param basin: basin corresponding to the `graph`
-    :param graph: graph corresponding to the `basin`
-    :param crossings: crossings to pairwise connect
-    :param kwargs: optional arguments (thresholds)
-
-    :key dense_threshold: threshold above which the graph is considered 'dense' (`a` in the above formula),
-        defaults to 0.5
-    :key flatness_threshold: width-length ratio below which the basin is considered 'flat', defaults to 0.1
-    :key min_coverage_threshold: minimum coverage of the graph's nodes by the crossings, defaults to 0.9
-    :key max_coverage_threshold: maximum coverage of the graph's nodes by the crossings by which the 'flatness'
-        criterion is disabled, defaults to 0.1
+    :param graph: graph
+    :param points: point locations
 
-    :type basin: shapely.Polygon
     :type graph: networkx.Graph
-    :type crossings: list[shapely.Point]
+    :type points: list[shapely.Point]
 
-    :return: whether to perform a full graph search
-    :rtype: bool
+    :return: graph-nodes' coordinates, in the order of `points`
+    :rtype: list[tuple[float, float]]
     """
-    # optional arguments
-    dense_threshold: float = kwargs.get("dense_threshold", 0.5)
-    flatness_threshold: float = kwargs.get("flatness_threshold", 0.1)
-    min_coverage_threshold: float = kwargs.get("min_coverage_threshold", 0.9)
-    max_coverage_threshold: float = kwargs.get("max_coverage_threshold", 0.1)
-
-    # validate optional arguments
-    assert dense_threshold >= 0
-    assert 0 <= flatness_threshold <= 1
-    assert 0 <= min_coverage_threshold <= 1
-    assert 0 <= max_coverage_threshold <= 1
-
-    # density graph
-    density = graph.number_of_edges() > dense_threshold * (graph.number_of_nodes() ** 2)
-
-    # graph coverage
-    graph_coverage = len(crossings) / graph.number_of_nodes()
-    coverage = graph_coverage >= min_coverage_threshold
-
-    # basin flatness
-    _v = basin.length**2 - 16 * basin.area
-    if _v < 0:
-        flatness = False
-    else:
-        width = 0.25 * (basin.length - np.sqrt(basin.length**2 - 16 * basin.area))
-        length = basin.area / width
-        flatness = bool(width / length < flatness_threshold)
-        if graph_coverage <= max_coverage_threshold:
-            flatness = False
-
-    # apply full graph search
-    return any([density, coverage, flatness])
-
-
-def find_flow_routes(
-    graph: nx.Graph, crossings: list[shapely.Point], *, use_full_graph: bool = False
-) -> set[tuple[tuple[int, int], tuple[int, int]]]:
+    nodes = list(graph.nodes)
+    if not nodes or not points:
+        return []
+    tree = shapely.STRtree(shapely.points(nodes))
+    idx_points, idx_nodes = tree.query_nearest(points, all_matches=False)
+    nearest = np.empty(len(points), dtype=int)
+    nearest[idx_points] = idx_nodes
+    return [nodes[i] for i in nearest]
+
+
+def _graph_to_csgraph(graph: nx.Graph) -> tuple[list, dict, sparse.csr_matrix]:
+    """Graph as sparse (upper triangular) matrix with the minimal weight of the edge(s) between pairs of graph-nodes."""
+    nodes = list(graph.nodes)
+    index = {n: i for i, n in enumerate(nodes)}
+    weights: dict[tuple[int, int], float] = {}
+    for u, v, w in graph.edges(data="weight", default=1.0):
+        i, j = sorted((index[u], index[v]))
+        if i != j and w < weights.get((i, j), np.inf):
+            weights[i, j] = w
+    rows, cols = np.array([*weights.keys()], dtype=int).reshape(-1, 2).T
+    matrix = sparse.csr_matrix((np.fromiter(weights.values(), dtype=float), (rows, cols)), shape=(len(nodes),) * 2)
+    return nodes, index, matrix
+
+
+def find_flow_routes(graph: nx.Graph, crossings: list[shapely.Point]) -> set[tuple[tuple[int, int], tuple[int, int]]]:
     """Find all shortest routes between combinations of crossings.
 
+    All crossings are snapped to graph-nodes in one spatial-index query. From every crossing a single shortest-path
+    tree is computed (k Dijkstra-runs for k crossings), of which the routes to the remaining crossings are collected.
+
     :param graph: graph
     :param crossings: (border) crossings
-    :param use_full_graph: search for the shortest paths between all pairs of nodes and selecting the crossings instead
-        of searching for the shortest paths between the pairs of crossings, defaults to False
 
     :type graph: networkx.Graph
     :type crossings: list[shapely.Point]
-    :type use_full_graph: bool, optional
 
     :return: set of graph-edges that are part of at least one shortest route between crossings
     :rtype: set[tuple[tuple[int, int], tuple[int, int]]]
     """
     if len(crossings) > graph.number_of_nodes():
         LOG.warning(f"More crossings ({len(crossings)}) than graph-nodes ({graph.number_of_nodes()})")
-    desc = "Finding main routes"
 
     # initiate working variables
     flow_routes: set[tuple[tuple[int, int], tuple[int, int]]] = set()
-    mp_graph = shapely.MultiPoint(graph.nodes)
-    set_crossings = set(crossings)
-    n_combinations = int(0.5 * len(set_crossings) * (len(set_crossings) - 1))
+    nodes, index, matrix = _graph_to_csgraph(graph)
+    sources = np.unique([index[n] for n in points_to_graph_nodes(graph, list(dict.fromkeys(crossings)))])
 
     # no shortest paths to be found
-    if n_combinations == 0:
+    if len(sources) < 2:
         return flow_routes
 
-    # find the shortest paths
-    if use_full_graph:
-        # shortest path between all nodes
-        print(f"\r{desc} ({n_combinations=}): Full graph processing...", end="", flush=True)
-        paths = dict(nx.shortest_path(graph, weight="weight"))
-
-        # select shortest paths between crossings
-        for c1, c2 in tqdm.tqdm(itertools.combinations(set_crossings, 2), f"{desc} (F)", n_combinations):
-            try:
-                # noinspection PyTypeChecker
-                path = paths[point_to_graph_node(mp_graph, c1)][point_to_graph_node(mp_graph, c2)]
-            except KeyError:
-                LOG.debug(f"No path between {c1} and {c2}")
-            else:
-                flow_routes.update(itertools.pairwise(path))
-    else:
-        # loop over all combinations of (border) crossings (without order)
-        for c1, c2 in tqdm.tqdm(itertools.combinations(set_crossings, 2), f"{desc} (S)", n_combinations):
-            try:
-                path = nx.shortest_path(
-                    graph,
-                    source=point_to_graph_node(mp_graph, c1),
-                    target=point_to_graph_node(mp_graph, c2),
-                    weight="weight",
-                    method="dijkstra",
-                )
-            except nx.NetworkXNoPath as e:
-                LOG.debug(e)
-            else:
-                flow_routes.update(itertools.pairwise(path))
+    # shortest path trees from all crossings (but the last), each to the crossings after it
+    _, predecessors = csgraph.dijkstra(matrix, directed=False, indices=sources[:-1], return_predecessors=True)
+    on_route = np.zeros(len(nodes), dtype=bool)
+    for i, tree in enumerate(tqdm.tqdm(predecessors, "Finding main routes", disable=len(sources) < 100)):
+        on_route[:] = False
+        on_route[sources[i]] = True
+        for target in sources[i + 1 :]:
+            if tree[target] < 0:
+                LOG.debug(f"No path between {nodes[sources[i]]} and {nodes[target]}")
+                continue
+            # walk up the tree until a node already on a route (from this source) is found
+            node = target
+            while not on_route[node]:
+                on_route[node] = True
+                flow_routes.add((nodes[tree[node]], nodes[node]))
+                node = tree[node]
 
     # return set of graph-edges
     return flow_routes
@@ -2,10 +2,12 @@
 
 import logging
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import geopandas as gpd
 import momepy
+import numpy as np
 import pandas as pd
 import shapely
 
@@ -33,8 +35,12 @@ _KNOWN_KWARGS: set[str] = {
     "water_bodies",
     "col_wb_depth",
     "create_wd_intermediate_output",
+    "workers",
 }
 
+# number of spatial partitions per worker when deriving the basin profiles in parallel
+_PARTITIONS_PER_WORKER: int = 4
+
 
 @typing.overload
 def main(
@@ -146,6 +152,11 @@ def main(
     :key col_wb_depth: column-name with representative depth values of `water_bodies`, defaults to "depth"
     :key create_wd_intermediate: create working directory for intermediate output files (if non-existing), including the
         parents, defaults to True
+    :key workers: number of processes to derive the basin profiles in parallel, defaults to None
+        With more than one worker, the main routes are determined per basin in parallel and the subsequent steps
+        (BGT-coupling, width, depth and basin profiles) are executed per spatial partition of basins, including the
+        (intersecting) hydro-objects, BGT-polygons, hydrotopes and cross-sections required to reproduce the sequential
+        results. The results are merged in the same order as when executed sequentially.
 
     :return: basin profiles for flowing/'doorgaand' and storing/'bergend' separately
 
@@ -187,6 +198,8 @@ def main(
     col_wb_depth: str = kwargs.get("col_wb_depth", "depth")
     # > export intermediate output
     create_wd_intermediate: bool = kwargs.get("create_wd_intermediate", True)
+    # > parallel processing
+    workers: int | None = kwargs.get("workers")
     _fn_int_output: str = "int_output.gpkg"
 
     # validate optional arguments
@@ -249,7 +262,7 @@ def main(
     else:
         assert crossings is not None
         main_route_idx = _label_main_routing_from_network(
-            basins, hydro_objects, crossings, selection_buffer, internal_crossings, wd_intermediate_output
+            basins, hydro_objects, crossings, selection_buffer, internal_crossings, wd_intermediate_output, workers
         )
 
     # label hydro-objects
@@ -265,27 +278,34 @@ def main(
             crossings[crossings.intersects(_temp)].to_file(wd_intermediate_output / _fn_int_output, layer="endpoints")
             del _temp
 
-    # BGT-coupling
-    hydro_objects = width.couple_bgt_to_hydro_objects(hydro_objects, bgt_data, min_overlap=bgt_buffer)
-    hydro_objects = width.estimate_width(hydro_objects, bgt_data, drop_na=True)
-    if wd_intermediate_output is not None:
-        bgt.save_bgt_coupling(hydro_objects, bgt_data, wd_intermediate_output)
-
-    # depth from hydrotopes
+    # hydrotopes and (normalised) measured cross-sections
     hydrotope_map = gpd.read_file(cloud.joinpath("Basisgegevens/Hydrotypen/hydrotype.shp"))
-    hydro_objects = depth.depth_from_hydrotopes(hydro_objects, hydrotope_map, hydrotope_table, drop_na=True)
-
-    # depth from measurements
     if cross_sections is not None:
         cross_sections = depth.normalise_measured_cross_sections(cross_sections, target_levels)
-        hydro_objects = depth.depth_from_measurements(hydro_objects, cross_sections)
 
-    # depth from (multi)polygons (user-defined)
-    if water_bodies is not None:
-        hydro_objects = _overwrite_depth(hydro_objects, water_bodies, col_wb_depth)
+    # width, depth and basin profiles [optionally in parallel, per spatial partition]
+    _settings = water_bodies, col_wb_depth, bgt_buffer, bgt_full_coverage
+    if workers is not None and workers > 1 and len(basins) > 1:
+        depth.verify_hydrotopes(hydrotope_map, hydrotope_table)
+        partitions = _partition_profile_data(
+            basins, hydro_objects, bgt_data, hydrotope_map, cross_sections, workers * _PARTITIONS_PER_WORKER
+        )
+        args = [(*data, hydrotope_table, *_settings, False) for _, data in partitions]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_derive_basin_profiles, *zip(*args, strict=True)))
+        hydro_objects, bgt_coupling, flowing_profiles, storing_profiles, covered_profiles = _merge_partitions(
+            basins, [own for own, _ in partitions], results
+        )
+    else:
+        hydro_objects["_ho_index"] = np.arange(len(hydro_objects))
+        hydro_objects, bgt_coupling, flowing_profiles, storing_profiles, covered_profiles = _derive_basin_profiles(
+            basins, hydro_objects, bgt_data, hydrotope_map, cross_sections, hydrotope_table, *_settings
+        )
+    hydro_objects.drop(columns="_ho_index", inplace=True)
 
-    # export depth-data [optional]
+    # export BGT-coupling and depth-data [optional]
     if wd_intermediate_output is not None:
+        bgt.save_bgt_coupling(bgt_coupling, bgt_data, wd_intermediate_output)
         hydro_objects.to_file(wd_intermediate_output / _fn_int_output, layer="hydro-objects")
 
     # export the hydro-object network used to derive the profiles [first-class output]
@@ -299,11 +319,6 @@ def main(
         network = hydro_objects.explode(index_parts=False, ignore_index=True)
         network.to_file(wd_output / "network.gpkg", layer="hydro_objects")
 
-    # basin profiles
-    main_route = hydro_objects["main-route"].values
-    flowing_profiles = cross_section.assign_basin_profiles(basins, hydro_objects[main_route], as_geo_dataframe=True)
-    storing_profiles = cross_section.assign_basin_profiles(basins, hydro_objects[~main_route], as_geo_dataframe=True)
-
     # NaN-valued basin profiles
     if sum(flowing_profiles["area"].isna()) > 0:
         if debug:
@@ -324,10 +339,8 @@ def main(
             raise ValueError(msg)
 
     # fill storing basins with BGT-data
-    if bgt_full_coverage:
-        storing_profiles = cross_section.full_bgt_coverage(
-            flowing_profiles, storing_profiles, basins, bgt_data, as_geo_dataframe=True, min_valid_area=2e-3
-        )
+    if covered_profiles is not None:
+        storing_profiles = covered_profiles
 
     # assure no zero area-values
     assert all(flowing_profiles["area"] > 0), (
@@ -479,6 +492,26 @@ def _label_main_routing_from_flags(hydro_objects: gpd.GeoDataFrame, col: str, va
     return set(indices)
 
 
+def _find_basin_main_routing(
+    hydro_objects: gpd.GeoDataFrame, crossings: list[shapely.Point], export_graph: bool
+) -> tuple[tuple[int, ...], gpd.GeoDataFrame | None, gpd.GeoDataFrame | None]:
+    """Main-route of a single basin: the shortest path(s) between its crossings.
+
+    :param hydro_objects: hydro-objects intersecting the basin
+    :param crossings: crossings of the basin
+    :param export_graph: return the graph's points and lines
+
+    :return: hydro-objects indices on the main route, and the graph's points and lines (if `export_graph`)
+    """
+    graph = path_finder.generate_graph(hydro_objects)
+    flow_edges = path_finder.find_flow_routes(graph, crossings)
+    indices = path_finder.label_flow_hydro_objects(hydro_objects, graph, flow_edges)
+    if export_graph:
+        points, lines = typing.cast(tuple[gpd.GeoDataFrame, gpd.GeoDataFrame], momepy.nx_to_gdf(graph))
+        return indices, points, lines
+    return indices, None, None
+
+
 def _label_main_routing_from_network(
     basins: gpd.GeoDataFrame,
     hydro_objects: gpd.GeoDataFrame,
@@ -486,6 +519,7 @@ def _label_main_routing_from_network(
     buffer: float,
     internal: bool,
     wd: Path | None,
+    workers: int | None = None,
 ) -> set[int]:
     """Labelling of main-route based on shortest path(s) between crossings.
 
@@ -497,6 +531,7 @@ def _label_main_routing_from_network(
         for `internal_crossings=False`.
     :param internal: include crossings inside the basin (`True`) or limit to crossings at the basin-border (`False`)
     :param wd: working directory for intermediate output files
+    :param workers: number of processes to find the main routes of basins in parallel, defaults to None
 
     :type basins: geopandas.GeoDataFrame
     :type hydro_objects: geopandas.GeoDataFrame
@@ -504,6 +539,7 @@ def _label_main_routing_from_network(
     :type buffer: float
     :type internal: bool
     :type wd: Path | None
+    :type workers: int | None
 
     :return: hydro-objects indices to label as main route
     :rtype: set[int]
@@ -514,30 +550,28 @@ def _label_main_routing_from_network(
     line_collector: list[gpd.GeoDataFrame] = []
     error_collector: list[int] = []
 
-    # find main routes per basin
+    # data selections per basin
+    args = []
     for node_id, basin in zip(basins["node_id"].values, basins.geometry.values, strict=True):
-        # data selections
-        subset_hydro_objects = hydro_objects[hydro_objects.intersects(basin)]
+        subset_hydro_objects = hydro_objects.iloc[np.sort(hydro_objects.sindex.query(basin, predicate="intersects"))]
         subset_crossings = path_finder.select_crossings(basin, crossings, buffer=buffer, internal=internal)
-
-        # create network-graph
         if len(subset_hydro_objects) == 0:
             error_collector.append(int(node_id))
             LOG.warning(f"No hydro-objects found for Basin #{node_id}")
             continue
-        graph = path_finder.generate_graph(subset_hydro_objects)
+        args.append((subset_hydro_objects, subset_crossings, wd is not None))
 
-        # basin flatness
-        use_full_graph = path_finder.full_graph_search(basin, graph, subset_crossings)
+    # find main routes per basin
+    if workers is not None and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_find_basin_main_routing, *zip(*args, strict=True)))
+    else:
+        results = [_find_basin_main_routing(*i) for i in args]
 
-        # find flow routes
-        flow_edges = path_finder.find_flow_routes(graph, subset_crossings, use_full_graph=use_full_graph)
-        indices = path_finder.label_flow_hydro_objects(subset_hydro_objects, graph, flow_edges)
+    # update collectors
+    for indices, points, lines in results:
         main_route_idx.update(indices)
-
-        # update collectors
         if wd is not None:
-            points, lines = typing.cast(tuple[gpd.GeoDataFrame, gpd.GeoDataFrame], momepy.nx_to_gdf(graph))
             point_collector.append(points)
             line_collector.append(lines)
 
@@ -555,6 +589,232 @@ def _label_main_routing_from_network(
     return main_route_idx
 
 
+def _derive_basin_profiles(
+    basins: gpd.GeoDataFrame,
+    hydro_objects: gpd.GeoDataFrame,
+    bgt_data: gpd.GeoDataFrame,
+    hydrotope_map: gpd.GeoDataFrame,
+    cross_sections: gpd.GeoDataFrame | None,
+    hydrotope_table: ht.HydrotopeTable,
+    water_bodies: gpd.GeoDataFrame | None,
+    col_wb_depth: str,
+    bgt_buffer: float,
+    bgt_full_coverage: bool,
+    check_hydrotopes: bool = True,
+) -> tuple[gpd.GeoDataFrame, pd.DataFrame, gpd.GeoDataFrame, gpd.GeoDataFrame, gpd.GeoDataFrame | None]:
+    """Derive width, depth and basin profiles of (a spatial partition of) basins with main-route labelled hydro-objects.
+
+    :param basins: basin areas (polygons)
+    :param hydro_objects: hydro-objects (lines) with main-route labels
+    :param bgt_data: BGT-data
+    :param hydrotope_map: geospatial data of hydrotopes
+    :param cross_sections: normalised measured cross-sections, defaults to None
+    :param hydrotope_table: table with hydrotope-classes
+    :param water_bodies: water bodies with user-defined representative depths, defaults to None
+    :param col_wb_depth: column-name with representative depth values of `water_bodies`
+    :param bgt_buffer: minimum overlap between BGT-polygon and hydro-object to be coupled
+    :param bgt_full_coverage: consider BGT-data not intersecting any hydro-objects as part of the storing capacity
+    :param check_hydrotopes: verify the definition of all hydrotopes, defaults to True
+
+    :type basins: geopandas.GeoDataFrame
+    :type hydro_objects: geopandas.GeoDataFrame
+    :type bgt_data: geopandas.GeoDataFrame
+    :type hydrotope_map: geopandas.GeoDataFrame
+    :type cross_sections: geopandas.GeoDataFrame | None
+    :type hydrotope_table: profiles.hydrotopes.HydrotopeTable
+    :type water_bodies: geopandas.GeoDataFrame | None
+    :type col_wb_depth: str
+    :type bgt_buffer: float
+    :type bgt_full_coverage: bool
+    :type check_hydrotopes: bool, optional
+
+    :return: hydro-objects with width and depth, BGT-coupling of the main route, basin profiles for flowing/'doorgaand'
+        and storing/'bergend', and the storing basin profiles filled with BGT-data (if `bgt_full_coverage`)
+    :rtype: tuple
+    """
+    # BGT-coupling
+    hydro_objects = width.couple_bgt_to_hydro_objects(hydro_objects, bgt_data, min_overlap=bgt_buffer)
+    hydro_objects = width.estimate_width(hydro_objects, bgt_data, drop_na=True)
+    bgt_coupling = pd.DataFrame(
+        hydro_objects.loc[hydro_objects["main-route"], ["_ho_index", "main-route", "index_bgt"]]
+    ).reset_index(drop=True)
+
+    # depth from hydrotopes
+    hydro_objects = depth.depth_from_hydrotopes(
+        hydro_objects, hydrotope_map, hydrotope_table, drop_na=True, check_hydrotopes=check_hydrotopes
+    )
+
+    # depth from measurements
+    if cross_sections is not None:
+        hydro_objects = depth.depth_from_measurements(hydro_objects, cross_sections)
+
+    # depth from (multi)polygons (user-defined)
+    if water_bodies is not None:
+        hydro_objects = _overwrite_depth(hydro_objects, water_bodies, col_wb_depth)
+
+    # basin profiles
+    main_route = hydro_objects["main-route"].values
+    flowing_profiles = cross_section.assign_basin_profiles(basins, hydro_objects[main_route], as_geo_dataframe=True)
+    storing_profiles = cross_section.assign_basin_profiles(basins, hydro_objects[~main_route], as_geo_dataframe=True)
+
+    # fill storing basins with BGT-data
+    covered_profiles = None
+    if bgt_full_coverage:
+        covered_profiles = cross_section.full_bgt_coverage(
+            flowing_profiles, storing_profiles.copy(), basins, bgt_data, as_geo_dataframe=True, min_valid_area=2e-3
+        )
+    return hydro_objects, bgt_coupling, flowing_profiles, storing_profiles, covered_profiles
+
+
+def _partition_profile_data(
+    basins: gpd.GeoDataFrame,
+    hydro_objects: gpd.GeoDataFrame,
+    bgt_data: gpd.GeoDataFrame,
+    hydrotope_map: gpd.GeoDataFrame,
+    cross_sections: gpd.GeoDataFrame | None,
+    n_partitions: int,
+) -> list[tuple[np.ndarray, tuple]]:
+    """Spatially partition the data required to derive the basin profiles.
+
+    The basins are grouped along a Hilbert curve into (at most) `n_partitions` partitions. Every partition contains:
+        1.  its basins;
+        2.  the hydro-objects intersecting its basins, and its share of the hydro-objects not intersecting any basin
+            (nearest to its basins);
+        3.  the hydro-objects sharing a BGT-polygon with these hydro-objects, as the BGT-coupling of non-main route
+            hydro-objects depends on the BGT-polygons used by the main route;
+        4.  the BGT-polygons intersecting these hydro-objects or its basins;
+        5.  the hydrotopes intersecting (or nearest to) these hydro-objects;
+        6.  the cross-sections intersecting these hydro-objects.
+
+    Deriving the basin profiles per partition reproduces the results of the full dataset for its basins and its own
+    hydro-objects. Hydro-objects intersecting basins of multiple partitions are owned by the first of these partitions. All selections keep the original index-labels and order, and the hydro-objects are labelled by their
+    position (column '_ho_index').
+
+    :param basins: basin areas (polygons)
+    :param hydro_objects: hydro-objects (lines) with main-route labels
+    :param bgt_data: BGT-data
+    :param hydrotope_map: geospatial data of hydrotopes
+    :param cross_sections: normalised measured cross-sections
+    :param n_partitions: (maximum) number of partitions
+
+    :type basins: geopandas.GeoDataFrame
+    :type hydro_objects: geopandas.GeoDataFrame
+    :type bgt_data: geopandas.GeoDataFrame
+    :type hydrotope_map: geopandas.GeoDataFrame
+    :type cross_sections: geopandas.GeoDataFrame | None
+    :type n_partitions: int
+
+    :return: per partition, the positions of its own hydro-objects and the data for `_derive_basin_profiles`
+    :rtype: list[tuple[numpy.ndarray, tuple]]
+    """
+    hydro_objects = hydro_objects.copy()
+    hydro_objects["_ho_index"] = np.arange(len(hydro_objects))
+    ho_geometries = hydro_objects.geometry.values
+
+    # group basins along a Hilbert curve
+    order = np.argsort(basins.geometry.hilbert_distance().to_numpy(), kind="stable")
+    groups = np.zeros(len(basins), dtype=int)
+    for i, chunk in enumerate(np.array_split(order, min(n_partitions, len(basins)))):
+        groups[chunk] = i
+
+    # own hydro-objects per partition: of the (first) intersecting basin, or else of the nearest basin
+    i_ho, i_basin = basins.sindex.query(ho_geometries, predicate="intersects")
+    ho_groups = np.full(len(hydro_objects), len(basins))
+    np.minimum.at(ho_groups, i_ho, groups[i_basin])
+    orphans = np.setdiff1d(np.arange(len(hydro_objects)), i_ho)
+    if len(orphans):
+        i_orphan, i_nearest = basins.sindex.nearest(ho_geometries[orphans], return_all=False)
+        ho_groups[orphans[i_orphan]] = groups[i_nearest]
+
+    partitions = []
+    for i in np.unique(groups):
+        own = np.flatnonzero(ho_groups == i)
+        partition_basins = basins.iloc[np.flatnonzero(groups == i)]
+
+        # hydro-objects intersecting the basins, and sharing BGT-polygons
+        i_ho = np.union1d(own, hydro_objects.sindex.query(partition_basins.geometry.values, predicate="intersects")[1])
+        i_bgt = np.unique(bgt_data.sindex.query(ho_geometries[i_ho], predicate="intersects")[1])
+        i_ho = np.union1d(i_ho, hydro_objects.sindex.query(bgt_data.geometry.values[i_bgt], predicate="intersects")[1])
+        geometries = ho_geometries[i_ho]
+
+        # BGT-polygons (incl. those required for the full BGT-coverage of the basins)
+        i_bgt = np.union1d(
+            bgt_data.sindex.query(geometries, predicate="intersects")[1],
+            bgt_data.sindex.query(partition_basins.geometry.values, predicate="intersects")[1],
+        )
+
+        # hydrotopes, incl. the nearest for hydro-objects outside the hydrotope map
+        i_geom, i_map = hydrotope_map.sindex.query(geometries, predicate="intersects")
+        outside = np.setdiff1d(np.arange(len(geometries)), i_geom)
+        if len(outside):
+            i_map = np.union1d(i_map, hydrotope_map.sindex.nearest(geometries[outside])[1])
+
+        # cross-sections
+        partition_cross_sections = None
+        if cross_sections is not None:
+            i_xs = np.unique(cross_sections.sindex.query(geometries, predicate="intersects")[1])
+            partition_cross_sections = cross_sections.iloc[i_xs]
+
+        data = (
+            partition_basins,
+            hydro_objects.iloc[i_ho].copy(),
+            bgt_data.iloc[i_bgt],
+            hydrotope_map.iloc[np.unique(i_map)],
+            partition_cross_sections,
+        )
+        partitions.append((own, data))
+    return partitions
+
+
+def _merge_partitions(
+    basins: gpd.GeoDataFrame, own: list[np.ndarray], results: list[tuple]
+) -> tuple[gpd.GeoDataFrame, pd.DataFrame, gpd.GeoDataFrame, gpd.GeoDataFrame, gpd.GeoDataFrame | None]:
+    """Merge the results of `_derive_basin_profiles` per spatial partition.
+
+    The merged results are ordered (and indexed) as if the basin profiles were derived from the full dataset at once:
+    hydro-objects in their original order, and basin profiles in the order of the basins.
+
+    :param basins: basin areas (polygons)
+    :param own: positions of the own hydro-objects per partition
+    :param results: results of `_derive_basin_profiles` per partition
+
+    :type basins: geopandas.GeoDataFrame
+    :type own: list[numpy.ndarray]
+    :type results: list[tuple]
+
+    :return: merged results of `_derive_basin_profiles`
+    :rtype: tuple
+    """
+    hydro_objects, bgt_coupling, flowing, storing, covered = zip(*results, strict=True)
+
+    # hydro-objects in original order
+    hydro_objects = pd.concat(
+        [df[df["_ho_index"].isin(labels)] for df, labels in zip(hydro_objects, own, strict=True)]
+    ).sort_values("_ho_index", kind="stable", ignore_index=True)
+    bgt_coupling = pd.concat(
+        [df[df["_ho_index"].isin(labels)] for df, labels in zip(bgt_coupling, own, strict=True)]
+    ).sort_values("_ho_index", kind="stable", ignore_index=True)
+
+    # basin profiles in order of the basins, indexed by the rank of the basin
+    position = pd.Series(np.arange(len(basins)), index=basins["node_id"].to_numpy())
+
+    def merge_profiles(tables: typing.Sequence[gpd.GeoDataFrame], ranks: pd.Index | None = None) -> gpd.GeoDataFrame:
+        table = pd.concat(tables)
+        table.index = position.loc[table["node_id"]].to_numpy()
+        table = table.sort_index(kind="stable")
+        ranks = pd.Index(table.index.unique()) if ranks is None else ranks
+        table.index = ranks.get_indexer(table.index)
+        return gpd.GeoDataFrame(table)
+
+    flowing_profiles = merge_profiles(flowing)
+    storing_profiles = merge_profiles(storing)
+    covered_profiles = None
+    if covered[0] is not None:
+        ranks = pd.Index(np.unique(position.loc[storing_profiles["node_id"]]))
+        covered_profiles = merge_profiles(covered, ranks)
+    return hydro_objects, bgt_coupling, flowing_profiles, storing_profiles, covered_profiles
+
+
 def _overwrite_depth(
     hydro_objects: gpd.GeoDataFrame, water_bodies: gpd.GeoDataFrame, col_depth: str
 ) -> gpd.GeoDataFrame:
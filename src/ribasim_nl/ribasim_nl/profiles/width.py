@@ -11,6 +11,89 @@ import shapely
 LOG = logging.getLogger(__name__)
 
 
+def polygon_width(polygons: np.ndarray) -> np.ndarray:
+    """Estimation of the polygons' widths based on their circumference (`shapely.length`) and area (`shapely.area`).
+
+    The width of a polygon is calculated by assuming the polygon to be representing a rectangular shape. In doing so,
+    its circumference (C) and area (A) can be used to calculate the two sides of such a rectangle by using the following
+    two definitions:
+     1. circumference: C = 2a + 2b;
+     2. area: A = ab.
+
+    Solving for a and b gives:
+
+        a, b = 0.25 * (C +/- sqrt(C^2 - 16A))
+
+    As the width is smaller than the length, the width (W) is estimated as:
+
+        W = 0.25 * (C - sqrt(C^2 - 16A))
+
+    In the case that this results in a negative value to take the square-root of (i.e., C^2 - 16A < 0), the polygon is
+    considered a square:
+
+        W = sqrt(A)
+
+    Thus, the width of the basin polygon is calculated as follows:
+
+        | W = sqrt(A)                           if C^2 - 16A < 0
+        | W = 0.25 * (C - sqrt(C^2 - 16A))      else
+
+    :param polygons: BGT-water polygons
+    :type polygons: numpy.ndarray[shapely.Polygon]
+
+    :return: width estimations
+    :rtype: numpy.ndarray[float]
+    """
+    circumference, area = shapely.length(polygons), shapely.area(polygons)
+    _v = circumference**2 - 16 * area
+    return np.where(_v < 0, np.sqrt(area), 0.25 * (circumference - np.sqrt(np.maximum(_v, 0))))
+
+
+def overlap_fraction(lines: np.ndarray, polygons: np.ndarray) -> np.ndarray:
+    """Fraction of the lines' lengths overlapping with the polygons (element-wise).
+
+    :param lines: hydro-objects
+    :param polygons: BGT-polygons
+
+    :type lines: numpy.ndarray[shapely.LineString]
+    :type polygons: numpy.ndarray[shapely.Polygon]
+
+    :return: overlap fractions
+    :rtype: numpy.ndarray[float]
+    """
+    lines, polygons = np.asarray(lines), np.asarray(polygons)
+
+    # lines covered by the polygons fully overlap: skip their intersection
+    shapely.prepare(polygons)
+    covered = shapely.covers(polygons, lines)
+    overlap = shapely.length(lines)
+    overlap[~covered] = shapely.length(shapely.intersection(lines[~covered], polygons[~covered]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return overlap / shapely.length(lines)
+
+
+def grouped_lists(labels: np.ndarray, values: np.ndarray, *, name: str | None = None) -> pd.Series:
+    """Sorted lists of the values per (sorted) label, i.e., `pd.Series(values, labels).groupby(level=0).apply(sorted)`.
+
+    :param labels: labels
+    :param values: values
+    :param name: name of the series, defaults to None
+
+    :type labels: numpy.ndarray
+    :type values: numpy.ndarray
+    :type name: str, optional
+
+    :return: sorted list of values per label
+    :rtype: pandas.Series
+    """
+    if len(labels) == 0:
+        return pd.Series([], index=labels, name=name, dtype=object)
+    order = np.lexsort((values, labels))
+    labels, values = labels[order], values[order]
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    return pd.Series([v.tolist() for v in np.split(values, starts[1:])], index=labels[starts], name=name, dtype=object)
+
+
 def couple_bgt_to_hydro_objects(
     hydro_objects: gpd.GeoDataFrame, bgt_data: gpd.GeoDataFrame, **kwargs
 ) -> gpd.GeoDataFrame:
@@ -54,18 +137,13 @@ def couple_bgt_to_hydro_objects(
 
     def couple_bgt(network_selection: gpd.GeoDataFrame, bgt_selection: gpd.GeoDataFrame) -> pd.Series:
         """Couple BGT-data (selection) to (selection of) hydro-objects."""
-
-        def overlap_with_bgt(line: shapely.LineString, polygon_index: int) -> bool:
-            """Verify minimum overlap of hydro-object with BGT-polygon to be coupled."""
-            polygon = bgt_data.loc[polygon_index, "geometry"]
-            return (line.intersection(polygon).length / line.length) > min_overlap
-
         # TODO: Decide on method: No intersection results in discarding the hydro-object (how='inner'); or keep it (how='left')
         out = network_selection.sjoin(bgt_selection[[bgt_id, "geometry"]], how="inner", predicate="intersects")
         if min_overlap is not None:
-            out = out[out.apply(lambda row: overlap_with_bgt(row["geometry"], row["index_right"]), axis=1)]
-        out = out.groupby(level=0)["index_right"].apply(list)
-        return out
+            out = out[
+                overlap_fraction(out.geometry.values, bgt_data.geometry.loc[out["index_right"]].values) > min_overlap
+            ]
+        return grouped_lists(out.index.to_numpy(), out["index_right"].to_numpy(), name="index_right")
 
     # couple BGT-data to hydro-objects
     # > main route coupling
@@ -109,52 +187,11 @@ def estimate_width(
         msg = "Hydro-objects not yet coupled to BGT-data"
         raise ValueError(msg)
 
-    def width_calculator(polygon: shapely.Polygon) -> float:
-        """Estimation of a polygon's width based on its circumference (polygon.length) and surface area (polygon.area).
-
-        The width of the polygon is calculated by assuming the polygon to be representing a rectangular shape. In doing
-        so, its circumference (`polygon.length`) and area (`polygon.area`) can be used to calculate the two sides of
-        such a rectangle by using the following two definitions:
-         1. circumference: C = 2a + 2b;
-         2. area: A = ab.
-
-        Solving for a and b gives:
-
-            a, b = 0.25 * (C +/- sqrt(C^2 - 16A))
-
-        As the width is smaller than the length, the width (W) is estimated as:
-
-            W = 0.25 * (C - sqrt(C^2 - 16A))
-
-        In the case that this results in a negative value to take the square-root of (i.e., C^2 - 16A < 0), the polygon
-        is considered a square:
-
-            W = sqrt(A)
-
-        Thus, the width of the basin polygon is calculated as follows:
-
-            | W = sqrt(A)                           if C^2 - 16A < 0
-            | W = 0.25 * (C - sqrt(C^2 - 16A))      else
-
-        :param polygon: BGT-water polygon
-        :type polygon: shapely.Polygon
-
-        :return: width estimation
-        :rtype: float
-        """
-        _v = polygon.length**2 - 16 * polygon.area
-        if _v < 0:
-            return np.sqrt(polygon.area)
-        return 0.25 * (polygon.length - np.sqrt(_v))
-
-    def representative_width(indices: list[int]) -> float | None:
-        """Take the mean of estimated widths of all connected polygons."""
-        if indices:
-            return float(np.mean([width_calculator(bgt_data.geometry.iloc[i]) for i in indices]))
-        return None
-
-    # assign representative width estimates to the hydro-objects
-    hydro_objects["width"] = hydro_objects["index_bgt"].apply(representative_width)
+    # assign representative width estimates to the hydro-objects: mean width of all coupled polygons
+    coupling = hydro_objects["index_bgt"].explode().dropna()
+    polygons = pd.unique(coupling.to_numpy())
+    widths = pd.Series(polygon_width(bgt_data.geometry.loc[polygons].values), index=polygons)
+    hydro_objects["width"] = pd.Series(widths.loc[coupling].to_numpy(), index=coupling.index).groupby(level=0).mean()
     if drop_na:
         hydro_objects.dropna(subset="width", inplace=True, ignore_index=True)
     return hydro_objects
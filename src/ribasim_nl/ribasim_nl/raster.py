@@ -1,10 +1,16 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any
 
 import numpy as np
+import numpy.typing as npt
 import rasterio
+import shapely
+from geopandas import GeoDataFrame
 from pandas import DataFrame
 from rasterio import features  # noqa:F401
-from rasterio.windows import from_bounds
+from rasterio.windows import Window, from_bounds
+from rasterstats import zonal_stats
 from shapely.geometry import Polygon
 
 DEFAULT_PERCENTILES = [
@@ -28,6 +34,9 @@ DEFAULT_PERCENTILES = [
     100,
 ]
 
+# polygons are batched by the block (of BLOCK_SIZE x BLOCK_SIZE cells) containing their centroid
+BLOCK_SIZE = 1024
+
 
 def sample_level_area(raster_path: Path, polygon: Polygon, ident=None, percentiles=DEFAULT_PERCENTILES) -> DataFrame:
     # Define the window coordinates (left, right, top, bottom)
@@ -74,3 +83,136 @@ def sample_level_area(raster_path: Path, polygon: Polygon, ident=None, percentil
         print(f"sampled polygon {ident}")
         df["id"] = ident
     return df
+
+
+def _polygon_batches(geometries: npt.NDArray[Any], transform, block_size: int) -> list[npt.NDArray[np.int64]]:
+    """Group polygon positions by the raster block containing their centroid."""
+    centroids = shapely.centroid(geometries)
+    cols, rows = ~transform * (shapely.get_x(centroids), shapely.get_y(centroids))
+    block_cols = np.floor(np.nan_to_num(cols) / block_size).astype(np.int64)
+    block_rows = np.floor(np.nan_to_num(rows) / block_size).astype(np.int64)
+    order = np.lexsort((block_cols, block_rows))
+    keys = np.stack([block_rows[order], block_cols[order]], axis=1)
+    splits = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+    return np.split(order, splits)
+
+
+def _batch_window(src: rasterio.DatasetReader, geometries: npt.NDArray[Any]) -> Window | None:
+    """Window on whole cells covering all geometries (plus one cell), clipped to the raster. None if outside."""
+    bounds = shapely.total_bounds(geometries)
+    window = from_bounds(*bounds, transform=src.transform)
+    col_off, row_off = int(np.floor(window.col_off)) - 1, int(np.floor(window.row_off)) - 1
+    col_end = int(np.ceil(window.col_off + window.width)) + 1
+    row_end = int(np.ceil(window.row_off + window.height)) + 1
+    col_off, row_off = max(col_off, 0), max(row_off, 0)
+    col_end, row_end = min(col_end, src.width), min(row_end, src.height)
+    if col_end <= col_off or row_end <= row_off:
+        return None
+    return Window.from_slices((row_off, row_end), (col_off, col_end))
+
+
+def _zonal_stats_batch(
+    raster_file: Path,
+    geometries: npt.NDArray[Any],
+    window: Window,
+    band: int,
+    fill_value: float | None,
+    all_touched: bool,
+    stats: str,
+    maaiveld_band: int | None,
+    maaiveld_data: npt.NDArray[Any] | None,
+) -> list[dict[str, Any]]:
+    with rasterio.open(raster_file) as src:
+        data = src.read(band, window=window)
+
+        if maaiveld_band is not None:
+            data = src.read(maaiveld_band, window=window) - data
+        elif maaiveld_data is not None:
+            data = maaiveld_data - data
+
+        # fill nodata
+        if fill_value is not None:
+            data = np.where(data == src.nodata, fill_value, data)
+
+        return zonal_stats(
+            geometries,
+            data,
+            affine=src.window_transform(window),
+            stats=stats,
+            nodata=src.nodata,
+            all_touched=all_touched,
+        )
+
+
+def zonal_stats_windowed(
+    raster_file: Path,
+    df: GeoDataFrame,
+    band: int = 1,
+    fill_value: float | None = None,
+    all_touched: bool = False,
+    stats: str = "mean",
+    maaiveld_band: int | None = None,
+    maaiveld_data: npt.ArrayLike | None = None,
+    block_size: int = BLOCK_SIZE,
+    processes: int | None = None,
+) -> list[dict[str, Any]]:
+    """Zonal statistics of polygons over a raster-band, reading only the windows covering polygon-batches.
+
+    Polygons are grouped by the raster block (block_size x block_size cells) containing their centroid. Every batch
+    reads the window covering its polygons, so peak memory is bounded by block size and polygon extent instead of
+    raster size. Statistics per batch are computed with rasterstats, so results equal rasterstats over the full band.
+
+    Args:
+        raster_file (Path): Raster-file to sample
+        df (GeoDataFrame): GeoDataFrame with polygons
+        band (int, optional): Band in raster-file to sample from. Defaults to 1.
+        fill_value (float | None, optional): Fill-value for nodata-cells. Defaults to None.
+        all_touched (bool, optional): rasterize all_touched setting. Defaults to False.
+        stats (str, optional): rasterstats stats setting. Defaults to "mean".
+        maaiveld_band (int | None, optional): If specified, raster-data will be subtracted from this band in the same
+            raster-file. Defaults to None.
+        maaiveld_data (npt.ArrayLike | None, optional): If numpy-array in same shape as raster, raster-data will be
+            subtracted from it. Defaults to None.
+        block_size (int, optional): Size of blocks (in cells) to batch polygons by. Defaults to BLOCK_SIZE.
+        processes (int | None, optional): Number of processes to compute batches in parallel. Defaults to None (no
+            parallel processing).
+
+    Returns
+    -------
+        list[dict]: Rasterstats output, in order of df
+    """
+    geometries = df.geometry.to_numpy()
+    if len(geometries) == 0:
+        return []
+
+    # batches with their windows, polygons outside the raster get a single cell so rasterstats reports empty stats
+    with rasterio.open(raster_file) as src:
+        batches = _polygon_batches(geometries, src.transform, block_size)
+        windows = [_batch_window(src, geometries[i]) or Window.from_slices((0, 1), (0, 1)) for i in batches]
+
+    args = [
+        (
+            raster_file,
+            geometries[i],
+            window,
+            band,
+            fill_value,
+            all_touched,
+            stats,
+            maaiveld_band,
+            None if maaiveld_data is None else np.asarray(maaiveld_data)[window.toslices()],
+        )
+        for i, window in zip(batches, windows, strict=True)
+    ]
+    if processes is not None and processes > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            batch_stats = list(executor.map(_zonal_stats_batch, *zip(*args, strict=True)))
+    else:
+        batch_stats = [_zonal_stats_batch(*i) for i in args]
+
+    # back in order of df
+    result: list[dict[str, Any]] = [{}] * len(geometries)
+    for positions, batch_result in zip(batches, batch_stats, strict=True):
+        for position, polygon_stats in zip(positions, batch_result, strict=True):
+            result[position] = polygon_stats
+    return result
@@ -1,40 +1,71 @@
 # %%
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 
 from ribasim_nl.model import Model
 
 
-def reindex_nodes(model: Model, node_index: pd.Series, original_index_postfix: str | None = "waterbeheerder") -> Model:
-    """Reindex all model-nodes to a new node_index series"""
+def _map_node_ids(node_ids: pd.Series | pd.Index, node_index: pd.Series) -> np.ndarray:
+    """Map node_ids to new node_ids in a single vectorized look-up; raises a KeyError on the first unknown node_id"""
+    positions = node_index.index.get_indexer(node_ids)
+    if (positions == -1).any():
+        raise KeyError(np.asarray(node_ids)[positions == -1].tolist()[0])
+    return node_index.to_numpy()[positions]
+
+
+def _reindex_table(table, node_index: pd.Series, label: str) -> None:
+    """Renumber the node_id and listen_node_id columns of a node-table (in place)"""
+    try:
+        if table.df is not None:
+            if "node_id" in table.df.columns:
+                table.df["node_id"] = _map_node_ids(table.df["node_id"], node_index)
+                table.df.index += 1
+            if "listen_node_id" in table.df.columns:
+                table.df["listen_node_id"] = _map_node_ids(table.df["listen_node_id"], node_index)
+    except KeyError as e:
+        raise KeyError(f"node_id {e} in table {label} not a node_id node-table") from e
+
+
+def reindex_nodes(
+    model: Model,
+    node_index: pd.Series,
+    original_index_postfix: str | None = "waterbeheerder",
+    workers: int | None = None,
+) -> Model:
+    """Reindex all model-nodes to a new node_index series
+
+    All node_ids are mapped through one look-up on the `node_index` shared by all tables. With `workers` the
+    node-tables (node, static, area, ...) are renumbered on a thread pool; every table is renumbered by a single
+    thread.
+    """
     # reindex the node table
     assert model.node.df is not None
     if original_index_postfix is not None:
         model.node.df[f"meta_node_id_{original_index_postfix}"] = model.node.df.index.astype("int32")
-    model.node.df.index = pd.Index(
-        model.node.df.reset_index("node_id")["node_id"].apply(lambda x: node_index[x]).to_list(),
-        name="node_id",
-    )
+    model.node.df.index = pd.Index(_map_node_ids(model.node.df.index, node_index).astype("int64"), name="node_id")
 
     # re-number from_node_id and to_node_id
     assert model.link.df is not None
-    model.link.df["from_node_id"] = model.link.df["from_node_id"].apply(lambda x: node_index[x])
-    model.link.df["to_node_id"] = model.link.df["to_node_id"].apply(lambda x: node_index[x])
+    model.link.df["from_node_id"] = _map_node_ids(model.link.df["from_node_id"], node_index)
+    model.link.df["to_node_id"] = _map_node_ids(model.link.df["to_node_id"], node_index)
 
     # renumber all node-tables (node, static, area, ...)
     assert model.node.df is not None
+    tables = []
     for node_type in model.node.df.node_type.unique():
         ribasim_node = model.get_component(node_type)
-        for attr in ribasim_node.__class__.model_fields:
-            table = getattr(ribasim_node, attr)
-            try:
-                if table.df is not None:
-                    if "node_id" in table.df.columns:
-                        table.df["node_id"] = table.df["node_id"].apply(lambda x: node_index[x])
-                        table.df.index += 1
-                    if "listen_node_id" in table.df.columns:
-                        table.df["listen_node_id"] = table.df["listen_node_id"].apply(lambda x: node_index[x])
-            except KeyError as e:
-                raise KeyError(f"node_id {e} in table {node_type} / {attr} not a node_id node-table") from e
+        tables.extend(
+            (getattr(ribasim_node, attr), f"{node_type} / {attr}") for attr in ribasim_node.__class__.model_fields
+        )
+    if workers is not None and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # consume the results to raise mapping errors
+            list(executor.map(lambda t: _reindex_table(t[0], node_index, t[1]), tables))
+    else:
+        for table, label in tables:
+            _reindex_table(table, node_index, label)
     return model
 
 
@@ -71,9 +102,7 @@ def prefix_index(
         )
 
     # create a node_index and reindex nodes
-    node_index = pd.Series(
-        data=[int(f"{prefix_id}{node_id:0>{max_digits}}") for node_id in node_ids], index=node_ids
-    ).astype("int32")
+    node_index = pd.Series(data=prefix_id * 10**max_digits + node_ids.to_numpy(), index=node_ids).astype("int32")
     model = reindex_nodes(model=model, node_index=node_index, original_index_postfix=original_index_postfix)
 
     # create an link_index and reindex links
@@ -90,9 +119,7 @@ def prefix_index(
             f"Either increase max_digits to at least {actual_link_digits} or ensure all link IDs fit within {max_digits} digits{model_info}."
         )
 
-    model.link.df.index = pd.Index(
-        [int(f"{prefix_id}{link_id:0>{max_digits}}") for link_id in link_ids], name="link_id"
-    )
+    model.link.df.index = pd.Index(prefix_id * 10**max_digits + link_ids.to_numpy().astype("int64"), name="link_id")
 
     # keep original index if
     if original_index_postfix is not None:
@@ -125,7 +152,7 @@ def reset_index(
     expected_length = node_id_max - node_id_min + 1
     if not ((node_start == node_id_min) and (expected_length == len(model.node.df))):
         # create a re-index for nodes
-        node_index = pd.Series(data=[i + node_start for i in range(len(node_ids))], index=node_ids).astype("int32")
+        node_index = pd.Series(data=np.arange(len(node_ids)) + node_start, index=node_ids).astype("int32")
         model = reindex_nodes(model=model, node_index=node_index, original_index_postfix=original_index_postfix)
 
         # only reset nodes if we have to
@@ -137,7 +164,7 @@ def reset_index(
 
         if not ((link_start == link_id_min) and (expected_length == len(model.link.df))):
             # create a re-index for links
-            model.link.df.index = pd.Index([i + link_start for i in range(len(link_ids))], name="link_id")
+            model.link.df.index = pd.Index(np.arange(len(link_ids), dtype="int64") + link_start, name="link_id")
 
         # keep original index if
         if original_index_postfix is not None:
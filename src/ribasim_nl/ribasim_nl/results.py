@@ -1,12 +1,192 @@
+"""Lazy readers for Ribasim results (NetCDF and Arrow).
+
+Selections on variables, node_id/link_id and time are pushed down into xarray (NetCDF) or pyarrow (Arrow), so only
+the selected values are read from disk before converting to a pandas DataFrame.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import xarray as xr
-from pandas import DataFrame
+from pydantic import BaseModel
+
+ID_COLUMNS = ["node_id", "link_id"]
+
+
+def _as_list(values) -> list | None:
+    if values is None:
+        return None
+    if isinstance(values, str) or not isinstance(values, Iterable):
+        return [values]
+    return list(values)
+
+
+def _as_timestamp(value: pd.Timestamp | str | None) -> pd.Timestamp | None:
+    if value is None:
+        return None
+    timestamp = pd.Timestamp(value)
+    if not isinstance(timestamp, pd.Timestamp):  # NaT
+        raise ValueError(f"not a valid time: {value}")
+    return timestamp
+
+
+def _read_netcdf(
+    filepath: Path,
+    variables: list[str] | None,
+    ids: dict[str, list],
+    start_time: pd.Timestamp | None,
+    end_time: pd.Timestamp | None,
+) -> pd.DataFrame:
+    with xr.open_dataset(filepath) as dataset:
+        if variables is not None:
+            dataset = dataset[variables]
+        for dim, values in ids.items():
+            if dim in dataset.dims:
+                dataset = dataset.sel({dim: dataset[dim].isin(values)})
+        if "time" in dataset.dims and (start_time is not None or end_time is not None):
+            dataset = dataset.sel(time=slice(start_time, end_time))
+        return dataset.load().to_dataframe().reset_index()
+
+
+def _read_arrow(
+    filepath: Path,
+    variables: list[str] | None,
+    ids: dict[str, list],
+    start_time: pd.Timestamp | None,
+    end_time: pd.Timestamp | None,
+) -> pd.DataFrame:
+    dataset = ds.dataset(filepath, format="arrow")
+    names = dataset.schema.names
+    columns = None
+    if variables is not None:
+        columns = [i for i in ["time", *ID_COLUMNS] if i in names] + [i for i in variables if i not in ID_COLUMNS]
+
+    expressions = [pc.field(column).isin(values) for column, values in ids.items() if column in names]
+    if "time" in names:
+        if start_time is not None:
+            expressions += [pc.field("time") >= start_time]
+        if end_time is not None:
+            expressions += [pc.field("time") <= end_time]
+    expression = None
+    for i in expressions:
+        expression = i if expression is None else expression & i
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def read_results(
+    filepath: Path,
+    variables: str | list[str] | None = None,
+    node_id: int | list[int] | None = None,
+    link_id: int | list[int] | None = None,
+    start_time: pd.Timestamp | str | None = None,
+    end_time: pd.Timestamp | str | None = None,
+) -> pd.DataFrame:
+    """Read (a selection of) Ribasim results into a DataFrame indexed by time.
+
+    Selections are applied before values are read, so memory scales with the selection, not with the file.
+
+    Args:
+        filepath (Path): Path to a Ribasim result file (.nc or .arrow)
+        variables (str | list[str] | None, optional): Variable(s) to read. Defaults to None (all variables).
+        node_id (int | list[int] | None, optional): node_id(s) to read. Defaults to None (all nodes).
+        link_id (int | list[int] | None, optional): link_id(s) to read. Defaults to None (all links).
+        start_time (pd.Timestamp | str | None, optional): First time to read (inclusive). Defaults to None.
+        end_time (pd.Timestamp | str | None, optional): Last time to read (inclusive). Defaults to None.
+
+    Returns
+    -------
+        pd.DataFrame: results with columns node_id or link_id and variables, indexed by time if present
+    """
+    filepath = Path(filepath)
+    variables = _as_list(variables)
+    ids = {k: v for k, v in zip(ID_COLUMNS, [_as_list(node_id), _as_list(link_id)], strict=True) if v is not None}
+    start = _as_timestamp(start_time)
+    end = _as_timestamp(end_time)
+
+    if filepath.suffix == ".nc":
+        df = _read_netcdf(filepath, variables, ids, start, end)
+    elif filepath.suffix == ".arrow":
+        df = _read_arrow(filepath, variables, ids, start, end)
+    else:
+        raise NotImplementedError(f"File(-type) not supported: {filepath.name}")
+
+    if "time" in df.columns:
+        df.set_index("time", inplace=True)
+    return df
+
+
+class Results(BaseModel):
+    """Ribasim result file, read lazily.
+
+    `df` reads (and caches) the full file. Use `select` to read only the variables, node_ids/link_ids and time window
+    you need.
+    """
+
+    filepath: Path
+    _df: pd.DataFrame | None = None
+    _time: pd.DatetimeIndex | None = None
+
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._df is None:
+            self._df = read_results(self.filepath)
+        return self._df
 
-from ribasim_nl.model import Model
+    @property
+    def time(self) -> pd.DatetimeIndex:
+        """Time stamps in results, read without reading any values."""
+        if self._time is None:
+            if self.filepath.suffix == ".nc":
+                with xr.open_dataset(self.filepath) as dataset:
+                    time = (
+                        dataset["time"].to_numpy() if "time" in dataset.coords else np.array([], dtype="datetime64[ns]")
+                    )
+            else:
+                dataset = ds.dataset(self.filepath, format="arrow")
+                time = dataset.to_table(columns=["time"])["time"].unique().to_numpy()
+            self._time = pd.DatetimeIndex(time, name="time")
+        return self._time
 
+    def select(
+        self,
+        variables: str | list[str] | None = None,
+        node_id: int | list[int] | None = None,
+        link_id: int | list[int] | None = None,
+        start_time: pd.Timestamp | str | None = None,
+        end_time: pd.Timestamp | str | None = None,
+    ) -> pd.DataFrame:
+        """Read a selection of results, see `read_results`. Selections are not cached."""
+        if self._df is not None:
+            return self._select_from_df(variables, node_id, link_id, start_time, end_time)
+        return read_results(
+            self.filepath,
+            variables=variables,
+            node_id=node_id,
+            link_id=link_id,
+            start_time=start_time,
+            end_time=end_time,
+        )
 
-def basin_results(model: Model) -> DataFrame:
-    """Read basin-results into a pandas DataFrame."""
-    assert model.filepath is not None
-    basin_nc = model.filepath.parent.joinpath(model.results_dir, "basin.nc")
+    def at(self, time: pd.Timestamp | str, variables: str | list[str] | None = None, **kwargs) -> pd.DataFrame:
+        """Read results at a single time stamp."""
+        return self.select(variables=variables, start_time=time, end_time=time, **kwargs)
 
-    return xr.open_dataset(basin_nc).to_dataframe().reset_index()
+    def _select_from_df(self, variables, node_id, link_id, start_time, end_time) -> pd.DataFrame:
+        # full file is cached already, select from memory
+        df = self._df
+        assert df is not None
+        for column, values in zip(ID_COLUMNS, [node_id, link_id], strict=True):
+            if values is not None and column in df.columns:
+                df = df[df[column].isin(_as_list(values))]
+        start, end = _as_timestamp(start_time), _as_timestamp(end_time)
+        if df.index.name == "time" and (start is not None or end is not None):
+            df = df.loc[start:end]
+        variables = _as_list(variables)
+        if variables is not None:
+            df = df[[i for i in ID_COLUMNS if i in df.columns] + [i for i in variables if i not in ID_COLUMNS]]
+        return df.copy()
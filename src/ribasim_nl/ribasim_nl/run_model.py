@@ -1,15 +1,30 @@
 # %%
+import json
+import os
 import re
 import shutil
 import subprocess
 import sys
-from collections import namedtuple
-from datetime import timedelta
+import threading
+import time
+import tomllib
+from collections import deque, namedtuple
+from collections.abc import Callable, Iterable
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import TextIO
 
+import pandas as pd
 from ribasim.cli import _find_cli
 
-RunSpecs = namedtuple("RunSpecs", ["exit_code", "simulation_time"])
+# simulation_time is the computation time reported by Ribasim, wall_time includes start-up of the CLI
+RunSpecs = namedtuple(
+    "RunSpecs",
+    ["exit_code", "simulation_time", "wall_time", "progress", "simulated_time", "speed", "stalls"],
+    defaults=(None, None, None, None, 0),
+)
 
 
 def parse_computation_time(line: str) -> timedelta | None:
@@ -35,13 +50,219 @@ def parse_computation_time(line: str) -> timedelta | None:
     return None
 
 
+@dataclass
+class RunEvent:
+    """A telemetry-event of a model-run, see `run`
+
+    Parameters
+    ----------
+    event : str
+        `progress` (new progress from the Ribasim CLI), `stall` (simulation speed dropped below `stall_speed`) or
+        `finished` (the CLI exited)
+    wall_time : float
+        Seconds since the start of the run
+    progress : float | None, optional
+        Fraction of the simulation period completed. By default None (not simulating yet)
+    simulated_time : datetime | None, optional
+        Model time reached, derived from progress and the starttime and endtime in the toml-file. By default None
+    speed : float | None, optional
+        Simulated seconds per wall-clock second over the last `stall_window` seconds, on `finished` the average since
+        simulating started. By default None
+    exit_code : int | None, optional
+        Exit code of the CLI, only on `finished`. By default None
+    """
+
+    event: str
+    wall_time: float
+    progress: float | None = None
+    simulated_time: datetime | None = None
+    speed: float | None = None
+    exit_code: int | None = None
+
+    def to_json(self) -> str:
+        record = asdict(self)
+        if self.simulated_time is not None:
+            record["simulated_time"] = self.simulated_time.isoformat()
+        return json.dumps(record)
+
+
+def read_run_events(events_file: Path | str) -> pd.DataFrame:
+    """Read the JSON-lines events-file of a model-run, see `run`
+
+    Parameters
+    ----------
+    events_file : Path | str
+        Path to the events-file
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per `RunEvent`
+    """
+    with Path(events_file).open(encoding="utf-8") as src:
+        df = pd.DataFrame([json.loads(line) for line in src if line.strip()], columns=list(RunEvent.__annotations__))
+    df["simulated_time"] = pd.to_datetime(df["simulated_time"])
+    return df
+
+
+def _optional(value, dtype: Callable):
+    """Convert an event-field with `dtype`, None if the field is missing (None or NaN)"""
+    return None if value is None or pd.isna(value) else dtype(value)
+
+
+def run_specs_from_events(events: pd.DataFrame, simulation_time: timedelta | None = None) -> RunSpecs:
+    """RunSpecs of a model-run from its events, see `read_run_events`
+
+    Fields missing in the events (e.g. an events-file of an interrupted run) are None in the RunSpecs.
+    """
+    if events.empty:
+        return RunSpecs(exit_code=None, simulation_time=simulation_time, wall_time=None)
+    finished = events[events["event"] == "finished"]
+    progress = events["progress"].dropna()
+    simulated_time = events["simulated_time"].dropna()
+    last = finished.iloc[-1] if not finished.empty else events.iloc[-1]
+    wall_time = _optional(last["wall_time"], float)
+    return RunSpecs(
+        exit_code=None if finished.empty else _optional(last["exit_code"], int),
+        simulation_time=simulation_time,
+        wall_time=None if wall_time is None else timedelta(seconds=wall_time),
+        progress=float(progress.iloc[-1]) if not progress.empty else None,
+        simulated_time=simulated_time.iloc[-1].to_pydatetime() if not simulated_time.empty else None,
+        speed=None if finished.empty else _optional(last["speed"], float),
+        stalls=int((events["event"] == "stall").sum()),
+    )
+
+
+def _simulation_period(toml_path: Path) -> tuple[datetime, datetime] | None:
+    try:
+        with toml_path.open("rb") as file:
+            config = tomllib.load(file)
+    except tomllib.TOMLDecodeError:
+        return None
+    starttime, endtime = config.get("starttime"), config.get("endtime")
+    if isinstance(starttime, datetime) and isinstance(endtime, datetime) and endtime > starttime:
+        return starttime, endtime
+    return None
+
+
+class _Telemetry:
+    """Progress-samples of a running model, shared between the stdout-reader and the stall-watchdog"""
+
+    def __init__(
+        self,
+        period: tuple[datetime, datetime] | None,
+        callback: Callable[[RunEvent], None] | None,
+        events: TextIO | None,
+        stall_speed: float | None,
+        stall_window: float,
+    ):
+        self.period = period
+        self.callback = callback
+        self.events = events
+        self.stall_speed = stall_speed
+        self.stall_window = stall_window
+        self.start = time.perf_counter()
+        self.samples: deque[tuple[float, float]] = deque()  # (wall_time, simulated seconds)
+        self.first_sample: tuple[float, float] | None = None
+        self.progress: float | None = None
+        self.stalled = False
+        self.stalls = 0
+        self.lock = threading.Lock()
+
+    def _simulated_time(self) -> datetime | None:
+        if self.period is None or self.progress is None:
+            return None
+        starttime, endtime = self.period
+        return starttime + self.progress * (endtime - starttime)
+
+    def _speed(self, wall_time: float) -> float | None:
+        """Simulated seconds per wall-clock second since the last sample at least stall_window seconds old"""
+        if self.period is None or not self.samples:
+            return None
+        while len(self.samples) > 1 and self.samples[1][0] <= wall_time - self.stall_window:
+            self.samples.popleft()
+        reference_wall, reference_simulated = self.samples[0]
+        if wall_time <= reference_wall:
+            return None
+        return (self.samples[-1][1] - reference_simulated) / (wall_time - reference_wall)
+
+    def _emit(self, event: str, wall_time: float, speed: float | None, exit_code: int | None = None) -> RunEvent:
+        run_event = RunEvent(event, wall_time, self.progress, self._simulated_time(), speed, exit_code)
+        if self.events is not None:
+            self.events.write(run_event.to_json() + "\n")
+            self.events.flush()
+        if self.callback is not None:
+            self.callback(run_event)
+        return run_event
+
+    def update(self, progress: int) -> None:
+        with self.lock:
+            fraction = progress / 100
+            if fraction == self.progress:
+                return
+            wall_time = time.perf_counter() - self.start
+            self.progress = fraction
+            if self.period is not None:
+                starttime, endtime = self.period
+                self.samples.append((wall_time, fraction * (endtime - starttime).total_seconds()))
+                if self.first_sample is None:
+                    self.first_sample = self.samples[-1]
+            speed = self._speed(wall_time)
+            if self.stalled and (self.stall_speed is None or speed is None or speed >= self.stall_speed):
+                self.stalled = False  # re-arm the alarm
+            self._emit("progress", wall_time, speed)
+
+    def check_stall(self) -> RunEvent | None:
+        """Emit a stall-event if the speed dropped below stall_speed, once until the speed recovers"""
+        with self.lock:
+            wall_time = time.perf_counter() - self.start
+            # the alarm is armed once simulating started, so compilation and initialization are not a stall
+            if self.stall_speed is None or self.stalled or self.first_sample is None:
+                return None
+            if wall_time - self.first_sample[0] < self.stall_window:
+                return None
+            speed = self._speed(wall_time)
+            if speed is None or speed >= self.stall_speed:
+                return None
+            self.stalled = True
+            self.stalls += 1
+            return self._emit("stall", wall_time, speed)
+
+    def finish(self, exit_code: int) -> RunEvent:
+        with self.lock:
+            wall_time = time.perf_counter() - self.start
+            # average speed since simulating started
+            speed = None
+            if self.first_sample is not None and wall_time > self.first_sample[0]:
+                first_wall, first_simulated = self.first_sample
+                speed = (self.samples[-1][1] - first_simulated) / (wall_time - first_wall)
+            return self._emit("finished", wall_time, speed, exit_code)
+
+
 def run(
     toml_path: Path,
+    callback: Callable[[RunEvent], None] | None = None,
+    events_file: Path | str | None = None,
+    stall_speed: float | None = None,
+    stall_window: float = 60.0,
+    terminate_on_stall: bool = False,
+    ribasim_home: Path | str | None = None,
 ) -> RunSpecs:
     """To run a Ribasim model
 
+    Progress of the Ribasim CLI is turned into `RunEvent`s: on every new progress percentage, when the simulation
+    stalls and when the CLI exits. Events are passed to `callback` and/or written as JSON-lines to `events_file`,
+    see `read_run_events`.
+
     Args:
         toml_path (Path): path to your ribasim toml-file
+        callback (Callable[[RunEvent], None] | None, optional): called with every event. Defaults to None
+        events_file (Path | str | None, optional): JSON-lines file the events are written to. Defaults to None
+        stall_speed (float | None, optional): simulated seconds per wall-clock second below which the run is
+            considered stalled. Defaults to None (no stall-alarm)
+        stall_window (float, optional): seconds over which the speed for the stall-alarm is measured. Defaults to 60
+        terminate_on_stall (bool, optional): terminate the CLI on a stall. Defaults to False
+        ribasim_home (Path | str | None, optional): Ribasim home directory, see `ribasim.cli`. Defaults to None
 
     """
     toml_path = Path(toml_path)
@@ -49,19 +270,45 @@ def run(
     if not toml_path.exists():
         raise FileNotFoundError(f"{toml_path} does not exist!")
 
-    cli = _find_cli()
+    cli = _find_cli(ribasim_home)
     args = [cli.as_posix(), toml_path.absolute().as_posix()]
 
-    proc = subprocess.Popen(
-        args,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        bufsize=1,
-        universal_newlines=True,
-        encoding="utf-8",
-    )
+    with ExitStack() as stack:
+        events = None
+        if events_file is not None:
+            events_file = Path(events_file)
+            events_file.parent.mkdir(parents=True, exist_ok=True)
+            events = stack.enter_context(events_file.open("w", encoding="utf-8"))
+        telemetry = _Telemetry(_simulation_period(toml_path), callback, events, stall_speed, stall_window)
+
+        proc = stack.enter_context(
+            subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=1,
+                universal_newlines=True,
+                encoding="utf-8",
+            )
+        )
+
+        # the watchdog notices a stall also when the CLI stops printing
+        done = threading.Event()
+
+        def _watchdog():
+            while not done.wait(min(stall_window / 4, 1.0)):
+                stall = telemetry.check_stall()
+                if stall is not None:
+                    print(
+                        f"\nstall: {stall.speed:.3g} simulated s/s at {stall.simulated_time} (progress {stall.progress:.0%})"
+                    )
+                    if terminate_on_stall:
+                        proc.terminate()
+
+        watchdog = threading.Thread(target=_watchdog, daemon=True)
+        if stall_speed is not None:
+            watchdog.start()
 
-    with proc:
         assert proc.stdout is not None
         # Reconfigure stdout to replace unencodable characters (e.g. cp1252 on Windows)
         if hasattr(sys.stdout, "reconfigure"):
@@ -75,6 +322,9 @@ def run(
                 print("\r" + " " * term_width, end="\r")  # Clear current line
                 print(line.rstrip(), end="\r")  # Allow progress bar to stay on one line
                 was_simulating = True
+                progress = parse_progress(line)
+                if progress is not None:
+                    telemetry.update(progress)
             else:
                 if was_simulating:
                     print()
@@ -84,4 +334,239 @@ def run(
                 print(line, end="")  # Standard line
             sys.stdout.flush()  # Flush to Jupyter        outs = None
 
-    return RunSpecs(proc.returncode, computation_time)
+        exit_code = proc.wait()
+        done.set()
+        if watchdog.is_alive():
+            watchdog.join()
+        finished = telemetry.finish(exit_code)
+
+    return RunSpecs(
+        exit_code=exit_code,
+        simulation_time=computation_time,
+        wall_time=timedelta(seconds=finished.wall_time),
+        progress=telemetry.progress,
+        simulated_time=finished.simulated_time,
+        speed=finished.speed,
+        stalls=telemetry.stalls,
+    )
+
+
+@dataclass
+class RunJob:
+    """A model-run in a batch, see `run_batch`
+
+    Parameters
+    ----------
+    toml_path : Path
+        Path to the ribasim toml-file
+    threads : int, optional
+        Number of threads of the Ribasim CLI, also used for scheduling. By default 1
+    memory : float | None, optional
+        Expected peak memory in GB, only used for scheduling. By default None (not limited)
+    name : str, optional
+        Name in the summary-table. By default the stem of the toml-file
+    """
+
+    toml_path: Path
+    threads: int = 1
+    memory: float | None = None
+    name: str = ""
+
+    def __post_init__(self):
+        self.toml_path = Path(self.toml_path)
+        if not self.name:
+            self.name = self.toml_path.stem
+
+
+def parse_progress(line: str) -> int | None:
+    """Percentage from a Ribasim CLI progress line, e.g. `Simulating  45%|█████      |  ETA: 0:01:02`"""
+    match = re.search(r"Simulating\s*(\d+)%", line)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def parse_run_log(lines: Iterable[str]) -> dict:
+    """Metrics from the stdout of a Ribasim CLI run
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        Lines of the run-log
+
+    Returns
+    -------
+    dict
+        `computation_time` (timedelta | None), `progress` (last percentage, int | None) and `error`, the first line
+        with an error (str | None)
+    """
+    metrics = {"computation_time": None, "progress": None, "error": None}
+    for line in lines:
+        # progress bars are redrawn with carriage returns, so one line can hold many updates
+        for part in line.split("\r"):
+            progress = parse_progress(part)
+            if progress is not None:
+                metrics["progress"] = progress
+            elif "Computation time" in part:
+                metrics["computation_time"] = parse_computation_time(part)
+            elif metrics["error"] is None and "Error" in part:
+                metrics["error"] = part.strip()
+    return metrics
+
+
+@dataclass
+class _Attempt:
+    job: RunJob
+    attempt: int
+    log_file: Path
+    offset: int
+    proc: subprocess.Popen
+    start: float
+
+
+def _launch(cli: Path, job: RunJob, attempt: int, log_file: Path) -> _Attempt:
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    mode = "w" if attempt == 1 else "a"
+    with log_file.open(mode, encoding="utf-8") as log:
+        if attempt > 1:
+            log.write(f"\n--- attempt {attempt} ---\n")
+        offset = log.tell()
+        args = [cli.as_posix(), "--threads", str(job.threads), job.toml_path.absolute().as_posix()]
+        # the child process keeps its own handle on the log-file
+        proc = subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT)
+    return _Attempt(job, attempt, log_file, offset, proc, time.perf_counter())
+
+
+def _log_lines(attempt: _Attempt) -> list[str]:
+    with attempt.log_file.open(encoding="utf-8", errors="replace") as log:
+        log.seek(attempt.offset)
+        return log.read().splitlines()
+
+
+def run_batch(
+    jobs: Iterable[RunJob | Path | str],
+    max_threads: int | None = None,
+    max_memory: float | None = None,
+    retries: int = 0,
+    fail_fast: bool = False,
+    log_dir: Path | str | None = None,
+    poll_interval: float = 1.0,
+    ribasim_home: Path | str | None = None,
+) -> pd.DataFrame:
+    """Run a batch of Ribasim models as concurrent Ribasim CLI processes
+
+    Jobs are started in order as soon as their thread- and memory-hints fit in what is still available. The stdout of
+    every job is written to a log-file (`{toml-stem}.log` next to the toml-file, or `{name}.log` in log_dir) instead
+    of the terminal. A failed job is started again until it has been tried `retries + 1` times.
+
+    Parameters
+    ----------
+    jobs : Iterable[RunJob | Path | str]
+        Jobs or paths to toml-files (single-threaded jobs)
+    max_threads : int | None, optional
+        Number of threads of all running jobs. By default the number of cores
+    max_memory : float | None, optional
+        Memory (GB) of all running jobs, see `RunJob.memory`. By default None (not limited)
+    retries : int, optional
+        Times a failed job is started again. By default 0
+    fail_fast : bool, optional
+        On a failed job, stop all running jobs and do not start pending jobs. By default False
+    log_dir : Path | str | None, optional
+        Directory for the log-files. By default None (next to the toml-files)
+    poll_interval : float, optional
+        Seconds between checks on running jobs. By default 1.0
+    ribasim_home : Path | str | None, optional
+        Ribasim home directory, see `ribasim.cli`. By default None
+
+    Returns
+    -------
+    pd.DataFrame
+        Summary-table indexed by job-name with status (`done`, `failed`, `cancelled` or `skipped`), exit_code,
+        attempts, wall_time, computation_time, progress, error and log_file
+    """
+    jobs = [job if isinstance(job, RunJob) else RunJob(Path(job)) for job in jobs]
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"job-names should be unique, got {names}")
+    for job in jobs:
+        if not job.toml_path.exists():
+            raise FileNotFoundError(f"{job.toml_path} does not exist!")
+
+    max_threads = max_threads or os.cpu_count() or 1
+    cli = _find_cli(ribasim_home)
+
+    def _log_file(job: RunJob) -> Path:
+        if log_dir is not None:
+            return Path(log_dir) / f"{job.name}.log"
+        return job.toml_path.with_suffix(".log")
+
+    def _fits(job: RunJob) -> bool:
+        if not running:  # a job larger than the limits still runs, on its own
+            return True
+        threads = sum(i.job.threads for i in running)
+        if threads + job.threads > max_threads:
+            return False
+        if max_memory is not None and job.memory is not None:
+            memory = sum(i.job.memory or 0 for i in running)
+            return memory + job.memory <= max_memory
+        return True
+
+    pending = deque((job, 1) for job in jobs)
+    running: list[_Attempt] = []
+    summary: dict[str, dict] = {}
+    cancelled: set[str] = set()
+    stop = False
+
+    while pending or running:
+        # start pending jobs in order, as long as they fit
+        while not stop and pending and _fits(pending[0][0]):
+            job, attempt = pending.popleft()
+            running.append(_launch(cli, job, attempt, _log_file(job)))
+            print(f"started {job.name} (attempt {attempt})")
+
+        time.sleep(poll_interval if running else 0)
+
+        for attempt in [i for i in running if i.proc.poll() is not None]:
+            running.remove(attempt)
+            job = attempt.job
+            exit_code = attempt.proc.returncode
+            if exit_code == 0:
+                status = "done"
+            elif job.name in cancelled:
+                status = "cancelled"
+            else:
+                status = "failed"
+            summary[job.name] = {
+                "status": status,
+                "exit_code": exit_code,
+                "attempts": attempt.attempt,
+                "wall_time": timedelta(seconds=time.perf_counter() - attempt.start),
+                **parse_run_log(_log_lines(attempt)),
+                "log_file": attempt.log_file,
+            }
+            print(f"{status} {job.name} (exit code {exit_code})")
+            if status == "failed" and not stop:
+                if attempt.attempt <= retries:
+                    pending.appendleft((job, attempt.attempt + 1))
+                elif fail_fast:
+                    stop = True
+                    for i in running:
+                        cancelled.add(i.job.name)
+                        i.proc.terminate()
+
+        if stop and not running:
+            for job, attempt in pending:
+                summary[job.name] = {"status": "skipped", "attempts": attempt - 1}
+            pending.clear()
+
+    columns = [
+        "status",
+        "exit_code",
+        "attempts",
+        "wall_time",
+        "computation_time",
+        "progress",
+        "error",
+        "log_file",
+    ]
+    return pd.DataFrame.from_dict(summary, orient="index", columns=columns).reindex(names)
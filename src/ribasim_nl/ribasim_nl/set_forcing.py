@@ -1,12 +1,16 @@
 """Assign dynamic precipitation and evaporation forcing from LHM zarr budgets to Ribasim Basin nodes."""
 
-import imod
 import numpy as np
 import pandas as pd
 import xarray as xr
 
 from ribasim_nl import Model
-from ribasim_nl.assign_offline_budgets import _compute_budgets_per_basin, _crop_to_gdf, split_basin_definitions
+from ribasim_nl.assign_offline_budgets import (
+    BasinAggregator,
+    _compute_budgets_per_basin,
+    _crop_to_gdf,
+    split_basin_definitions,
+)
 
 # Makkink to open water evaporation factor, depending on the month of the year (rows)
 # and the decade in the month, starting at day 1, 11, 21 (cols). As used in Mozart.
@@ -43,28 +47,6 @@ def _open_water_factor(times: np.ndarray) -> np.ndarray:
     return EVAP_FACTOR[months, decades]
 
 
-def _count_cells_per_basin(mask: xr.DataArray, nodata: int = -999) -> pd.Series:
-    """Count the number of valid raster cells per basin node_id in a rasterized basin mask.
-
-    Parameters
-    ----------
-    mask : xr.DataArray
-        Rasterized basin mask where each cell value is a node_id, and nodata cells are filled with ``nodata``.
-    nodata : int, optional
-        Fill value for cells outside any basin, by default -999.
-
-    Returns
-    -------
-    pd.Series
-        Series indexed by node_id with the number of raster cells assigned to each basin.
-    """
-    flat = mask.values.reshape(-1)
-    valid = np.isfinite(flat) & (flat != nodata)
-    ids = flat[valid].astype(np.int64)
-    unique, counts = np.unique(ids, return_counts=True)
-    return pd.Series(counts, index=unique, name="count")
-
-
 class SetDynamicForcing:
     def __init__(
         self,
@@ -72,6 +54,7 @@ class SetDynamicForcing:
         budgets: xr.Dataset,
         startdate: str,
         enddate: str,
+        processes: int | None = None,
     ) -> None:
         """Set up dynamic precipitation and evaporation forcing for a Ribasim model.
 
@@ -85,11 +68,16 @@ class SetDynamicForcing:
             Model start date (ISO format, e.g. "2000-01-01").
         enddate : str
             Model end date (ISO format, e.g. "2001-01-01").
+        processes : int | None, optional
+            Number of processes to aggregate precipitation and evaporation in parallel, by default None
         """
         self.model = model
         self.budgets = budgets
         self.startdate = startdate
         self.enddate = enddate
+        self.processes = processes
+        # primary and secondary basin masks of the last `add`, to reuse in `AssignOfflineBudgets.compute_budgets`
+        self.basin_masks: list[BasinAggregator] = []
 
     def add(self) -> Model:
         """Compute basin-averaged precipitation and evaporation from LHM zarr and add to model.
@@ -122,44 +110,23 @@ class SetDynamicForcing:
             ~secondary_basin_definition["node_id"].isin(primary_node_ids)
         ]
 
-        primary_basin_mask = imod.prepare.rasterize(
-            primary_basin_definition,
-            column="node_id",
-            like=like,
-            fill=-999,
-            dtype=np.int32,
-        )
-        secondary_basin_mask = imod.prepare.rasterize(
-            secondary_basin_definition,
-            column="node_id",
-            like=like,
-            fill=-999,
-            dtype=np.int32,
-        )
-
-        # Crop budgets to the basin extent
-        precip_ds = _crop_to_gdf(self.budgets[[PRECIPITATION_VAR]], basin_definition)
-        assert isinstance(precip_ds, xr.Dataset)
-        evap_ds = _crop_to_gdf(self.budgets[[EVAPORATION_VAR]], basin_definition)
-        assert isinstance(evap_ds, xr.Dataset)
+        primary_basin_mask = BasinAggregator.from_basin_definition(primary_basin_definition, like=like)
+        secondary_basin_mask = BasinAggregator.from_basin_definition(secondary_basin_definition, like=like)
+        self.basin_masks = [primary_basin_mask, secondary_basin_mask]
 
         # Sum budgets over raster cells per basin, for primary and secondary masks (no overlap)
-        print("compute precipitation per basin")
-        primary_precip_df = _compute_budgets_per_basin(precip_ds, primary_basin_mask)
-        secondary_precip_df = _compute_budgets_per_basin(precip_ds, secondary_basin_mask)
-
-        print("compute evaporation per basin")
-        primary_evap_df = _compute_budgets_per_basin(evap_ds, primary_basin_mask)
-        secondary_evap_df = _compute_budgets_per_basin(evap_ds, secondary_basin_mask)
+        print("compute precipitation and evaporation per basin")
+        meteo_ds = self.budgets[[PRECIPITATION_VAR, EVAPORATION_VAR]]
+        primary_meteo_df = _compute_budgets_per_basin(meteo_ds, primary_basin_mask, processes=self.processes)
+        secondary_meteo_df = _compute_budgets_per_basin(meteo_ds, secondary_basin_mask, processes=self.processes)
 
         # Concatenate — no duplicate (node_id, time) rows since secondary excludes primary node_ids
-        precip_df = pd.concat([primary_precip_df, secondary_precip_df]).sort_index()
-        evap_df = pd.concat([primary_evap_df, secondary_evap_df]).sort_index()
+        meteo_sum_df = pd.concat([primary_meteo_df, secondary_meteo_df]).sort_index()
+        precip_df = meteo_sum_df[[PRECIPITATION_VAR]]
+        evap_df = meteo_sum_df[[EVAPORATION_VAR]]
 
         # Cell counts per basin: combine primary and secondary (disjoint sets, no summing needed)
-        cell_counts = pd.concat(
-            [_count_cells_per_basin(primary_basin_mask), _count_cells_per_basin(secondary_basin_mask)]
-        )
+        cell_counts = pd.concat([primary_basin_mask.cell_counts, secondary_basin_mask.cell_counts])
 
         # Divide summed mm/day by cell count to get the basin-mean, then convert to m/s
         node_ids = precip_df.index.get_level_values("node_id")
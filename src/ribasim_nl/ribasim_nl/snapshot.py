@@ -0,0 +1,256 @@
+"""Binary snapshots of a Ribasim-NL model.
+
+A snapshot is a directory with one uncompressed Arrow (Feather) file per table (node, link and all non-empty
+sub-tables, geometries as GeoArrow WKB) and a `snapshot.json` with the model settings and the sha256, size and
+modification time of every table file. Tables are read memory-mapped and, when the snapshot is unchanged, assigned
+without re-validation: the tables were validated when the snapshot was written. A table file is only hashed again
+on read if its size or modification time differs from the one written. Snapshots are meant to hand off models between pipeline stages,
+the toml + GeoPackage stay the exchange format.
+"""
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import ribasim
+from pydantic import BaseModel
+from ribasim.input_base import ChildModel, TableModel
+
+from ribasim_nl.manifest import file_sha256
+
+if TYPE_CHECKING:
+    from ribasim_nl.model import Model
+
+SNAPSHOT_FILE_NAME = "snapshot.json"
+SNAPSHOT_VERSION = 1
+
+
+def assign_without_validation(model: BaseModel, name: str, value: Any) -> None:
+    """Assign a field of one model without (pydantic/pandera) validation.
+
+    Equivalent to an assignment within ribasim's `_no_validate()`, but limited to this instance: `_no_validate()`
+    replaces `__setattr__` of the whole class, so it races with assignments to other models in other threads.
+    """
+    object.__setattr__(model, name, value)
+    if name in type(model).model_fields:
+        model.__pydantic_fields_set__.add(name)
+
+
+def snapshot_path(toml_file: Path | str) -> Path:
+    """Default snapshot-directory of a model: next to its toml-file, i.e. `model.toml` -> `model.snapshot`."""
+    return Path(toml_file).with_suffix(".snapshot")
+
+
+def _tables(model: "Model") -> dict[str, TableModel]:
+    """All non-empty tables of a model by key: `node`, `link` and `{node_type}.{table}` (e.g. `basin.profile`)."""
+    tables = {"node": model.node, "link": model.link}
+    for node_model in model._nodes():
+        for attr in node_model.__class__.model_fields:
+            table = getattr(node_model, attr)
+            if isinstance(table, TableModel) and table.df is not None:
+                tables[f"{node_model._parent_field}.{attr}"] = table
+    return tables
+
+
+def _get_table(model: "Model", key: str) -> TableModel:
+    table: Any = model
+    for attr in key.split("."):
+        table = getattr(table, attr)
+    return table
+
+
+def _settings(model: "Model") -> dict:
+    """Model settings (toml-content) without node- and link-tables."""
+    content = model.model_dump(mode="json", exclude_unset=True, exclude_none=True, by_alias=True)
+    return {k: v for k, v in content.items() if not isinstance(getattr(model, k, None), ChildModel)}
+
+
+def _write_table(df: pd.DataFrame, path: Path) -> None:
+    if isinstance(df, gpd.GeoDataFrame):
+        table = pa.table(df.to_arrow(index=True, geometry_encoding="WKB"))
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    feather.write_feather(table, path, compression="uncompressed")
+
+
+def _read_table(path: Path, spatial: bool) -> pd.DataFrame:
+    table = feather.read_table(path, memory_map=True)
+    if spatial:
+        return gpd.GeoDataFrame.from_arrow(table)
+    return table.to_pandas()
+
+
+def _snapshot_hash(settings: dict, table_hashes: dict[str, str]) -> str:
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+    for key, sha256 in sorted(table_hashes.items()):
+        digest.update(f"{key}:{sha256}".encode())
+    return digest.hexdigest()
+
+
+def _source(model: "Model") -> dict | None:
+    """Size, modification time and sha256 of the database the model was read from or written to.
+
+    The sha256 of the toml-file is included too: with edited settings the snapshot is outdated.
+    """
+    if model.filepath is None or not Path(model.filepath).exists():
+        return None
+    if model.database_path is None or not model.database_path.exists():
+        return None
+    stat = model.database_path.stat()
+    return {
+        "toml": Path(model.filepath).name,
+        "toml_sha256": file_sha256(Path(model.filepath)),
+        "input_dir": model.input_dir.as_posix(),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(model.database_path),
+    }
+
+
+def write_snapshot(model: "Model", path: Path | str) -> Path:
+    """Write a binary snapshot of a model.
+
+    Parameters
+    ----------
+    model : Model
+        Ribasim-NL model
+    path : Path | str
+        Snapshot directory, will be replaced if it exists
+
+    Returns
+    -------
+    Path
+        Snapshot directory
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    tables = {}
+    table_hashes: dict[str, str] = {}
+    for key, table in _tables(model).items():
+        df = table.df
+        assert df is not None
+        file_name = f"{key}.arrow"
+        _write_table(df, tmp_path / file_name)
+        table_hashes[key] = file_sha256(tmp_path / file_name)
+        stat = (tmp_path / file_name).stat()
+        tables[key] = {
+            "file": file_name,
+            "sha256": table_hashes[key],
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "spatial": isinstance(df, gpd.GeoDataFrame),
+            "filepath": table.filepath.as_posix() if table.filepath is not None else None,
+        }
+
+    settings = _settings(model)
+    content = {
+        "snapshot_version": SNAPSHOT_VERSION,
+        "ribasim_version": ribasim.__version__,
+        "hash": _snapshot_hash(settings, table_hashes),
+        "source": _source(model),
+        "settings": settings,
+        "tables": tables,
+    }
+    (tmp_path / SNAPSHOT_FILE_NAME).write_text(json.dumps(content, indent=1))
+
+    # replace an existing snapshot as a whole, so a reader never sees a mix of two snapshots
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.replace(path)
+    return path
+
+
+def _table_hash(path: Path, table: dict) -> str:
+    """Sha256 of a table file, only computed if its size or modification time differs from the one written."""
+    stat = (path / table["file"]).stat()
+    if stat.st_size == table.get("size") and stat.st_mtime_ns == table.get("mtime_ns"):
+        return table["sha256"]
+    return file_sha256(path / table["file"])
+
+
+def read_snapshot_content(path: Path | str) -> dict:
+    """Content of `snapshot.json` in a snapshot directory."""
+    return json.loads((Path(path) / SNAPSHOT_FILE_NAME).read_text())
+
+
+def snapshot_is_current(path: Path | str, toml_file: Path | str) -> bool:
+    """Snapshot exists and was written from the current toml-file and database of the model at toml_file.
+
+    The toml-file should have the same sha256 as the one the snapshot was written from, so edited settings are not
+    ignored. The database should be the one the snapshot was written from: same size and modification time or,
+    after a copy or DVC checkout, same sha256.
+    """
+    path = Path(path)
+    toml_file = Path(toml_file)
+    if not (path / SNAPSHOT_FILE_NAME).exists() or not toml_file.exists():
+        return False
+    source = read_snapshot_content(path).get("source")
+    if source is None or source["toml"] != toml_file.name:
+        return False
+    if source.get("toml_sha256") != file_sha256(toml_file):
+        return False
+    database_path = toml_file.parent / source["input_dir"] / "database.gpkg"
+    if not database_path.exists():
+        return False
+    stat = database_path.stat()
+    if stat.st_size != source["size"]:
+        return False
+    if stat.st_mtime_ns == source["mtime_ns"]:
+        return True
+    return file_sha256(database_path) == source["sha256"]
+
+
+def read_snapshot(model_cls: type["Model"], path: Path | str, validate: bool | None = None) -> "Model":
+    """Read a model from a binary snapshot.
+
+    Parameters
+    ----------
+    model_cls : type[Model]
+        Model class to construct
+    path : Path | str
+        Snapshot directory
+    validate : bool | None, optional
+        Validate all tables with their schemas. By default (None) only when the snapshot hash does not match, or
+        the snapshot was written with another Ribasim version. Table files are hashed only if their size or
+        modification time changed since writing
+
+    Returns
+    -------
+    Model
+        Model with all tables of the snapshot
+    """
+    path = Path(path)
+    content = read_snapshot_content(path)
+    if content["snapshot_version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {content['snapshot_version']} in {path}")
+
+    tables = content["tables"]
+    if validate is None:
+        table_hashes = {key: _table_hash(path, table) for key, table in tables.items()}
+        validate = (content["ribasim_version"] != ribasim.__version__) or (
+            _snapshot_hash(content["settings"], table_hashes) != content["hash"]
+        )
+
+    model = model_cls(**content["settings"])
+    for key, table in tables.items():
+        df = _read_table(path / table["file"], table["spatial"])
+        table_model = _get_table(model, key)
+        if validate:
+            table_model.df = cast(Any, df)
+        else:
+            assign_without_validation(table_model, "df", df)
+        if table["filepath"] is not None:
+            table_model.filepath = Path(table["filepath"])
+
+    model.update_used_ids()
+    return model
@@ -0,0 +1,254 @@
+from collections import defaultdict
+from collections.abc import Iterator
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+# columns the index is built from; copies are kept to detect tables edited in place
+LINK_COLUMNS = ["from_node_id", "to_node_id", "link_type"]
+NODE_COLUMNS = ["node_type", "meta_function"]
+
+
+def _copy_columns(df: pd.DataFrame | None, columns: list[str]) -> dict[str, pd.Series] | None:
+    """Copies of the indexed columns (those present) of a table, None if there is no table."""
+    if df is None:
+        return None
+    return {i: df[i].copy() for i in columns if i in df.columns}
+
+
+def _columns_equal(df: pd.DataFrame | None, columns: list[str], copies: dict[str, pd.Series] | None) -> bool:
+    """Check if the indexed columns of a table equal their copies (values, dtypes and index)."""
+    if (df is None) or (copies is None):
+        return (df is None) and (copies is None)
+    if [i for i in columns if i in df.columns] != list(copies):
+        return False
+    return all(df[column].equals(copy) for column, copy in copies.items())
+
+
+class _NodeAttributes(dict):
+    """Node attributes by node_id; unknown nodes have no attributes (like nodes in a networkx graph)."""
+
+    def __missing__(self, key) -> dict:
+        return {}
+
+
+class TopologyIndex:
+    """Persistent index of the model topology (links and node attributes).
+
+    The index is kept in sync with the link- and node-table by the Model methods that edit them, so
+    upstream/downstream queries never have to rebuild a full graph. The index remembers the
+    DataFrames it was synced with and keeps a copy of the indexed columns (LINK_COLUMNS and
+    NODE_COLUMNS); if a table is replaced or edited in place outside the Model methods (e.g.
+    `link_df.loc[i, "from_node_id"] = 1`) the index is considered stale and rebuilt on next access.
+
+    Nodes and neighbours are exposed as `nodes`, `predecessors` and `successors`, so the index can
+    be used wherever the traversal functions expect a `nx.DiGraph`.
+    """
+
+    def __init__(self) -> None:
+        self._links: dict[int, tuple[int, int, str]] = {}
+        self._successors: defaultdict[int, dict[int, int]] = defaultdict(dict)
+        self._predecessors: defaultdict[int, dict[int, int]] = defaultdict(dict)
+        self._nodes: _NodeAttributes = _NodeAttributes()
+        self._link_df: pd.DataFrame | None = None
+        self._node_df: pd.DataFrame | None = None
+        self._link_columns: dict[str, pd.Series] | None = None
+        self._node_columns: dict[str, pd.Series] | None = None
+        self._synced = False
+        self.version = 0
+
+    # synchronisation with the model tables
+    def is_synced(self, link_df: pd.DataFrame | None, node_df: pd.DataFrame | None) -> bool:
+        """Check if the index was last synced with exactly these tables, with unchanged indexed columns."""
+        return (
+            self._synced
+            and (link_df is self._link_df)
+            and (node_df is self._node_df)
+            # vectorised comparisons, much cheaper than a rebuild
+            and _columns_equal(link_df, LINK_COLUMNS, self._link_columns)
+            and _columns_equal(node_df, NODE_COLUMNS, self._node_columns)
+        )
+
+    def track(self, link_df: pd.DataFrame | None, node_df: pd.DataFrame | None) -> None:
+        """Register the current tables after the index has been updated in place."""
+        self._link_df = link_df
+        self._node_df = node_df
+        self._link_columns = _copy_columns(link_df, LINK_COLUMNS)
+        self._node_columns = _copy_columns(node_df, NODE_COLUMNS)
+        self._synced = True
+
+    def rebuild(self, link_df: pd.DataFrame | None, node_df: pd.DataFrame | None) -> None:
+        """Rebuild the index from the link- and node-table."""
+        self._links = {}
+        self._successors = defaultdict(dict)
+        self._predecessors = defaultdict(dict)
+        self._nodes = _NodeAttributes()
+
+        if link_df is not None:
+            for link_id, from_node_id, to_node_id, link_type in zip(
+                link_df.index.tolist(),
+                link_df["from_node_id"].tolist(),
+                link_df["to_node_id"].tolist(),
+                link_df["link_type"].tolist(),
+                strict=True,
+            ):
+                self._add(link_id, from_node_id, to_node_id, link_type)
+
+        if node_df is not None:
+            functions = node_df["meta_function"].tolist() if "meta_function" in node_df.columns else [""] * len(node_df)
+            for node_id, node_type, function in zip(
+                node_df.index.tolist(), node_df["node_type"].tolist(), functions, strict=True
+            ):
+                self._nodes[node_id] = {"function": function, "node_type": node_type}
+
+        self.version += 1
+        self.track(link_df, node_df)
+
+    # in-place updates
+    def _add(self, link_id: int, from_node_id: int, to_node_id: int, link_type: str) -> None:
+        self._links[link_id] = (from_node_id, to_node_id, link_type)
+        self._successors[from_node_id][link_id] = to_node_id
+        self._predecessors[to_node_id][link_id] = from_node_id
+
+    def _remove(self, link_id: int) -> tuple[int, int, str]:
+        from_node_id, to_node_id, link_type = self._links.pop(link_id)
+        self._successors[from_node_id].pop(link_id, None)
+        self._predecessors[to_node_id].pop(link_id, None)
+        return from_node_id, to_node_id, link_type
+
+    def add_link(self, link_id: int, from_node_id: int, to_node_id: int, link_type: str = "flow") -> None:
+        if link_id in self._links:
+            self._remove(link_id)
+        self._add(int(link_id), int(from_node_id), int(to_node_id), link_type)
+        self.version += 1
+
+    def remove_link(self, link_id: int) -> None:
+        if link_id in self._links:
+            self._remove(link_id)
+            self.version += 1
+
+    def redirect_link(self, link_id: int, from_node_id: int | None = None, to_node_id: int | None = None) -> None:
+        link_id = int(link_id)
+        _from_node_id, _to_node_id, link_type = self._remove(link_id)
+        if from_node_id is None:
+            from_node_id = _from_node_id
+        if to_node_id is None:
+            to_node_id = _to_node_id
+        self._add(link_id, int(from_node_id), int(to_node_id), link_type)
+        self.version += 1
+
+    def reverse_link(self, link_id: int) -> None:
+        from_node_id, to_node_id, _ = self._links[link_id]
+        self.redirect_link(link_id, from_node_id=to_node_id, to_node_id=from_node_id)
+
+    def set_node(self, node_id: int, node_type: str, function: str = "") -> None:
+        self._nodes[int(node_id)] = {"function": function, "node_type": node_type}
+        self.version += 1
+
+    def remove_node(self, node_id: int) -> None:
+        """Remove node attributes. Links are kept and should be removed with `remove_link`."""
+        if self._nodes.pop(node_id, None) is not None:
+            self.version += 1
+
+    # queries
+    @property
+    def nodes(self) -> _NodeAttributes:
+        return self._nodes
+
+    @property
+    def edges(self) -> list[tuple[int, int]]:
+        """(from_node_id, to_node_id) of all links"""
+        return [(i[0], i[1]) for i in self._links.values()]
+
+    def predecessors(self, node_id: int) -> Iterator[int]:
+        """Unique upstream neighbours of node_id, over all link types."""
+        return iter(dict.fromkeys(self._predecessors.get(node_id, {}).values()))
+
+    def successors(self, node_id: int) -> Iterator[int]:
+        """Unique downstream neighbours of node_id, over all link types."""
+        return iter(dict.fromkeys(self._successors.get(node_id, {}).values()))
+
+    def neighbors(self, node_id: int) -> set[int]:
+        return set(self.predecessors(node_id)) | set(self.successors(node_id))
+
+    def link(self, link_id: int) -> tuple[int, int, str]:
+        """(from_node_id, to_node_id, link_type) of link_id"""
+        return self._links[link_id]
+
+    def upstream_link_ids(self, node_id: int, link_type: str | None = None) -> list[int]:
+        """Sorted link_ids flowing into node_id"""
+        link_ids = self._predecessors.get(node_id, {}).keys()
+        if link_type is not None:
+            link_ids = (i for i in link_ids if self._links[i][2] == link_type)
+        return sorted(link_ids)
+
+    def downstream_link_ids(self, node_id: int, link_type: str | None = None) -> list[int]:
+        """Sorted link_ids flowing out of node_id"""
+        link_ids = self._successors.get(node_id, {}).keys()
+        if link_type is not None:
+            link_ids = (i for i in link_ids if self._links[i][2] == link_type)
+        return sorted(link_ids)
+
+    def link_ids(self, node_id: int) -> list[int]:
+        """Sorted link_ids connected to node_id in either direction"""
+        return sorted(set(self._predecessors.get(node_id, {}).keys()) | set(self._successors.get(node_id, {}).keys()))
+
+    def has_links(self, node_id: int) -> bool:
+        return bool(self._predecessors.get(node_id)) or bool(self._successors.get(node_id))
+
+    def to_networkx(self) -> nx.DiGraph:
+        """Materialise the index as a `nx.DiGraph` with `function` and `node_type` node attributes."""
+        graph = nx.DiGraph()
+        graph.add_edges_from(self.edges)
+        nx.set_node_attributes(graph, {k: v for k, v in self._nodes.items() if k in graph})
+        return graph
+
+
+class NodeRowIndex:
+    """Row positions by node_id in a table with a `node_id` column (e.g. basin.profile).
+
+    Like the TopologyIndex, the index remembers the DataFrame it was built from and is rebuilt if the table has
+    been replaced. It also keeps a copy of the node_id column, so a table edited in place (e.g.
+    `df.loc[9, "node_id"] = 2084`) is detected as well.
+    """
+
+    def __init__(self) -> None:
+        self._df: pd.DataFrame | None = None
+        self._column = np.empty(0, dtype=np.int64)  # node_id column in table order
+        self._node_ids = np.empty(0, dtype=np.int64)
+        self._positions = np.empty(0, dtype=np.intp)
+
+    def is_synced(self, df: pd.DataFrame | None) -> bool:
+        if (df is None) or (df is not self._df) or (len(df) != len(self._column)):
+            return False
+        # one vectorised comparison, much cheaper than the argsort of a rebuild
+        return np.array_equal(df["node_id"].to_numpy(), self._column)
+
+    def rebuild(self, df: pd.DataFrame) -> None:
+        """Rebuild the index from the node_id column: node_ids sorted, with their row positions."""
+        self._column = df["node_id"].to_numpy(dtype=np.int64, copy=True)
+        self._positions = np.argsort(self._column, kind="stable")
+        self._node_ids = self._column[self._positions]
+        self._df = df
+
+    def _slice(self, node_id: int) -> slice:
+        start, end = np.searchsorted(self._node_ids, [node_id, node_id + 1])
+        return slice(start, end)
+
+    def positions(self, node_id: int) -> np.ndarray:
+        """Row positions of node_id, in table order."""
+        return self._positions[self._slice(node_id)]
+
+    def remove(self, node_id: int, df: pd.DataFrame | None) -> None:
+        """Remove the rows of node_id, df is the table without these rows."""
+        if df is None:
+            self._df = None
+            return
+        index = self._slice(node_id)
+        removed = np.sort(self._positions[index])
+        self._node_ids = np.delete(self._node_ids, index)
+        self._positions = np.delete(self._positions, index)
+        self._positions -= np.searchsorted(removed, self._positions)
+        self._column = np.delete(self._column, removed)
+        self._df = df
@@ -3,24 +3,38 @@ from collections import deque
 
 import networkx as nx
 
+from ribasim_nl.csr_graph import CSRGraph
+from ribasim_nl.topology_index import TopologyIndex
+
 
 def upstream_nodes(
-    graph: nx.DiGraph, node_id: int, stop_at_inlet: bool = False, stop_at_node_type: str | None = None
+    graph: nx.DiGraph | TopologyIndex | CSRGraph,
+    node_id: int,
+    stop_at_inlet: bool = False,
+    stop_at_node_type: str | None = None,
 ) -> set[int]:
     """Efficiently find all upstream nodes in a directed graph starting from a given node,
     stopping traversal at nodes stopping at the next inlet.
 
+    A TopologyIndex or nx.DiGraph is traversed node by node, so it needs no rebuild after an edit of the model.
+    For many start nodes, build a CSRGraph once and use CSRGraph.upstream_nodes.
+
     Parameters
     ----------
-    - graph (nx.DiGraph): The directed graph.
+    - graph (nx.DiGraph | TopologyIndex | CSRGraph): The directed graph.
     - node_id (int): The node to start the search from.
     - stop_at_inlet (bool): To stop at the next inlet(s)
     - stop_at_node_type (str | None): To stop at a specific node type (e.g., 'Basin', 'LevelBoundary')
 
     Returns
     -------
-    - set: A set of all upstream nodes excluding the starting node.
+    - set: A set of all upstream nodes including the starting node.
     """  # noqa: D205
+    if isinstance(graph, CSRGraph):
+        return graph.upstream_nodes([node_id], stop_at_inlet=stop_at_inlet, stop_at_node_type=stop_at_node_type)[
+            node_id
+        ]
+
     visited = set()  # To keep track of visited nodes
     node_ids = set({node_id})  # To store the result
 
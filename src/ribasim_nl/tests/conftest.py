@@ -0,0 +1,36 @@
+import pytest
+from ribasim import Node
+from ribasim.nodes import basin
+from ribasim_nl.model import DEFAULT_TABLES
+from shapely.geometry import MultiPolygon, Point
+
+from ribasim_nl import Model
+
+
+def _model() -> Model:
+    """Basin chain 1 -> 2 -> 3 -> 4 -> 5 -> 6 -> LevelBoundary 7, with an inlet 8 from LevelBoundary 9."""
+    model = Model(starttime="2020-01-01", endtime="2021-01-01", crs="EPSG:28992")
+    for node_id, x in [(1, 0), (3, 20), (5, 40)]:
+        area = basin.Area(geometry=[MultiPolygon([Point(x, 0).buffer(5)])])
+        model.basin.add(Node(node_id, Point(x, 0)), [*DEFAULT_TABLES.basin, area])
+    model.outlet.add(Node(2, Point(10, 0)), DEFAULT_TABLES.outlet)
+    model.tabulated_rating_curve.add(Node(4, Point(30, 0)), DEFAULT_TABLES.tabulated_rating_curve)
+    model.outlet.add(Node(6, Point(50, 0)), DEFAULT_TABLES.outlet)
+    model.level_boundary.add(Node(7, Point(60, 0)), DEFAULT_TABLES.level_boundary)
+    model.outlet.add(Node(8, Point(40, 10), meta_function="inlet"), DEFAULT_TABLES.outlet)
+    model.level_boundary.add(Node(9, Point(40, 20)), DEFAULT_TABLES.level_boundary)
+    for from_node_id, to_node_id in [(1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (9, 8), (8, 5)]:
+        model.link.add(model.get_node(from_node_id), model.get_node(to_node_id))
+    return model
+
+
+@pytest.fixture
+def model() -> Model:
+    """Basin chain 1 -> 2 -> 3 -> 4 -> 5 -> 6 -> LevelBoundary 7, with an inlet 8 from LevelBoundary 9."""
+    return _model()
+
+
+@pytest.fixture
+def model_factory():
+    """Factory of independent copies of the `model` fixture, for tests that need more than one."""
+    return _model
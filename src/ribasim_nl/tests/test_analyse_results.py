@@ -0,0 +1,89 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from ribasim_nl.analyse_results import CompareOutputMeasurements, IngestMeasurements, LoadMeasurements
+
+
+def test_measurement_store(tmp_path):
+    times = pd.date_range("2020-01-01", "2020-03-31", freq="D")
+    rng = np.random.default_rng(seed=1)
+    values = rng.random((len(times), 3))
+    values[::7, 1] = np.nan
+    df = pd.DataFrame(values, index=times.strftime("%Y-%m-%d"), columns=["a", "b", "c"])
+    df.to_csv(tmp_path / "Metingen_afvoer_dag_totaal.csv")
+    df.to_csv(tmp_path / "Metingen_aanvoer_dag_totaal.csv")
+
+    from_csv = LoadMeasurements(tmp_path, meetreeksen=["b", "c", "onbekend"])
+    assert list(from_csv["afvoer_dag"].columns) == ["time", "b", "c"]
+
+    IngestMeasurements(tmp_path)
+    assert sorted(i.name for i in (tmp_path / "arrow").iterdir()) == ["aanvoer_dag.arrow", "afvoer_dag.arrow"]
+    from_store = LoadMeasurements(tmp_path, meetreeksen=["b", "c", "onbekend"])
+    for key in ("aanvoer_dag", "afvoer_dag"):
+        # missing measurements are NaN, as from the CSV
+        pd.testing.assert_frame_equal(from_store[key], from_csv[key])
+    assert from_store["afvoer_dag"]["b"].isna().sum() == df["b"].isna().sum()
+
+    # a changed CSV is read instead of the outdated store
+    df.assign(b=1.0).to_csv(tmp_path / "Metingen_afvoer_dag_totaal.csv")
+    assert (LoadMeasurements(tmp_path, meetreeksen=["b"])["afvoer_dag"]["b"] == 1.0).all()
+
+
+def _write_validation_inputs(folder, model):
+    """Model with flow results, a koppeltabel and measurements for 4 links of `model`."""
+    times = pd.date_range("2020-01-01", "2020-12-31", freq="D")
+    rng = np.random.default_rng(seed=1)
+    link_ids = model.link.df.index.to_numpy()[:4]
+    flow = pd.DataFrame(
+        {
+            "time": np.repeat(times, len(link_ids)),
+            "link_id": np.tile(link_ids, len(times)).astype(np.int32),
+            "flow_rate": rng.random(len(times) * len(link_ids)),
+        }
+    )
+    meetreeksen = [f"meting {i}" for i in link_ids]
+    measurements = pd.DataFrame(rng.random((len(times), len(link_ids))), index=times, columns=meetreeksen)
+    for file in ("Metingen_afvoer_dag_totaal.csv", "Metingen_aanvoer_dag_totaal.csv"):
+        measurements.to_csv(folder / file)
+    pd.DataFrame(
+        {
+            "Waterschap": "Waterschap",
+            "new_link_id": [f"[{i}]" for i in link_ids],
+            "geometry": [f"POINT ({i} 0)" for i in link_ids],
+            "MeetreeksC": meetreeksen,
+            "Aan/Af": "Afvoer",
+        }
+    ).to_excel(folder / "koppeltabel.xlsx", index=False)
+    pd.DataFrame({"MeetreeksC": meetreeksen, "Aan/Af": "Afvoer", "Specifiek": np.nan}).to_excel(
+        folder / "specifiek.xlsx", index=False
+    )
+
+    for run in ("serial", "parallel"):
+        model.write(folder / run / "model.toml")
+        (folder / run / "results").mkdir()
+        flow.to_feather(folder / run / "results" / "flow.arrow")
+        for file in ("basin_state.nc", "basin.nc", "flow.nc"):  # only checked for existence by model.results_path
+            (folder / run / "results" / file).touch()
+
+
+def test_compare_output_measurements_workers(tmp_path, model):
+    _write_validation_inputs(tmp_path, model)
+    for run, workers in (("serial", 1), ("parallel", 2)):
+        CompareOutputMeasurements(
+            tmp_path / "koppeltabel.xlsx",
+            tmp_path / "specifiek.xlsx",
+            tmp_path,
+            tmp_path / run,
+            "model.toml",
+            workers=workers,
+        )
+
+    serial, parallel = tmp_path / "serial" / "results", tmp_path / "parallel" / "results"
+    files = sorted(i.relative_to(serial) for i in serial.rglob("*") if i.is_file() and i.suffix != ".arrow")
+    assert files == sorted(i.relative_to(parallel) for i in parallel.rglob("*") if i.is_file() and i.suffix != ".arrow")
+    assert len([i for i in files if i.suffix == ".png"]) == 8  # daily and decade figure per location
+    for file in (i for i in files if i.suffix == ".xlsx"):
+        for sheet, df in pd.read_excel(serial / file, sheet_name=None).items():
+            pd.testing.assert_frame_equal(df, pd.read_excel(parallel / file, sheet_name=sheet))
+    for file in ("Validatie_resultaten.gpkg", "Validatie_resultaten_dec.gpkg"):
+        pd.testing.assert_frame_equal(gpd.read_file(serial / file), gpd.read_file(parallel / file))
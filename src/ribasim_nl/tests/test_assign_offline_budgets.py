@@ -0,0 +1,84 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+import xarray as xr
+from ribasim_nl.assign_offline_budgets import BasinAggregator, _compute_budgets_per_basin
+
+NODATA = -999
+
+
+@pytest.fixture
+def budgets():
+    """Daily budgets on a 250m grid (descending y), with NaN cells"""
+    rng = np.random.default_rng(seed=1)
+    time = pd.date_range("2020-01-01", periods=50, freq="D")
+    x = np.arange(100_125, 110_000, 250.0)
+    y = np.arange(404_875, 395_000, -250.0)
+    data_vars = {}
+    for var_name in ["bdgriv_sys1", "bdgdrn_sys1", "bdgqrun_m3d"]:
+        data = rng.normal(size=(len(time), len(y), len(x)))
+        data[rng.random(data.shape) < 0.05] = np.nan
+        data_vars[var_name] = (("time", "y", "x"), data)
+    return xr.Dataset(data_vars, coords={"time": time, "y": y, "x": x})
+
+
+@pytest.fixture
+def basin_definition():
+    boxes = [
+        shapely.box(x, y, x + 1_700, y + 1_300) for x in range(101_000, 108_000, 1_700) for y in [396_000, 399_000]
+    ]
+    return gpd.GeoDataFrame({"node_id": np.arange(len(boxes)) + 10}, geometry=boxes, crs="EPSG:28992")
+
+
+def compute_budgets_per_basin_bincount(budgets: xr.Dataset, basin_mask: xr.DataArray) -> pd.DataFrame:
+    """Previous implementation: all data in memory and a bincount per timestep"""
+    basin_mask = basin_mask.transpose("x", "y")
+    var_names, times = list(budgets.data_vars), budgets.time.values
+    mask = basin_mask.values.reshape(-1)
+    valid = np.isfinite(mask) & (mask != NODATA)
+    unique_ids, inv = np.unique(mask[valid].astype(np.int64), return_inverse=True)
+    result = np.zeros((len(times), len(unique_ids), len(var_names)))
+    for v, var_name in enumerate(var_names):
+        arr = budgets[var_name].transpose("time", "x", "y").values.reshape(len(times), -1)[:, valid]
+        arr = np.where(np.isfinite(arr), arr, 0.0)
+        for t in range(len(times)):
+            result[t, :, v] = np.bincount(inv, weights=arr[t], minlength=len(unique_ids))
+    index = pd.MultiIndex.from_product([unique_ids, times], names=["node_id", "time"])
+    return pd.DataFrame(
+        result.transpose(1, 0, 2).reshape(-1, len(var_names)), index=index, columns=var_names
+    ).sort_index()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"time_chunk": 7}, {"processes": 2}])
+def test_aggregate(budgets, basin_definition, kwargs):
+    aggregator = BasinAggregator.from_basin_definition(basin_definition, like=budgets["bdgriv_sys1"].isel(time=0))
+    expected = compute_budgets_per_basin_bincount(budgets, aggregator.mask)
+    pd.testing.assert_frame_equal(aggregator.aggregate(budgets, **kwargs), expected)
+    assert (aggregator.cell_counts.index == basin_definition.node_id).all()
+
+
+def test_aggregate_chunked_and_cropped(budgets, basin_definition):
+    """Dask chunks in time and a mask on a part of the budget grid"""
+    like = budgets["bdgriv_sys1"].isel(time=0, x=slice(2, 30), y=slice(1, 35))
+    aggregator = BasinAggregator.from_basin_definition(basin_definition, like=like)
+    expected = compute_budgets_per_basin_bincount(budgets.isel(x=slice(2, 30), y=slice(1, 35)), aggregator.mask)
+    result = _compute_budgets_per_basin(budgets.chunk(time=9), aggregator)
+    pd.testing.assert_frame_equal(result, expected)
+    # a basin_mask as DataArray gives the same result
+    pd.testing.assert_frame_equal(_compute_budgets_per_basin(budgets, aggregator.mask), expected, check_exact=False)
+
+
+def test_from_basin_definition_reuse(budgets, basin_definition):
+    like = budgets["bdgriv_sys1"].isel(time=0)
+    aggregator = BasinAggregator.from_basin_definition(basin_definition, like=like)
+    reuse = [aggregator]
+    assert BasinAggregator.from_basin_definition(basin_definition.copy(), like=like, reuse=reuse) is aggregator
+    assert BasinAggregator.from_basin_definition(basin_definition.iloc[1:], like=like, reuse=reuse) is not aggregator
+    assert (
+        BasinAggregator.from_basin_definition(basin_definition, like=like.isel(x=slice(1, None)), reuse=reuse)
+        is not aggregator
+    )
+    # without aggregators to reuse, a new one is rasterized
+    assert BasinAggregator.from_basin_definition(basin_definition.copy(), like=like) is not aggregator
@@ -0,0 +1,71 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import rasterio
+import shapely
+from rasterio.transform import from_origin
+from ribasim_nl.berging import (
+    basin_link_buffer_area,
+    basin_link_buffer_areas,
+    sample_area_fraction,
+    sample_area_fractions,
+)
+
+NODATA = -1.0
+
+
+@pytest.fixture
+def raster_file(tmp_path):
+    """250m raster with surface water fractions and nodata cells"""
+    rng = np.random.default_rng(seed=1)
+    shape = (40, 60)
+    data = rng.uniform(0, 0.2, size=shape)
+    data[rng.random(shape) < 0.1] = NODATA
+    raster_file = tmp_path / "fraction.tif"
+    with rasterio.open(
+        raster_file,
+        "w",
+        driver="GTiff",
+        height=shape[0],
+        width=shape[1],
+        count=1,
+        dtype="float64",
+        crs="EPSG:28992",
+        transform=from_origin(100_000, 400_000, 250, 250),
+        nodata=NODATA,
+    ) as dst:
+        dst.write(data, 1)
+    return raster_file
+
+
+@pytest.fixture
+def polygons():
+    """Tiling basins, plus overlapping, tiny and out-of-raster polygons"""
+    boxes = [
+        shapely.box(x, y, x + 730, y + 410) for x in range(100_100, 114_000, 730) for y in range(390_300, 399_500, 410)
+    ]
+    rng = np.random.default_rng(seed=2)
+    circles = shapely.buffer(shapely.points(rng.uniform(100_000, 115_000, 10), rng.uniform(390_000, 400_000, 10)), 600)
+    others = [shapely.box(105_010, 395_010, 105_100, 395_100), shapely.box(114_000, 399_000, 116_000, 401_000)]
+    return gpd.GeoSeries([*boxes, *circles, *others], crs="EPSG:28992")
+
+
+def test_sample_area_fractions(raster_file, polygons):
+    with rasterio.open(raster_file) as src:
+        result = sample_area_fractions(src, polygons, sample_res=25, block_size=16)
+        expected = [sample_area_fraction(src, polygon, sample_res=25) for polygon in polygons]
+    np.testing.assert_allclose(result.to_numpy(), expected, equal_nan=True)
+
+
+def test_basin_link_buffer_area_on_link_table_edited_in_place(model):
+    area = basin_link_buffer_area(model, 3)
+    assert area == pytest.approx(basin_link_buffer_areas(model, [3])[3])
+
+    # move link 3 -> 4 to basin 1, without the Model methods
+    link_df = model.link.df
+    link_df.loc[link_df.from_node_id == 3, "from_node_id"] = 1
+    assert basin_link_buffer_area(model, 3) < area
+    for node_id in [1, 3]:
+        assert basin_link_buffer_area(model, node_id) == pytest.approx(
+            basin_link_buffer_areas(model, [node_id])[node_id]
+        )
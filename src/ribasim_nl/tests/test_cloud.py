@@ -63,8 +63,6 @@ def test_propfind_distinguishes_dirs_and_files(cloud, monkeypatch):
     files like '.zgroup' and '.zmetadata' are files (not directories). The old heuristic based on
     file extensions got both of these wrong.
     """
-    import requests
-
     fake_xml = """\
 <?xml version="1.0"?>
 <D:multistatus xmlns:D="DAV:">
@@ -110,7 +108,7 @@ def test_propfind_distinguishes_dirs_and_files(cloud, monkeypatch):
         status_code = 207
         text = fake_xml
 
-    monkeypatch.setattr(requests, "request", lambda *args, **kwargs: FakeResponse())
+    monkeypatch.setattr(cloud.session, "request", lambda *args, **kwargs: FakeResponse())
 
     url = cloud.joinurl("Basisgegevens/LHM/4.3/results/LHM_433_budget.zip")
     items, dir_names = cloud._propfind(url)
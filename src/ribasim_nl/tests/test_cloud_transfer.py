@@ -0,0 +1,263 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+import pytest
+from ribasim_nl.cloud import CloudStorage
+
+ROOT_NAME = "Ribasim modeldata"
+
+
+class WebDAVServer(ThreadingHTTPServer):
+    """HTTP server serving `root`, recording (method, path, Range) of all requests"""
+
+    root: Path
+    requests: list[tuple[str, str, str | None]]
+
+
+class WebDAVHandler(BaseHTTPRequestHandler):
+    """Minimal WebDAV stand-in: GET (with Range), HEAD, PUT, COPY, MKCOL and PROPFIND (Depth 1) on a local directory"""
+
+    server: WebDAVServer
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _local_path(self, path: str) -> Path:
+        relative_path = unquote(path).lstrip("/").removeprefix(ROOT_NAME).lstrip("/")
+        return self.server.root.joinpath(relative_path)
+
+    @property
+    def local_path(self) -> Path:
+        self.server.requests.append((self.command, unquote(self.path), self.headers.get("Range")))
+        return self._local_path(self.path)
+
+    @staticmethod
+    def etag(path: Path) -> str:
+        return f'"{path.stat().st_mtime_ns}-{path.stat().st_size}"'
+
+    def _respond(self, status: int, body: bytes = b"", headers: dict | None = None) -> None:
+        headers = {"Content-Length": str(len(body)), **(headers or {})}
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        path = self.local_path
+        if not path.exists():
+            return self._respond(404)
+        if path.is_dir():
+            return self._respond(200)
+        self._respond(200, headers={"Content-Length": str(path.stat().st_size), "ETag": self.etag(path)})
+
+    def do_GET(self) -> None:
+        path = self.local_path
+        if not path.exists():
+            return self._respond(404)
+        if path.is_dir():
+            return self._respond(200)
+        data = path.read_bytes()
+        headers = {"ETag": self.etag(path)}
+        byte_range = self.headers.get("Range")
+        if byte_range is not None and self.headers.get("If-Range", headers["ETag"]) == headers["ETag"]:
+            offset = int(byte_range.removeprefix("bytes=").rstrip("-"))
+            if offset >= len(data):
+                return self._respond(416)
+            headers["Content-Range"] = f"bytes {offset}-{len(data) - 1}/{len(data)}"
+            return self._respond(206, data[offset:], headers)
+        self._respond(200, data, headers)
+
+    def do_PUT(self) -> None:
+        path = self.local_path
+        path.write_bytes(self.rfile.read(int(self.headers["Content-Length"])))
+        self._respond(201, headers={"ETag": self.etag(path)})
+
+    def do_COPY(self) -> None:
+        path = self.local_path
+        destination = self._local_path(urlsplit(self.headers["Destination"]).path)
+        destination.write_bytes(path.read_bytes())
+        self._respond(201, headers={"ETag": self.etag(destination)})
+
+    def do_MKCOL(self) -> None:
+        self.local_path.mkdir()
+        self._respond(201)
+
+    def do_PROPFIND(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.local_path
+        if not path.exists():
+            return self._respond(404)
+        responses = []
+        for item in [path, *(sorted(path.iterdir()) if path.is_dir() else [])]:
+            if item.is_dir():
+                properties = "<D:resourcetype><D:collection/></D:resourcetype>"
+            else:
+                properties = (
+                    f"<D:resourcetype/><D:getetag>{self.etag(item)}</D:getetag>"
+                    f"<D:getcontentlength>{item.stat().st_size}</D:getcontentlength>"
+                )
+            responses.append(
+                f"<D:response><D:href>{quote(item.name)}</D:href><D:propstat><D:prop>"
+                f"<D:displayname>{item.name}</D:displayname>{properties}"
+                "</D:prop></D:propstat></D:response>"
+            )
+        body = f'<?xml version="1.0"?><D:multistatus xmlns:D="DAV:">{"".join(responses)}</D:multistatus>'
+        self._respond(207, body.encode())
+
+
+@pytest.fixture
+def remote_dir(tmp_path):
+    remote_dir = tmp_path / "remote"
+    for relative_path, size in [
+        ("AaenMaas/aangeleverd/a.gpkg", 1000),
+        ("AaenMaas/aangeleverd/sub/b.csv", 10),
+        ("AaenMaas/aangeleverd/sub/deeper/c.txt", 0),
+        ("Basisgegevens/LHM/d.nc", 5000),
+        ("Basisgegevens/KRW/e.shp", 200),
+        ("Basisgegevens/KRW/e.dbf", 100),
+        ("Basisgegevens/KRW/f.shp", 100),
+    ]:
+        path = remote_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(bytes(i % 251 for i in range(size)))
+    return remote_dir
+
+
+@pytest.fixture
+def server(remote_dir):
+    server = WebDAVServer(("127.0.0.1", 0), WebDAVHandler)
+    server.root = remote_dir
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cloud(server, tmp_path):
+    url = f"http://127.0.0.1:{server.server_port}/{ROOT_NAME}"
+    return CloudStorage(data_dir=tmp_path / "local", url=url, password="test", max_workers=4)  # noqa: S106
+
+
+def assert_same_tree(local_dir: Path, remote_dir: Path):
+    remote_files = sorted(i.relative_to(remote_dir) for i in remote_dir.rglob("*") if i.is_file())
+    local_files = sorted(i.relative_to(local_dir) for i in local_dir.rglob("*") if i.is_file())
+    assert local_files == remote_files
+    for i in remote_files:
+        assert local_dir.joinpath(i).read_bytes() == remote_dir.joinpath(i).read_bytes()
+
+
+def test_download_content(cloud, remote_dir):
+    stats = cloud.download_content(cloud.joinurl("AaenMaas", "aangeleverd"), overwrite=False)
+    assert stats.n_files == 3
+    assert stats.n_bytes == 1010
+    assert_same_tree(cloud.joinpath("AaenMaas", "aangeleverd"), remote_dir / "AaenMaas" / "aangeleverd")
+
+    # existing files are not downloaded again, with overwrite only if changed
+    url = cloud.joinurl("AaenMaas", "aangeleverd")
+    assert cloud.download_content(url, overwrite=False).n_files == 0
+    assert cloud.download_content(url, overwrite=True).n_files == 0
+
+    # remote change, local change and remote removal
+    remote_dir.joinpath("AaenMaas", "aangeleverd", "a.gpkg").write_bytes(b"changed")
+    cloud.joinpath("AaenMaas", "aangeleverd", "sub", "b.csv").write_bytes(b"changed")
+    remote_dir.joinpath("AaenMaas", "aangeleverd", "sub", "deeper", "c.txt").unlink()
+    diff = cloud.diff("AaenMaas").set_index("path").status.to_dict()
+    assert diff == {
+        "AaenMaas/aangeleverd/a.gpkg": "remote_changed",
+        "AaenMaas/aangeleverd/sub/b.csv": "local_changed",
+        "AaenMaas/aangeleverd/sub/deeper/c.txt": "local_only",
+    }
+    assert cloud.download_content(url, overwrite=True).n_files == 2
+    assert_same_tree(cloud.joinpath("AaenMaas", "aangeleverd"), remote_dir / "AaenMaas" / "aangeleverd")
+    assert cloud.diff("AaenMaas").empty
+
+
+def test_download_basisgegevens(cloud, remote_dir):
+    cloud.download_basisgegevens()
+    assert_same_tree(cloud.joinpath("Basisgegevens"), remote_dir / "Basisgegevens")
+    with pytest.raises(ValueError):
+        cloud.download_basisgegevens(bronnen=["Top10NL"])
+
+
+def test_resume_download(cloud, server, remote_dir):
+    file_path = cloud.joinpath("Basisgegevens", "LHM", "d.nc")
+    file_path.parent.mkdir(parents=True)
+    remote_bytes = remote_dir.joinpath("Basisgegevens", "LHM", "d.nc").read_bytes()
+    file_path.with_name("d.nc.part").write_bytes(remote_bytes[:3000])
+
+    # with the ETag of the remote file the download is resumed
+    _, _, files = cloud._propfind_files(cloud.file_url(file_path.parent))
+    assert cloud.download_file(cloud.file_url(file_path), remote_file=files["d.nc"]) == 2000
+    assert file_path.read_bytes() == remote_bytes
+    assert not file_path.with_name("d.nc.part").exists()
+    assert ("GET", f"/{ROOT_NAME}/Basisgegevens/LHM/d.nc", "bytes=3000-") in server.requests
+
+    # without, a (possibly outdated) part can't be verified and the download starts over
+    file_path.unlink()
+    file_path.with_name("d.nc.part").write_bytes(b"outdated")
+    assert cloud.download_file(cloud.file_url(file_path)) == 5000
+    assert file_path.read_bytes() == remote_bytes
+
+
+def test_synchronize(cloud, server, remote_dir):
+    shp_path = cloud.joinpath("Basisgegevens", "KRW", "e.shp")
+    nc_path = cloud.joinpath("Basisgegevens", "LHM", "d.nc")
+    filepaths = [shp_path, nc_path, cloud.joinpath("AaenMaas", "aangeleverd", "sub")]
+    cloud.synchronize(filepaths, overwrite=True)
+    assert shp_path.exists()
+    assert shp_path.with_suffix(".dbf").exists()
+    assert not shp_path.with_name("f.shp").exists()
+    assert nc_path.exists()
+    assert_same_tree(cloud.joinpath("AaenMaas", "aangeleverd", "sub"), remote_dir / "AaenMaas" / "aangeleverd" / "sub")
+
+    # a second synchronize is a no-op on the network, apart from listings
+    n_requests = len(server.requests)
+    cloud.synchronize(filepaths, overwrite=True)
+    assert all(i[0] != "GET" for i in server.requests[n_requests:])
+
+
+def test_upload_content(cloud, remote_dir):
+    local_dir = cloud.joinpath("AaenMaas", "verwerkt")
+    for relative_path in ["x.gpkg", "sub/y.csv", "sub/deeper/z.txt"]:
+        path = local_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relative_path)
+    remote_dir.joinpath("AaenMaas", "verwerkt").mkdir()
+
+    stats = cloud.upload_content(local_dir)
+    assert stats.n_files == 3
+    assert_same_tree(local_dir, remote_dir / "AaenMaas" / "verwerkt")
+
+    # existing files are only uploaded with overwrite, if changed
+    local_dir.joinpath("x.gpkg").write_text("changed")
+    assert cloud.upload_content(local_dir).n_files == 0
+    assert cloud.upload_content(local_dir, overwrite=True).n_files == 1
+    assert cloud.upload_content(local_dir, overwrite=True).n_files == 0
+
+
+def test_upload_model(cloud, server, remote_dir):
+    model_dir = cloud.joinpath("AaenMaas", "modellen", "model")
+    model_dir.joinpath("input").mkdir(parents=True)
+    model_dir.joinpath("model.toml").write_text("toml")
+    model_dir.joinpath("input", "database.gpkg").write_text("database")
+    remote_dir.joinpath("AaenMaas", "modellen").mkdir()
+
+    first_version = cloud.upload_model("AaenMaas", "model")
+    model_dir.joinpath("model.toml").write_text("changed toml")
+    n_requests = len(server.requests)
+    second_version = cloud.upload_model("AaenMaas", "model")
+
+    # unchanged database is copied server-side, changed toml is uploaded
+    assert second_version.revision == first_version.revision + 1
+    methods = {i[1].rsplit("/", 1)[-1]: i[0] for i in server.requests[n_requests:] if i[0] in ["PUT", "COPY"]}
+    assert methods == {"model.toml": "PUT", "database.gpkg": "COPY"}
+    remote_model_dir = remote_dir / "AaenMaas" / "modellen" / second_version.path_string
+    assert remote_model_dir.joinpath("input", "database.gpkg").read_text() == "database"
+    assert remote_model_dir.joinpath("model.toml").read_text() == "changed toml"
@@ -0,0 +1,19 @@
+from ribasim_nl import concat
+
+
+def test_concat(model_factory):
+    models = [model_factory() for _ in range(3)]
+    n_nodes, n_links = len(models[0].node.df), len(models[0].link.df)
+    model = concat(models)
+
+    # node_ids are subsequent over all models; links and tables refer to the renumbered nodes
+    assert sorted(model.node.df.index) == list(range(1, 3 * n_nodes + 1))
+    assert model.link.df.index.tolist() == list(range(3 * n_links))
+    node_type = model.node.df["node_type"]
+    assert (node_type[model.basin.area.df["node_id"]] == "Basin").all()
+    assert (node_type[model.outlet.static.df["node_id"]] == "Outlet").all()
+    assert len(model.basin.area.df) == 9
+    for i in range(3):
+        assert set(model.link.df.iloc[i * n_links : (i + 1) * n_links][["from_node_id", "to_node_id"]].stack()) == set(
+            range(i * n_nodes + 1, (i + 1) * n_nodes + 1)
+        )
@@ -0,0 +1,100 @@
+from collections import deque
+
+import networkx as nx
+import numpy as np
+import pytest
+from ribasim_nl.csr_graph import CSRGraph
+from ribasim_nl.downstream import downstream_nodes
+from ribasim_nl.upstream import upstream_nodes
+
+
+def bfs_upstream_nodes(graph, node_id, stop_at_inlet=False, stop_at_node_type=None):
+    """Reference: per-node networkx BFS"""
+    visited, node_ids, queue = set(), {node_id}, deque([node_id])
+    while queue:
+        current_node = queue.popleft()
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        for predecessor in graph.predecessors(current_node):
+            node_ids.add(predecessor)
+            attributes = graph.nodes[predecessor]
+            if (
+                attributes.get("node_type") != "LevelBoundary"
+                and not (stop_at_inlet and attributes.get("function") == "inlet")
+                and (stop_at_node_type is None or attributes.get("node_type") != stop_at_node_type)
+            ):
+                queue.append(predecessor)
+    return node_ids
+
+
+def bfs_downstream_nodes(graph, node_id, stop_at_outlet=False, stop_at_node_type=None, stop_at_node_ids=()):
+    """Reference: per-node networkx BFS"""
+    visited, node_ids, queue = set(), {node_id}, deque([node_id])
+    while queue:
+        current_node = queue.popleft()
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        for successor in graph.successors(current_node):
+            if successor not in visited:
+                node_ids.add(successor)
+                attributes = graph.nodes[successor]
+                if not (
+                    (stop_at_outlet and attributes.get("function") == "outlet")
+                    or (stop_at_node_type is not None and attributes.get("node_type") == stop_at_node_type)
+                    or successor in stop_at_node_ids
+                ):
+                    queue.append(successor)
+    return node_ids
+
+
+@pytest.fixture
+def graph():
+    """Random directed graph with cycles, node types and functions"""
+    rng = np.random.default_rng(seed=42)
+    graph = nx.gnm_random_graph(300, 450, seed=42, directed=True)
+    node_types = rng.choice(["Basin", "Outlet", "Pump", "LevelBoundary"], size=300, p=[0.5, 0.3, 0.15, 0.05])
+    functions = rng.choice(["", "inlet", "outlet"], size=300)
+    for node_id in graph.nodes:
+        graph.nodes[node_id]["node_type"] = str(node_types[node_id])
+        graph.nodes[node_id]["function"] = str(functions[node_id])
+    return graph
+
+
+def test_upstream_nodes(graph):
+    csr_graph = CSRGraph.from_graph(graph)
+    node_ids = list(graph.nodes)
+    for kwargs in [{}, {"stop_at_inlet": True}, {"stop_at_node_type": "Basin"}]:
+        result = csr_graph.upstream_nodes(node_ids, **kwargs)
+        assert all(result[i] == bfs_upstream_nodes(graph, i, **kwargs) for i in node_ids)
+
+
+def test_downstream_nodes(graph):
+    csr_graph = CSRGraph.from_graph(graph)
+    node_ids = list(graph.nodes)
+    for kwargs in [{}, {"stop_at_outlet": True}, {"stop_at_node_type": "Pump"}, {"stop_at_node_ids": [1, 2, 3]}]:
+        result = csr_graph.downstream_nodes(node_ids, **kwargs)
+        assert all(result[i] == bfs_downstream_nodes(graph, i, **kwargs) for i in node_ids)
+
+
+def test_unknown_node(graph):
+    csr_graph = CSRGraph.from_graph(graph)
+    assert csr_graph.upstream_nodes([1000]) == {1000: {1000}}
+    with pytest.raises(KeyError):
+        csr_graph.positions([1000])
+
+
+def test_single_node_traversal(graph):
+    # single-node queries traverse the graph itself and agree with the batch-traversal
+    csr_graph = CSRGraph.from_graph(graph)
+    node_ids = list(graph.nodes)
+    assert all(
+        upstream_nodes(graph, i, stop_at_inlet=True) == upstream_nodes(csr_graph, i, stop_at_inlet=True)
+        for i in node_ids
+    )
+    assert all(
+        downstream_nodes(graph, i, stop_at_node_ids=[1, 2, 3])
+        == downstream_nodes(csr_graph, i, stop_at_node_ids=[1, 2, 3])
+        for i in node_ids
+    )
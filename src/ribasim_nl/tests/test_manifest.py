@@ -0,0 +1,36 @@
+import logging
+
+from ribasim_nl.manifest import MANIFEST_FILE_NAME, Manifest, RemoteFile
+
+
+def test_save_merges_concurrent_writers(tmp_path):
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        tmp_path.joinpath(name).write_text(name)
+    manifest = Manifest(tmp_path)
+    manifest.record("c.txt", RemoteFile(etag="c"))
+    manifest.save()
+
+    # two processes synchronizing the same data directory
+    manifest_a, manifest_b = Manifest(tmp_path), Manifest(tmp_path)
+    manifest_a.record("a.txt", RemoteFile(etag="a"))
+    manifest_b.record("b.txt", RemoteFile(etag="b"))
+    manifest_b.remove("c.txt")
+    manifest_a.save()
+    manifest_b.save()
+
+    assert Manifest(tmp_path).paths() == ["a.txt", "b.txt"]
+    assert manifest_b.paths() == ["a.txt", "b.txt"]
+    assert [i.name for i in tmp_path.glob(f"{MANIFEST_FILE_NAME}*.tmp")] == []
+
+
+def test_unreadable_manifest(tmp_path, caplog):
+    tmp_path.joinpath(MANIFEST_FILE_NAME).write_text('{"a.txt": {"etag": "a"')
+    with caplog.at_level(logging.WARNING):
+        manifest = Manifest(tmp_path)
+    assert len(manifest) == 0
+    assert "unreadable manifest" in caplog.text
+
+    tmp_path.joinpath("a.txt").write_text("a")
+    manifest.record("a.txt", RemoteFile(etag="a"))
+    manifest.save()
+    assert Manifest(tmp_path).get("a.txt") == manifest.get("a.txt")
@@ -0,0 +1,192 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+from ribasim_nl.model import DEFAULT_TABLES
+from ribasim_nl.topology_index import NodeRowIndex
+from shapely.geometry import Point
+
+
+def assert_topology_matches_tables(model):
+    """Topology index, updated in place, should equal an index rebuilt from the tables."""
+    graph = model.graph
+    model.reset_graph  # noqa: B018
+    assert set(graph.edges) == set(model.graph.edges)
+    assert dict(graph.nodes.data()) == dict(model.graph.nodes.data())
+
+
+def test_topology_queries(model):
+    assert model.upstream_node_id(3) == 2
+    assert model.downstream_node_id(3) == 4
+    assert model.upstream_node_id(1) is None
+    assert sorted(model.upstream_node_id(5).to_list()) == [4, 8]
+    assert model._upstream_nodes(5) == {1, 2, 3, 4, 5, 8, 9}
+    assert model._upstream_nodes(5, stop_at_inlet=True) == {1, 2, 3, 4, 5, 8}
+    assert model._downstream_nodes(1, stop_at_node_type="TabulatedRatingCurve") == {1, 2, 3, 4}
+
+
+def test_topology_updates(model):
+    _ = model.topology
+    model.merge_basins(node_id=3, to_node_id=1)
+    assert model.downstream_node_id(1) == 4
+    assert 3 not in model.topology.nodes
+
+    link_id = model.topology.downstream_link_ids(1)[0]
+    model.reverse_link(link_id=link_id)
+    assert model.upstream_node_id(1) == 4
+    model.redirect_link(link_id=link_id, from_node_id=5)
+    assert model.upstream_node_id(1) == 5
+
+    model.remove_node(6, remove_links=True)
+    assert model.downstream_node_id(5) == 1
+
+    model.update_node(4, "Outlet", data=DEFAULT_TABLES.outlet)
+    assert model.topology.nodes[4]["node_type"] == "Outlet"
+
+    model.add_link(model.get_node(5), model.get_node(7))
+    assert sorted(model.downstream_node_id(5).to_list()) == [1, 7]
+    model.remove_link(5, 7)
+    assert 7 not in model.node.df.index
+
+    # all edits were applied in place, so the index was never rebuilt
+    assert model._synced_topology() is not None
+    assert_topology_matches_tables(model)
+
+
+def test_topology_rebuild_on_replaced_table(model):
+    _ = model.topology
+    model.link.df = model.link.df[model.link.df.to_node_id != 7]
+    assert model.downstream_node_id(6) is None
+
+
+def test_topology_rebuild_on_table_edited_in_place(model):
+    assert model.downstream_node_id(3) == 4
+    assert model._upstream_nodes(5, stop_at_inlet=True) == {1, 2, 3, 4, 5, 8}
+
+    link_df = model.link.df
+    link_id = link_df[(link_df.from_node_id == 3) & (link_df.to_node_id == 4)].index[0]
+    link_df.loc[link_id, "from_node_id"] = 1
+    assert model.downstream_node_id(3) is None
+    assert 3 not in model._upstream_nodes(4)
+
+    model.node.df.loc[8, "meta_function"] = ""
+    assert model._upstream_nodes(5, stop_at_inlet=True) == {1, 4, 5, 8, 9}
+    assert_topology_matches_tables(model)
+
+
+def test_queries_on_tables_edited_in_place(model):
+    # queries through the topology index (and CSRGraph) should see edits made outside the Model methods
+    assert model.downstream_nodes_batch([3])[3] == {3, 4, 5, 6, 7}
+    link_df = model.link.df
+    link_id = link_df[(link_df.from_node_id == 3) & (link_df.to_node_id == 4)].index[0]
+    link_df.loc[link_id, "to_node_id"] = 5
+
+    assert model.downstream_node_id(3) == 5
+    assert model.upstream_node_id(4) is None
+    assert sorted(model.upstream_node_id(5).to_list()) == [3, 4, 8]
+    assert model.find_node_id(us_node_id=3) == 5
+    assert model.find_node_id(ds_node_id=5, node_type="Outlet") == 8
+    assert link_id in model.get_downstream_links(2).index
+    assert link_id in model.get_upstream_links(6).index
+    assert model.downstream_nodes_batch([3])[3] == {3, 5, 6, 7}
+    assert model.upstream_nodes_batch([4])[4] == {4}
+
+    model.node.df.loc[8, "meta_function"] = ""
+    assert model.upstream_nodes_batch([5], stop_at_inlet=True)[5] == {1, 2, 3, 4, 5, 8, 9}
+
+    model.remove_link(3, 5, remove_disconnected_nodes=False)
+    assert link_id not in model.link.df.index
+    assert model.downstream_node_id(3) is None
+    assert_topology_matches_tables(model)
+
+
+def test_invalid_topology_at_node(model):
+    assert model.invalid_topology_at_node().empty
+
+    # outlets 2 and 6 without outflow, basin 3 and level boundary 7 without inflow (allowed)
+    # and a flow boundary and discrete control without links
+    model.remove_link(6, 7, remove_disconnected_nodes=False)
+    model.remove_link(2, 3, remove_disconnected_nodes=False)
+    model.node.df = pd.concat(
+        [
+            model.node.df,
+            gpd.GeoDataFrame(
+                {"node_type": ["FlowBoundary", "DiscreteControl"]},
+                geometry=[Point(0, 10), Point(0, 20)],
+                index=pd.Index([10, 11], name="node_id"),
+                crs=model.crs,
+            ),
+        ]
+    )
+    df = model.invalid_topology_at_node()
+    assert df.index.to_list() == [2, 6, 10]
+    assert df.node_type.to_list() == ["Outlet", "Outlet", "FlowBoundary"]
+    assert df.at[6, "exception"] == "must have at least 1 outneighbor(s) (got 0)"
+
+    # control links in the same pass
+    df = model.invalid_topology_at_node(link_type=["flow", "control"])
+    assert df[df.link_type == "flow"].index.to_list() == [2, 6, 10]
+    assert df[df.link_type == "control"].index.to_list() == [11]
+    assert df.at[11, "exception"] == "must have at least 1 outneighbor(s) (got 0)"
+
+
+def test_validate_link_source_destination(model):
+    model.validate_link_source_destination()
+    link_df = model.link.df.loc[[2]].rename(columns={"from_node_id": "to_node_id", "to_node_id": "from_node_id"})
+    model.link.df = pd.concat([model.link.df, link_df.set_axis([100]).rename_axis("link_id")])
+    with pytest.raises(ValueError, match="reversed source-destination"):
+        model.validate_link_source_destination()
+
+
+def test_indexed_lookups(model):
+    assert model.find_node_id(us_node_id=1) == 2
+    assert model.find_node_id(ds_node_id=5, node_type="Outlet") == 8
+    with pytest.raises(ValueError, match="multiple node_ids"):
+        model.find_node_id(ds_node_id=5)
+
+    # links within the upstream nodes of basin 3 and the downstream nodes of outlet 6
+    assert model.get_upstream_links(3).index.to_list() == [1, 2]
+    assert model.get_downstream_links(6).index.to_list() == [6]
+    assert model.get_downstream_links(5).index.to_list() == [5, 6]
+
+    # node_id row index of a sub-table is maintained on removal
+    model.remove_node(3, remove_links=True)
+    assert model.basin.profile.df.node_id.unique().tolist() == [1, 5]
+    assert model._row_index(model.basin.profile).positions(5).tolist() == [2, 3]
+    assert model.upstream_node_id(4) is None
+    assert_topology_matches_tables(model)
+
+
+def test_merge_outlets(model):
+    model.outlet.static.df["max_downstream_level"] = [1.0, 2.0, 3.0]
+    model.merge_outlets(outlet_a_id=6, outlet_b_id=2)
+    assert 2 not in model.node.df.index
+    assert model.outlet.static.df.node_id.tolist() == [6, 8]
+    assert sorted(model.upstream_node_id(6).to_list()) == [1, 5]
+    assert sorted(model.downstream_node_id(6).to_list()) == [3, 7]
+    assert_topology_matches_tables(model)
+
+
+def test_row_index_node_id_edited_in_place(model):
+    row_index = NodeRowIndex()
+    df = pd.DataFrame({"node_id": [1, 2, 3]})
+    row_index.rebuild(df)
+    df.loc[0, "node_id"] = 3
+    assert not row_index.is_synced(df)
+    row_index.rebuild(df)
+    assert row_index.positions(3).tolist() == [0, 2]
+
+    # like notebooks that move an area to another basin between remove_node calls
+    model.remove_node(3, remove_links=True)
+    area_df = model.basin.area.df
+    area_df.loc[area_df.index[area_df.node_id == 1], "node_id"] = 5
+    model.remove_node(5, remove_links=True)
+    assert model.basin.area.df is None
+
+
+def test_single_node_queries_between_edits(model):
+    # queries alternated with edits use the topology index, the CSRGraph is only built for batch-queries
+    assert model.upstream_node_id(5).tolist() == [4, 8]
+    model.remove_node(4, remove_links=True)
+    assert model.upstream_node_id(5) == 8
+    assert model._csr_graph is None
+    assert model.upstream_nodes_batch([5])[5] == model._upstream_nodes(5)
@@ -0,0 +1,65 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+
+from ribasim_nl import Model, NetworkValidator
+
+
+@pytest.fixture
+def network_validator():
+    """Chain 1 -> 2 -> 3 -> 4 -> 5 with an overlapping basin 6, an internal basin 7 and links to a missing node 99"""
+    model = Model(starttime="2020-01-01", endtime="2021-01-01", crs="EPSG:28992")
+    nodes = {
+        1: ("Basin", (0, 0)),
+        2: ("Outlet", (10, 0)),
+        3: ("Basin", (20, 0)),
+        4: ("Outlet", (30, 0)),
+        5: ("LevelBoundary", (40, 0)),
+        6: ("Basin", (20.5, 0)),
+        7: ("Basin", (100, 0)),
+    }
+    model.node.df = gpd.GeoDataFrame(
+        {"node_type": [i[0] for i in nodes.values()], "name": ""},
+        geometry=[shapely.Point(i[1]) for i in nodes.values()],
+        index=pd.Index(list(nodes.keys()), name="node_id"),
+        crs=model.crs,
+    )
+    links = [
+        (1, 2, [(0, 0), (10, 0)]),
+        (2, 3, [(10, 0), (20, 0)]),
+        (3, 4, [(22, 0), (30, 0)]),  # starts 2m from node 3
+        (4, 5, [(30, 0), (40, 0)]),
+        (6, 3, [(20.5, 0), (20.5, 0)]),  # zero-length, within tolerance of both nodes
+        (6, 99, [(20.5, 0), (50, 50)]),  # to-node missing
+        (99, 3, [(50, 50), (20, 0)]),  # from-node missing
+    ]
+    model.link.df = gpd.GeoDataFrame(
+        {"from_node_id": [i[0] for i in links], "to_node_id": [i[1] for i in links], "link_type": "flow", "name": ""},
+        geometry=[shapely.LineString(i[2]) for i in links],
+        index=pd.Index(range(1, len(links) + 1), name="link_id"),
+        crs=model.crs,
+    )
+    return NetworkValidator(model)
+
+
+def test_node_checks(network_validator):
+    assert network_validator.node_overlapping().index.to_list() == [3, 6]
+    assert network_validator.node_internal_basin().index.to_list() == [7]
+
+
+def test_link_checks(network_validator):
+    # a missing to-node is reported by link_missing_nodes, not as incorrect connectivity
+    assert network_validator.link_incorrect_connectivity().index.to_list() == [3, 7]
+    assert network_validator.link_missing_nodes().index.to_list() == [6, 7]
+    assert network_validator.node_duplicated().empty
+
+    df = network_validator.node_invalid_connectivity()
+    assert df.node_id.to_list() == [3, 99]
+    assert df.geometry.to_list() == [shapely.Point(22, 0), shapely.Point(50, 50)]
+
+
+def test_link_node_types(network_validator):
+    model = network_validator.model
+    assert model.link_from_node_type.to_list() == ["Basin", "Outlet", "Basin", "Outlet", "Basin", "Basin", None]
+    assert model.link_to_node_type.to_list() == ["Outlet", "Basin", "Outlet", "LevelBoundary", "Basin", None, "Basin"]
@@ -0,0 +1,60 @@
+import itertools
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import pytest
+import shapely
+from ribasim_nl.profiles import path_finder
+
+
+@pytest.fixture
+def hydro_objects():
+    """Grid of hydro-objects with (slightly) irregular nodes, so shortest paths are unique"""
+    rng = np.random.default_rng(seed=1)
+    n = 12
+    xy = np.stack(np.meshgrid(np.arange(n) * 100.0, np.arange(n) * 100.0, indexing="ij"), axis=-1)
+    xy += rng.uniform(-20, 20, size=xy.shape)
+    lines = [shapely.LineString([xy[i, j], xy[i + 1, j]]) for i in range(n - 1) for j in range(n)]
+    lines += [shapely.LineString([xy[i, j], xy[i, j + 1]]) for i in range(n) for j in range(n - 1)]
+    # a disconnected hydro-object and a parallel hydro-object
+    lines += [shapely.LineString([(2000, 2000), (2100, 2000)]), shapely.LineString([xy[0, 0], (50, -50), xy[1, 0]])]
+    return gpd.GeoDataFrame(geometry=lines, crs="EPSG:28992")
+
+
+@pytest.fixture
+def crossings(hydro_objects):
+    rng = np.random.default_rng(seed=2)
+    points = shapely.get_point(hydro_objects.geometry.values[rng.choice(len(hydro_objects) - 2, 15)], 0)
+    points = shapely.points(shapely.get_coordinates(points) + rng.uniform(-1, 1, size=(len(points), 2)))
+    return [*points, shapely.Point(2000, 2001), points[0]]
+
+
+def test_find_flow_routes(hydro_objects, crossings):
+    graph = path_finder.generate_graph(hydro_objects)
+    result = path_finder.find_flow_routes(graph, crossings)
+
+    # pairwise shortest paths
+    expected = set()
+    for c1, c2 in itertools.combinations(set(crossings), 2):
+        try:
+            path = nx.shortest_path(
+                graph,
+                source=path_finder.point_to_graph_node(graph, c1),
+                target=path_finder.point_to_graph_node(graph, c2),
+                weight="weight",
+            )
+        except nx.NetworkXNoPath:
+            continue
+        expected.update(itertools.pairwise(path))
+
+    assert {frozenset(i) for i in result} == {frozenset(i) for i in expected}
+    assert path_finder.label_flow_hydro_objects(hydro_objects, graph, result) == (
+        path_finder.label_flow_hydro_objects(hydro_objects, graph, expected)
+    )
+
+
+def test_points_to_graph_nodes(hydro_objects, crossings):
+    graph = path_finder.generate_graph(hydro_objects)
+    expected = [path_finder.point_to_graph_node(graph, i) for i in crossings]
+    assert path_finder.points_to_graph_nodes(graph, crossings) == expected
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+from ribasim_nl.performance import _compute_node_performance, read_performance_history, write_performance
+
+
+def _write_results(results_dir, seed=0, n_time=200):
+    rng = np.random.default_rng(seed)
+    time = pd.date_range("2020-01-01", periods=n_time, freq="D")
+    convergence = rng.lognormal(mean=-8, sigma=2, size=(n_time, 3))
+    convergence[0] = np.nan
+    results_dir.mkdir(parents=True, exist_ok=True)
+    xr.Dataset(
+        {"convergence": (("time", "node_id"), convergence)}, coords={"time": time, "node_id": [1, 3, 5]}
+    ).to_netcdf(results_dir / "basin.nc")
+    xr.Dataset(
+        {
+            "computation_time": ("time", rng.uniform(1, 2, n_time)),
+            "accepted_timesteps": ("time", rng.integers(1, 10, n_time)),
+            "rejected_timesteps": ("time", rng.integers(0, 2, n_time)),
+            "dt": ("time", rng.uniform(10, 100, n_time)),
+        },
+        coords={"time": time},
+    ).to_netcdf(results_dir / "solver_stats.nc")
+    return convergence
+
+
+def test_node_performance_chunked(tmp_path):
+    convergence = _write_results(tmp_path)
+    exact = _compute_node_performance(tmp_path / "basin.nc")
+    chunked = _compute_node_performance(tmp_path / "basin.nc", chunk_size=30)
+
+    pd.testing.assert_frame_equal(exact.drop(columns="median_convergence"), chunked.drop(columns="median_convergence"))
+    np.testing.assert_allclose(exact.median_convergence, chunked.median_convergence, rtol=0.04)
+    expected = pd.Series(np.nanmedian(convergence, axis=0), index=[1, 3, 5])
+    np.testing.assert_allclose(exact.set_index("node_id").median_convergence, expected.loc[exact.node_id])
+
+
+def test_write_performance(tmp_path, model):
+    toml_file = tmp_path / "model" / "model.toml"
+    model.write(toml_file)
+    _write_results(toml_file.parent / "results")
+
+    output_path = write_performance(toml_file, excel_rows=50)
+    assert output_path == toml_file.with_name("performance.xlsx")
+    assert len(pd.read_excel(output_path, sheet_name="time")) == 50
+    nodes_df = pd.read_parquet(toml_file.with_name("performance_nodes.parquet"))
+    assert nodes_df.set_index("node_id").loc[5, ["node_type", "in_degree", "out_degree"]].tolist() == ["Basin", 2, 1]
+    # upstream of basin 5 are basins 1, 3 and 5 (and inlet 8 from level boundary 9), all basins have the same area
+    upstream_area = nodes_df.set_index("node_id").upstream_area
+    assert upstream_area[5] == 3 * upstream_area[1]
+    assert len(pd.read_parquet(toml_file.with_name("performance_time.parquet"))) == 200
+
+    # every run of the model is added to the history, identified by the time of the results
+    history_dir = tmp_path / "history"
+    for seed, mtime in [(1, 1_600_000_000), (2, 1_700_000_000)]:
+        _write_results(toml_file.parent / "results", seed=seed)
+        os.utime(toml_file.parent / "results" / "solver_stats.nc", (mtime, mtime))
+        write_performance(toml_file, history_dir=history_dir, excel=False)
+    write_performance(toml_file, history_dir=history_dir, excel=False)  # same run again
+
+    history = read_performance_history(history_dir)
+    assert len(history) == 2
+    assert history.model.unique().tolist() == ["model"]
+    assert history.run_time.is_monotonic_increasing
+    assert np.isnan(history.computation_time_change.iloc[0])
+    assert (
+        history.computation_time_change.iloc[1]
+        == history.computation_time.iloc[1] / history.computation_time.iloc[0] - 1
+    )
+    assert (history.steps > 0).all()
@@ -0,0 +1,92 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from ribasim_nl.profiles import hydrotopes as ht
+
+CRS = "EPSG:28992"
+
+
+@pytest.fixture
+def profile_data():
+    """Basins on a 4x4 grid, with hydro-objects, BGT-polygons, hydrotopes and cross-sections crossing basin borders"""
+    rng = np.random.default_rng(seed=1)
+
+    # basins (1000 x 1000 m)
+    basins = gpd.GeoDataFrame(
+        {"node_id": np.arange(16) + 1, "meta_streefpeil": rng.uniform(-2, 2, 16).round(2)},
+        geometry=[shapely.box(x, y, x + 1000, y + 1000) for x in range(0, 4000, 1000) for y in range(0, 4000, 1000)],
+        crs=CRS,
+    )
+
+    # hydro-objects: horizontal and vertical segments, incl. hydro-objects outside the basins (x > 4000)
+    lines = []
+    for c in np.arange(50, 4500, 180) + rng.uniform(-20, 20, 25):
+        bounds = np.sort(rng.uniform(0, 4600, 10))
+        lines += [shapely.LineString([(a, c), (b, c)]) for a, b in zip(bounds[::2], bounds[1::2], strict=True)]
+        lines += [shapely.LineString([(c, a), (c, b)]) for a, b in zip(bounds[::2], bounds[1::2], strict=True)]
+    hydro_objects = gpd.GeoDataFrame({"main-route": rng.random(len(lines)) < 0.4}, geometry=lines, crs=CRS)
+
+    # BGT-polygons: buffered hydro-objects, (merged) across hydro-objects and basin borders, and isolated ponds
+    polygons = list(hydro_objects.geometry.values[rng.random(len(lines)) < 0.8].buffer(rng.uniform(1, 8)))
+    polygons += list(shapely.buffer(shapely.points(rng.uniform(0, 4000, (40, 2))), 60))
+    bgt_data = gpd.GeoDataFrame({"gml_id": np.arange(len(polygons))}, geometry=polygons, crs=CRS)
+
+    # hydrotopes: not covering a strip and the eastern part (nearest hydrotopes), without equidistant hydrotopes
+    hydrotope_map = gpd.GeoDataFrame(
+        {"HYDROTYPE2": [1, 2, 3, 1, 2, 3]},
+        geometry=[shapely.box(x, y, x + 1000 - y / 40, y + 2000) for y in (0, 2000) for x in (0, 1000, 2500)],
+        crs=CRS,
+    )
+    hydrotope_table = ht.HydrotopeTable()
+    for fid in (1, 2, 3):
+        hydrotope_table.add_from_specs(fid, f"hydrotope {fid}", (0.5 * fid, 0.7 * fid, 1.0 * fid, 1.2 * fid))
+
+    # measured cross-sections
+    main_route = hydro_objects.geometry.values[hydro_objects["main-route"]]
+    points = shapely.line_interpolate_point(main_route[::3], 0.5, normalized=True)
+    cross_sections = gpd.GeoDataFrame(
+        geometry=[
+            shapely.LineString([(p.x - 5, p.y - 5, 0), (p.x, p.y, -z), (p.x + 5, p.y + 5, 0)])
+            for p, z in zip(points, rng.uniform(0.5, 3, len(points)), strict=True)
+        ],
+        crs=CRS,
+    )
+
+    water_bodies = gpd.GeoDataFrame({"depth": [4.0]}, geometry=[shapely.box(1500, 1500, 2500, 2500)], crs=CRS)
+    return basins, hydro_objects, bgt_data, hydrotope_map, cross_sections, hydrotope_table, water_bodies
+
+
+@pytest.mark.parametrize("n_partitions", [2, 5, 16])
+def test_partitioned_basin_profiles(profile_data, n_partitions):
+    # importing `run` connects to the cloud storage
+    from ribasim_nl.profiles import run
+
+    basins, hydro_objects, bgt_data, hydrotope_map, cross_sections, hydrotope_table, water_bodies = profile_data
+    settings = water_bodies, "depth", 0.1, True
+
+    sequential = run._derive_basin_profiles(
+        basins,
+        hydro_objects.assign(_ho_index=np.arange(len(hydro_objects))),
+        bgt_data,
+        hydrotope_map,
+        cross_sections,
+        hydrotope_table,
+        *settings,
+    )
+
+    partitions = run._partition_profile_data(
+        basins, hydro_objects, bgt_data, hydrotope_map, cross_sections, n_partitions
+    )
+    assert len(partitions) == n_partitions
+    own = [i for i, _ in partitions]
+    assert np.array_equal(np.sort(np.concatenate(own)), np.arange(len(hydro_objects)))
+
+    results = [run._derive_basin_profiles(*data, hydrotope_table, *settings, False) for _, data in partitions]
+    merged = run._merge_partitions(basins, own, results)
+
+    pd.testing.assert_frame_equal(merged[0], sequential[0])
+    pd.testing.assert_frame_equal(merged[1], sequential[1])
+    for result, expected in zip(merged[2:], sequential[2:], strict=True):
+        pd.testing.assert_frame_equal(result, expected, check_index_type=False)
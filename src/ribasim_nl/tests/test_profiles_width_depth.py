@@ -0,0 +1,139 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from ribasim_nl.profiles import depth, width
+from ribasim_nl.profiles import hydrotopes as ht
+
+
+def test_polygon_width():
+    polygons = np.array([shapely.box(0, 0, 10, 2), shapely.box(0, 0, 3, 3), shapely.Point(0, 0).buffer(5)])
+    widths = width.polygon_width(polygons)
+    assert np.allclose(widths[:2], [2, 3])
+    # circle: C^2 - 16A < 0, i.e., square-root of the area
+    assert np.isclose(widths[2], np.sqrt(polygons[2].area))
+
+
+def test_overlap_fraction():
+    lines = np.array([shapely.LineString([(0, 1), (10, 1)])] * 3)
+    polygons = np.array([shapely.box(0, 0, 10, 2), shapely.box(0, 0, 2.5, 2), shapely.box(20, 0, 30, 2)])
+    assert np.allclose(width.overlap_fraction(lines, polygons), [1, 0.25, 0])
+
+
+def test_grouped_lists():
+    labels = np.array([3, 1, 3, 1, 2])
+    values = np.array([7, 5, 4, 6, 1])
+    expected = pd.Series(values, index=labels).groupby(level=0).apply(sorted)
+    result = width.grouped_lists(labels, values)
+    pd.testing.assert_series_equal(result, expected, check_names=False)
+    assert width.grouped_lists(labels[:0], values[:0]).empty
+
+
+def test_estimate_width():
+    bgt_data = gpd.GeoDataFrame(geometry=[shapely.box(0, 0, 10, 2), shapely.box(0, 0, 12, 4)], index=[5, 8])
+    hydro_objects = gpd.GeoDataFrame(
+        {"index_bgt": [[5, 8], [], [8]]}, geometry=[shapely.LineString([(0, 1), (10, 1)])] * 3
+    )
+    result = width.estimate_width(hydro_objects, bgt_data)
+    assert np.allclose(result["width"], [3, 4])
+
+
+def test_estimate_width_labels():
+    # BGT-polygons and hydro-objects are coupled by index label, not by position
+    bgt_data = gpd.GeoDataFrame(geometry=[shapely.box(0, 0, 12, 4), shapely.box(0, 0, 10, 2)], index=[50, 8])
+    hydro_objects = gpd.GeoDataFrame(
+        {"index_bgt": [[8], [50, 8], []]}, geometry=[shapely.LineString([(0, 1), (10, 1)])] * 3, index=[30, 10, 20]
+    )
+    result = width.estimate_width(hydro_objects, bgt_data, drop_na=False)
+    assert np.allclose(result.loc[[30, 10], "width"], [2, 3])
+    assert np.isnan(result.at[20, "width"])
+
+
+def test_depth_from_hydrotopes():
+    hydrotope_map = gpd.GeoDataFrame(
+        {"HYDROTYPE2": [1, 2]}, geometry=[shapely.box(0, 0, 10, 10), shapely.box(10, 0, 20, 10)]
+    )
+    hydrotopes = ht.HydrotopeTable()
+    hydrotopes.add_from_specs(1, "a", (0.5, 1.0, 1.5, 2.0))
+    hydrotopes.add_from_specs(2, "b", (1.0, 2.0, 3.0, 4.0))
+    hydro_objects = gpd.GeoDataFrame(
+        {"width": [0.5, 2.0, 10.0, 5.0]},
+        geometry=[
+            shapely.LineString([(1, 1), (9, 1)]),
+            shapely.LineString([(8, 2), (18, 2)]),  # largest overlap with hydrotope 2
+            shapely.LineString([(15, 5), (25, 5)]),
+            shapely.LineString([(30, 5), (35, 5)]),  # outside the map: nearest hydrotope
+        ],
+    )
+    result = depth.depth_from_hydrotopes(hydro_objects, hydrotope_map, hydrotopes)
+    assert result["ht_code"].tolist() == [1, 2, 2, 2]
+    assert result["depth"].tolist() == [0.5, 2.0, 4.0, 3.0]
+
+
+def test_depth_from_hydrotopes_labels():
+    hydrotope_map = gpd.GeoDataFrame(
+        {"HYDROTYPE2": [1, 2]}, geometry=[shapely.box(0, 0, 10, 10), shapely.box(10, 0, 20, 10)], index=[7, 3]
+    )
+    hydrotopes = ht.HydrotopeTable()
+    hydrotopes.add_from_specs(1, "a", (0.5, 1.0, 1.5, 2.0))
+    hydrotopes.add_from_specs(2, "b", (1.0, 2.0, 3.0, 4.0))
+    hydro_objects = gpd.GeoDataFrame(
+        {"width": [0.5, 2.0, 5.0]},
+        geometry=[
+            shapely.LineString([(1, 1), (9, 1)]),
+            shapely.LineString([(8, 2), (18, 2)]),
+            shapely.LineString([(10, 15), (10, 20)]),  # outside the map, equidistant: first hydrotope (label 3)
+        ],
+        index=[40, 10, 30],
+    )
+    result = depth.depth_from_hydrotopes(hydro_objects, hydrotope_map, hydrotopes, drop_na=False)
+    assert result.index.tolist() == [40, 10, 30]
+    assert result["ht_code"].tolist() == [1, 2, 2]
+    assert result["depth"].tolist() == [0.5, 2.0, 3.0]
+
+
+def test_depth_from_measurements():
+    cross_sections = gpd.GeoDataFrame(
+        geometry=[
+            shapely.LineString([(1, -1, 0), (1, 0, -2), (1, 1, 0)]),
+            shapely.LineString([(3, -1, 0), (3, 0, -3), (3, 1, 0)]),
+            shapely.LineString([(12, -1, 0), (12, 0, -1), (12, 1, 0)]),
+        ]
+    )
+    hydro_objects = gpd.GeoDataFrame(
+        {"main-route": [True, True, False], "depth": [1.0, 1.0, 1.0]},
+        geometry=[
+            shapely.LineString([(0, 0), (10, 0)]),
+            shapely.LineString([(20, 0), (30, 0)]),
+            shapely.LineString([(10, 0), (20, 0)]),
+        ],
+    )
+    result = depth.depth_from_measurements(hydro_objects, cross_sections)
+    assert result["depth"].tolist() == [2.5, 1.0, 1.0]
+    assert result["depth_measured"].tolist() == [True, False, False]
+    assert result["index_xs"].iloc[0] == [0, 1]
+
+
+def test_depth_from_measurements_labels():
+    # cross-sections are referred to by index label, not by position
+    cross_sections = gpd.GeoDataFrame(
+        geometry=[
+            shapely.LineString([(1, -1, 0), (1, 0, -2), (1, 1, 0)]),
+            shapely.LineString([(3, -1, 0), (3, 0, -3), (3, 1, 0)]),
+            shapely.LineString([(12, -1, 0), (12, 0, -1), (12, 1, 0)]),
+        ],
+        index=[101, 7, 55],
+    )
+    hydro_objects = gpd.GeoDataFrame(
+        {"main-route": [True, True, False], "depth": [1.0, 1.0, 1.0]},
+        geometry=[
+            shapely.LineString([(0, 0), (10, 0)]),
+            shapely.LineString([(20, 0), (30, 0)]),
+            shapely.LineString([(10, 0), (20, 0)]),
+        ],
+        index=[30, 10, 20],
+    )
+    result = depth.depth_from_measurements(hydro_objects, cross_sections)
+    assert result.loc[[30, 10, 20], "depth"].tolist() == [2.5, 1.0, 1.0]
+    assert result.loc[[30, 10, 20], "depth_measured"].tolist() == [True, False, False]
+    assert result.at[30, "index_xs"] == [7, 101]
@@ -0,0 +1,83 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import rasterio
+import shapely
+from rasterio.transform import from_origin
+from rasterstats import zonal_stats
+from ribasim_nl.raster import zonal_stats_windowed
+
+NODATA = -999.0
+
+
+@pytest.fixture
+def raster_file(tmp_path):
+    """Two-band raster (surface level and depth) with nodata cells"""
+    rng = np.random.default_rng(seed=1)
+    shape = (200, 300)
+    data = rng.uniform(0, 10, size=(2, *shape))
+    data[1, rng.random(shape) < 0.05] = NODATA
+    raster_file = tmp_path / "raster.tif"
+    with rasterio.open(
+        raster_file,
+        "w",
+        driver="GTiff",
+        height=shape[0],
+        width=shape[1],
+        count=2,
+        dtype="float64",
+        crs="EPSG:28992",
+        transform=from_origin(0, 2000, 10, 10),
+        nodata=NODATA,
+    ) as dst:
+        dst.write(data)
+    return raster_file
+
+
+@pytest.fixture
+def df():
+    """Polygons of different sizes, including polygons partly and fully outside the raster"""
+    rng = np.random.default_rng(seed=2)
+    x, y = rng.uniform(0, 3000, size=50), rng.uniform(0, 2000, size=50)
+    radius = rng.uniform(5, 300, size=50)
+    geometries = [*shapely.buffer(shapely.points(x, y), radius), shapely.box(2900, 1900, 3100, 2100)]
+    geometries += [shapely.box(5000, 5000, 5100, 5100)]
+    return gpd.GeoDataFrame(geometry=geometries, crs="EPSG:28992")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"all_touched": True, "stats": "mean min max count"},
+        {"fill_value": 37.0, "all_touched": True},
+        {"maaiveld_band": 1, "all_touched": True},
+    ],
+)
+def test_zonal_stats_windowed(raster_file, df, kwargs):
+    with rasterio.open(raster_file) as src:
+        data = src.read(2)
+        if "maaiveld_band" in kwargs:
+            data = src.read(1) - data
+        if "fill_value" in kwargs:
+            data = np.where(data == NODATA, kwargs["fill_value"], data)
+        expected = zonal_stats(
+            df,
+            data,
+            affine=src.transform,
+            nodata=NODATA,
+            stats=kwargs.get("stats", "mean"),
+            all_touched=kwargs.get("all_touched", False),
+        )
+
+    result = zonal_stats_windowed(raster_file, df, band=2, block_size=64, **kwargs)
+    assert len(result) == len(expected)
+    for i, j in zip(result, expected, strict=True):
+        assert i.keys() == j.keys()
+        for key in i:
+            assert i[key] == pytest.approx(j[key], nan_ok=True)
+
+
+def test_zonal_stats_windowed_processes(raster_file, df):
+    expected = zonal_stats_windowed(raster_file, df, band=2, block_size=64)
+    assert zonal_stats_windowed(raster_file, df, band=2, block_size=64, processes=2) == expected
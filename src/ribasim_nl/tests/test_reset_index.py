@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+from ribasim_nl.reset_index import reindex_nodes
+
+from ribasim_nl import prefix_index, reset_index
+
+
+def test_prefix_index(model):
+    model = prefix_index(model, prefix_id=12, max_digits=4)
+    assert model.node.df.index.tolist() == [120001, 120003, 120005, 120002, 120004, 120006, 120007, 120008, 120009]
+    assert model.link.df.index.tolist() == list(range(120001, 120009))
+    assert model.link.df["from_node_id"].tolist()[:2] == [120001, 120002]
+    assert model.basin.area.df["node_id"].tolist() == [120001, 120003, 120005]
+    assert model.node.df["meta_node_id_waterbeheerder"].tolist() == [1, 3, 5, 2, 4, 6, 7, 8, 9]
+
+
+@pytest.mark.parametrize("workers", [None, 4])
+def test_reset_index(model, workers):
+    node_index = pd.Series(range(101, 110), index=model.node.df.index).astype("int32")
+    model = reindex_nodes(model, node_index, workers=workers)
+    assert model.outlet.static.df["node_id"].tolist() == node_index[[2, 6, 8]].tolist()
+
+    model = reset_index(model, node_start=1)
+    assert sorted(model.node.df.index) == list(range(1, 10))
+
+    # unknown node_ids are reported with the table
+    model.basin.area.df.loc[model.basin.area.df.index[0], "node_id"] = 999
+    with pytest.raises(KeyError, match="node_id 999 in table Basin / area"):
+        reset_index(model, node_start=20)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from ribasim_nl.results import Results, read_results
+
+
+@pytest.fixture
+def basin_dataset():
+    time = pd.date_range("2020-01-01", periods=10, freq="D")
+    node_id = np.arange(1, 6)
+    shape = (len(time), len(node_id))
+    return xr.Dataset(
+        {
+            "level": (("time", "node_id"), np.arange(np.prod(shape), dtype=float).reshape(shape)),
+            "storage": (("time", "node_id"), np.ones(shape)),
+        },
+        coords={"time": time, "node_id": node_id},
+    )
+
+
+@pytest.fixture(params=["nc", "arrow"])
+def results_file(request, basin_dataset, tmp_path):
+    filepath = tmp_path / f"basin.{request.param}"
+    if request.param == "nc":
+        basin_dataset.to_netcdf(filepath)
+    else:
+        basin_dataset.to_dataframe().reset_index().to_feather(filepath)
+    return filepath
+
+
+def test_read_results(results_file):
+    df = read_results(results_file)
+    assert df.index.name == "time"
+    assert len(df) == 50
+    assert {"node_id", "level", "storage"}.issubset(df.columns)
+
+    df = read_results(results_file, variables="level", node_id=[2, 4], start_time="2020-01-03", end_time="2020-01-04")
+    assert sorted(df.columns) == ["level", "node_id"]
+    assert len(df) == 4
+    assert df.index.min() == pd.Timestamp("2020-01-03")
+    assert df.set_index("node_id", append=True).at[(pd.Timestamp("2020-01-04"), 4), "level"] == 18.0
+
+
+def test_results_select(results_file):
+    results = Results(filepath=results_file)
+    assert len(results.time) == 10
+    selection = results.at("2020-01-10", variables="level", node_id=5)
+    assert selection.level.to_list() == [49.0]
+
+    # selections from cached df are equal to selections from file
+    _ = results.df
+    pd.testing.assert_frame_equal(results.at("2020-01-10", variables="level", node_id=5), selection)
@@ -0,0 +1,163 @@
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from ribasim_nl.run_model import RunJob, RunSpecs, parse_run_log, read_run_events, run, run_batch, run_specs_from_events
+
+# stand-in for the Ribasim CLI: behaviour is read from the toml-file
+FAKE_CLI = """#!{python}
+import sys, time
+from pathlib import Path
+
+toml_path = Path(sys.argv[-1])
+behaviour = toml_path.read_text().split()[-1]
+print("Simulating   0%|          |  ETA: N/A", end="\\r")
+print("Simulating  50%|█████     |  ETA: 0:00:01", flush=True)
+if behaviour == "flaky" and not toml_path.with_suffix(".tried").exists():
+    toml_path.with_suffix(".tried").touch()
+    behaviour = "fail"
+if behaviour == "fail":
+    print("┌ Error: Convergence bounced.")
+    sys.exit(1)
+if behaviour == "slow":
+    time.sleep(30)
+if behaviour == "stall":
+    time.sleep(1.5)
+print("Simulating 100%|██████████| Time: 0:00:01")
+print("Computation time: 1 second, 250 milliseconds")
+"""
+
+
+@pytest.fixture
+def ribasim_home(tmp_path):
+    cli = tmp_path / "ribasim" / "bin" / "ribasim"
+    cli.parent.mkdir(parents=True)
+    cli.write_text(FAKE_CLI.format(python=sys.executable), encoding="utf-8")
+    cli.chmod(0o755)
+    return cli.parents[1]
+
+
+def _toml(tmp_path, name, behaviour):
+    toml_path = tmp_path / name / f"{name}.toml"
+    toml_path.parent.mkdir()
+    toml_path.write_text(behaviour)
+    return toml_path
+
+
+def test_parse_run_log():
+    metrics = parse_run_log(
+        [
+            "Simulating   0%|          |  ETA: N/A\rSimulating  45%|████      |  ETA: 0:01:02",
+            "┌ Error: Convergence bounced.",
+            "Computation time: 2 minutes, 3 seconds, 4 milliseconds",
+        ]
+    )
+    assert metrics == {
+        "computation_time": timedelta(minutes=2, seconds=3, milliseconds=4),
+        "progress": 45,
+        "error": "┌ Error: Convergence bounced.",
+    }
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake CLI is a script with a shebang")
+def test_run_batch(tmp_path, ribasim_home):
+    jobs = [
+        RunJob(_toml(tmp_path, "ok", "ok"), threads=2),
+        _toml(tmp_path, "flaky", "flaky"),
+        RunJob(_toml(tmp_path, "fail", "fail"), memory=4),
+    ]
+    summary = run_batch(jobs, max_threads=2, retries=1, poll_interval=0.05, ribasim_home=ribasim_home)
+
+    assert summary.index.tolist() == ["ok", "flaky", "fail"]
+    assert summary["status"].tolist() == ["done", "done", "failed"]
+    assert summary["attempts"].tolist() == [1, 2, 2]
+    assert summary.at["ok", "computation_time"] == timedelta(seconds=1, milliseconds=250)
+    assert summary.at["ok", "progress"] == 100
+    assert summary.at["fail", "progress"] == 50
+    assert summary.at["fail", "error"] == "┌ Error: Convergence bounced."
+    assert summary.at["ok", "log_file"] == tmp_path / "ok" / "ok.log"
+    assert "--- attempt 2 ---" in (tmp_path / "flaky" / "flaky.log").read_text(encoding="utf-8")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake CLI is a script with a shebang")
+def test_run_batch_fail_fast(tmp_path, ribasim_home):
+    jobs = [_toml(tmp_path, name, behaviour) for name, behaviour in [("slow", "slow"), ("fail", "fail"), ("ok", "ok")]]
+    summary = run_batch(
+        jobs, max_threads=2, fail_fast=True, log_dir=tmp_path / "logs", poll_interval=0.05, ribasim_home=ribasim_home
+    )
+
+    assert summary["status"].tolist() == ["cancelled", "failed", "skipped"]
+    assert (tmp_path / "logs" / "fail.log").exists()
+
+
+def _timed_toml(tmp_path, name, behaviour):
+    # a simulation period of 10 days, the behaviour of the fake CLI is the last word
+    return _toml(tmp_path, name, f"starttime = 2020-01-01T00:00:00\nendtime = 2020-01-11T00:00:00\n# {behaviour}")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake CLI is a script with a shebang")
+def test_run_telemetry(tmp_path, ribasim_home):
+    events = []
+    events_file = tmp_path / "events" / "run_events.jsonl"
+    specs = run(
+        _timed_toml(tmp_path, "ok", "ok"), callback=events.append, events_file=events_file, ribasim_home=ribasim_home
+    )
+
+    assert [i.event for i in events] == ["progress", "progress", "progress", "finished"]
+    assert [i.progress for i in events] == [0.0, 0.5, 1.0, 1.0]
+    assert events[1].simulated_time == datetime(2020, 1, 6)
+    assert events[-1].exit_code == 0
+    assert specs.exit_code == 0
+    assert specs.simulation_time == timedelta(seconds=1, milliseconds=250)
+    assert specs.progress == 1.0
+    assert specs.simulated_time == datetime(2020, 1, 11)
+    assert specs.stalls == 0
+
+    df = read_run_events(events_file)
+    assert df["event"].tolist() == [i.event for i in events]
+    assert run_specs_from_events(df, specs.simulation_time) == specs
+
+
+def test_run_specs_from_incomplete_events(tmp_path):
+    events_file = tmp_path / "run_events.jsonl"
+    events_file.write_text('{"event": "progress", "wall_time": 2.0, "progress": 0.5}\n{"event": "finished"}\n')
+    specs = run_specs_from_events(read_run_events(events_file))
+    assert specs.exit_code is None
+    assert specs.wall_time is None
+    assert specs.speed is None
+    assert specs.progress == 0.5
+
+    events_file.write_text("")
+    assert run_specs_from_events(read_run_events(events_file)) == RunSpecs(None, None, None)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake CLI is a script with a shebang")
+def test_run_stall(tmp_path, ribasim_home):
+    # the fake CLI prints nothing for 1.5 seconds after 50%: below 1 simulated day per second
+    toml_path = _timed_toml(tmp_path, "stall", "stall")
+    events = []
+    specs = run(toml_path, callback=events.append, stall_speed=86400, stall_window=0.3, ribasim_home=ribasim_home)
+
+    stalls = [i for i in events if i.event == "stall"]
+    assert len(stalls) == specs.stalls == 1
+    assert stalls[0].progress == 0.5
+    assert stalls[0].speed < 86400
+    assert specs.exit_code == 0
+    assert specs.progress == 1.0
+
+    specs = run(toml_path, stall_speed=86400, stall_window=0.3, terminate_on_stall=True, ribasim_home=ribasim_home)
+    assert specs.exit_code != 0
+    assert specs.progress == 0.5
+    assert specs.simulated_time == datetime(2020, 1, 6)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake CLI is a script with a shebang")
+def test_model_run_specs(tmp_path, ribasim_home, model):
+    toml_path = tmp_path / "model" / "model.toml"
+    model.write(toml_path)
+    assert model.run_specs is None
+
+    specs = model.run(ribasim_home=ribasim_home)
+    assert model.run_events_path.exists()
+    assert model.run_specs.progress == specs.progress == 1.0
+    assert model.run_specs.stalls == 0
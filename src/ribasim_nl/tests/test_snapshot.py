@@ -0,0 +1,90 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+from ribasim_nl.manifest import file_sha256
+
+from ribasim_nl import Model, snapshot
+
+
+def test_snapshot(tmp_path, model):
+    toml_file = tmp_path / "model" / "model.toml"
+    model.write(toml_file)
+    path = model.to_snapshot()
+    assert path == toml_file.with_suffix(".snapshot")
+
+    # tables equal to the model (read as plain GeoDataFrames); GeoPackage moves the geometry column to the end
+    snapshot = Model.from_snapshot(path)
+    from_toml = Model.read(toml_file)
+    for attr in ["node", "link"]:
+        pd.testing.assert_frame_equal(getattr(snapshot, attr).df, getattr(model, attr).df, check_frame_type=False)
+        pd.testing.assert_frame_equal(getattr(snapshot, attr).df, getattr(from_toml, attr).df, check_like=True)
+    pd.testing.assert_frame_equal(snapshot.basin.area.df, model.basin.area.df, check_frame_type=False)
+    pd.testing.assert_frame_equal(snapshot.outlet.static.df, model.outlet.static.df, check_frame_type=False)
+    assert snapshot.starttime == from_toml.starttime
+    assert snapshot.crs == from_toml.crs
+
+    # a current snapshot is read as if read from the toml-file
+    cached = Model.read_cached(toml_file)
+    assert cached.filepath == toml_file
+    assert cached.node.df.index.tolist() == from_toml.node.df.index.tolist()
+
+
+def test_snapshot_validation(tmp_path, model):
+    path = model.to_snapshot(tmp_path / "model.snapshot")
+
+    # a modified table does not match the snapshot hash and is validated
+    table = feather.read_table(path / "outlet.static.arrow")
+    feather.write_feather(table.append_column("unknown", pa.array([1.0] * len(table))), path / "outlet.static.arrow")
+    with pytest.raises(ValueError, match="Unrecognized column 'unknown'"):
+        Model.from_snapshot(path)
+    assert "unknown" in Model.from_snapshot(path, validate=False).outlet.static.df.columns
+
+
+def test_read_cached_outdated(tmp_path, model):
+    toml_file = tmp_path / "model.toml"
+    model.write(toml_file)
+    model.to_snapshot()
+
+    # re-written database: snapshot is outdated and the toml-file is read
+    model.remove_node(model.outlet.node.df.index[0], remove_links=True)
+    model.write(toml_file)
+    assert len(Model.read_cached(toml_file).node.df) == len(model.node.df)
+
+
+def test_snapshot_read_hashes_changed_files_only(tmp_path, monkeypatch, model):
+    path = model.to_snapshot(tmp_path / "model.snapshot")
+
+    hashed = []
+    monkeypatch.setattr(snapshot, "file_sha256", lambda file: hashed.append(file.name) or file_sha256(file))
+    Model.from_snapshot(path)
+    assert hashed == []
+
+    # a table file with another modification time is hashed again; same content, so no validation needed
+    os.utime(path / "outlet.static.arrow", ns=(0, 0))
+    Model.from_snapshot(path)
+    assert hashed == ["outlet.static.arrow"]
+
+
+def test_assign_without_validation(model):
+    # only this table is assigned without validation, the class (shared by all threads) is left alone
+    setattr_ = type(model.link).__setattr__
+    df = model.link.df.iloc[:2]
+    snapshot.assign_without_validation(model.link, "df", df)
+    assert model.link.df is df
+    assert "df" in model.link.model_fields_set
+    assert type(model.link).__setattr__ is setattr_
+
+
+def test_read_cached_edited_toml(tmp_path, model):
+    toml_file = tmp_path / "model.toml"
+    model.write(toml_file)
+    model.to_snapshot()
+    assert snapshot.snapshot_is_current(snapshot.snapshot_path(toml_file), toml_file)
+
+    # edited settings, unchanged database: snapshot is outdated and the toml-file is read
+    toml_file.write_text(toml_file.read_text().replace("2021-01-01", "2020-06-01"))
+    assert not snapshot.snapshot_is_current(snapshot.snapshot_path(toml_file), toml_file)
+    assert Model.read_cached(toml_file).endtime == pd.Timestamp("2020-06-01")